@@ -0,0 +1,227 @@
+# async_validator.py
+"""
+基于asyncio的并发LLM验证引擎，用于批量审查大量图纸。
+
+与逐个调用 LLMValidator.validate 相比：
+  - 整个批次共用一个 AsyncOpenAI 客户端（一个HTTP连接池），连接被复用；
+  - 用信号量限制同时进行的请求数，用令牌桶限制每秒请求数；
+  - 每个请求有超时；遇到429/5xx/超时/连接错误时按指数退避（带随机抖动）重试，
+    服务器返回 Retry-After 时以其为准；
+  - 本地静态检查与验证缓存的处理方式与 LLMValidator 相同；
+  - validate_many() 并发执行，但结果按提交顺序返回。
+
+用法:
+    engine = AsyncValidationEngine(api_key, base_url, model_name, max_concurrency=8)
+    results = engine.run([(lisp_code, json_data), ...])
+"""
+
+import asyncio
+import random
+import time
+
+import httpx
+import openai
+from openai import AsyncOpenAI
+
+from llm_validator import PROMPT_VERSION, LLM_TEMPERATURE, build_messages, build_prompt, parse_verdict, \
+    merge_static_result, chunk_text
+from verdict_stream import StreamingVerdictParser
+from prompt_compaction import DEFAULT_TOKEN_BUDGET
+from static_validator import StaticValidator, RATING_FAIL
+from validation_cache import ValidationCache, validation_cache_key
+
+DEFAULT_MAX_CONCURRENCY = 8
+DEFAULT_REQUESTS_PER_SECOND = 4.0
+DEFAULT_TIMEOUT_SECONDS = 120.0
+DEFAULT_MAX_RETRIES = 5
+BACKOFF_BASE_SECONDS = 1.0
+BACKOFF_MAX_SECONDS = 60.0
+
+
+class TokenBucket:
+    """令牌桶限流器：平均每秒 rate 个请求，允许最多 capacity 个突发请求。"""
+
+    def __init__(self, rate: float, capacity: float = None):
+        if rate <= 0:
+            raise ValueError("rate 必须大于0。")
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self._tokens = self.capacity
+        self._updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        """取得一个令牌，必要时等待。"""
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self._tokens = min(self.capacity, self._tokens + (now - self._updated) * self.rate)
+                self._updated = now
+                if self._tokens >= 1:
+                    self._tokens -= 1
+                    return
+                await asyncio.sleep((1 - self._tokens) / self.rate)
+
+
+def _is_retryable(error: Exception) -> bool:
+    """429、5xx、超时和连接错误可以重试；其余错误（如401、400）重试也没有意义。"""
+    if isinstance(error, (asyncio.TimeoutError, openai.APITimeoutError, openai.APIConnectionError)):
+        return True
+    if isinstance(error, openai.APIStatusError):
+        return error.status_code == 429 or error.status_code >= 500
+    return False
+
+
+def _retry_after(error: Exception):
+    """服务器在 Retry-After 响应头中要求的等待秒数（若有）。"""
+    response = getattr(error, 'response', None)
+    value = response.headers.get('retry-after') if response is not None else None
+    try:
+        return float(value) if value is not None else None
+    except ValueError:
+        return None
+
+
+def backoff_delay(attempt: int, base: float = BACKOFF_BASE_SECONDS, cap: float = BACKOFF_MAX_SECONDS) -> float:
+    """第 attempt 次重试前的等待时间：指数退避 + 全抖动（在 [0, min(cap, base*2^attempt)] 内随机）。"""
+    return random.uniform(0, min(cap, base * (2 ** attempt)))
+
+
+class AsyncValidationEngine:
+    """并发验证引擎；一个实例对应一个共享的客户端和一组限流参数。"""
+
+    def __init__(self, api_key: str, base_url: str, model_name: str,
+                 max_concurrency: int = DEFAULT_MAX_CONCURRENCY,
+                 requests_per_second: float = DEFAULT_REQUESTS_PER_SECOND,
+                 timeout: float = DEFAULT_TIMEOUT_SECONDS,
+                 max_retries: int = DEFAULT_MAX_RETRIES,
+                 static_check: bool = True,
+                 cache: ValidationCache = None,
+                 token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 stream: bool = False):
+        if not api_key:
+            raise ValueError("API Key不能为空。")
+        if not base_url:
+            raise ValueError("API Base URL不能为空。")
+        self.api_key = api_key
+        self.base_url = base_url
+        self.model_name = model_name
+        self.max_concurrency = max_concurrency
+        self.requests_per_second = requests_per_second
+        self.timeout = timeout
+        self.max_retries = max_retries
+        self.static_check = static_check
+        self.cache = cache
+        self.token_budget = token_budget
+        self.stream = stream
+
+    def _make_client(self) -> AsyncOpenAI:
+        # 重试由本引擎负责，因此关闭SDK自带的重试；连接池大小与并发数一致
+        limits = httpx.Limits(max_connections=self.max_concurrency,
+                              max_keepalive_connections=self.max_concurrency)
+        return AsyncOpenAI(api_key=self.api_key, base_url=self.base_url, max_retries=0, timeout=self.timeout,
+                           http_client=httpx.AsyncClient(limits=limits, timeout=self.timeout))
+
+    async def _request(self, client, semaphore, bucket, prompt: str) -> tuple:
+        """发送一个审查请求（含重试），返回 (结论字典, 是否提前取消, 尝试次数)。"""
+        attempt = 0
+        while True:
+            attempt += 1
+            try:
+                async with semaphore:
+                    await bucket.acquire()
+                    if self.stream:
+                        verdict, aborted = await asyncio.wait_for(self._stream_verdict(client, prompt),
+                                                                  timeout=self.timeout)
+                        return verdict, aborted, attempt
+                    response = await asyncio.wait_for(
+                        client.chat.completions.create(
+                            model=self.model_name,
+                            messages=build_messages(prompt),
+                            temperature=LLM_TEMPERATURE),
+                        timeout=self.timeout)
+                return parse_verdict(response.choices[0].message.content), False, attempt
+            except Exception as e:
+                if attempt > self.max_retries or not _is_retryable(e):
+                    e.attempts = attempt
+                    raise
+                delay = _retry_after(e)
+                await asyncio.sleep(delay if delay is not None else backoff_delay(attempt - 1))
+
+    async def _stream_verdict(self, client, prompt: str) -> tuple:
+        """
+        流式接收一个结论；评级为"失败"且错误列表完整时立即关闭连接，不再接收其余内容。
+        返回 (结论字典, 是否提前取消)。
+        """
+        stream = await client.chat.completions.create(
+            model=self.model_name,
+            messages=build_messages(prompt),
+            temperature=LLM_TEMPERATURE,
+            stream=True)
+        parser = StreamingVerdictParser()
+        aborted = False
+        try:
+            async for chunk in stream:
+                parser.feed(chunk_text(chunk))
+                if parser.done:
+                    break
+                if parser.is_fatal(RATING_FAIL):
+                    aborted = True
+                    break
+        finally:
+            await stream.close()
+        if not parser.done and not aborted:
+            raise ValueError("LLM的流式响应在结论完整之前就结束了。")
+        return parser.verdict(), aborted
+
+    async def validate_one(self, client, semaphore, bucket, lisp_code: str, json_data: dict) -> dict:
+        """
+        验证一张图纸。返回的字典包含 overall_rating/errors/warnings/suggestions，
+        以及 source（'static'、'cache'、'llm' 或 'error'）、attempts、seconds，
+        实际发出请求时还有 prompt_tokens（压缩前后的Token数）。
+        """
+        start = time.perf_counter()
+        static_validator = None
+        if self.static_check:
+            static_validator = StaticValidator()
+            static_result = static_validator.check(lisp_code, json_data)
+            if static_validator.overall_rating == RATING_FAIL:
+                result = dict(static_result["analysis"], overall_rating=RATING_FAIL)
+                return dict(result, source='static', attempts=0, seconds=time.perf_counter() - start)
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = validation_cache_key(json_data, lisp_code, self.model_name, PROMPT_VERSION)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                result = merge_static_result(cached, static_validator) if static_validator else cached
+                return dict(result, source='cache', attempts=0, seconds=time.perf_counter() - start)
+
+        prompt, prompt_stats = build_prompt(lisp_code, json_data, self.token_budget)
+        try:
+            verdict, aborted, attempts = await self._request(client, semaphore, bucket, prompt)
+        except Exception as e:
+            return {"overall_rating": "VALIDATION_ERROR", "errors": [f"调用LLM API时发生错误: {e}"],
+                    "warnings": [], "suggestions": [], "source": 'error', "attempts": getattr(e, 'attempts', 1),
+                    "seconds": time.perf_counter() - start, "prompt_tokens": prompt_stats}
+        if self.cache is not None and not aborted:
+            # 提前取消的结论只有评级和错误，不写入与 LLMValidator 共用的缓存
+            self.cache.put(cache_key, verdict)
+        result = merge_static_result(verdict, static_validator) if static_validator else verdict
+        return dict(result, source='llm', attempts=attempts, seconds=time.perf_counter() - start,
+                    prompt_tokens=prompt_stats)
+
+    async def validate_many(self, items) -> list:
+        """并发验证 (lisp_code, json_data) 序列，结果与输入顺序一一对应。"""
+        semaphore = asyncio.Semaphore(self.max_concurrency)
+        bucket = TokenBucket(self.requests_per_second)
+        client = self._make_client()
+        try:
+            return await asyncio.gather(*(self.validate_one(client, semaphore, bucket, lisp_code, json_data)
+                                          for lisp_code, json_data in items))
+        finally:
+            await client.close()
+
+    def run(self, items) -> list:
+        """validate_many 的同步入口。"""
+        return asyncio.run(self.validate_many(list(items)))
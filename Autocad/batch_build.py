@@ -0,0 +1,257 @@
+"""
+Headless batch build for lisp_generator.
+
+Takes a directory of spec JSON files (or a manifest listing them), dispatches
+every spec to its registered generator across a process pool and writes one
+.lsp file per spec plus a summary manifest. A failing spec is recorded in the
+manifest and never aborts the rest of the batch.
+
+Usage:
+    python batch_build.py SPEC_DIR_OR_MANIFEST [-o OUT_DIR] [-j WORKERS] [--3d] [--emitter MODE] [--runtime MODE]
+                          [--format {lsp,dxf}] [--dry-run] [--validate [--concurrency N] [--rps R]]
+    python lisp_generator.py --batch SPEC_DIR_OR_MANIFEST [...]
+
+A manifest is a JSON list whose items are either a spec path or an object
+{"spec": "path.json", "shape": "hex_nut_3d", "output": "nut.lsp"}; relative
+paths are resolved against the manifest's directory.
+
+By default the 2D drawings share one copy of the helper runtime
+(daedalus_runtime.lsp, written into the output directory) instead of each
+embedding it; keep that file next to the drawings or on AutoCAD's support path.
+
+With --format dxf, the 2D drawings are written as DXF files by dxf_writer.py
+instead, ready to open without running any LISP; 3D shapes fail in this mode.
+
+With --dry-run, every generated program is also run by the headless AutoLISP
+interpreter (lisp_dry_run.py) and its report (errors, command and entity
+counts, view bounding boxes) is stored under each result's 'dry_run' key.
+
+With --validate, every generated drawing is then reviewed by the LLM through
+the concurrent validation engine (async_validator.py) and the verdicts are
+stored in the manifest under each result's 'validation' key.
+"""
+import argparse
+import json
+import os
+import re
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+from dxf_writer import generate_dxf
+from fastener_catalog import expand_spec
+from lisp_dry_run import dry_run_file
+from lisp_emitter import EMITTER_MODES
+from lisp_runtime import RUNTIME_MODES, write_runtime
+from lisp_generator import generate, load_environment, SOLID_SHAPE_MAP
+
+MANIFEST_NAME = "batch_manifest.json"
+OUTPUT_FORMATS = ('lsp', 'dxf')
+
+
+def _safe_stem(text: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', text).strip('_') or 'spec'
+
+
+def collect_jobs(source: str, solid: bool = False, emitter: str = None, runtime: str = 'shared',
+                 output_format: str = 'lsp', dry_run: bool = False) -> list:
+    """Expands a spec directory or manifest into a list of job dicts."""
+    if os.path.isdir(source):
+        entries = [{'spec': os.path.join(source, name)}
+                   for name in sorted(os.listdir(source))
+                   if name.endswith('.json') and name != MANIFEST_NAME]
+    else:
+        with open(source, 'r', encoding='utf-8') as f:
+            listed = json.load(f)
+        if not isinstance(listed, list):
+            raise ValueError(f"Manifest '{source}' must contain a JSON list.")
+        base_dir = os.path.dirname(os.path.abspath(source))
+        entries = []
+        for item in listed:
+            entry = {'spec': item} if isinstance(item, str) else dict(item)
+            if 'spec' not in entry:
+                raise ValueError(f"Manifest entry {item!r} has no 'spec' path.")
+            entry['spec'] = os.path.join(base_dir, entry['spec'])
+            entries.append(entry)
+
+    jobs = []
+    used_names = set()
+    for index, entry in enumerate(entries):
+        stem = os.path.splitext(os.path.basename(entry['spec']))[0]
+        suffix = entry.get('shape') or ('3d' if solid else '2d')
+        output = entry.get('output') or f"{_safe_stem(stem)}__{_safe_stem(suffix)}.{output_format}"
+        # Names are fixed here, before dispatch, so workers never race on a file.
+        if output in used_names:
+            root, ext = os.path.splitext(output)
+            output = f"{root}_{index}{ext}"
+        used_names.add(output)
+        jobs.append({'index': index, 'spec': entry['spec'], 'shape': entry.get('shape'),
+                     'solid': solid, 'emitter': emitter, 'runtime': runtime, 'format': output_format,
+                     'dry_run': dry_run, 'output': output})
+    return jobs
+
+
+def _build_one(job: dict) -> dict:
+    """Worker entry point: generates one spec and writes its .lsp (or .dxf) file."""
+    result = {'index': job['index'], 'spec': job['spec'], 'shape': job['shape'],
+              'output': job['output'], 'status': 'ok', 'error': None, 'bytes': 0}
+    start = time.perf_counter()
+    try:
+        with open(job['spec'], 'r', encoding='utf-8') as f:
+            drawing_data = json.load(f)
+        shape_type = job['shape'] or drawing_data.get('shape')
+        if not shape_type:
+            raise ValueError("The 'shape' key is missing.")
+        drawing_data = expand_spec(drawing_data, shape_type)
+        if 'drawing_options' in drawing_data:
+            drawing_data['drawing_options']['runtime'] = job['runtime']
+            if job['emitter']:
+                drawing_data['drawing_options']['emitter'] = job['emitter']
+        if job['solid'] and not job['shape']:
+            shape_type = SOLID_SHAPE_MAP.get(shape_type, shape_type)
+        result['shape'] = shape_type
+        if job['format'] == 'dxf':
+            result['bytes'] = generate_dxf(shape_type, drawing_data, job['output_path'])['bytes']
+        else:
+            lisp_output = generate(shape_type, drawing_data)
+            with open(job['output_path'], 'w', encoding='utf-8') as f:
+                f.write(lisp_output)
+            result['bytes'] = len(lisp_output.encode('utf-8'))
+            if job['dry_run']:
+                report = dry_run_file(job['output_path'])
+                del report['output']
+                result['dry_run'] = report
+    except Exception as e:
+        result['status'] = 'failed'
+        result['error'] = f"{type(e).__name__}: {e}"
+        result['output'] = None
+    result['seconds'] = round(time.perf_counter() - start, 6)
+    return result
+
+
+def run_batch(source: str, output_dir: str, workers: int = None, solid: bool = False, emitter: str = None,
+              runtime: str = 'shared', output_format: str = 'lsp', dry_run: bool = False) -> dict:
+    """Builds every spec in `source` into `output_dir` and writes the summary manifest."""
+    jobs = collect_jobs(source, solid, emitter, runtime, output_format, dry_run)
+    os.makedirs(output_dir, exist_ok=True)
+    runtime_path = write_runtime(output_dir) if runtime == 'shared' and output_format == 'lsp' else None
+    for job in jobs:
+        job['output_path'] = os.path.join(output_dir, job['output'])
+
+    workers = workers or os.cpu_count() or 1
+    start = time.perf_counter()
+    if workers == 1 or len(jobs) <= 1:
+        results = [_build_one(job) for job in jobs]
+    else:
+        # Several specs per task keep the pickling/IPC overhead small next to generation.
+        chunksize = max(1, len(jobs) // (workers * 4))
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            results = list(executor.map(_build_one, jobs, chunksize=chunksize))
+    elapsed = time.perf_counter() - start
+
+    failed = [r for r in results if r['status'] != 'ok']
+    manifest = {
+        'source': os.path.abspath(source),
+        'output_dir': os.path.abspath(output_dir),
+        'workers': workers,
+        'total': len(results),
+        'succeeded': len(results) - len(failed),
+        'failed': len(failed),
+        'seconds': round(elapsed, 3),
+        'runtime': runtime_path,
+        'results': results,
+    }
+    if dry_run:
+        manifest['dry_run_failed'] = sum(1 for r in results if not r.get('dry_run', {'ok': True})['ok'])
+    with open(os.path.join(output_dir, MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+
+def validate_batch(manifest: dict, concurrency: int, requests_per_second: float) -> dict:
+    """Reviews the successfully built drawings of a manifest concurrently and records the verdicts in it."""
+    from async_validator import AsyncValidationEngine
+    from validation_cache import ValidationCache
+
+    load_environment()
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    engine = AsyncValidationEngine(
+        api_key=os.getenv("OPENAI_API_KEY"),
+        base_url=os.getenv("OPENAI_API_BASE_URL"),
+        model_name=os.getenv("AI_MODEL_NAME", "gemini-1.5-flash-latest"),
+        max_concurrency=concurrency,
+        requests_per_second=requests_per_second,
+        cache=ValidationCache(os.path.join(base_dir, ".validation_cache")))
+
+    built = [r for r in manifest['results'] if r['status'] == 'ok']
+    items = []
+    for r in built:
+        with open(r['spec'], 'r', encoding='utf-8') as f:
+            drawing_data = expand_spec(json.load(f), r['shape'])
+        with open(os.path.join(manifest['output_dir'], r['output']), 'r', encoding='utf-8') as f:
+            items.append((f.read(), drawing_data))
+
+    start = time.perf_counter()
+    verdicts = engine.run(items)
+    for r, verdict in zip(built, verdicts):
+        verdict['seconds'] = round(verdict['seconds'], 3)
+        r['validation'] = verdict
+    manifest['validation_seconds'] = round(time.perf_counter() - start, 3)
+    manifest['validation_failed'] = sum(1 for v in verdicts if v['overall_rating'] in ("失败", "VALIDATION_ERROR"))
+    with open(os.path.join(manifest['output_dir'], MANIFEST_NAME), 'w', encoding='utf-8') as f:
+        json.dump(manifest, f, indent=2, ensure_ascii=False)
+    return manifest
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Batch-generate AutoLISP drawings from spec JSON files.")
+    parser.add_argument('source', help="Directory of spec JSON files, or a JSON manifest listing them.")
+    parser.add_argument('-o', '--output-dir', default='lsp_out', help="Directory for the generated .lsp files.")
+    parser.add_argument('-j', '--workers', type=int, default=None, help="Worker processes (default: CPU count).")
+    parser.add_argument('--3d', dest='solid', action='store_true',
+                        help="Generate the 3D solid model for specs that do not name a shape explicitly.")
+    parser.add_argument('--emitter', choices=EMITTER_MODES, default=None,
+                        help="Override the 2D emitter mode of every spec ('entmake' is much faster to run in AutoCAD).")
+    parser.add_argument('--runtime', choices=RUNTIME_MODES, default='shared',
+                        help="'shared' (default) loads one runtime file per session; 'inline' embeds it in every drawing.")
+    parser.add_argument('--format', dest='output_format', choices=OUTPUT_FORMATS, default='lsp',
+                        help="'lsp' (default) writes AutoLISP programs; 'dxf' writes the 2D drawings as DXF files.")
+    parser.add_argument('--dry-run', action='store_true',
+                        help="Run every generated program with the headless AutoLISP interpreter and report errors.")
+    parser.add_argument('--validate', action='store_true',
+                        help="Review the generated drawings with the LLM validator (needs OPENAI_API_KEY).")
+    parser.add_argument('--concurrency', type=int, default=8, help="Concurrent validation requests (default: 8).")
+    parser.add_argument('--rps', type=float, default=4.0, help="Validation requests per second (default: 4).")
+    args = parser.parse_args(argv)
+
+    if args.validate and args.output_format != 'lsp':
+        parser.error("--validate reviews LISP programs and needs --format lsp.")
+    if args.dry_run and args.output_format != 'lsp':
+        parser.error("--dry-run runs LISP programs and needs --format lsp.")
+    manifest = run_batch(args.source, args.output_dir, args.workers, args.solid, args.emitter, args.runtime,
+                         args.output_format, args.dry_run)
+    print(f"Batch finished: {manifest['succeeded']}/{manifest['total']} succeeded "
+          f"in {manifest['seconds']}s using {manifest['workers']} worker(s).")
+    for r in manifest['results']:
+        if r['status'] != 'ok':
+            print(f"  [FAILED] {r['spec']}: {r['error']}")
+    if args.dry_run:
+        print(f"Dry run: {manifest['dry_run_failed']} program(s) failed.")
+        for r in manifest['results']:
+            report = r.get('dry_run')
+            if report and not report['ok']:
+                print(f"  [DRY RUN FAILED] {r['output']}: {report['errors'][0]}")
+    if args.validate:
+        manifest = validate_batch(manifest, args.concurrency, args.rps)
+        print(f"Validation finished in {manifest['validation_seconds']}s: "
+              f"{manifest['validation_failed']} drawing(s) failed review.")
+        for r in manifest['results']:
+            verdict = r.get('validation')
+            if verdict:
+                print(f"  [{verdict['overall_rating']}] {r['output']} ({verdict['source']})")
+    print(f"Manifest: '{os.path.join(args.output_dir, MANIFEST_NAME)}'")
+    return 1 if manifest['failed'] or manifest.get('dry_run_failed') or manifest.get('validation_failed') else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
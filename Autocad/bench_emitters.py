@@ -0,0 +1,81 @@
+"""
+Benchmark of the 'command' and 'entmake' emitter modes.
+
+For each drawing it measures, on the Python side, the time to build and emit
+the LISP program, and counts the work AutoCAD has to do when the program runs:
+the number of `(command ...)` round trips and `(entmake ...)` calls in the
+drawing body (helper defuns expand into further calls at run time).
+
+With --write DIR, each variant is also written as a timed .lsp file that
+prints its own run time (MILLISECS) at the end, so both modes can be compared
+inside AutoCAD with APPLOAD + DRAWMYOBJECT.
+
+Usage:
+    python bench_emitters.py [SPEC.json ...] [-n REPEAT] [--write DIR]
+"""
+import argparse
+import copy
+import json
+import os
+import sys
+import time
+
+from lisp_emitter import EMITTER_MODES, emit_body, emit_entmake_body, emit_lisp
+from lisp_generator import drawing_builders
+
+DEFAULT_SPECS = ['screw_nut_assembly.json', 'socket_head_cap_screw_data.json']
+
+
+def _add_timer(lisp_code: str, label: str) -> str:
+    start = '(defun C:DrawMyObject ()\n'
+    lisp_code = lisp_code.replace(start, start + '  (setq *bench-t0* (getvar "MILLISECS"))\n', 1)
+    return lisp_code.replace(
+        '(setvar "CMDECHO" 1)',
+        f'(princ (strcat "\\n{label}: " (itoa (- (getvar "MILLISECS") *bench-t0*)) " ms"))(setvar "CMDECHO" 1)', 1)
+
+
+def bench_spec(spec_path: str, repeat: int, write_dir: str = None) -> list:
+    with open(spec_path, 'r', encoding='utf-8') as f:
+        spec = json.load(f)
+    builder = drawing_builders[spec['shape']]
+    rows = []
+    for mode in EMITTER_MODES:
+        start = time.perf_counter()
+        for _ in range(repeat):
+            drawing = builder(copy.deepcopy(spec))
+            lisp_code = emit_lisp(drawing, mode)
+        seconds = (time.perf_counter() - start) / repeat
+        body = emit_entmake_body(drawing.entities) if mode == 'entmake' else emit_body(drawing.entities)
+        rows.append({'spec': os.path.basename(spec_path), 'mode': mode, 'entities': len(drawing),
+                     'ms': seconds * 1000, 'bytes': len(lisp_code.encode('utf-8')),
+                     'commands': body.count('(command '), 'entmakes': body.count('(entmake ')})
+        if write_dir:
+            os.makedirs(write_dir, exist_ok=True)
+            stem = os.path.splitext(os.path.basename(spec_path))[0]
+            out_path = os.path.join(write_dir, f"{stem}__{mode}.lsp")
+            with open(out_path, 'w', encoding='utf-8') as f:
+                f.write(_add_timer(lisp_code, f"{stem} [{mode}]"))
+    return rows
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Compare the command and entmake LISP emitters.")
+    parser.add_argument('specs', nargs='*', help="2D spec JSON files (default: screw-nut and socket head cap screw).")
+    parser.add_argument('-n', '--repeat', type=int, default=200, help="Generation repetitions per measurement.")
+    parser.add_argument('--write', metavar='DIR', help="Also write timed .lsp files for running in AutoCAD.")
+    args = parser.parse_args(argv)
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    specs = args.specs or [os.path.join(base_dir, name) for name in DEFAULT_SPECS]
+    print(f"{'spec':<34}{'mode':<10}{'entities':>9}{'gen ms':>9}{'bytes':>9}{'command':>9}{'entmake':>9}")
+    for spec_path in specs:
+        for r in bench_spec(spec_path, args.repeat, args.write):
+            print(f"{r['spec']:<34}{r['mode']:<10}{r['entities']:>9}{r['ms']:>9.3f}{r['bytes']:>9}"
+                  f"{r['commands']:>9}{r['entmakes']:>9}")
+    if args.write:
+        print(f"Timed LISP files written to '{args.write}'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
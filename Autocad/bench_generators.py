@@ -0,0 +1,297 @@
+"""
+Generation cost benchmark for every generator.
+
+Runs each AutoCAD generator registered in `shape_generators`
+(lisp_generator.py) and each entry of the menu `config` of
+Blender/main_generator.py on the shipped sample specs and on synthetically
+scaled copies of them (every number under 'parameters' multiplied by a
+factor). For every case it records:
+  - wall time: best and median of several runs, caches bypassed;
+  - peak allocated memory of one run (tracemalloc);
+  - output bytes;
+  - emitted commands by type: for LISP, the commands and entmake calls the
+    program executes, counted by running it in the headless interpreter
+    (lisp_dry_run.py), helper calls included; for Blender, the bpy.ops
+    operator calls in the script, or the data-API helper calls (dm_*) for
+    the "mesh_emitter": "data" variant, which is benched as blender-data:*.
+
+With --save-baseline the results are stored as JSON; with --baseline they are
+compared against a stored run, and a case whose time, peak memory,
+output size or command count grew by more than the threshold is reported as a
+regression (exit status 1). Sizes and command counts are deterministic and
+held to --threshold (10%); times are compared by their best run, the least
+noisy, and held to the looser --time-threshold (50%). Timings depend on the
+machine, so compare against a baseline recorded on the same one.
+
+Usage:
+    python bench_generators.py [-n REPEAT] [--scales 0.1 10] [-k FILTER]
+                               [--baseline FILE] [--save-baseline FILE] [--threshold 0.1] [--time-threshold 0.5]
+"""
+import argparse
+import copy
+import glob
+import importlib.util
+import json
+import os
+import platform
+import re
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from collections import Counter
+
+from fastener_catalog import expand_spec
+from lisp_dry_run import dry_run
+from lisp_generator import SOLID_SHAPE_MAP, shape_generators
+from lisp_runtime import write_runtime
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BLENDER_DIR = os.path.join(BASE_DIR, os.pardir, 'Blender')
+DEFAULT_REPEAT = 20
+DEFAULT_SCALES = (0.1, 10.0)
+# Allowed growth over the baseline. Sizes and command counts are deterministic; sub-millisecond
+# timings vary by tens of percent between interpreter runs (hash seeds, memory layout).
+DEFAULT_THRESHOLD = 0.1
+DEFAULT_TIME_THRESHOLD = 0.5
+# Timings this close to the baseline are noise, whatever their ratio.
+MIN_TIME_DELTA_MS = 0.05
+COMPARED_METRICS = ('best_ms', 'peak_kib', 'bytes', 'commands')
+
+# bpy.ops operator calls and calls (not definitions) of the data-mode helpers of scene_builder.py
+_BPY_OPS_RE = re.compile(r'(?<!def )\b(bpy\.ops\.\w+\.\w+|dm_\w+)\(')
+
+
+def _load_blender_generator():
+    spec = importlib.util.spec_from_file_location('blender_main_generator',
+                                                  os.path.join(BLENDER_DIR, 'main_generator.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def scale_spec(data, factor: float):
+    """A copy of a spec with every number under a 'parameters' key (at any depth) multiplied by factor."""
+    def scale(value):
+        if isinstance(value, bool):
+            return value
+        if isinstance(value, (int, float)):
+            return value * factor
+        if isinstance(value, dict):
+            return {k: scale(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [scale(v) for v in value]
+        return value
+
+    def walk(value):
+        if isinstance(value, dict):
+            return {k: scale(v) if k == 'parameters' else walk(v) for k, v in value.items()}
+        if isinstance(value, list):
+            return [walk(v) for v in value]
+        return value
+    return walk(data) if factor != 1 else copy.deepcopy(data)
+
+
+# ==============================================================================
+# Cases
+# ==============================================================================
+def lisp_cases(scales) -> list:
+    """(name, shape, spec) for every registered AutoCAD generator: its sample spec and scaled copies."""
+    samples = {}
+    for path in sorted(glob.glob(os.path.join(BASE_DIR, '*.json'))):
+        with open(path, 'r', encoding='utf-8') as f:
+            data = json.load(f)
+        shape = data.get('shape') if isinstance(data, dict) else None
+        for target in (shape, SOLID_SHAPE_MAP.get(shape)):
+            if target in shape_generators:
+                samples.setdefault(target, data)
+
+    cases = []
+    for shape in shape_generators:
+        if shape not in samples:
+            print(f"  [SKIP] lisp:{shape}: no sample spec")
+            continue
+        for factor in (1.0,) + tuple(scales):
+            data = expand_spec(scale_spec(samples[shape], factor), shape)
+            cases.append((_case_name('lisp', shape, factor), shape, data))
+    return cases
+
+
+def blender_cases(blender, scales) -> list:
+    """(name, menu entry, (data, opts)) for every entry of the Blender menu config, in both mesh emitters, and scaled copies."""
+    names = {func: shape for shape, func in {**blender.PART_GENERATORS, **blender.ASSEMBLY_GENERATORS}.items()}
+    cases = []
+    for key, entry in blender.config.items():
+        data, opts = blender.load_config_data(entry, BLENDER_DIR)
+        name = names.get(entry['generator'], f"menu_{key}")
+        for emitter, target in (('ops', 'blender'), ('data', 'blender-data')):
+            emitter_opts = dict(opts, mesh_emitter=emitter)
+            for factor in (1.0,) + tuple(scales):
+                cases.append((_case_name(target, name, factor), entry, (scale_spec(data, factor), emitter_opts)))
+    return cases
+
+
+def _case_name(target: str, shape: str, factor: float) -> str:
+    return f"{target}:{shape}" + (f"@x{factor:g}" if factor != 1 else "")
+
+
+# ==============================================================================
+# Measurement
+# ==============================================================================
+def _measure(func, repeat: int) -> dict:
+    """Times func() `repeat` times after one warm-up run, then measures the peak memory of one more run."""
+    func()
+    times = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        output = func()
+        times.append((time.perf_counter() - start) * 1000)
+    tracemalloc.start()
+    try:
+        func()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+    return {'best_ms': round(min(times), 4), 'median_ms': round(statistics.median(times), 4),
+            'peak_kib': round(peak / 1024, 1), 'bytes': len(output.encode('utf-8')), 'output': output}
+
+
+def bench_lisp(name, shape, data, repeat, runtime_dir) -> dict:
+    generator = shape_generators[shape]
+    row = _measure(lambda: generator(data), repeat)
+    report = dry_run(row.pop('output'), load_paths=[runtime_dir])
+    row.update(case=name, target='lisp', commands=sum(report['commands'].values()) + report['entmake'],
+               command_types=dict(report['commands'], **({'entmake': report['entmake']} if report['entmake'] else {})),
+               entities=sum(report['entities'].values()), ok=report['ok'], errors=report['errors'][:3])
+    return row
+
+
+def bench_blender(blender, name, entry, inputs, repeat) -> dict:
+    data, opts = inputs
+    row = _measure(lambda: blender.generate_config_script(entry, data, opts), repeat)
+    ops = Counter(call.replace('bpy.ops.', '') for call in _BPY_OPS_RE.findall(row.pop('output')))
+    row.update(case=name, target='blender', commands=sum(ops.values()), command_types=dict(ops.most_common()),
+               ok=True, errors=[])
+    return row
+
+
+def run_benchmarks(repeat: int = DEFAULT_REPEAT, scales=DEFAULT_SCALES, pattern: str = None) -> list:
+    """Runs every case (those whose name contains `pattern`, if given) and returns one row per case."""
+    blender = _load_blender_generator()
+    cases = [('lisp',) + c for c in lisp_cases(scales)] + [('blender',) + c for c in blender_cases(blender, scales)]
+    rows = []
+    with tempfile.TemporaryDirectory() as runtime_dir:
+        write_runtime(runtime_dir)
+        for target, name, shape, data in cases:
+            if pattern and pattern not in name:
+                continue
+            try:
+                if target == 'lisp':
+                    rows.append(bench_lisp(name, shape, data, repeat, runtime_dir))
+                else:
+                    rows.append(bench_blender(blender, name, shape, data, repeat))
+            except Exception as e:
+                rows.append({'case': name, 'target': target, 'ok': False, 'errors': [f"{type(e).__name__}: {e}"]})
+    return rows
+
+
+# ==============================================================================
+# Baseline
+# ==============================================================================
+def save_baseline(rows: list, path: str, repeat: int):
+    baseline = {'python': platform.python_version(), 'machine': platform.machine(), 'repeat': repeat,
+                'created': time.strftime('%Y-%m-%dT%H:%M:%S'),
+                'results': {r['case']: {k: v for k, v in r.items() if k != 'case'} for r in rows if r.get('ok')}}
+    with open(path, 'w', encoding='utf-8') as f:
+        json.dump(baseline, f, indent=2, ensure_ascii=False)
+
+
+def compare(rows: list, baseline: dict, threshold: float = DEFAULT_THRESHOLD,
+            time_threshold: float = DEFAULT_TIME_THRESHOLD) -> list:
+    """Regressions against the baseline: (case, metric, old, new, threshold) for every metric grown too much."""
+    regressions = []
+    for row in rows:
+        old = baseline['results'].get(row['case'])
+        if not old or not row.get('ok'):
+            continue
+        for metric in COMPARED_METRICS:
+            if metric not in old or metric not in row:
+                continue
+            before, after = old[metric], row[metric]
+            allowed = time_threshold if metric == 'best_ms' else threshold
+            if after <= before * (1 + allowed):
+                continue
+            if metric == 'best_ms' and after - before < MIN_TIME_DELTA_MS:
+                continue
+            regressions.append((row['case'], metric, before, after, allowed))
+    return regressions
+
+
+def _change(row, baseline, metric) -> str:
+    old = baseline['results'].get(row['case'], {}).get(metric) if baseline else None
+    if not old:
+        return ""
+    return f" ({(row[metric] / old - 1) * 100:+.0f}%)"
+
+
+def print_table(rows: list, baseline: dict = None):
+    print(f"{'case':44s} {'best ms':>16s} {'median ms':>9s} {'peak KiB':>16s} {'bytes':>16s} {'commands':>14s}")
+    for row in rows:
+        if not row.get('ok') and 'median_ms' not in row:
+            print(f"{row['case']:44s} [FAIL] {row['errors'][0]}")
+            continue
+        print(f"{row['case']:44s} {row['best_ms']:9.3f}{_change(row, baseline, 'best_ms'):>7s} "
+              f"{row['median_ms']:9.3f} "
+              f"{row['peak_kib']:9.1f}{_change(row, baseline, 'peak_kib'):>7s} "
+              f"{row['bytes']:9d}{_change(row, baseline, 'bytes'):>7s} "
+              f"{row['commands']:7d}{_change(row, baseline, 'commands'):>7s}")
+        if not row['ok']:
+            print(f"    [DRY RUN FAILED] {row['errors'][0]}")
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Benchmark every LISP and Blender generator against a baseline.")
+    parser.add_argument('-n', '--repeat', type=int, default=DEFAULT_REPEAT, help="Timed runs per case.")
+    parser.add_argument('--scales', type=float, nargs='*', default=list(DEFAULT_SCALES),
+                        help="Scale factors of the synthetic specs (default: 0.1 10; none for samples only).")
+    parser.add_argument('-k', dest='pattern', default=None, help="Only run cases whose name contains this text.")
+    parser.add_argument('--baseline', default=None, help="Baseline JSON to compare against.")
+    parser.add_argument('--save-baseline', default=None, help="Write the results as a baseline JSON file.")
+    parser.add_argument('--threshold', type=float, default=DEFAULT_THRESHOLD,
+                        help=f"Allowed growth of peak memory, bytes and commands (default: {DEFAULT_THRESHOLD}).")
+    parser.add_argument('--time-threshold', type=float, default=DEFAULT_TIME_THRESHOLD,
+                        help=f"Allowed growth of the best time (default: {DEFAULT_TIME_THRESHOLD}).")
+    parser.add_argument('--json', dest='json_path', default=None, help="Also write all results to this JSON file.")
+    args = parser.parse_args(argv)
+
+    baseline = None
+    if args.baseline:
+        with open(args.baseline, 'r', encoding='utf-8') as f:
+            baseline = json.load(f)
+    rows = run_benchmarks(max(1, args.repeat), args.scales, args.pattern)
+    print_table(rows, baseline)
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(rows, f, indent=2, ensure_ascii=False)
+    if args.save_baseline:
+        save_baseline(rows, args.save_baseline, args.repeat)
+        print(f"Baseline written to '{args.save_baseline}'.")
+
+    failed = [r for r in rows if not r.get('ok')]
+    regressions = compare(rows, baseline, args.threshold, args.time_threshold) if baseline else []
+    if baseline:
+        missing = sorted(set(baseline['results']) - {r['case'] for r in rows})
+        if missing and not args.pattern:
+            print(f"Not in this run: {', '.join(missing)}")
+    for case, metric, before, after, allowed in regressions:
+        print(f"  [REGRESSION] {case}: {metric} {before} -> {after} (+{(after / before - 1) * 100:.0f}%, "
+              f"threshold {allowed * 100:.0f}%)")
+    for row in failed:
+        print(f"  [FAIL] {row['case']}: {row['errors'][0]}")
+    print(f"{len(rows)} case(s), {len(failed)} failed, {len(regressions)} regression(s).")
+    return 1 if failed or regressions else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
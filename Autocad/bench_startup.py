@@ -0,0 +1,95 @@
+"""
+Cold-start benchmark for the generator modules.
+
+Imports each module in a fresh interpreter under `python -X importtime` and
+fails (exit status 1) when importing it:
+  - takes longer than the budget (best of several runs, so one slow run on a
+    busy machine does not fail the check);
+  - pulls in a module that only validation or the catalog needs (openai,
+    httpx, dotenv, numpy, ...);
+  - prints anything or creates files in the working directory.
+
+The interpreters run in an empty temporary directory, so the check also
+catches a module that creates files relative to where it is started.
+
+Usage:
+    python bench_startup.py [-m MODULE ...] [-n RUNS] [--budget-ms MS]
+"""
+import argparse
+import os
+import subprocess
+import sys
+import tempfile
+
+DEFAULT_MODULES = ['lisp_generator']
+DEFAULT_BUDGET_MS = 80.0
+DEFAULT_RUNS = 5
+# Heavy or side-effecting dependencies that must load lazily, only when they are used.
+LAZY_MODULES = ('openai', 'httpx', 'dotenv', 'numpy', 'llm_validator', 'async_validator', 'fastener_catalog')
+
+
+def _import_once(module: str, base_dir: str) -> dict:
+    env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, (base_dir, os.environ.get('PYTHONPATH')))))
+    with tempfile.TemporaryDirectory() as cwd:
+        proc = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                              cwd=cwd, env=env, capture_output=True, text=True, encoding='utf-8')
+        created = os.listdir(cwd)
+    # Lines look like "import time:   self [us] | cumulative | imported package".
+    imported, cumulative_us = [], None
+    for line in proc.stderr.splitlines():
+        if not line.startswith('import time:') or line.rstrip().endswith('imported package'):
+            continue
+        _, cumulative, name = line[len('import time:'):].split('|')
+        name = name.strip()
+        imported.append(name)
+        if name == module:
+            cumulative_us = int(cumulative)
+    return {'returncode': proc.returncode, 'stdout': proc.stdout, 'stderr': proc.stderr,
+            'imported': imported, 'ms': cumulative_us / 1000 if cumulative_us is not None else None,
+            'created': created}
+
+
+def check_module(module: str, base_dir: str, runs: int, budget_ms: float) -> list:
+    """Returns the problems found for one module (empty when it is within budget and side-effect free)."""
+    results = [_import_once(module, base_dir) for _ in range(runs)]
+    first = results[0]
+    if first['returncode'] != 0 or first['ms'] is None:
+        return [f"import failed:\n{first['stderr'].strip()[-2000:]}"]
+    problems = []
+    best = min(r['ms'] for r in results)
+    print(f"  {module}: best {best:.1f} ms of {runs} run(s), median "
+          f"{sorted(r['ms'] for r in results)[runs // 2]:.1f} ms (budget {budget_ms:.0f} ms)")
+    if best > budget_ms:
+        problems.append(f"import takes {best:.1f} ms, over the {budget_ms:.0f} ms budget")
+    eager = sorted({name.split('.')[0] for name in first['imported'] if name.split('.')[0] in LAZY_MODULES})
+    if eager:
+        problems.append(f"imports modules that should load lazily: {', '.join(eager)}")
+    if first['stdout']:
+        problems.append(f"prints on import: {first['stdout'].strip()[:200]!r}")
+    if first['created']:
+        problems.append(f"creates files on import: {', '.join(first['created'])}")
+    return problems
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Check the import time and import side effects of the generators.")
+    parser.add_argument('-m', '--module', action='append', dest='modules',
+                        help=f"Module to check (repeatable; default: {', '.join(DEFAULT_MODULES)}).")
+    parser.add_argument('-n', '--runs', type=int, default=DEFAULT_RUNS, help="Fresh interpreters per module.")
+    parser.add_argument('--budget-ms', type=float, default=DEFAULT_BUDGET_MS,
+                        help=f"Import time budget per module (default: {DEFAULT_BUDGET_MS:.0f} ms).")
+    args = parser.parse_args(argv)
+
+    base_dir = os.path.dirname(os.path.abspath(__file__))
+    failed = False
+    print(f"Cold import check ({sys.executable}):")
+    for module in args.modules or DEFAULT_MODULES:
+        for problem in check_module(module, base_dir, max(1, args.runs), args.budget_ms):
+            print(f"  [FAIL] {module}: {problem}")
+            failed = True
+    print("Startup regression found." if failed else "All modules within budget.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
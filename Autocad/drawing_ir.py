@@ -0,0 +1,418 @@
+"""
+Backend-neutral intermediate representation for 2D engineering drawings.
+
+The 2D generators in lisp_generator.py describe a drawing as a flat stream of
+typed entity records collected in a Drawing. Emitters (see lisp_emitter.py)
+serialize that stream; geometry is computed once and can be reused by any
+other consumer (previews, validation, ...).
+
+Every record uses __slots__ so a drawing with many thousands of entities stays
+compact, and the layer/view strings are shared references rather than copies.
+"""
+import math
+import operator
+
+
+class Entity:
+    __slots__ = ('layer', 'view', 'component')
+    kind = 'entity'
+
+    def points(self):
+        """Returns the characteristic points of the entity, used for extents."""
+        return ()
+
+
+class Line(Entity):
+    __slots__ = ('x1', 'y1', 'x2', 'y2')
+    kind = 'line'
+
+    def __init__(self, layer, x1, y1, x2, y2):
+        self.layer, self.x1, self.y1, self.x2, self.y2 = layer, x1, y1, x2, y2
+
+    def points(self):
+        return ((self.x1, self.y1), (self.x2, self.y2))
+
+
+class Rect(Entity):
+    __slots__ = ('x1', 'y1', 'x2', 'y2')
+    kind = 'rect'
+
+    def __init__(self, layer, x1, y1, x2, y2):
+        self.layer, self.x1, self.y1, self.x2, self.y2 = layer, x1, y1, x2, y2
+
+    def points(self):
+        return ((self.x1, self.y1), (self.x2, self.y2))
+
+
+class Circle(Entity):
+    __slots__ = ('cx', 'cy', 'r')
+    kind = 'circle'
+
+    def __init__(self, layer, cx, cy, r):
+        self.layer, self.cx, self.cy, self.r = layer, cx, cy, r
+
+    def points(self):
+        return ((self.cx - self.r, self.cy - self.r), (self.cx + self.r, self.cy + self.r))
+
+
+class Arc(Entity):
+    """Counter-clockwise arc from the start point to the end point around (cx, cy)."""
+    __slots__ = ('cx', 'cy', 'sx', 'sy', 'ex', 'ey')
+    kind = 'arc'
+
+    def __init__(self, layer, cx, cy, sx, sy, ex, ey):
+        self.layer, self.cx, self.cy, self.sx, self.sy, self.ex, self.ey = layer, cx, cy, sx, sy, ex, ey
+
+    @property
+    def radius(self):
+        return math.hypot(self.sx - self.cx, self.sy - self.cy)
+
+    def points(self):
+        return ((self.sx, self.sy), (self.ex, self.ey))
+
+
+class Polygon(Entity):
+    """Regular polygon; `inscribed` polygons have `radius` to their vertices, circumscribed ones to their flats."""
+    __slots__ = ('cx', 'cy', 'sides', 'radius', 'inscribed')
+    kind = 'polygon'
+
+    def __init__(self, layer, cx, cy, sides, radius, inscribed=True):
+        self.layer, self.cx, self.cy, self.sides, self.radius, self.inscribed = layer, cx, cy, sides, radius, inscribed
+
+    def vertices(self):
+        vertex_radius = self.radius if self.inscribed else self.radius / math.cos(math.pi / self.sides)
+        # AutoCAD draws a polygon whose radius is typed in with its bottom edge horizontal.
+        start = -math.pi / 2 + math.pi / self.sides
+        step = 2 * math.pi / self.sides
+        return [(self.cx + vertex_radius * math.cos(start + i * step),
+                 self.cy + vertex_radius * math.sin(start + i * step)) for i in range(self.sides)]
+
+    def points(self):
+        return self.vertices()
+
+
+class LinearDim(Entity):
+    __slots__ = ('x1', 'y1', 'x2', 'y2', 'tx', 'ty', 'text')
+    kind = 'dim_linear'
+
+    def __init__(self, layer, x1, y1, x2, y2, tx, ty, text=None):
+        self.layer, self.x1, self.y1, self.x2, self.y2, self.tx, self.ty, self.text = layer, x1, y1, x2, y2, tx, ty, text
+
+    @property
+    def rotation(self):
+        """Dimension orientation as AutoCAD's DIMLINEAR picks it: horizontal unless the text sits beside a span."""
+        dx, dy = abs(self.x2 - self.x1), abs(self.y2 - self.y1)
+        if dx < 1e-9:
+            return 90.0
+        if dy < 1e-9:
+            return 0.0
+        inside_x = min(self.x1, self.x2) <= self.tx <= max(self.x1, self.x2)
+        return 0.0 if inside_x else 90.0
+
+    def points(self):
+        return ((self.x1, self.y1), (self.x2, self.y2), (self.tx, self.ty))
+
+
+class DiameterDim(Entity):
+    """Diameter dimension picked on a circle. `cx`/`cy`/`r` are known when the circle is."""
+    __slots__ = ('px', 'py', 'tx', 'ty', 'text', 'cx', 'cy', 'r')
+    kind = 'dim_diameter'
+
+    def __init__(self, layer, px, py, tx, ty, text=None, cx=None, cy=None, r=None):
+        self.layer, self.px, self.py, self.tx, self.ty, self.text = layer, px, py, tx, ty, text
+        self.cx, self.cy, self.r = cx, cy, r
+
+    def points(self):
+        return ((self.px, self.py), (self.tx, self.ty))
+
+
+class Leader(Entity):
+    __slots__ = ('x1', 'y1', 'x2', 'y2')
+    kind = 'leader'
+
+    def __init__(self, layer, x1, y1, x2, y2):
+        self.layer, self.x1, self.y1, self.x2, self.y2 = layer, x1, y1, x2, y2
+
+    def points(self):
+        return ((self.x1, self.y1), (self.x2, self.y2))
+
+
+class Hatch(Entity):
+    __slots__ = ('pattern', 'scale', 'pick_points')
+    kind = 'hatch'
+
+    def __init__(self, layer, pattern, scale, pick_points):
+        self.layer, self.pattern, self.scale, self.pick_points = layer, pattern, scale, tuple(pick_points)
+
+    def points(self):
+        return self.pick_points
+
+
+class Datum(Entity):
+    __slots__ = ('ax', 'ay', 'lx', 'ly', 'label')
+    kind = 'datum'
+
+    def __init__(self, layer, ax, ay, lx, ly, label):
+        self.layer, self.ax, self.ay, self.lx, self.ly, self.label = layer, ax, ay, lx, ly, label
+
+    def points(self):
+        return ((self.ax, self.ay), (self.lx, self.ly))
+
+
+class GdtFrame(Entity):
+    __slots__ = ('ax', 'ay', 'fx', 'fy', 'symbol', 'tolerance', 'datums', 'leader_side')
+    kind = 'gdt'
+
+    def __init__(self, layer, ax, ay, fx, fy, symbol, tolerance, datums, leader_side):
+        self.layer, self.ax, self.ay, self.fx, self.fy = layer, ax, ay, fx, fy
+        self.symbol, self.tolerance, self.datums, self.leader_side = symbol, tolerance, tuple(datums), leader_side
+
+    def points(self):
+        return ((self.ax, self.ay), (self.fx, self.fy))
+
+
+class Roughness(Entity):
+    __slots__ = ('x', 'y', 'text', 'size', 'rotation')
+    kind = 'roughness'
+
+    def __init__(self, layer, x, y, text, size, rotation):
+        self.layer, self.x, self.y, self.text, self.size, self.rotation = layer, x, y, text, size, rotation
+
+    def points(self):
+        return ((self.x, self.y),)
+
+
+class Balloon(Entity):
+    __slots__ = ('cx', 'cy', 'radius', 'text', 'text_height')
+    kind = 'balloon'
+
+    def __init__(self, layer, cx, cy, radius, text, text_height):
+        self.layer, self.cx, self.cy, self.radius, self.text, self.text_height = layer, cx, cy, radius, text, text_height
+
+    def points(self):
+        return ((self.cx - self.radius, self.cy - self.radius), (self.cx + self.radius, self.cy + self.radius))
+
+
+class Table(Entity):
+    """Parameter list or bill of materials; `rows` are tuples of cell strings."""
+    __slots__ = ('x', 'y', 'title', 'rows', 'col_widths', 'row_height', 'text_height', 'style')
+    kind = 'table'
+
+    def __init__(self, layer, x, y, title, rows, col_widths, row_height, text_height, style):
+        self.layer, self.x, self.y, self.title, self.rows = layer, x, y, title, tuple(rows)
+        self.col_widths, self.row_height, self.text_height, self.style = tuple(col_widths), row_height, text_height, style
+
+    def points(self):
+        height = self.row_height * 1.5 + len(self.rows) * self.row_height
+        return ((self.x, self.y), (self.x + sum(self.col_widths), self.y - height))
+
+
+class Comment(Entity):
+    """Section marker; carries no geometry."""
+    __slots__ = ('text',)
+    kind = 'comment'
+
+    def __init__(self, layer, text):
+        self.layer, self.text = layer, text
+
+
+PARAM_TABLE_LAYER = {'name': 'Parameter_Table', 'color': 7}
+
+_RECORD_GETTERS = {}
+
+
+def _freeze(value):
+    if isinstance(value, (list, tuple)):
+        return tuple(_freeze(v) for v in value)
+    return value
+
+
+def entity_records(entities) -> tuple:
+    """Hashable content (type, layer, fields) of a run of entities; equal records emit identical output."""
+    records = []
+    for entity in entities:
+        cls = type(entity)
+        getter = _RECORD_GETTERS.get(cls)
+        if getter is None:
+            getter = _RECORD_GETTERS[cls] = operator.attrgetter('layer', *cls.__slots__)
+        records.append((cls, getter(entity)))
+    records = tuple(records)
+    try:
+        hash(records)
+    except TypeError:
+        records = _freeze(records)
+    return records
+
+
+class Drawing:
+    """Ordered entity stream of one 2D drawing plus the settings shared by all emitters."""
+    __slots__ = ('title', 'layers', 'dim_opts', 'entities', '_view', '_component')
+
+    def __init__(self, title: str, layers: dict, dim_opts: dict):
+        self.title = title
+        self.layers = layers
+        self.dim_opts = dim_opts
+        self.entities = []
+        self._view = None
+        self._component = None
+
+    # --- Layer helpers ---
+    def layer_name(self, key: str) -> str:
+        return self.layers[key]['name']
+
+    @property
+    def annotation_layer(self) -> str:
+        return self.layers.get('annotations', {'name': 'Annotations'})['name']
+
+    def _add(self, entity):
+        entity.view = self._view
+        entity.component = self._component
+        self.entities.append(entity)
+        return entity
+
+    # --- Structure ---
+    def view(self, name: str):
+        """Starts a new view; following entities belong to it."""
+        self._view = name
+        return self._add(Comment(None, name))
+
+    def comment(self, text: str):
+        return self._add(Comment(None, text))
+
+    def component(self, name: str):
+        """Following entities belong to the named component (a drawing is one component, named by its title, by default)."""
+        self._component = name
+
+    # --- Geometry ---
+    def line(self, layer, x1, y1, x2, y2):
+        return self._add(Line(self.layer_name(layer), x1, y1, x2, y2))
+
+    def rect(self, layer, x1, y1, x2, y2):
+        return self._add(Rect(self.layer_name(layer), x1, y1, x2, y2))
+
+    def circle(self, layer, cx, cy, r):
+        return self._add(Circle(self.layer_name(layer), cx, cy, r))
+
+    def arc(self, layer, cx, cy, sx, sy, ex, ey):
+        return self._add(Arc(self.layer_name(layer), cx, cy, sx, sy, ex, ey))
+
+    def polygon(self, layer, cx, cy, sides, radius, inscribed=True):
+        return self._add(Polygon(self.layer_name(layer), cx, cy, sides, radius, inscribed))
+
+    def hatch(self, layer, pattern, scale, pick_points):
+        return self._add(Hatch(self.layer_name(layer), pattern, scale, pick_points))
+
+    # --- Dimensions and annotations ---
+    def dim_linear(self, x1, y1, x2, y2, tx, ty, text=None):
+        return self._add(LinearDim(self.layer_name('dimensions'), x1, y1, x2, y2, tx, ty, text))
+
+    def dim_diameter(self, px, py, tx, ty, text=None, center=None, radius=None):
+        """Diameter dimension picked at (px, py); without `center` it measures the circle or arc drawn through that point."""
+        if center is None:
+            curve = self._curve_at(px, py)
+            if curve is not None:
+                center, radius = (curve.cx, curve.cy), (curve.r if curve.kind == 'circle' else curve.radius)
+        cx, cy = center if center else (None, None)
+        return self._add(DiameterDim(self.layer_name('dimensions'), px, py, tx, ty, text, cx, cy, radius))
+
+    def _curve_at(self, x, y, tolerance=1e-3):
+        """The last circle or arc passing through (x, y), as AutoCAD picks it; None if there is none."""
+        for entity in reversed(self.entities):
+            if entity.kind in ('circle', 'arc'):
+                r = entity.r if entity.kind == 'circle' else entity.radius
+                if abs(math.hypot(x - entity.cx, y - entity.cy) - r) <= max(tolerance, r * 1e-3):
+                    return entity
+        return None
+
+    def leader(self, x1, y1, x2, y2):
+        return self._add(Leader(self.layer_name('dimensions'), x1, y1, x2, y2))
+
+    def datum(self, ax, ay, lx, ly, label):
+        return self._add(Datum(self.annotation_layer, ax, ay, lx, ly, str(label)))
+
+    def gdt(self, ax, ay, fx, fy, symbol, tolerance, datums, leader_side):
+        return self._add(GdtFrame(self.annotation_layer, ax, ay, fx, fy, symbol, str(tolerance), datums, leader_side))
+
+    def roughness(self, x, y, finish):
+        """Adds a surface roughness symbol from a spec triple [text, rotation, size]."""
+        return self._add(Roughness(self.annotation_layer, x, y, str(finish[0]), finish[2], finish[1]))
+
+    def balloon(self, cx, cy, radius, text, text_height):
+        return self._add(Balloon(self.annotation_layer, cx, cy, radius, str(text), text_height))
+
+    # --- Tables ---
+    def parameter_table(self, params: dict, x, y):
+        flat_params = {}
+        for key, value in params.items():
+            if isinstance(value, dict):
+                for sub_key, sub_value in value.items():
+                    flat_params[f"{key}_{sub_key}".replace('_', ' ').title()] = sub_value
+            else:
+                flat_params[key.replace('_', ' ').title()] = value
+        if not flat_params:
+            return None
+        rows = [(str(k), str(v)) for k, v in flat_params.items()]
+        return self._add(Table(PARAM_TABLE_LAYER['name'], x, y, "Parameter List", rows, (150, 80), 15,
+                               self.dim_opts.get('text_height', 3.5), 'parameters'))
+
+    def bom_table(self, components: dict, x, y):
+        if not components:
+            return None
+        rows = []
+        for item_num, (key, val) in enumerate(components.items(), start=1):
+            rows.append((str(item_num), str(val.get('name', key.replace('_', ' ').title())), str(val.get('quantity', 1))))
+        return self._add(Table(PARAM_TABLE_LAYER['name'], x, y, "Bill of Materials", rows, (40, 150, 50), 15,
+                               self.dim_opts.get('text_height', 3.5), 'bom'))
+
+    def family_table(self, header, rows, x, y, col_width=60):
+        """Size table of a family sheet: a header row followed by one row per family member."""
+        if not rows:
+            return None
+        rows = [tuple(str(cell) for cell in header)] + [tuple(str(cell) for cell in row) for row in rows]
+        return self._add(Table(PARAM_TABLE_LAYER['name'], x, y, "Family Table", rows, (col_width,) * len(header), 15,
+                               self.dim_opts.get('text_height', 3.5), 'bom'))
+
+    # --- Queries ---
+    def __len__(self):
+        return len(self.entities)
+
+    def __iter__(self):
+        return iter(self.entities)
+
+    def tags(self) -> list:
+        """
+        Stable identity of every entity, parallel to `entities` (None for comments):
+        (component, view, feature), where feature numbers the entities of one layer and kind
+        within their view, e.g. 'Outline/circle/1'. Editing a spec keeps the tags of the
+        entities it does not add or remove, so two versions of a drawing can be matched up.
+        """
+        tags, counts = [], {}
+        for entity in self.entities:
+            if entity.kind == 'comment':
+                tags.append(None)
+                continue
+            component, view = entity.component or self.title, entity.view or ''
+            key = (component, view, entity.layer, entity.kind)
+            counts[key] = number = counts.get(key, 0) + 1
+            tags.append((component, view, f"{entity.layer}/{entity.kind}/{number}"))
+        return tags
+
+    def count_by_kind(self) -> dict:
+        counts = {}
+        for entity in self.entities:
+            if entity.kind != 'comment':
+                counts[entity.kind] = counts.get(entity.kind, 0) + 1
+        return counts
+
+    def extents(self, view=None):
+        """Returns (min_x, min_y, max_x, max_y) of all entities, or of one view, or None when empty."""
+        xs, ys = [], []
+        for entity in self.entities:
+            if view is not None and entity.view != view:
+                continue
+            for x, y in entity.points():
+                xs.append(x)
+                ys.append(y)
+        if not xs:
+            return None
+        return min(xs), min(ys), max(xs), max(ys)
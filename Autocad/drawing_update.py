@@ -0,0 +1,146 @@
+"""
+In-place update of a drawing that is already open in AutoCAD.
+
+After an edit, re-running the whole drawing redraws every entity and leaves the
+old drawing behind. When a drawing is generated with drawing_options.tagging,
+every entity carries its identity (component, view, feature; see
+Drawing.tags) as XDATA. This module compares the drawings of two versions of a
+spec by those tags and writes a `C:UpdateMyObject` command that only touches
+what changed:
+
+  - entities whose tag disappeared are erased;
+  - entities whose tag stayed but whose geometry or text changed are patched
+    with `entmod` when the change fits the existing entity (same DXF group
+    layout, i.e. same kind, and same number of sides for polygons);
+  - everything else that changed (annotation and table groups drawn by the
+    runtime helpers, hatches, polygons that gained sides) is erased and
+    drawn again, together with the entities whose tag is new.
+
+Layers and dimension settings are set up again only when they changed. The
+update emits in the mode of the new spec ('command' or 'entmake') and tags what
+it draws, so later updates can be applied on top of it.
+
+Usage:
+    python drawing_update.py OLD_SPEC.json NEW_SPEC.json [-o update_object.lsp]
+"""
+import argparse
+import json
+import sys
+import textwrap
+
+from drawing_ir import entity_records
+from fastener_catalog import expand_spec
+from lisp_emitter import (dxf_groups, emit_body_section, emit_entmake_body_section,
+                          fmt_tag_key, get_entmake_table_setup, get_runtime_settings)
+from lisp_generator import drawing_builders
+from lisp_runtime import get_runtime_prelude
+
+
+def _patchable(old, new) -> bool:
+    """Whether `old` can be turned into `new` by entmod: same entity type and DXF group layout."""
+    if old.kind != new.kind:
+        return False
+    if old.kind == 'polygon' and old.sides != new.sides:
+        return False
+    return dxf_groups(old) is not None and dxf_groups(new) is not None
+
+
+def diff_drawings(old, new) -> dict:
+    """
+    Matches the entities of two drawings by tag. Returns lists of tags to 'erase', (tag, entity)
+    pairs to 'patch' and to 'add' (in drawing order), and the number of 'unchanged' entities.
+    """
+    old_entities = {tag: entity for tag, entity in zip(old.tags(), old.entities) if tag}
+    diff = {'erase': [], 'patch': [], 'add': [], 'unchanged': 0}
+    seen = set()
+    for tag, entity in zip(new.tags(), new.entities):
+        if tag is None:
+            continue
+        seen.add(tag)
+        previous = old_entities.get(tag)
+        if previous is None:
+            diff['add'].append((tag, entity))
+        elif entity_records((previous,)) == entity_records((entity,)):
+            diff['unchanged'] += 1
+        elif _patchable(previous, entity):
+            diff['patch'].append((tag, entity))
+        else:
+            diff['erase'].append(tag)
+            diff['add'].append((tag, entity))
+    diff['erase'].extend(tag for tag in old_entities if tag not in seen)
+    return diff
+
+
+def emit_update_lisp(old, new, mode: str = 'command', runtime: str = 'inline') -> tuple:
+    """Returns (LISP program defining C:UpdateMyObject, diff) that turns drawing `old` into `new` in place."""
+    diff = diff_drawings(old, new)
+    out = [get_runtime_prelude(runtime), textwrap.dedent("""
+(defun C:UpdateMyObject ()
+  (command "_.UNDO" "Begin")
+  (setvar "CMDECHO" 0)
+""")]
+    if old.layers != new.layers or old.dim_opts != new.dim_opts:
+        out.append(get_entmake_table_setup(new.layers, new.dim_opts))
+    out.append(get_runtime_settings(new, mode == 'entmake', tagging=True))
+    out.append('  (setq *daedalus-index* (dm-tag-index))\n')
+    out.append('  (if (not *daedalus-index*)\n'
+               '    (princ "\\n[ERROR] No tagged drawing found. Draw it first with drawing_options.tagging set.")\n'
+               '    (progn\n')
+    if diff['erase']:
+        out.append('\n  ;; --- Erase ---\n')
+        out.extend(f'  (dm-erase {fmt_tag_key(tag)})\n' for tag in diff['erase'])
+    if diff['patch']:
+        out.append('\n  ;; --- Modify ---\n')
+        out.extend(f"  (dm-patch {fmt_tag_key(tag)} '({dxf_groups(entity)}))\n" for tag, entity in diff['patch'])
+    if diff['add']:
+        out.append('\n  ;; --- Add ---\n')
+        emit_section = emit_entmake_body_section if mode == 'entmake' else emit_body_section
+        tags, entities = zip(*diff['add'])
+        out.append(emit_section(entities, None, tags)[0])
+    message = f"\\n{new.title} updated: {len(diff['erase'])} erased, {len(diff['patch'])} modified, {len(diff['add'])} added.\\n"
+    out.append(f'''
+  (princ "{message}")))
+  (setvar "CMDECHO" 1)(command "_.UNDO" "End")(princ))
+(princ "\\nLISP file loaded. Type 'UpdateMyObject' to run.")(princ)''')
+    return ''.join(out), diff
+
+
+def generate_update(old_data: dict, new_data: dict, shape_type: str = None) -> tuple:
+    """(update LISP, diff) between two versions of a 2D spec, emitted as the new spec's drawing_options ask."""
+    old_data, new_data = expand_spec(old_data), expand_spec(new_data)
+    shape_type = shape_type or new_data.get('shape')
+    builder = drawing_builders.get(shape_type)
+    if builder is None:
+        raise TypeError(f"Shape '{shape_type}' has no 2D drawing to update in place.")
+    if old_data.get('shape', shape_type) != shape_type:
+        raise ValueError(f"Cannot update a '{old_data.get('shape')}' drawing into a '{shape_type}' drawing.")
+    opts = new_data['drawing_options']
+    return emit_update_lisp(builder(old_data), builder(new_data),
+                            opts.get('emitter', 'command'), opts.get('runtime', 'inline'))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Write a LISP script that updates a tagged drawing in place.")
+    parser.add_argument('old', help="Spec JSON the drawing in AutoCAD was generated from.")
+    parser.add_argument('new', help="Edited spec JSON.")
+    parser.add_argument('-o', '--output', default='update_object.lsp', help="Output LISP file.")
+    args = parser.parse_args(argv)
+
+    specs = []
+    for path in (args.old, args.new):
+        with open(path, 'r', encoding='utf-8') as f:
+            specs.append(json.load(f))
+    try:
+        lisp_code, diff = generate_update(*specs)
+    except (TypeError, ValueError, KeyError) as e:
+        print(f"[Error] {type(e).__name__}: {e}")
+        return 1
+    with open(args.output, 'w', encoding='utf-8') as f:
+        f.write(lisp_code)
+    print(f"'{args.output}' written: {len(diff['erase'])} erased, {len(diff['patch'])} modified, "
+          f"{len(diff['add'])} added, {diff['unchanged']} unchanged. Run it with 'UpdateMyObject'.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
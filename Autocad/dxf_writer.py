@@ -0,0 +1,831 @@
+"""
+Native DXF writer for the drawing IR (drawing_ir.Drawing).
+
+Writes a 2D drawing as an AutoCAD 2013 (AC1027) DXF file. The file opens in
+AutoCAD or any DXF viewer, so no AutoCAD session is needed to run LISP. It
+draws the same views as the LISP emitter:
+
+  - layers with their colors and linetypes. The linetypes are defined from
+    acad.lin, the file the LISP header loads them from, with LTSCALE 5;
+  - linear and diameter dimensions as DIMENSION entities. Each one has its
+    geometry block, so viewers that do not recompute dimensions show them too;
+  - hatches with their pattern lines (metric acadiso.pat definitions);
+  - datum, GD&T, roughness and balloon symbols, and parameter, BOM and family
+    tables, exploded into the lines, polylines and texts that the runtime
+    helpers draw (see lisp_runtime.py).
+
+With drawing_options.tagging, every entity carries the same DAEDALUS XDATA
+as a tagged LISP drawing. drawing_update.py can then update a drawing that was
+opened from the DXF file.
+
+The file is streamed. Entities are formatted one at a time and written out in
+chunks, so memory use does not grow with the size of the sheet. The header
+needs the handle count before the entities are written. A first pass over
+the IR counts the records and the dimension blocks without formatting anything.
+
+Hatches are given by pick points, as in AutoCAD. Their boundaries are found
+by casting rays from each pick point to the nearest lines, rectangles and
+polygon edges of the same view. This is exact for the rectangular section
+regions the generators hatch. A pick point that is not enclosed is skipped
+and reported.
+
+Usage:
+    python dxf_writer.py SPEC.json [-o drawing.dxf] [--shape SHAPE]
+"""
+import argparse
+import json
+import math
+import os
+import re
+import sys
+
+from drawing_ir import PARAM_TABLE_LAYER
+from lisp_emitter import DIMSTYLE_NAME
+from lisp_runtime import TAG_APP_NAME
+
+DXF_VERSION = "AC1027"  # AutoCAD 2013
+FLUSH_CHARS = 1 << 16
+LTSCALE = 5.0
+
+# Dimension settings the LISP header leaves at their defaults, as written into the dimension style.
+DIM_EXT_OFFSET = 0.625  # DIMEXO
+DIM_EXT_EXTENSION = 1.25  # DIMEXE
+DIM_TEXT_GAP = 0.625  # DIMGAP
+DIM_DECIMALS = 2  # DIMDEC, as set by the LISP header
+TEXT_WIDTH_FACTOR = 0.7  # average character width over text height, for estimating text boxes
+
+# Dash patterns of acad.lin (dash > 0, gap < 0, dot = 0).
+LINETYPES = {
+    'BORDER': ("Border __ __ . __ __ . __ __ . __ __ . __ __ .", (0.5, -0.25, 0.5, -0.25, 0.0, -0.25)),
+    'CENTER': ("Center ____ _ ____ _ ____ _ ____ _ ____ _ ____", (1.25, -0.25, 0.25, -0.25)),
+    'CENTER2': ("Center (.5x) ___ _ ___ _ ___ _ ___ _ ___ _ ___", (0.75, -0.125, 0.125, -0.125)),
+    'DASHDOT': ("Dash dot __ . __ . __ . __ . __ . __ . __ . __", (0.5, -0.25, 0.0, -0.25)),
+    'DASHED': ("Dashed __ __ __ __ __ __ __ __ __ __ __ __ __ _", (0.5, -0.25)),
+    'DIVIDE': ("Divide ____ . . ____ . . ____ . . ____ . . ____", (0.5, -0.25, 0.0, -0.25, 0.0, -0.25)),
+    'DOT': ("Dot . . . . . . . . . . . . . . . . . . . . . . . .", (0.0, -0.25)),
+    'HIDDEN': ("Hidden __ __ __ __ __ __ __ __ __ __ __ __ __ __", (0.25, -0.125)),
+    'HIDDEN2': ("Hidden (.5x) _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _ _", (0.125, -0.0625)),
+    'PHANTOM': ("Phantom ______  __  __  ______  __  __  ______", (1.25, -0.25, 0.25, -0.25, 0.25, -0.25)),
+}
+
+# Pattern lines of acadiso.pat: (angle, base x, base y, offset x, offset y, dashes).
+HATCH_PATTERNS = {
+    'ANSI31': ((45.0, 0.0, 0.0, 0.0, 3.175, ()),),
+    'ANSI32': ((45.0, 0.0, 0.0, 0.0, 9.525, ()), (45.0, 4.490128053, 0.0, 0.0, 9.525, (3.175, -1.5875))),
+    'ANSI33': ((45.0, 0.0, 0.0, 0.0, 6.35, ()), (45.0, 4.490128053, 0.0, 0.0, 6.35, (3.175, -1.5875))),
+    'ANSI37': ((45.0, 0.0, 0.0, 0.0, 3.175, ()), (135.0, 0.0, 0.0, 0.0, 3.175, ())),
+    'SOLID': (),
+}
+DEFAULT_HATCH_PATTERN = 'ANSI31'
+
+# TEXT alignment: (72 horizontal, 73 vertical).
+_TEXT_ALIGN = {'bl': (0, 0), 'mc': (1, 2), 'ml': (0, 2), 'mr': (2, 2)}
+# %%c/%%d/%%p control codes and \U+XXXX escapes, each shown as one character.
+_TEXT_CODES = re.compile(r'%%[cdpCDP]|\\U\+[0-9A-Fa-f]{4}')
+
+
+# ==============================================================================
+# Group Formatting
+# ==============================================================================
+def _txt(value) -> str:
+    """A string group value; DXF values cannot span lines."""
+    return str(value).replace('\r', ' ').replace('\n', ' ')
+
+
+def _real(value) -> str:
+    """A real group value; DXF readers accept integral reals without a decimal point."""
+    return f"{value:.12g}"
+
+
+def _pt(code, x, y) -> str:
+    return f"{code}\n{x:.12g}\n{code + 10}\n{y:.12g}\n{code + 20}\n0.0\n"
+
+
+def _entity_head(kind, handle, owner, layer, color) -> str:
+    color_group = f"62\n{color}\n" if color is not None else ''
+    return f"0\n{kind}\n5\n{handle:X}\n330\n{owner:X}\n100\nAcDbEntity\n8\n{_txt(layer)}\n{color_group}"
+
+
+def _fmt_line(p, head):
+    _, _, x1, y1, x2, y2 = p
+    return f"{head}100\nAcDbLine\n{_pt(10, x1, y1)}{_pt(11, x2, y2)}"
+
+
+def _fmt_lwpolyline(p, head):
+    _, _, points, closed = p
+    vertices = ''.join(f"10\n{x:.12g}\n20\n{y:.12g}\n" for x, y in points)
+    return f"{head}100\nAcDbPolyline\n90\n{len(points)}\n70\n{1 if closed else 0}\n{vertices}"
+
+
+def _fmt_circle(p, head):
+    _, _, cx, cy, r = p
+    return f"{head}100\nAcDbCircle\n{_pt(10, cx, cy)}40\n{_real(r)}\n"
+
+
+def _fmt_arc(p, head):
+    _, _, cx, cy, r, start, end = p
+    return (f"{head}100\nAcDbCircle\n{_pt(10, cx, cy)}40\n{_real(r)}\n"
+            f"100\nAcDbArc\n50\n{_real(start)}\n51\n{_real(end)}\n")
+
+
+def _fmt_text(p, head):
+    _, _, x, y, height, rotation, text, align = p
+    horizontal, vertical = _TEXT_ALIGN[align]
+    alignment = f"72\n{horizontal}\n{_pt(11, x, y)}" if align != 'bl' else ''
+    return (f"{head}100\nAcDbText\n{_pt(10, x, y)}40\n{_real(height)}\n1\n{_txt(text)}\n"
+            f"50\n{_real(rotation)}\n7\nStandard\n{alignment}100\nAcDbText\n73\n{vertical}\n")
+
+
+def _fmt_leader(p, head):
+    _, _, points = p
+    vertices = ''.join(_pt(10, x, y) for x, y in points)
+    return (f"{head}100\nAcDbLeader\n3\n{DIMSTYLE_NAME}\n71\n1\n72\n0\n73\n3\n74\n0\n75\n0\n40\n0.0\n41\n0.0\n"
+            f"76\n{len(points)}\n{vertices}")
+
+
+def _fmt_solid(p, head):
+    _, _, (a, b, c) = p
+    return f"{head}100\nAcDbTrace\n{_pt(10, *a)}{_pt(11, *b)}{_pt(12, *c)}{_pt(13, *c)}"
+
+
+def _fmt_hatch(p, head):
+    _, _, pattern, scale, boxes, seeds = p
+    definition = HATCH_PATTERNS.get(pattern.upper(), HATCH_PATTERNS[DEFAULT_HATCH_PATTERN])
+    solid = pattern.upper() == 'SOLID'
+    paths = ''.join(f"92\n3\n72\n0\n73\n1\n93\n4\n10\n{_real(x1)}\n20\n{_real(y1)}\n10\n{_real(x2)}\n20\n{_real(y1)}\n"
+                    f"10\n{_real(x2)}\n20\n{_real(y2)}\n10\n{_real(x1)}\n20\n{_real(y2)}\n97\n0\n"
+                    for x1, y1, x2, y2 in boxes)
+    out = [f"{head}100\nAcDbHatch\n{_pt(10, 0, 0)}210\n0.0\n220\n0.0\n230\n1.0\n2\n{_txt(pattern)}\n"
+           f"70\n{1 if solid else 0}\n71\n0\n91\n{len(boxes)}\n{paths}75\n1\n76\n1\n"]
+    if not solid:
+        out.append(f"52\n0.0\n41\n{_real(scale)}\n77\n0\n78\n{len(definition)}\n")
+        for angle, bx, by, dx, dy, dashes in definition:
+            # Pattern offsets are stored rotated by the line angle and scaled.
+            a = math.radians(angle)
+            ox, oy = (dx * math.cos(a) - dy * math.sin(a)) * scale, (dx * math.sin(a) + dy * math.cos(a)) * scale
+            out.append(f"53\n{_real(angle)}\n43\n{_real(bx * scale)}\n44\n{_real(by * scale)}\n"
+                       f"45\n{_real(ox)}\n46\n{_real(oy)}\n79\n{len(dashes)}\n")
+            out.extend(f"49\n{_real(dash * scale)}\n" for dash in dashes)
+    out.append(f"98\n{len(seeds)}\n")
+    out.extend(f"10\n{_real(x)}\n20\n{_real(y)}\n" for x, y in seeds)
+    return ''.join(out)
+
+
+def _fmt_dimension(p, head):
+    _, _, entity, block, text_pos = p
+    text = _txt(entity.text or '')
+    if entity.kind == 'dim_linear':
+        if entity.rotation == 0.0:
+            defpoint = (entity.x2, entity.ty)
+        else:
+            defpoint = (entity.tx, entity.y2)
+        return (f"{head}100\nAcDbDimension\n2\n{block}\n{_pt(10, *defpoint)}{_pt(11, *text_pos)}70\n32\n71\n5\n1\n{text}\n"
+                f"3\n{DIMSTYLE_NAME}\n100\nAcDbAlignedDimension\n{_pt(13, entity.x1, entity.y1)}{_pt(14, entity.x2, entity.y2)}"
+                f"50\n{_real(entity.rotation)}\n100\nAcDbRotatedDimension\n")
+    far, chord = _diameter_points(entity)
+    # 70: diameter type (3) + unique block (32) + text at the picked location (128).
+    return (f"{head}100\nAcDbDimension\n2\n{block}\n{_pt(10, *far)}{_pt(11, *text_pos)}70\n163\n71\n5\n1\n{text}\n"
+            f"3\n{DIMSTYLE_NAME}\n100\nAcDbDiametricDimension\n{_pt(15, *chord)}40\n0.0\n")
+
+
+_FORMATTERS = {
+    'LINE': _fmt_line,
+    'LWPOLYLINE': _fmt_lwpolyline,
+    'CIRCLE': _fmt_circle,
+    'ARC': _fmt_arc,
+    'TEXT': _fmt_text,
+    'LEADER': _fmt_leader,
+    'SOLID': _fmt_solid,
+    'HATCH': _fmt_hatch,
+    'DIMENSION': _fmt_dimension,
+}
+
+
+def _xdata(tag) -> str:
+    component, view, feature = tag
+    return f"1001\n{TAG_APP_NAME}\n1000\n{_txt(component)}\n1000\n{_txt(view)}\n1000\n{_txt(feature)}\n"
+
+
+# ==============================================================================
+# Geometry: the primitives each IR entity is drawn with
+# ==============================================================================
+def _polar(x, y, angle_deg, dist):
+    a = math.radians(angle_deg)
+    return x + dist * math.cos(a), y + dist * math.sin(a)
+
+
+def _rect_points(x1, y1, x2, y2):
+    return ((x1, y1), (x2, y1), (x2, y2), (x1, y2))
+
+
+def _angle_deg(cx, cy, x, y) -> float:
+    return math.degrees(math.atan2(y - cy, x - cx)) % 360.0
+
+
+def _diameter_points(entity):
+    """(far point, chord point) of a diameter dimension on the line from the center through the picked point."""
+    ang = math.atan2(entity.py - entity.cy, entity.px - entity.cx)
+    dx, dy = entity.r * math.cos(ang), entity.r * math.sin(ang)
+    return (entity.cx - dx, entity.cy - dy), (entity.cx + dx, entity.cy + dy)
+
+
+def _dim_text(entity, measurement: float, prefix: str = '') -> str:
+    """Text a dimension shows: the override with '<>' replaced by the measured value, or the value itself."""
+    value = f"{measurement:.{DIM_DECIMALS}f}"
+    if entity.text is None:
+        return prefix + value
+    return entity.text.replace('<>', value)
+
+
+def helper_primitives(entity, text_height):
+    """Primitives drawn by the runtime helper of an annotation or table entity (mirrors lisp_runtime)."""
+    kind, lay = entity.kind, entity.layer
+    th = text_height
+    if kind == 'roughness':
+        size, rotation = entity.size, entity.rotation
+        h = size * 0.4
+        p2 = _polar(entity.x, entity.y, rotation + 60.0, size)
+        p3 = _polar(*p2, rotation + 120.0, size)
+        return [('LWPOLYLINE', lay, ((entity.x, entity.y), p2, p3), False),
+                ('LINE', lay, *p3, *_polar(*p3, rotation, size * 1.5)),
+                ('TEXT', lay, *_polar(*p2, rotation + 90.0, h * 0.4), h, rotation, entity.text, 'bl')]
+    if kind == 'datum':
+        lx, ly = entity.lx, entity.ly
+        return [('LEADER', lay, ((entity.ax, entity.ay), (lx, ly))),
+                ('LWPOLYLINE', lay, _rect_points(lx - th, ly - th, lx + th, ly + th), True),
+                ('TEXT', lay, lx, ly, th, 0.0, f"-{entity.label}-", 'mc')]
+    if kind == 'gdt':
+        box_w, box_h = th * 2.5, th * 2.0
+        x, y0 = entity.fx, entity.fy
+        mid_y = y0 + box_h / 2.0
+        total_width = box_w * 3 + len(entity.datums) * box_w
+        side = entity.leader_side
+        end = (x, mid_y) if not side or side.upper() == 'LEFT' else (x + total_width, mid_y)
+        out = [('LEADER', lay, ((entity.ax, entity.ay), end)),
+               ('LWPOLYLINE', lay, _rect_points(x, y0, x + box_w, y0 + box_h), True),
+               ('TEXT', lay, x + box_w / 2.0, mid_y, th, 0.0, entity.symbol, 'mc')]
+        x += box_w
+        out.append(('LWPOLYLINE', lay, _rect_points(x, y0, x + box_w * 2, y0 + box_h), True))
+        out.append(('TEXT', lay, x + box_w, mid_y, th, 0.0, entity.tolerance, 'mc'))
+        x += box_w * 2
+        for datum in entity.datums:
+            out.append(('LWPOLYLINE', lay, _rect_points(x, y0, x + box_w, y0 + box_h), True))
+            out.append(('TEXT', lay, x + box_w / 2.0, mid_y, th, 0.0, datum, 'mc'))
+            x += box_w
+        return out
+    if kind == 'balloon':
+        return [('CIRCLE', lay, entity.cx, entity.cy, entity.radius),
+                ('TEXT', lay, entity.cx, entity.cy, entity.text_height, 0.0, entity.text, 'mc')]
+    if kind == 'table':
+        return _table_primitives(entity)
+    raise ValueError(f"Entity kind '{kind}' is not drawn by a runtime helper.")
+
+
+def _table_primitives(table):
+    lay, rows, widths = table.layer, table.rows, table.col_widths
+    if not rows:
+        return []
+    row_height, th = table.row_height, table.text_height
+    header_height = row_height * 1.5
+    total_height, total_width = header_height + len(rows) * row_height, sum(widths)
+    x0, y0 = table.x, table.y
+    full_dividers = table.style != 'parameters'
+    out = [('LWPOLYLINE', lay, _rect_points(x0, y0, x0 + total_width, y0 - total_height), True),
+           ('LINE', lay, x0, y0 - header_height, x0 + total_width, y0 - header_height)]
+    x = x0
+    for w in widths[:-1]:
+        x += w
+        out.append(('LINE', lay, x, y0 if full_dividers else y0 - header_height, x, y0 - total_height))
+    out.append(('TEXT', lay, x0 + total_width / 2.0, y0 - header_height / 2.0, th * 1.2, 0.0, table.title, 'mc'))
+    current_y = y0 - header_height
+    for i, row in enumerate(rows, start=1):
+        text_mid_y, x = current_y - row_height / 2.0, x0
+        for item, w in zip(row, widths):
+            out.append(('TEXT', lay, x + w / 2.0, text_mid_y, th, 0.0, item, 'mc'))
+            x += w
+        current_y -= row_height
+        if i < len(rows):
+            out.append(('LINE', lay, x0, current_y, x0 + total_width, current_y))
+    return out
+
+
+def arrowhead(tip, toward, size):
+    """Closed filled arrowhead with its tip at `tip`, pointing away from `toward`."""
+    dx, dy = toward[0] - tip[0], toward[1] - tip[1]
+    length = math.hypot(dx, dy) or 1.0
+    ux, uy = dx / length, dy / length
+    bx, by = tip[0] + ux * size, tip[1] + uy * size
+    w = size / 6.0
+    return ('SOLID', '0', (tip, (bx - uy * w, by + ux * w), (bx + uy * w, by - ux * w)))
+
+
+def text_box(p, height_factor: float = 1.0):
+    """
+    Corners of the box a TEXT primitive occupies, estimated from its character count.
+    `height_factor` scales the box height (the preview greeks texts as thinner bars).
+    """
+    _, _, x, y, h, rotation, text, align = p
+    w = len(_TEXT_CODES.sub('_', str(text))) * h * TEXT_WIDTH_FACTOR
+    bar = h * height_factor
+    x0 = {'bl': 0.0, 'ml': 0.0, 'mc': -w / 2.0, 'mr': -w}[align]
+    y0 = 0.0 if align == 'bl' else -bar / 2.0
+    a = math.radians(rotation)
+    cos_a, sin_a = math.cos(a), math.sin(a)
+    return [(x + cx * cos_a - cy * sin_a, y + cx * sin_a + cy * cos_a)
+            for cx, cy in ((x0, y0), (x0 + w, y0), (x0 + w, y0 + bar), (x0, y0 + bar))]
+
+
+def dimension_block(entity, dim_opts):
+    """(text position, primitives of the dimension's geometry block) for a dimension that has one."""
+    th, asz = dim_opts.get('text_height', 3.5), dim_opts.get('arrow_size', 2.5)
+    if entity.kind == 'dim_linear':
+        x1, y1, x2, y2 = entity.x1, entity.y1, entity.x2, entity.y2
+        if entity.rotation == 0.0:
+            d1, d2 = (x1, entity.ty), (x2, entity.ty)
+            s1, s2 = (1 if entity.ty >= y1 else -1), (1 if entity.ty >= y2 else -1)
+            ext = [('LINE', '0', x1, y1 + s1 * DIM_EXT_OFFSET, x1, entity.ty + s1 * DIM_EXT_EXTENSION),
+                   ('LINE', '0', x2, y2 + s2 * DIM_EXT_OFFSET, x2, entity.ty + s2 * DIM_EXT_EXTENSION)]
+            text_pos, rotation = ((x1 + x2) / 2.0, entity.ty + DIM_TEXT_GAP + th / 2.0), 0.0
+            measurement = abs(x2 - x1)
+        else:
+            d1, d2 = (entity.tx, y1), (entity.tx, y2)
+            s1, s2 = (1 if entity.tx >= x1 else -1), (1 if entity.tx >= x2 else -1)
+            ext = [('LINE', '0', x1 + s1 * DIM_EXT_OFFSET, y1, entity.tx + s1 * DIM_EXT_EXTENSION, y1),
+                   ('LINE', '0', x2 + s2 * DIM_EXT_OFFSET, y2, entity.tx + s2 * DIM_EXT_EXTENSION, y2)]
+            text_pos, rotation = (entity.tx - DIM_TEXT_GAP - th / 2.0, (y1 + y2) / 2.0), 90.0
+            measurement = abs(y2 - y1)
+        prims = ext + [('LINE', '0', *d1, *d2), arrowhead(d1, d2, asz), arrowhead(d2, d1, asz),
+                       ('TEXT', '0', *text_pos, th, rotation, _dim_text(entity, measurement), 'mc')]
+        return text_pos, prims
+    far, chord = _diameter_points(entity)
+    text_pos = (entity.tx, entity.ty)
+    prims = [('LINE', '0', *far, *chord), arrowhead(far, chord, asz), arrowhead(chord, far, asz)]
+    if math.hypot(entity.tx - entity.cx, entity.ty - entity.cy) > entity.r:
+        prims.append(('LINE', '0', *chord, *text_pos))
+    align = 'ml' if entity.tx >= entity.cx else 'mr'
+    prims.append(('TEXT', '0', *text_pos, th, 0.0, _dim_text(entity, 2 * entity.r, '%%c'), align))
+    return text_pos, prims
+
+
+def _has_block(entity) -> bool:
+    return entity.kind == 'dim_linear' or (entity.kind == 'dim_diameter' and entity.r is not None)
+
+
+def _segments(entity):
+    kind = entity.kind
+    if kind == 'line':
+        return ((entity.x1, entity.y1, entity.x2, entity.y2),)
+    if kind in ('rect', 'polygon'):
+        points = _rect_points(entity.x1, entity.y1, entity.x2, entity.y2) if kind == 'rect' else entity.vertices()
+        return tuple((*points[i - 1], *points[i]) for i in range(len(points)))
+    return ()
+
+
+def hatch_segments(entities) -> dict:
+    """Segments of every view that contains a hatch, keyed by (component, view)."""
+    segments = {(e.component, e.view): [] for e in entities if e.kind == 'hatch'}
+    if segments:
+        for entity in entities:
+            target = segments.get((entity.component, entity.view))
+            if target is not None:
+                target.extend(_segments(entity))
+    return segments
+
+
+def hatch_boxes(segments, pick_points):
+    """
+    (boxes, unenclosed pick points): the rectangle around each pick point bounded by the nearest
+    of `segments` (those of the hatch's view) in each axis direction.
+    """
+    boxes, missed = [], []
+    for px, py in pick_points:
+        left, right, bottom, top = -math.inf, math.inf, -math.inf, math.inf
+        for ax, ay, bx, by in segments:
+            if ay != by and min(ay, by) <= py <= max(ay, by):
+                x = ax + (py - ay) * (bx - ax) / (by - ay)
+                if x < px - 1e-9:
+                    left = max(left, x)
+                elif x > px + 1e-9:
+                    right = min(right, x)
+            if ax != bx and min(ax, bx) <= px <= max(ax, bx):
+                y = ay + (px - ax) * (by - ay) / (bx - ax)
+                if y < py - 1e-9:
+                    bottom = max(bottom, y)
+                elif y > py + 1e-9:
+                    top = min(top, y)
+        if math.inf in (-left, right, -bottom, top):
+            missed.append((px, py))
+        else:
+            boxes.append((left, bottom, right, top))
+    return boxes, missed
+
+
+def entity_primitives(entity, text_height, segments=None, warn=None, block=None) -> list:
+    """
+    Primitives one IR entity is drawn with. A dimension that has a geometry block is one
+    ('DIMENSION', layer, entity, block name, text position) record; see dimension_block.
+    `segments` are hatch_segments of the drawing; `warn` receives what cannot be drawn exactly.
+    """
+    warn = warn or (lambda message: None)
+    kind, lay = entity.kind, entity.layer
+    if kind == 'line':
+        return [('LINE', lay, entity.x1, entity.y1, entity.x2, entity.y2)]
+    if kind == 'rect':
+        return [('LWPOLYLINE', lay, _rect_points(entity.x1, entity.y1, entity.x2, entity.y2), True)]
+    if kind == 'polygon':
+        return [('LWPOLYLINE', lay, entity.vertices(), True)]
+    if kind == 'circle':
+        return [('CIRCLE', lay, entity.cx, entity.cy, entity.r)]
+    if kind == 'arc':
+        return [('ARC', lay, entity.cx, entity.cy, entity.radius, _angle_deg(entity.cx, entity.cy, entity.sx, entity.sy),
+                 _angle_deg(entity.cx, entity.cy, entity.ex, entity.ey))]
+    if kind == 'leader':
+        return [('LEADER', lay, ((entity.x1, entity.y1), (entity.x2, entity.y2)))]
+    if kind in ('dim_linear', 'dim_diameter'):
+        if _has_block(entity):
+            return [('DIMENSION', lay, entity, block, None)]
+        # No circle or arc passes through the picked point (Drawing.dim_diameter looks for one), so there is
+        # nothing to measure: the dimension is drawn as a leader with its text.
+        warn(f"Diameter dimensions picked off any circle are drawn as leaders without a value ({entity.view}).")
+        align = 'ml' if entity.tx >= entity.px else 'mr'
+        return [('LEADER', lay, ((entity.px, entity.py), (entity.tx, entity.ty))),
+                ('TEXT', lay, entity.tx, entity.ty, text_height, 0.0, (entity.text or '%%c').replace('<>', ''), align)]
+    if kind == 'hatch':
+        boxes, missed = hatch_boxes((segments or {}).get((entity.component, entity.view), ()), entity.pick_points)
+        for x, y in missed:
+            warn(f"Hatch pick point ({x:g}, {y:g}) in '{entity.view}' is not enclosed; skipped.")
+        if entity.pattern.upper() not in HATCH_PATTERNS:
+            warn(f"Hatch pattern '{entity.pattern}' is unknown; drawn with {DEFAULT_HATCH_PATTERN} lines.")
+        return [('HATCH', lay, entity.pattern, entity.scale, boxes, entity.pick_points)] if boxes else []
+    if kind == 'comment':
+        return []
+    return helper_primitives(entity, text_height)
+
+
+def _primitive_points(p):
+    """Points whose bounding box is that of a drawn primitive (a DIMENSION must be expanded first)."""
+    kind = p[0]
+    if kind in ('LINE', 'HATCHLINE'):
+        return ((p[2], p[3]), (p[4], p[5]))
+    if kind in ('LWPOLYLINE', 'SOLID', 'LEADER'):
+        return p[2]
+    if kind == 'CIRCLE':
+        _, _, cx, cy, r = p
+        return ((cx - r, cy - r), (cx + r, cy + r))
+    if kind == 'ARC':
+        _, _, cx, cy, r, start, end = p
+        sweep = (end - start) % 360.0 or 360.0
+        # The end points, and the quadrant points the counter-clockwise sweep passes.
+        angles = [start, start + sweep] + [q for q in range(0, 720, 90) if start < q < start + sweep]
+        return [_polar(cx, cy, a, r) for a in angles]
+    if kind == 'TEXT':
+        return text_box(p)
+    if kind == 'HATCH':
+        return [corner for x1, y1, x2, y2 in p[4] for corner in ((x1, y1), (x2, y2))]
+    return ()
+
+
+def primitive_extents(primitives):
+    """(min_x, min_y, max_x, max_y) of what the primitives draw, texts included; None when nothing is drawn."""
+    min_x = min_y = math.inf
+    max_x = max_y = -math.inf
+    for p in primitives:
+        for x, y in _primitive_points(p):
+            min_x, max_x = min(min_x, x), max(max_x, x)
+            min_y, max_y = min(min_y, y), max(max_y, y)
+    return (min_x, min_y, max_x, max_y) if min_x <= max_x else None
+
+
+def drawing_primitives(drawing, segments=None):
+    """
+    Everything the drawing shows, as primitives: dimensions expanded into their block geometry
+    and leaders given their arrowheads. This is what previews draw and what the DXF extents cover.
+    """
+    text_height = drawing.dim_opts.get('text_height', 3.5)
+    arrow_size = drawing.dim_opts.get('arrow_size', 2.5)
+    if segments is None:
+        segments = hatch_segments(drawing.entities)
+    for entity in drawing.entities:
+        if entity.kind == 'comment':
+            continue
+        for p in entity_primitives(entity, text_height, segments):
+            if p[0] == 'DIMENSION':
+                yield from dimension_block(entity, drawing.dim_opts)[1]
+            else:
+                yield p
+                if p[0] == 'LEADER':
+                    yield arrowhead(p[2][0], p[2][1], arrow_size)
+
+
+# ==============================================================================
+# Writer
+# ==============================================================================
+class DxfWriter:
+    """Streams one Drawing to a text stream as a DXF R2013 file; see write_dxf."""
+
+    def __init__(self, drawing, stream, tagging: bool = False):
+        self.drawing = drawing
+        self.stream = stream
+        self.tagging = tagging
+        self.text_height = drawing.dim_opts.get('text_height', 3.5)
+        self.stats = {'entities': 0, 'dimensions': 0, 'hatches': 0, 'warnings': []}
+        self.extents = None
+        self.h = {}
+        self._buffer, self._buffered = [], 0
+        self._next_handle = 1
+        self._hatch_segments = {}
+
+    # --- Output ---
+    def _write(self, text: str):
+        self._buffer.append(text)
+        self._buffered += len(text)
+        if self._buffered >= FLUSH_CHARS:
+            self._flush()
+
+    def _flush(self):
+        self.stream.write(''.join(self._buffer))
+        self._buffer, self._buffered = [], 0
+
+    def _handle(self) -> int:
+        handle = self._next_handle
+        self._next_handle += 1
+        return handle
+
+    def _warn(self, message: str):
+        if message not in self.stats['warnings']:
+            self.stats['warnings'].append(message)
+
+    # --- Entity expansion ---
+    def _primitives(self, entity, block=None):
+        return entity_primitives(entity, self.text_height, self._hatch_segments, self._warn, block)
+
+    def _plan(self):
+        """
+        First pass: layers in use, number of dimension blocks, handles needed (an upper bound), and
+        the segments of the views that contain hatches.
+        """
+        layers = {'0': {'name': '0', 'color': 7}}
+        for info in list(self.drawing.layers.values()) + [PARAM_TABLE_LAYER]:
+            layers.setdefault(info['name'], info)
+        blocks = handles = 0
+        for entity in self.drawing.entities:
+            if entity.layer is not None and entity.layer not in layers:
+                layers[entity.layer] = {'name': entity.layer, 'color': 7}
+            if entity.kind in ('dim_linear', 'dim_diameter') and _has_block(entity):
+                blocks += 1
+                handles += 3 + len(dimension_block(entity, self.drawing.dim_opts)[1])
+            elif entity.kind == 'hatch':
+                handles += 1
+            elif entity.kind != 'comment':
+                handles += len(self._primitives(entity))
+        self.stats['warnings'].clear()
+        self._hatch_segments = hatch_segments(self.drawing.entities)
+        self.extents = primitive_extents(drawing_primitives(self.drawing, self._hatch_segments))
+        linetypes = {}
+        for info in layers.values():
+            name = info.get('linetype') or 'Continuous'
+            if name.upper() not in ('CONTINUOUS', 'BYLAYER', 'BYBLOCK'):
+                if name.upper() not in LINETYPES:
+                    self._warn(f"Linetype '{name}' is not in acad.lin; drawn continuous.")
+                linetypes.setdefault(name.upper(), name)
+        return layers, linetypes, blocks, handles
+
+    # --- Sections ---
+    def write(self) -> dict:
+        layers, linetypes, blocks, entity_handles = self._plan()
+        # Handles of the objects that others point to are fixed up front.
+        self.h = {name: self._handle() for name in (
+            'root', 'groups', 'layouts', 'plotstyles', 'placeholder', 'model_layout', 'paper_layout',
+            'VPORT', 'LTYPE', 'LAYER', 'STYLE', 'VIEW', 'UCS', 'APPID', 'DIMSTYLE', 'BLOCK_RECORD',
+            'model_record', 'paper_record', 'model_block', 'model_end', 'paper_block', 'paper_end', 'style')}
+        table_records = 1 + 3 + len(linetypes) + len(layers) + 2 + 2
+        self._first_block_record = self._next_handle + table_records
+        handseed = self._first_block_record + blocks + entity_handles + 1
+
+        self._write_header(handseed)
+        self._write("0\nSECTION\n2\nCLASSES\n0\nENDSEC\n")
+        self._write_tables(layers, linetypes, blocks)
+        self._write_blocks()
+        self._write_entities()
+        self._write_objects()
+        self._write("0\nEOF\n")
+        self._flush()
+        if self._next_handle > handseed:
+            raise RuntimeError(f"DXF handle plan was exceeded ({self._next_handle:X} > {handseed:X}).")
+        return self.stats
+
+    def _write_header(self, handseed: int):
+        dim_opts = self.drawing.dim_opts
+        extents = self.extents or (0.0, 0.0, 0.0, 0.0)
+        self._write(f"0\nSECTION\n2\nHEADER\n9\n$ACADVER\n1\n{DXF_VERSION}\n9\n$DWGCODEPAGE\n3\nANSI_1252\n"
+                    f"9\n$HANDSEED\n5\n{handseed:X}\n9\n$INSUNITS\n70\n4\n9\n$MEASUREMENT\n70\n1\n"
+                    f"9\n$EXTMIN\n{_pt(10, extents[0], extents[1])}9\n$EXTMAX\n{_pt(10, extents[2], extents[3])}"
+                    f"9\n$LTSCALE\n40\n{_real(LTSCALE)}\n9\n$CLAYER\n8\n0\n9\n$DIMSTYLE\n2\n{DIMSTYLE_NAME}\n"
+                    f"9\n$DIMTXT\n40\n{_real(dim_opts.get('text_height', 3.5))}\n"
+                    f"9\n$DIMASZ\n40\n{_real(dim_opts.get('arrow_size', 2.5))}\n9\n$DIMDEC\n70\n{DIM_DECIMALS}\n"
+                    f"0\nENDSEC\n")
+
+    def _table(self, name: str, count: int, extra: str = ''):
+        self._write(f"0\nTABLE\n2\n{name}\n5\n{self.h[name]:X}\n330\n0\n100\nAcDbSymbolTable\n70\n{count}\n{extra}")
+
+    def _record(self, table: str, subclass: str, name: str, handle_code: int = 5, handle: int = None) -> str:
+        handle = handle or self._handle()
+        return (f"0\n{table}\n{handle_code}\n{handle:X}\n330\n{self.h[table]:X}\n100\nAcDbSymbolTableRecord\n"
+                f"100\n{subclass}\n2\n{_txt(name)}\n70\n0\n")
+
+    def _write_tables(self, layers: dict, linetypes: dict, blocks: int):
+        h = self.h
+        dim_opts, dim_color = self.drawing.dim_opts, self.drawing.layers.get('dimensions', {}).get('color', 7)
+        extents = self.extents or (0.0, 0.0, 100.0, 100.0)
+        center = ((extents[0] + extents[2]) / 2.0, (extents[1] + extents[3]) / 2.0)
+        view_height = max(extents[3] - extents[1], (extents[2] - extents[0]) / 1.5, 1.0) * 1.1
+        self._write("0\nSECTION\n2\nTABLES\n")
+
+        self._table('VPORT', 1)
+        self._write(f"{self._record('VPORT', 'AcDbViewportTableRecord', '*Active')}"
+                    f"10\n0.0\n20\n0.0\n11\n1.0\n21\n1.0\n12\n{_real(center[0])}\n22\n{_real(center[1])}\n13\n0.0\n23\n0.0\n14\n10.0\n24\n10.0\n"
+                    f"15\n10.0\n25\n10.0\n16\n0.0\n26\n0.0\n36\n1.0\n17\n0.0\n27\n0.0\n37\n0.0\n"
+                    f"40\n{_real(view_height)}\n41\n1.5\n42\n50.0\n43\n0.0\n44\n0.0\n50\n0.0\n51\n0.0\n"
+                    f"71\n0\n72\n1000\n73\n1\n74\n3\n75\n0\n76\n0\n77\n0\n78\n0\n281\n0\n65\n0\n146\n0.0\n0\nENDTAB\n")
+
+        self._table('LTYPE', 3 + len(linetypes))
+        for name in ('ByBlock', 'ByLayer', 'Continuous'):
+            description = 'Solid line' if name == 'Continuous' else ''
+            self._write(f"{self._record('LTYPE', 'AcDbLinetypeTableRecord', name)}3\n{description}\n72\n65\n73\n0\n40\n0.0\n")
+        for key, name in linetypes.items():
+            description, dashes = LINETYPES.get(key, ('', ()))
+            elements = ''.join(f"49\n{_real(d)}\n74\n0\n" for d in dashes)
+            self._write(f"{self._record('LTYPE', 'AcDbLinetypeTableRecord', name)}3\n{description}\n72\n65\n"
+                        f"73\n{len(dashes)}\n40\n{_real(sum(abs(d) for d in dashes))}\n{elements}")
+        self._write("0\nENDTAB\n")
+
+        self._table('LAYER', len(layers))
+        for info in layers.values():
+            linetype = info.get('linetype') or 'Continuous'
+            if linetype.upper() == 'CONTINUOUS':
+                linetype = 'Continuous'
+            self._write(f"{self._record('LAYER', 'AcDbLayerTableRecord', info['name'])}"
+                        f"62\n{int(info.get('color', 7))}\n6\n{_txt(linetype)}\n370\n-3\n390\n{h['placeholder']:X}\n")
+        self._write("0\nENDTAB\n")
+
+        self._table('STYLE', 1)
+        self._write(f"{self._record('STYLE', 'AcDbTextStyleTableRecord', 'Standard', handle=h['style'])}"
+                    f"40\n0.0\n41\n1.0\n50\n0.0\n71\n0\n42\n2.5\n3\ntxt\n4\n\n0\nENDTAB\n")
+        self._table('VIEW', 0)
+        self._write("0\nENDTAB\n")
+        self._table('UCS', 0)
+        self._write("0\nENDTAB\n")
+
+        self._table('APPID', 2)
+        for name in ('ACAD', TAG_APP_NAME):
+            self._write(self._record('APPID', 'AcDbRegAppTableRecord', name))
+        self._write("0\nENDTAB\n")
+
+        self._table('DIMSTYLE', 2, "100\nAcDbDimStyleTable\n71\n0\n")
+        self._write(self._record('DIMSTYLE', 'AcDbDimStyleTableRecord', 'Standard', handle_code=105))
+        self._write(f"{self._record('DIMSTYLE', 'AcDbDimStyleTableRecord', DIMSTYLE_NAME, handle_code=105)}"
+                    f"40\n1.0\n41\n{_real(dim_opts.get('arrow_size', 2.5))}\n42\n{_real(DIM_EXT_OFFSET)}\n"
+                    f"44\n{_real(DIM_EXT_EXTENSION)}\n140\n{_real(dim_opts.get('text_height', 3.5))}\n"
+                    f"147\n{_real(DIM_TEXT_GAP)}\n73\n0\n74\n0\n77\n1\n78\n0\n176\n{dim_color}\n177\n{dim_color}\n"
+                    f"178\n{dim_color}\n271\n{DIM_DECIMALS}\n340\n{h['style']:X}\n0\nENDTAB\n")
+
+        self._table('BLOCK_RECORD', 2 + blocks)
+        self._write(f"{self._record('BLOCK_RECORD', 'AcDbBlockTableRecord', '*Model_Space', handle=h['model_record'])}"
+                    f"340\n{h['model_layout']:X}\n280\n1\n281\n0\n")
+        self._write(f"{self._record('BLOCK_RECORD', 'AcDbBlockTableRecord', '*Paper_Space', handle=h['paper_record'])}"
+                    f"340\n{h['paper_layout']:X}\n280\n1\n281\n0\n")
+        for i in range(blocks):
+            self._write(f"{self._record('BLOCK_RECORD', 'AcDbBlockTableRecord', f'*D{i + 1}', handle=self._first_block_record + i)}"
+                        f"340\n0\n280\n1\n281\n0\n")
+        self._next_handle = self._first_block_record + blocks
+        self._write("0\nENDTAB\n0\nENDSEC\n")
+
+    def _block(self, name: str, record: int, begin: int, end: int, body: str = ''):
+        self._write(f"0\nBLOCK\n5\n{begin:X}\n330\n{record:X}\n100\nAcDbEntity\n8\n0\n100\nAcDbBlockBegin\n"
+                    f"2\n{name}\n70\n{1 if name.startswith('*D') else 0}\n{_pt(10, 0, 0)}3\n{name}\n1\n\n{body}"
+                    f"0\nENDBLK\n5\n{end:X}\n330\n{record:X}\n100\nAcDbEntity\n8\n0\n100\nAcDbBlockEnd\n")
+
+    def _write_blocks(self):
+        h = self.h
+        self._write("0\nSECTION\n2\nBLOCKS\n")
+        self._block('*Model_Space', h['model_record'], h['model_block'], h['model_end'])
+        self._block('*Paper_Space', h['paper_record'], h['paper_block'], h['paper_end'])
+        number = 0
+        for entity in self.drawing.entities:
+            if entity.kind not in ('dim_linear', 'dim_diameter') or not _has_block(entity):
+                continue
+            record = self._first_block_record + number
+            number += 1
+            begin = self._handle()
+            body = ''.join(_FORMATTERS[p[0]](p, _entity_head(p[0], self._handle(), record, p[1], 0))
+                           for p in dimension_block(entity, self.drawing.dim_opts)[1])
+            self._block(f"*D{number}", record, begin, self._handle(), body)
+        self._write("0\nENDSEC\n")
+
+    def _write_entities(self):
+        owner, dim_opts = self.h['model_record'], self.drawing.dim_opts
+        tags = self.drawing.tags() if self.tagging else None
+        stats = self.stats
+        number = 0
+        self._write("0\nSECTION\n2\nENTITIES\n")
+        for i, entity in enumerate(self.drawing.entities):
+            kind = entity.kind
+            if kind == 'comment':
+                continue
+            block = None
+            if kind in ('dim_linear', 'dim_diameter') and _has_block(entity):
+                number += 1
+                block = f"*D{number}"
+                stats['dimensions'] += 1
+            xdata = _xdata(tags[i]) if tags else ''
+            for p in self._primitives(entity, block):
+                if p[0] == 'DIMENSION':
+                    p = p[:4] + (dimension_block(entity, dim_opts)[0],)
+                elif p[0] == 'HATCH':
+                    stats['hatches'] += 1
+                self._write(_FORMATTERS[p[0]](p, _entity_head(p[0], self._handle(), owner, p[1], None)) + xdata)
+                stats['entities'] += 1
+        self._write("0\nENDSEC\n")
+
+    def _write_objects(self):
+        h = self.h
+
+        def dictionary(handle, owner, entries=()):
+            items = ''.join(f"3\n{name}\n350\n{target:X}\n" for name, target in entries)
+            return f"0\nDICTIONARY\n5\n{handle:X}\n330\n{owner:X}\n100\nAcDbDictionary\n281\n1\n{items}"
+
+        def layout(handle, name, flags, tab_order, record):
+            return (f"0\nLAYOUT\n5\n{handle:X}\n330\n{h['layouts']:X}\n100\nAcDbPlotSettings\n1\n\n4\nA3\n6\n\n"
+                    f"40\n7.5\n41\n20.0\n42\n7.5\n43\n20.0\n44\n420.0\n45\n297.0\n46\n0.0\n47\n0.0\n48\n0.0\n49\n0.0\n"
+                    f"140\n0.0\n141\n0.0\n142\n1.0\n143\n1.0\n70\n{flags}\n72\n1\n73\n0\n74\n5\n7\n\n75\n16\n76\n0\n"
+                    f"77\n2\n78\n300\n147\n1.0\n148\n0.0\n149\n0.0\n100\nAcDbLayout\n1\n{name}\n70\n1\n71\n{tab_order}\n"
+                    f"10\n0.0\n20\n0.0\n11\n420.0\n21\n297.0\n12\n0.0\n22\n0.0\n32\n0.0\n"
+                    f"14\n1e+20\n24\n1e+20\n34\n1e+20\n15\n-1e+20\n25\n-1e+20\n35\n-1e+20\n146\n0.0\n"
+                    f"13\n0.0\n23\n0.0\n33\n0.0\n16\n1.0\n26\n0.0\n36\n0.0\n17\n0.0\n27\n1.0\n37\n0.0\n76\n1\n"
+                    f"330\n{record:X}\n")
+
+        self._write("0\nSECTION\n2\nOBJECTS\n")
+        self._write(dictionary(h['root'], 0, (('ACAD_GROUP', h['groups']), ('ACAD_LAYOUT', h['layouts']),
+                                              ('ACAD_PLOTSTYLENAME', h['plotstyles']))))
+        self._write(dictionary(h['groups'], h['root']))
+        self._write(dictionary(h['layouts'], h['root'], (('Model', h['model_layout']), ('Layout1', h['paper_layout']))))
+        self._write(f"0\nACDBDICTIONARYWDFLT\n5\n{h['plotstyles']:X}\n330\n{h['root']:X}\n100\nAcDbDictionary\n281\n1\n"
+                    f"3\nNormal\n350\n{h['placeholder']:X}\n100\nAcDbDictionaryWithDefault\n340\n{h['placeholder']:X}\n"
+                    f"0\nACDBPLACEHOLDER\n5\n{h['placeholder']:X}\n330\n{h['plotstyles']:X}\n")
+        self._write(layout(h['model_layout'], 'Model', 1024, 0, h['model_record']))
+        self._write(layout(h['paper_layout'], 'Layout1', 0, 1, h['paper_record']))
+        self._write("0\nENDSEC\n")
+
+
+def write_dxf(drawing, stream, tagging: bool = False) -> dict:
+    """
+    Writes `drawing` to a text stream as a DXF R2013 file. Returns statistics: entities written,
+    dimensions, hatches and warnings about what could not be drawn exactly.
+    """
+    return DxfWriter(drawing, stream, tagging).write()
+
+
+def save_dxf(drawing, path: str, tagging: bool = False) -> dict:
+    """Writes `drawing` to a DXF file (UTF-8, as R2007 and later expect); the stats include its size in bytes."""
+    with open(path, 'w', encoding='utf-8', newline='\n') as f:
+        stats = write_dxf(drawing, f, tagging)
+    stats['bytes'] = os.path.getsize(path)
+    return stats
+
+
+def generate_dxf(shape_type: str, data: dict, path: str) -> dict:
+    """Builds the 2D drawing of a spec and saves it as a DXF file."""
+    from lisp_generator import drawing_builders
+
+    builder = drawing_builders.get(shape_type)
+    if builder is None:
+        raise TypeError(f"Shape '{shape_type}' has no 2D drawing to write as DXF.")
+    return save_dxf(builder(data), path, data['drawing_options'].get('tagging', False))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Write the 2D drawing of a spec as a DXF file, without AutoCAD.")
+    parser.add_argument('spec', help="Spec JSON file.")
+    parser.add_argument('-o', '--output', default='drawing.dxf', help="Output DXF file.")
+    parser.add_argument('--shape', default=None, help="Shape to draw (default: the spec's 'shape').")
+    args = parser.parse_args(argv)
+
+    from fastener_catalog import expand_spec
+
+    with open(args.spec, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    shape_type = args.shape or data.get('shape')
+    try:
+        stats = generate_dxf(shape_type, expand_spec(data, shape_type), args.output)
+    except (TypeError, ValueError, KeyError) as e:
+        print(f"[Error] {type(e).__name__}: {e}")
+        return 1
+    for warning in stats['warnings']:
+        print(f"  [WARN] {warning}")
+    print(f"'{args.output}' written: {stats['entities']} entities ({stats['dimensions']} dimensions, "
+          f"{stats['hatches']} hatches), {stats['bytes']} bytes.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
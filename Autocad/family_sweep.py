@@ -0,0 +1,351 @@
+"""
+Parametric size families for the hexagonal parts (nut, prism, screw).
+
+A family is a template spec (e.g. hex_nut_data.json) plus a parameter table
+with one row per size. Table columns are parameter paths, dotted for nested
+values ('side_length', 'hole.diameter', 'head.side_length'); a 'designation'
+column names each member. Geometry inputs missing from the table are taken
+from the template.
+
+All derived view coordinates of the family are computed in one pass by the
+parts' *_geometry functions in lisp_generator.py, evaluated on NumPy arrays
+instead of scalars. Each member is then drawn either as its own drawing or
+into one tiled family sheet, where the sizes are packed on a grid, numbered
+with balloons and listed in a family table (annotations and per-part
+parameter tables are left out of the sheet).
+
+Usage:
+    python family_sweep.py TABLE.csv --shape hexagonal_nut [--template SPEC.json] [-o OUT_DIR]
+                           [--sheet [--columns N]] [--emitter MODE] [--runtime MODE]
+    python family_sweep.py --catalog "ISO 4032" [--sizes M6 M8 M10] [...]
+    python lisp_generator.py --family TABLE.csv --shape hexagonal_nut [...]
+
+Example table (nuts.csv):
+    designation,side_length,height,hole.diameter
+    M10,9.24,8.4,10
+    M12,10.97,10.8,12
+"""
+import argparse
+import copy
+import csv
+import json
+import math
+import os
+import re
+import sys
+import time
+
+import numpy as np
+
+from drawing_ir import Drawing
+from fastener_catalog import family_table
+from lisp_emitter import EMITTER_MODES, emit_lisp
+from lisp_runtime import RUNTIME_MODES, write_runtime
+from lisp_generator import (hex_nut_geometry, draw_hex_nut, hex_prism_geometry, draw_hex_prism,
+                            hex_screw_geometry, draw_hex_screw)
+
+LABEL_COLUMN = 'designation'
+# Catalog standards that can be drawn as a family, and their shape.
+CATALOG_SHAPES = {'ISO 4032': 'hexagonal_nut', 'ISO 4014': 'hexagonal_screw'}
+SHEET_NAME = "family_sheet.lsp"
+
+
+def _nut_layout(v, spacing):
+    vertex = 2 * v['side_length']
+    return 2 * vertex + spacing, v['height'] + spacing + np.maximum(vertex, v['height'])
+
+
+def _prism_layout(v, spacing):
+    side = v['side_length']
+    return 2 * side + spacing + side * math.sqrt(3), v['height'] + spacing + 2 * side
+
+
+def _screw_layout(v, spacing):
+    side = v['head.side_length']
+    return 2 * side + spacing + side * math.sqrt(3), v['head.height'] + v['shaft.length'] + spacing + 2 * side
+
+
+# Per shape: title, default template, geometry inputs (in *_geometry argument order),
+# the *_geometry/draw_* pair and the (width, height) of the views without margins.
+FAMILY_SHAPES = {
+    'hexagonal_nut': {
+        'title': "Hexagonal Nut", 'template': 'hex_nut_data.json',
+        'inputs': ('side_length', 'height', 'hole.diameter'),
+        'geometry': hex_nut_geometry, 'draw': draw_hex_nut, 'layout': _nut_layout},
+    'hexagonal_prism': {
+        'title': "Hexagonal Prism", 'template': 'hex_prism_data.json',
+        'inputs': ('side_length', 'height'),
+        'geometry': hex_prism_geometry, 'draw': draw_hex_prism, 'layout': _prism_layout},
+    'hexagonal_screw': {
+        'title': "Hexagonal Screw", 'template': 'hex_screw.json',
+        'inputs': ('head.side_length', 'head.height', 'shaft.diameter', 'shaft.length'),
+        'geometry': hex_screw_geometry, 'draw': draw_hex_screw, 'layout': _screw_layout},
+}
+
+
+def _safe_stem(text: str) -> str:
+    return re.sub(r'[^A-Za-z0-9_.-]+', '_', text).strip('_') or 'part'
+
+
+# ==============================================================================
+# Parameter Tables
+# ==============================================================================
+def load_table(source) -> dict:
+    """
+    Reads a parameter table from a CSV path or a mapping of column -> sequence.
+
+    Returns column -> 1-D NumPy array; a column becomes float when every value
+    is numeric and stays a string array otherwise.
+    """
+    if isinstance(source, str):
+        with open(source, 'r', encoding='utf-8-sig', newline='') as f:
+            reader = csv.reader(f)
+            header = [name.strip() for name in next(reader, [])]
+            raw = [row for row in reader if any(cell.strip() for cell in row)]
+        if not header or not raw:
+            raise ValueError(f"Parameter table '{source}' has no header or no rows.")
+        for line_no, row in enumerate(raw, start=2):
+            if len(row) != len(header):
+                raise ValueError(f"Row {line_no} of '{source}' has {len(row)} values, expected {len(header)}.")
+        source = {name: [row[i].strip() for row in raw] for i, name in enumerate(header)}
+
+    table, length = {}, None
+    for name, values in source.items():
+        values = np.asarray(values)
+        if values.ndim != 1:
+            raise ValueError(f"Column '{name}' must be one-dimensional.")
+        if length is not None and len(values) != length:
+            raise ValueError(f"Column '{name}' has {len(values)} values, expected {length}.")
+        length = len(values)
+        try:
+            table[name] = values.astype(float)
+        except ValueError:
+            table[name] = values.astype(str)
+    if not length:
+        raise ValueError("Parameter table has no rows.")
+    return table
+
+
+def _get_path(params: dict, path: str):
+    value = params
+    for key in path.split('.'):
+        value = value[key]
+    return value
+
+
+def _set_path(params: dict, path: str, value):
+    keys = path.split('.')
+    for key in keys[:-1]:
+        params = params.setdefault(key, {})
+    params[keys[-1]] = value
+
+
+def load_template(shape: str, template=None) -> dict:
+    """The spec every family member starts from: a dict, a JSON path, or the shape's sample spec."""
+    if shape not in FAMILY_SHAPES:
+        raise ValueError(f"No family support for shape '{shape}'. Expected one of: {', '.join(FAMILY_SHAPES)}.")
+    if isinstance(template, dict):
+        return template
+    if template is None:
+        template = os.path.join(os.path.dirname(os.path.abspath(__file__)), FAMILY_SHAPES[shape]['template'])
+    with open(template, 'r', encoding='utf-8') as f:
+        return json.load(f)
+
+
+# ==============================================================================
+# Vectorized Geometry
+# ==============================================================================
+def _input_arrays(shape: str, template: dict, table: dict, rows: int) -> dict:
+    """Geometry inputs as float arrays, from the table or broadcast from the template."""
+    arrays = {}
+    for path in FAMILY_SHAPES[shape]['inputs']:
+        if path in table:
+            if table[path].dtype.kind != 'f':
+                raise ValueError(f"Column '{path}' must be numeric.")
+            arrays[path] = table[path]
+        else:
+            try:
+                arrays[path] = np.full(rows, float(_get_path(template['parameters'], path)))
+            except (KeyError, TypeError):
+                raise ValueError(f"'{path}' is neither a table column nor set in the template.") from None
+    bad = [path for path, values in arrays.items() if np.any(~np.isfinite(values) | (values <= 0))]
+    if bad:
+        raise ValueError(f"Non-positive or missing values in: {', '.join(bad)}.")
+    return arrays
+
+
+def family_geometry(shape: str, inputs: dict, ix, iy, spacing) -> list:
+    """Evaluates the shape's *_geometry on whole columns at once; returns one dict of floats per row."""
+    spec = FAMILY_SHAPES[shape]
+    columns = spec['geometry'](*(inputs[path] for path in spec['inputs']), ix, iy, spacing)
+    rows = len(next(iter(inputs.values())))
+    keys = list(columns)
+    values = [np.broadcast_to(np.asarray(columns[key], dtype=float), (rows,)).tolist() for key in keys]
+    return [dict(zip(keys, row)) for row in zip(*values)]
+
+
+def tile_offsets(widths, heights, columns: int):
+    """Lower-left corners of cells packed row by row on a grid of `columns` cells per row."""
+    count = len(widths)
+    grid_rows = -(-count // columns)
+    w = np.zeros(grid_rows * columns)
+    h = np.zeros(grid_rows * columns)
+    w[:count], h[:count] = widths, heights
+    w, h = w.reshape(grid_rows, columns), h.reshape(grid_rows, columns)
+    x = np.cumsum(w, axis=1) - w
+    row_heights = h.max(axis=1)
+    y = np.cumsum(row_heights) - row_heights
+    return x.ravel()[:count], np.repeat(y, columns)[:count]
+
+
+# ==============================================================================
+# Family Builders
+# ==============================================================================
+def _labels(shape: str, table: dict, rows: int) -> list:
+    if LABEL_COLUMN in table:
+        return [str(v) for v in table[LABEL_COLUMN].tolist()]
+    return [f"{shape}_{i + 1:03d}" for i in range(rows)]
+
+
+def _member_specs(template: dict, table: dict, rows: int, annotations: bool = True):
+    """Yields the spec of every family member: the template with the row's table values filled in."""
+    columns = list(table)
+    values = [table[name].tolist() for name in columns]
+    base = template if annotations else {k: v for k, v in template.items()
+                                         if k not in ('datums', 'geometric_tolerances', 'surface_finish')}
+    for i in range(rows):
+        params = copy.deepcopy(template['parameters'])
+        for name, column in zip(columns, values):
+            _set_path(params, name, column[i])
+        yield dict(base, parameters=params)
+
+
+def build_family_drawings(shape: str, table, template=None) -> list:
+    """One (label, Drawing) per table row, each laid out like the single-part drawing."""
+    template = load_template(shape, template)
+    table = load_table(table)
+    rows = len(next(iter(table.values())))
+    spec = FAMILY_SHAPES[shape]
+    opts = template['drawing_options']
+    ix, iy = opts['insertion_point']
+    geometry = family_geometry(shape, _input_arrays(shape, template, table, rows), ix, iy, opts['spacing'])
+    drawings = []
+    for label, data, g in zip(_labels(shape, table, rows), _member_specs(template, table, rows), geometry):
+        title = f"{spec['title']} {label}" if LABEL_COLUMN in table else spec['title']
+        d = Drawing(title, opts['layers'], opts['dimension_options'])
+        spec['draw'](d, data, g)
+        drawings.append((label, d))
+    return drawings
+
+
+def build_family_sheet(shape: str, table, template=None, columns: int = None) -> Drawing:
+    """All table rows tiled on one drawing, numbered with balloons and listed in a family table."""
+    template = load_template(shape, template)
+    table = load_table(table)
+    rows = len(next(iter(table.values())))
+    spec = FAMILY_SHAPES[shape]
+    opts = template['drawing_options']
+    ox, oy = opts['insertion_point']
+    spacing = opts['spacing']
+    text_height = opts['dimension_options'].get('text_height', 3.5)
+    inputs = _input_arrays(shape, template, table, rows)
+
+    widths, heights = spec['layout'](inputs, spacing)
+    widths, heights = widths + 2 * spacing, heights + 2 * spacing
+    columns = columns or max(1, math.ceil(math.sqrt(rows)))
+    x, y = tile_offsets(widths, heights, columns)
+    geometry = family_geometry(shape, inputs, ox + x + spacing, oy + y + spacing, spacing)
+
+    labels = _labels(shape, table, rows)
+    d = Drawing(f"{spec['title']} Family", opts['layers'], opts['dimension_options'])
+    for number, (label, data, g) in enumerate(zip(labels, _member_specs(template, table, rows, False), geometry), 1):
+        d.comment(f"Family Member {number}: {label}")
+        d.component(label)
+        spec['draw'](d, data, g, table=False)
+        d.balloon(g['ix'] - spacing / 2, g['iy'] - spacing / 2, text_height * 2, str(number), text_height)
+
+    header = ['No.', 'Designation'] + [path.replace('.', ' ').replace('_', ' ').title() for path in spec['inputs']]
+    table_rows = [[number, label] + [f"{inputs[path][i]:g}" for path in spec['inputs']]
+                  for i, (number, label) in enumerate(zip(range(1, rows + 1), labels))]
+    d.comment("Family Table")
+    d.component(None)
+    d.family_table(header, table_rows, ox + float(np.max(x + widths)) + spacing, oy + float(np.max(y + heights)))
+    return d
+
+
+def _emit_options(template: dict, emitter: str = None, runtime: str = None):
+    opts = template['drawing_options']
+    return emitter or opts.get('emitter', 'command'), runtime or opts.get('runtime', 'inline'), opts.get('tagging', False)
+
+
+def generate_family(shape: str, table, template=None, emitter: str = None, runtime: str = None) -> list:
+    """One (label, LISP program) per table row."""
+    template = load_template(shape, template)
+    mode, runtime, tagging = _emit_options(template, emitter, runtime)
+    return [(label, emit_lisp(d, mode, runtime, tagging)) for label, d in build_family_drawings(shape, table, template)]
+
+
+def generate_family_sheet(shape: str, table, template=None, columns: int = None,
+                          emitter: str = None, runtime: str = None) -> str:
+    """The tiled family sheet as one LISP program."""
+    template = load_template(shape, template)
+    mode, runtime, tagging = _emit_options(template, emitter, runtime)
+    return emit_lisp(build_family_sheet(shape, table, template, columns), mode, runtime, tagging)
+
+
+# ==============================================================================
+# Command Line
+# ==============================================================================
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Generate a size family of a hexagonal part from a parameter table.")
+    parser.add_argument('table', nargs='?', help="CSV parameter table, one row per size.")
+    parser.add_argument('--shape', choices=sorted(FAMILY_SHAPES))
+    parser.add_argument('--catalog', choices=sorted(CATALOG_SHAPES),
+                        help="Take the sizes from the standard parts catalog instead of a CSV table.")
+    parser.add_argument('--sizes', nargs='+', help="Catalog designations to include (default: all).")
+    parser.add_argument('--template', help="Spec JSON the family starts from (default: the shape's sample spec).")
+    parser.add_argument('-o', '--out', default='family_out', help="Output directory.")
+    parser.add_argument('--sheet', action='store_true', help="Write one tiled family sheet instead of one drawing per row.")
+    parser.add_argument('--columns', type=int, help="Parts per row on the family sheet (default: square grid).")
+    parser.add_argument('--emitter', choices=EMITTER_MODES, help="Override drawing_options['emitter'].")
+    parser.add_argument('--runtime', choices=RUNTIME_MODES,
+                        help="Helper runtime: 'shared' (default for per-row drawings) or 'inline' (default for a sheet).")
+    args = parser.parse_args(argv)
+
+    if args.catalog:
+        args.shape = args.shape or CATALOG_SHAPES[args.catalog]
+    elif not args.table:
+        parser.error("either a parameter table or --catalog is required")
+    if not args.shape:
+        parser.error("--shape is required with a parameter table")
+
+    start = time.perf_counter()
+    table = load_table(family_table(args.catalog, args.sizes) if args.catalog else args.table)
+    os.makedirs(args.out, exist_ok=True)
+    if args.sheet:
+        runtime = args.runtime or 'inline'
+        outputs = [(SHEET_NAME, generate_family_sheet(args.shape, table, args.template, args.columns,
+                                                      args.emitter, runtime))]
+    else:
+        runtime = args.runtime or 'shared'
+        used = set()
+        outputs = []
+        for label, lisp_code in generate_family(args.shape, table, args.template, args.emitter, runtime):
+            name = f"{_safe_stem(label)}.lsp"
+            if name in used:
+                name = f"{_safe_stem(label)}_{len(outputs) + 1}.lsp"
+            used.add(name)
+            outputs.append((name, lisp_code))
+    if runtime == 'shared':
+        write_runtime(args.out)
+    for name, lisp_code in outputs:
+        with open(os.path.join(args.out, name), 'w', encoding='utf-8') as f:
+            f.write(lisp_code)
+    rows = len(next(iter(table.values())))
+    print(f"{args.shape}: {rows} sizes -> {len(outputs)} file(s) in '{args.out}' "
+          f"({time.perf_counter() - start:.3f} s).")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,235 @@
+"""
+Built-in catalog of standard metric fasteners.
+
+  ISO 4014  hexagon head bolts (partially threaded)  -> hexagonal_screw
+  ISO 4032  hexagon nuts, style 1                    -> hexagonal_nut
+  ISO 4762  hexagon socket head cap screws           -> socket_head_cap_screw
+
+The nominal dimensions are stored as compact rows below and turned into one
+NumPy structured array per standard on first use; the columns the drawings
+need but the standards do not list (hexagon side length, thread depth,
+thread length for a given length, ...) are derived for all sizes at once
+when the table is loaded. Lookups go through an index from designation
+("M10", "M10x50") to table row and are memoized.
+
+A spec references a catalog part with a top-level "designation" key, for
+example {"shape": "socket_head_cap_screw", "designation": "M6x20", ...};
+expand_spec() fills in the parameters, and values given explicitly in the
+spec's "parameters" still take precedence.
+"""
+import copy
+import functools
+import math
+import re
+
+import numpy as np
+
+# --- Nominal dimensions (mm) ---
+# ISO 4032: d, pitch P, width across flats s, nut height m
+_ISO_4032_ROWS = (
+    (1.6, 0.35, 3.2, 1.3), (2, 0.4, 4, 1.6), (2.5, 0.45, 5, 2), (3, 0.5, 5.5, 2.4), (4, 0.7, 7, 3.2),
+    (5, 0.8, 8, 4.7), (6, 1, 10, 5.2), (8, 1.25, 13, 6.8), (10, 1.5, 16, 8.4), (12, 1.75, 18, 10.8),
+    (16, 2, 24, 14.8), (20, 2.5, 30, 18), (24, 3, 36, 21.5), (30, 3.5, 46, 25.6), (36, 4, 55, 31),
+    (42, 4.5, 65, 34), (48, 5, 75, 38), (56, 5.5, 85, 45), (64, 6, 95, 51),
+)
+# ISO 4014: d, pitch P, width across flats s, head height k, shortest and longest length l
+_ISO_4014_ROWS = (
+    (3, 0.5, 5.5, 2, 20, 30), (4, 0.7, 7, 2.8, 25, 40), (5, 0.8, 8, 3.5, 25, 50), (6, 1, 10, 4, 30, 60),
+    (8, 1.25, 13, 5.3, 40, 80), (10, 1.5, 16, 6.4, 45, 100), (12, 1.75, 18, 7.5, 50, 120),
+    (16, 2, 24, 10, 65, 160), (20, 2.5, 30, 12.5, 80, 200), (24, 3, 36, 15, 90, 240),
+    (30, 3.5, 46, 18.7, 110, 300), (36, 4, 55, 22.5, 140, 360), (42, 4.5, 65, 26, 160, 440),
+    (48, 5, 75, 30, 180, 480), (56, 5.5, 85, 35, 220, 500), (64, 6, 95, 40, 260, 500),
+)
+# ISO 4762: d, pitch P, head diameter dk, head height k, socket width s, socket depth t,
+# under-head fillet r, reference thread length b, shortest and longest length l
+_ISO_4762_ROWS = (
+    (1.6, 0.35, 3, 1.6, 1.5, 0.7, 0.1, 15, 2.5, 16), (2, 0.4, 3.8, 2, 1.5, 1, 0.1, 16, 3, 20),
+    (2.5, 0.45, 4.5, 2.5, 2, 1.1, 0.1, 17, 4, 25), (3, 0.5, 5.5, 3, 2.5, 1.3, 0.1, 18, 5, 30),
+    (4, 0.7, 7, 4, 3, 2, 0.2, 20, 6, 40), (5, 0.8, 8.5, 5, 4, 2.5, 0.2, 22, 8, 50),
+    (6, 1, 10, 6, 5, 3, 0.25, 24, 10, 60), (8, 1.25, 13, 8, 6, 4, 0.4, 28, 12, 80),
+    (10, 1.5, 16, 10, 8, 5, 0.4, 32, 16, 100), (12, 1.75, 18, 12, 10, 6, 0.6, 36, 20, 120),
+    (16, 2, 24, 16, 14, 8, 0.6, 44, 25, 160), (20, 2.5, 30, 20, 17, 10, 0.8, 52, 30, 200),
+    (24, 3, 36, 24, 19, 12, 0.8, 60, 40, 200), (30, 3.5, 45, 30, 22, 15.5, 1, 72, 45, 200),
+    (36, 4, 54, 36, 27, 19, 1, 84, 55, 200), (42, 4.5, 63, 42, 32, 24, 1.2, 96, 60, 300),
+    (48, 5, 72, 48, 36, 28, 1.6, 108, 70, 300), (56, 5.5, 84, 56, 41, 34, 2, 124, 80, 300),
+    (64, 6, 96, 64, 46, 38, 2, 140, 90, 300),
+)
+# Preferred nominal lengths l (ISO 888 series as used by ISO 4014 / ISO 4762)
+_LENGTH_SERIES = (2.5, 3, 4, 5, 6, 8, 10, 12, 16, 20, 25, 30, 35, 40, 45, 50, 55, 60, 65, 70, 80, 90, 100,
+                  110, 120, 130, 140, 150, 160, 180, 200, 220, 240, 260, 280, 300, 320, 340, 360, 380, 400,
+                  420, 440, 460, 480, 500)
+
+_COLUMNS = {
+    'ISO 4032': ('d', 'pitch', 's', 'm'),
+    'ISO 4014': ('d', 'pitch', 's', 'k', 'l_min', 'l_max'),
+    'ISO 4762': ('d', 'pitch', 'dk', 'k', 's', 't', 'r', 'b', 'l_min', 'l_max'),
+}
+_ROWS = {'ISO 4032': _ISO_4032_ROWS, 'ISO 4014': _ISO_4014_ROWS, 'ISO 4762': _ISO_4762_ROWS}
+
+STANDARDS = tuple(_COLUMNS)
+
+# Standard implied by a spec's shape when its designation does not name one.
+SHAPE_STANDARDS = {
+    'hexagonal_nut': 'ISO 4032', 'hex_nut_3d': 'ISO 4032',
+    'hexagonal_screw': 'ISO 4014', 'hex_screw_3d': 'ISO 4014',
+    'socket_head_cap_screw': 'ISO 4762', 'socket_head_cap_screw_3d': 'ISO 4762',
+}
+
+# Basic thread profile: depth of the external thread h3 = 0.61343 P (ISO 68-1 / ISO 965-1).
+THREAD_DEPTH_FACTOR = 0.61343
+
+_DESIGNATION_RE = re.compile(r'^\s*(?:(ISO)\s*(\d+)\s+)?M(\d+(?:\.\d+)?)\s*(?:[xX×*]\s*(\d+(?:\.\d+)?))?\s*$')
+
+
+def _fmt(value: float) -> str:
+    return f"{value:g}"
+
+
+# ==============================================================================
+# Array Tables
+# ==============================================================================
+@functools.lru_cache(maxsize=None)
+def load_standard(standard: str) -> np.ndarray:
+    """The dimension table of one standard as a structured array, with derived columns filled in."""
+    if standard not in _COLUMNS:
+        raise KeyError(f"Unknown standard '{standard}'. Expected one of: {', '.join(STANDARDS)}.")
+    columns = _COLUMNS[standard]
+    derived = [('side_length', 'f8'), ('thread_depth', 'f8')]
+    if standard == 'ISO 4762':
+        derived += [('countersink', 'f8'), ('chamfer', 'f8')]
+    table = np.zeros(len(_ROWS[standard]), dtype=[(name, 'f8') for name in columns] + derived)
+    raw = np.array(_ROWS[standard], dtype=float)
+    for i, name in enumerate(columns):
+        table[name] = raw[:, i]
+    # Regular hexagon: side length = width across flats / sqrt(3)
+    table['side_length'] = np.round(table['s'] / math.sqrt(3), 4)
+    table['thread_depth'] = np.round(table['pitch'] * THREAD_DEPTH_FACTOR, 3)
+    if standard == 'ISO 4762':
+        table['countersink'] = table['s'] + 1.0
+        table['chamfer'] = table['pitch']
+    table.flags.writeable = False
+    return table
+
+
+@functools.lru_cache(maxsize=None)
+def _index(standard: str) -> dict:
+    """Designation -> (row, length) for every size, and every preferred length of the screws."""
+    table = load_standard(standard)
+    index = {}
+    for row, d in enumerate(table['d'].tolist()):
+        size = f"M{_fmt(d)}"
+        if 'l_min' not in table.dtype.names:
+            index[size] = (row, None)
+            continue
+        l_min, l_max = table['l_min'][row], table['l_max'][row]
+        for length in _LENGTH_SERIES:
+            if l_min <= length <= l_max:
+                index[f"{size}x{_fmt(length)}"] = (row, length)
+    return index
+
+
+def designations(standard: str) -> list:
+    """All designations the catalog knows for one standard, smallest first."""
+    return list(_index(standard))
+
+
+def parse_designation(text: str, standard: str = None) -> tuple:
+    """Splits 'ISO 4762 M6x20' / 'M6x20' / 'M10' into (standard, 'M6x20')."""
+    match = _DESIGNATION_RE.match(text)
+    if not match:
+        raise ValueError(f"Cannot read designation '{text}'; expected e.g. 'M10', 'M10x50' or 'ISO 4014 M10x50'.")
+    if match.group(2):
+        standard = f"ISO {match.group(2)}"
+    if standard is None:
+        raise ValueError(f"Designation '{text}' does not name a standard.")
+    size = f"M{_fmt(float(match.group(3)))}"
+    if match.group(4):
+        size += f"x{_fmt(float(match.group(4)))}"
+    return standard, size
+
+
+# ==============================================================================
+# Spec Parameters
+# ==============================================================================
+def _bolt_thread_length(d: float, length: float) -> float:
+    """ISO 4014 thread length b: 2d+6 up to l=125, 2d+12 up to l=200, 2d+25 beyond; never longer than l."""
+    b = 2 * d + (6 if length <= 125 else 12 if length <= 200 else 25)
+    return min(b, length)
+
+
+@functools.lru_cache(maxsize=None)
+def _parameters(standard: str, size: str) -> dict:
+    try:
+        row, length = _index(standard)[size]
+    except KeyError:
+        raise KeyError(f"'{size}' is not in the {standard} catalog.") from None
+    table = load_standard(standard)
+    part = dict(zip(table.dtype.names, table[row].tolist()))
+    designation = f"{standard} {size}"
+    if standard == 'ISO 4032':
+        return {'designation': designation, 'side_length': part['side_length'], 'height': part['m'],
+                'hole': {'diameter': part['d']}, 'thread_pitch': part['pitch']}
+    if standard == 'ISO 4014':
+        return {'designation': designation,
+                'head': {'side_length': part['side_length'], 'height': part['k']},
+                'shaft': {'diameter': part['d'], 'length': length,
+                          'thread_length': _bolt_thread_length(part['d'], length)},
+                'thread_pitch': part['pitch']}
+    return {'nominal_designation': designation, 'head_diameter': part['dk'], 'head_height': part['k'],
+            'shaft_diameter': part['d'], 'shaft_length': length, 'socket_depth': part['t'],
+            'socket_width_across_flats': part['s'], 'thread_pitch': part['pitch'],
+            'thread_depth': part['thread_depth'], 'thread_length': min(part['b'], length),
+            'fillet_radius': part['r'], 'socket_countersink_diameter': part['countersink'],
+            'end_chamfer_size': part['chamfer']}
+
+
+def lookup(designation: str, standard: str = None) -> dict:
+    """Spec parameters of a catalog part, e.g. lookup('ISO 4014 M10x50') or lookup('M10', 'ISO 4032')."""
+    return copy.deepcopy(_parameters(*parse_designation(designation, standard)))
+
+
+def _merge(base: dict, override: dict) -> dict:
+    merged = dict(base)
+    for key, value in override.items():
+        if isinstance(value, dict) and isinstance(merged.get(key), dict):
+            merged[key] = _merge(merged[key], value)
+        else:
+            merged[key] = value
+    return merged
+
+
+def expand_spec(data: dict, shape: str = None) -> dict:
+    """
+    Returns the spec with the parameters of its catalog designation filled in,
+    or the spec itself when it has no "designation". The input is not modified.
+    """
+    designation = data.get('designation')
+    if not designation:
+        return data
+    shape = shape or data.get('shape')
+    params = lookup(designation, SHAPE_STANDARDS.get(shape))
+    return dict(data, parameters=_merge(params, data.get('parameters', {})))
+
+
+def family_table(standard: str, sizes=None) -> dict:
+    """
+    Catalog sizes as a family_sweep parameter table (column -> array), taken
+    straight from the array table. `sizes` lists designations; default all.
+    """
+    sizes = designations(standard) if sizes is None else [parse_designation(s, standard)[1] for s in sizes]
+    index = _index(standard)
+    try:
+        rows = np.array([index[size][0] for size in sizes], dtype=int)
+    except KeyError as e:
+        raise KeyError(f"{e.args[0]!r} is not in the {standard} catalog.") from None
+    table = load_standard(standard)[rows]
+    columns = {'designation': np.array(sizes)}
+    if standard == 'ISO 4032':
+        columns.update({'side_length': table['side_length'], 'height': table['m'], 'hole.diameter': table['d']})
+    elif standard == 'ISO 4014':
+        lengths = np.array([index[size][1] for size in sizes], dtype=float)
+        columns.update({'head.side_length': table['side_length'], 'head.height': table['k'],
+                        'shaft.diameter': table['d'], 'shaft.length': lengths})
+    else:
+        raise ValueError(f"{standard} parts have no family generator.")
+    return columns
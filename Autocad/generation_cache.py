@@ -0,0 +1,64 @@
+"""
+In-memory memoization of generated LISP programs.
+
+The generators are pure functions of their spec (they never modify it), so a
+generated program can be looked up by the generator name plus a hash of the
+spec's exact JSON text. Unlike spec_hash.canonical_json, this text keeps the
+key order and does not normalize numbers: the parameter and BOM tables and
+the layer setup follow the order of the spec, and 50 and 50.0 print
+differently, so such specs must not share an entry.
+
+One cache is safe to share between threads. Two threads missing on the same
+key at once both generate, and the first result is kept; that costs at most
+one redundant generation and keeps the lock out of the generator call.
+"""
+import json
+import threading
+from collections import OrderedDict
+
+from spec_hash import spec_hash
+
+DEFAULT_MAX_ENTRIES = 256
+
+
+def generation_key(shape_type: str, data: dict) -> str:
+    """Cache key of one generation: generator name + the spec's JSON text, in its own key order."""
+    return spec_hash(shape_type, json.dumps(data, separators=(',', ':'), ensure_ascii=False))
+
+
+class GenerationCache:
+    """Thread-safe LRU map from generation key to generated program."""
+
+    def __init__(self, max_entries: int = DEFAULT_MAX_ENTRIES):
+        if max_entries < 1:
+            raise ValueError("max_entries must be at least 1.")
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get_or_generate(self, shape_type: str, data: dict, generator) -> str:
+        """Returns the cached program for (shape_type, data), calling generator(data) on a miss."""
+        key = generation_key(shape_type, data)
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+            self.misses += 1
+        result = generator(data)
+        with self._lock:
+            result = self._entries.setdefault(key, result)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return result
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+            self.hits = self.misses = 0
+
+    def __len__(self):
+        return len(self._entries)
@@ -0,0 +1,315 @@
+"""
+Long-lived generation service for the web backend.
+
+Running lisp_generator.py for each request pays for interpreter start-up and
+imports every time. It also loads .env, prints banners, creates placeholder
+files and waits for a menu choice. This service starts once and keeps a pool
+of worker processes with the generator registries (AutoCAD and Blender)
+already imported. It answers JSON-RPC 2.0 requests with the spec passed in
+memory; nothing is read from or written to disk.
+
+Transports:
+  - stdio (default): one JSON request per line on stdin, one response per line
+    on stdout. Requests run concurrently, so match responses by id. Anything
+    the generators print goes to stderr.
+  - HTTP: `--http PORT` serves POSTed JSON-RPC bodies on 127.0.0.1 (any path):
+        fetch('http://127.0.0.1:8765/rpc', {method: 'POST', body: JSON.stringify(
+            {jsonrpc: '2.0', id: 1, method: 'lisp', params: {spec}})})
+
+Methods:
+  lisp     {spec, shape?, solid?, validate?} -> {shape, lisp, seconds[, validation]}
+  blender  {spec, shape?}                    -> {shape, script, seconds}
+  update   {old, new}                        -> {lisp, erased, modified, added, unchanged, seconds}
+  preview  {spec, shape?, format?, width?}   -> {shape, format, svg | png (base64), seconds}
+  shapes   {}                                -> {lisp: [...], blender: [...]}
+  ping     {}                                -> {pid}
+
+Usage:
+    python generation_service.py [--http PORT] [-j WORKERS]
+"""
+import argparse
+import base64
+import contextlib
+import importlib.util
+import json
+import os
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+BASE_DIR = os.path.dirname(os.path.abspath(__file__))
+BLENDER_GENERATOR_PATH = os.path.join(BASE_DIR, os.pardir, 'Blender', 'main_generator.py')
+HTTP_HOST = '127.0.0.1'
+DEFAULT_HTTP_PORT = 8765
+DEFAULT_WORKERS = 2
+
+# JSON-RPC 2.0 error codes; -32000 is the application range.
+PARSE_ERROR = -32700
+INVALID_REQUEST = -32600
+METHOD_NOT_FOUND = -32601
+INVALID_PARAMS = -32602
+GENERATION_ERROR = -32000
+
+
+class ServiceError(Exception):
+    def __init__(self, code: int, message: str):
+        super().__init__(message)
+        self.code = code
+
+
+# ==============================================================================
+# Method Handlers (run in the worker processes)
+# ==============================================================================
+_modules = {}
+
+
+def _load_modules() -> dict:
+    """Imports the generators once per process; their import-time output is kept off the protocol stream."""
+    if not _modules:
+        with contextlib.redirect_stdout(sys.stderr):
+            import drawing_update
+            import fastener_catalog
+            import lisp_generator
+            import preview_renderer
+            import static_validator
+            spec = importlib.util.spec_from_file_location('blender_main_generator', BLENDER_GENERATOR_PATH)
+            blender = importlib.util.module_from_spec(spec)
+            spec.loader.exec_module(blender)
+        _modules.update(lisp=lisp_generator, catalog=fastener_catalog, update=drawing_update,
+                        validator=static_validator, preview=preview_renderer, blender=blender)
+    return _modules
+
+
+def _init_worker():
+    sys.stdout = sys.stderr
+    _load_modules()
+
+
+def _spec(params: dict, key: str) -> dict:
+    value = params.get(key)
+    if not isinstance(value, dict):
+        raise ServiceError(INVALID_PARAMS, f"'{key}' must be a spec object.")
+    return value
+
+
+def _method_lisp(params: dict) -> dict:
+    m = _load_modules()
+    spec = _spec(params, 'spec')
+    shape = params.get('shape') or spec.get('shape')
+    if not shape:
+        raise ServiceError(INVALID_PARAMS, "The spec has no 'shape' key and no 'shape' was given.")
+    spec = m['catalog'].expand_spec(spec, shape)
+    if params.get('solid'):
+        shape = m['lisp'].SOLID_SHAPE_MAP.get(shape, shape)
+    if shape not in m['lisp'].shape_generators:
+        raise ServiceError(INVALID_PARAMS, f"No generator function found for shape '{shape}'.")
+    lisp_code = m['lisp'].generate(shape, spec)
+    result = {'shape': shape, 'lisp': lisp_code}
+    if params.get('validate'):
+        result['validation'] = m['validator'].StaticValidator().check(lisp_code, spec)
+    return result
+
+
+def _method_blender(params: dict) -> dict:
+    m = _load_modules()
+    spec = _spec(params, 'spec')
+    shape = params.get('shape') or spec.get('shape')
+    blender = m['blender']
+    if shape not in blender.PART_GENERATORS and shape not in blender.ASSEMBLY_GENERATORS:
+        raise ServiceError(INVALID_PARAMS, f"No Blender generator found for shape '{shape}'.")
+    return {'shape': shape, 'script': blender.generate_script(shape, spec)}
+
+
+def _method_update(params: dict) -> dict:
+    m = _load_modules()
+    lisp_code, diff = m['update'].generate_update(_spec(params, 'old'), _spec(params, 'new'))
+    return {'lisp': lisp_code, 'erased': len(diff['erase']), 'modified': len(diff['patch']),
+            'added': len(diff['add']), 'unchanged': diff['unchanged']}
+
+
+def _method_preview(params: dict) -> dict:
+    m = _load_modules()
+    spec = _spec(params, 'spec')
+    shape = params.get('shape') or spec.get('shape')
+    fmt = params.get('format', 'svg')
+    if shape not in m['lisp'].drawing_builders:
+        raise ServiceError(INVALID_PARAMS, f"Shape '{shape}' has no 2D drawing to preview.")
+    if fmt not in m['preview'].PREVIEW_FORMATS:
+        raise ServiceError(INVALID_PARAMS, f"'format' must be one of: {', '.join(m['preview'].PREVIEW_FORMATS)}.")
+    image = m['preview'].preview(m['catalog'].expand_spec(spec, shape), shape, fmt,
+                                 int(params.get('width', m['preview'].DEFAULT_WIDTH)))
+    if fmt == 'png':
+        image = base64.b64encode(image).decode('ascii')
+    return {'shape': shape, 'format': fmt, fmt: image}
+
+
+def _method_shapes(params: dict) -> dict:
+    m = _load_modules()
+    blender = m['blender']
+    return {'lisp': sorted(m['lisp'].shape_generators),
+            'blender': sorted(list(blender.PART_GENERATORS) + list(blender.ASSEMBLY_GENERATORS))}
+
+
+def _method_ping(params: dict) -> dict:
+    return {'pid': os.getpid()}
+
+
+METHODS = {
+    'lisp': _method_lisp,
+    'blender': _method_blender,
+    'update': _method_update,
+    'preview': _method_preview,
+    'shapes': _method_shapes,
+    'ping': _method_ping,
+}
+
+
+def call_method(method: str, params: dict) -> dict:
+    """Runs one method; returns {'result': ...} or {'error': {code, message}} (a worker never raises)."""
+    start = time.perf_counter()
+    try:
+        result = METHODS[method](params)
+    except ServiceError as e:
+        return {'error': {'code': e.code, 'message': str(e)}}
+    except Exception as e:
+        return {'error': {'code': GENERATION_ERROR, 'message': f"{type(e).__name__}: {e}"}}
+    if method in ('lisp', 'blender', 'update', 'preview'):
+        result['seconds'] = round(time.perf_counter() - start, 6)
+    return {'result': result}
+
+
+# ==============================================================================
+# Dispatcher
+# ==============================================================================
+class GenerationService:
+    """Validates JSON-RPC requests and runs them on a pool of warm worker processes (or in-process with 0 workers)."""
+
+    def __init__(self, workers: int = DEFAULT_WORKERS):
+        self.workers = workers
+        self._executor = None
+        if workers > 0:
+            self._executor = ProcessPoolExecutor(max_workers=workers, initializer=_init_worker)
+            # Start every worker now so the first requests do not pay for the imports.
+            for future in [self._executor.submit(call_method, 'ping', {}) for _ in range(workers)]:
+                future.result()
+        else:
+            _load_modules()
+
+    def handle(self, request) -> dict:
+        """Response object for one decoded request, or None for a notification (a request without id)."""
+        if not isinstance(request, dict) or not isinstance(request.get('method'), str):
+            return _error_response(None, INVALID_REQUEST, "A request must be an object with a 'method'.")
+        request_id = request.get('id')
+        method, params = request['method'], request.get('params', {})
+        if method not in METHODS:
+            response = _error_response(request_id, METHOD_NOT_FOUND, f"Unknown method '{method}'.")
+        elif not isinstance(params, dict):
+            response = _error_response(request_id, INVALID_PARAMS, "'params' must be an object.")
+        else:
+            outcome = (self._executor.submit(call_method, method, params).result() if self._executor
+                       else call_method(method, params))
+            response = dict(jsonrpc='2.0', id=request_id, **outcome)
+        return response if 'id' in request else None
+
+    def handle_text(self, text: str) -> str:
+        """JSON response text for one JSON request text (a batch array gets an array), or None."""
+        try:
+            request = json.loads(text)
+        except ValueError as e:
+            return json.dumps(_error_response(None, PARSE_ERROR, f"Invalid JSON: {e}"))
+        if isinstance(request, list):
+            responses = [r for r in (self.handle(item) for item in request) if r is not None]
+            return json.dumps(responses, ensure_ascii=False) if responses else None
+        response = self.handle(request)
+        return json.dumps(response, ensure_ascii=False) if response is not None else None
+
+    def close(self):
+        if self._executor:
+            self._executor.shutdown()
+
+
+def _error_response(request_id, code: int, message: str) -> dict:
+    return {'jsonrpc': '2.0', 'id': request_id, 'error': {'code': code, 'message': message}}
+
+
+# ==============================================================================
+# Transports
+# ==============================================================================
+def serve_stdio(service: GenerationService, stdin=None, stdout=None):
+    """One request per input line, answered concurrently; a response is written as soon as it is ready."""
+    stdin, stdout = stdin or sys.stdin, stdout or sys.stdout
+    # Stray prints (from generators or libraries) must not corrupt the response stream.
+    sys.stdout = sys.stderr
+    write_lock = threading.Lock()
+    threads = []
+
+    def answer(line):
+        text = service.handle_text(line)
+        if text is not None:
+            with write_lock:
+                stdout.write(text + '\n')
+                stdout.flush()
+
+    for line in stdin:
+        if line.strip():
+            thread = threading.Thread(target=answer, args=(line,), daemon=True)
+            thread.start()
+            threads.append(thread)
+            threads = [t for t in threads if t.is_alive()]
+    for thread in threads:
+        thread.join()
+
+
+class _RpcHandler(BaseHTTPRequestHandler):
+    service = None
+
+    def do_POST(self):
+        body = self.rfile.read(int(self.headers.get('Content-Length') or 0)).decode('utf-8')
+        text = self.service.handle_text(body)
+        payload = (text or '').encode('utf-8')
+        self.send_response(200 if text is not None else 204)
+        self.send_header('Content-Type', 'application/json; charset=utf-8')
+        self.send_header('Content-Length', str(len(payload)))
+        self.end_headers()
+        self.wfile.write(payload)
+
+    def log_message(self, format, *args):
+        sys.stderr.write(f"[generation_service] {self.address_string()} {format % args}\n")
+
+
+def serve_http(service: GenerationService, port: int = DEFAULT_HTTP_PORT):
+    handler = type('RpcHandler', (_RpcHandler,), {'service': service})
+    server = ThreadingHTTPServer((HTTP_HOST, port), handler)
+    sys.stderr.write(f"[generation_service] listening on http://{HTTP_HOST}:{server.server_port} "
+                     f"with {service.workers} worker(s)\n")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Serve LISP/Blender generation over stdio or local HTTP JSON-RPC.")
+    parser.add_argument('--http', type=int, metavar='PORT', default=None,
+                        help=f"Serve HTTP on {HTTP_HOST}:PORT instead of stdin/stdout.")
+    parser.add_argument('-j', '--workers', type=int, default=DEFAULT_WORKERS,
+                        help=f"Warm worker processes (default: {DEFAULT_WORKERS}; 0 runs requests in this process).")
+    args = parser.parse_args(argv)
+
+    service = GenerationService(args.workers)
+    try:
+        if args.http is not None:
+            serve_http(service, args.http)
+        else:
+            serve_stdio(service)
+    finally:
+        service.close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
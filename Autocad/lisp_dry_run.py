@@ -0,0 +1,1861 @@
+"""
+Headless dry run of generated AutoLISP programs.
+
+AutoCAD cannot run in CI, so this module executes a generated .lsp file with a
+restricted AutoLISP interpreter written in Python and records what it would
+draw. It needs no AutoCAD and runs a drawing in a few milliseconds.
+
+The interpreter covers the AutoLISP used by the generators and the shared
+runtime (lisp_runtime.py):
+  - special forms: defun, lambda, setq, if, cond, progn, while, repeat,
+    foreach, and, or, quote;
+  - list, arithmetic, string and geometry functions (polar, strcat, mapcar,
+    assoc, subst, ...), with AutoLISP's dynamic scoping and integer division;
+  - system variables, symbol tables (layers, linetypes, dimension styles,
+    registered applications), load, and the entity functions (entmake,
+    entmod, entget, entlast, entnext, entdel, ssget "_X", ssadd, ...);
+  - `command`: a model of the command processor. Every command's prompts are
+    answered in order, so a command can span several (command ...) calls (as
+    the runtime's PLINE does). The 2D commands (LINE, PLINE, RECTANG, CIRCLE,
+    ARC, POLYGON, TEXT, DIMLINEAR, DIMDIAMETER, LEADER, -HATCH), the setup
+    commands (-LAYER, -LINETYPE, -DIMSTYLE, UNDO, ZOOM, ...) and the 3D solid
+    commands (BOX, CYLINDER, TORUS, EXTRUDE, UNION, SUBTRACT, MOVE) are modeled.
+
+A script is loaded, then its C: commands are run. Errors AutoCAD would stop on
+(an undefined function, a bad argument type, a command given input it cannot
+take, a layer that does not exist) end the run. Problems AutoCAD would only
+report quietly (a failed entmake, a linetype that was never loaded) are
+collected and the run continues. The report counts the created entities and
+the commands by type and gives the bounding box of every view. An entity
+belongs to the view of its DAEDALUS tag when the drawing is tagged, otherwise
+to the `;; --- View ---` section of the generated code that drew it.
+
+Usage:
+    python lisp_dry_run.py FILE_OR_DIR [...] [-L LOAD_DIR] [--entry C:NAME] [-v] [--json REPORT.json]
+"""
+import argparse
+import bisect
+import json
+import math
+import os
+import re
+import sys
+import time
+from collections import Counter
+
+from lisp_runtime import RUNTIME_FILE_NAME, TAG_APP_NAME
+from static_validator import LispList, LispString, LispSyntaxError, Symbol, parse
+
+MAX_LOOP_ITERATIONS = 100000
+MAX_CALL_DEPTH = 400
+NO_VIEW = "(none)"
+
+_SECTION_RE = re.compile(r'^[ \t]*;;[ \t]*---[ \t]*(.+?)[ \t]*---[ \t]*$', re.MULTILINE)
+_ESCAPE_RE = re.compile(r'\\([0-7]{3}|.)', re.DOTALL)
+_ESCAPES = {'n': '\n', 'r': '\r', 't': '\t', 'e': '\x1b', '\\': '\\', '"': '"'}
+
+DEFAULT_SYSVARS = {
+    'CLAYER': "0", 'CMDECHO': 1, 'TEXTSTYLE': "Standard", 'DIMSTYLE': "Standard", 'CELTYPE': "ByLayer",
+    'LTSCALE': 1.0, 'DIMTXT': 2.5, 'DIMASZ': 2.5, 'DIMCLRD': 0, 'DIMCLRE': 0, 'DIMCLRT': 0, 'DIMDEC': 2,
+    'DIMSCALE': 1.0, 'OSMODE': 0, 'ORTHOMODE': 0, 'PDMODE': 0, 'LUNITS': 2, 'LUPREC': 4, 'AUNITS': 0,
+    'ATTREQ': 1, 'FILEDIA': 1, 'DELOBJ': 3, 'HPNAME': "ANSI31", 'HPSCALE': 1.0, 'HPANG': 0.0,
+}
+
+# Groups every entmake'd entity of a type must carry; entities of other types are refused.
+REQUIRED_GROUPS = {
+    'LINE': (10, 11), 'CIRCLE': (10, 40), 'ARC': (10, 40, 50, 51), 'LWPOLYLINE': (10,), 'TEXT': (10, 40, 1),
+    'MTEXT': (10, 1), 'DIMENSION': (10,), 'LEADER': (10,), 'HATCH': (), 'POINT': (10,), 'SOLID': (10, 11, 12),
+    'INSERT': (2, 10), 'SPLINE': (), 'ELLIPSE': (10, 11, 40), '3DSOLID': (),
+}
+TABLE_TYPES = ('LAYER', 'LTYPE', 'STYLE', 'DIMSTYLE', 'APPID')
+
+
+class LispError(Exception):
+    """An error that stops the run, as AutoCAD's *error* handler would."""
+    line = 0
+    function = None
+
+
+class Pair:
+    """A dotted pair (car . cdr)."""
+    __slots__ = ('car', 'cdr')
+
+    def __init__(self, car, cdr):
+        self.car, self.cdr = car, cdr
+
+    def __eq__(self, other):
+        return isinstance(other, Pair) and self.car == other.car and self.cdr == other.cdr
+
+    def __hash__(self):
+        return hash((self.car, repr(self.cdr)))
+
+
+class Quote:
+    """A quoted literal of the prepared code; its value is already converted."""
+    __slots__ = ('value',)
+
+    def __init__(self, value):
+        self.value = value
+
+
+class LispFunction:
+    """A function defined with defun or lambda."""
+    __slots__ = ('name', 'params', 'local_vars', 'body')
+
+    def __init__(self, name, params, local_vars, body):
+        self.name, self.params, self.local_vars, self.body = name, params, local_vars, body
+
+
+class Entity:
+    """
+    A database object: a drawn entity or a symbol table record. `groups` is its
+    DXF association list as AutoLISP sees it (without the -1 entity name);
+    3D solids carry their extents instead of geometry groups.
+    """
+    __slots__ = ('handle', 'groups', 'section', 'line', 'command', 'deleted', 'extents', 'ename')
+
+    def __init__(self, handle, groups, section=None, line=0, command=None, extents=None):
+        self.handle, self.groups, self.section, self.line, self.command = handle, groups, section, line, command
+        self.deleted, self.extents = False, extents
+        self.ename = Ename(self)
+
+    @property
+    def type(self):
+        return _group_value(self.groups, 0)
+
+    @property
+    def layer(self):
+        return _group_value(self.groups, 8)
+
+    def tag(self, app=TAG_APP_NAME):
+        """The (1000 ...) strings of the entity's XDATA for `app`, or None."""
+        for group in self.groups:
+            if _car(group) == -3:
+                for block in _cdr(group) or ():
+                    if isinstance(block, list) and block[0] == app:
+                        return [_cdr(g) for g in block[1:] if _car(g) == 1000]
+        return None
+
+    @property
+    def view(self):
+        tag = self.tag()
+        if tag and len(tag) >= 2:
+            return tag[1]
+        return self.section or NO_VIEW
+
+    def points(self):
+        """(x, y) points that bound the entity."""
+        if self.extents:
+            (x1, y1, _), (x2, y2, _) = self.extents
+            return [(x1, y1), (x2, y2)]
+        kind = self.type
+        if kind in ('CIRCLE', 'ARC'):
+            cx, cy = _group_value(self.groups, 10)[:2]
+            r = _group_value(self.groups, 40)
+            if kind == 'CIRCLE':
+                return [(cx - r, cy - r), (cx + r, cy + r)]
+            start, end = _group_value(self.groups, 50), _group_value(self.groups, 51)
+            sweep = (end - start) % (2 * math.pi)
+            angles = [start, end] + [k * math.pi / 2 for k in range(4)
+                                     if (k * math.pi / 2 - start) % (2 * math.pi) <= sweep]
+            return [(cx + r * math.cos(a), cy + r * math.sin(a)) for a in angles]
+        return [(v[0], v[1]) for g in self.groups if 10 <= _car(g) <= 18
+                for v in (_cdr(g),) if isinstance(v, list) and len(v) >= 2]
+
+
+class Ename:
+    """An entity name; compared by identity like AutoLISP enames."""
+    __slots__ = ('entity',)
+
+    def __init__(self, entity):
+        self.entity = entity
+
+
+class SelectionSet:
+    __slots__ = ('entities',)
+
+    def __init__(self, entities=()):
+        self.entities = list(entities)
+
+
+T = Symbol('t')
+
+
+# ==============================================================================
+# Values
+# ==============================================================================
+def _lst(items):
+    """A Python list as an AutoLISP list: the empty list is nil."""
+    return list(items) or None
+
+
+def _car(x):
+    if x is None:
+        return None
+    if isinstance(x, list):
+        return x[0]
+    if isinstance(x, Pair):
+        return x.car
+    raise LispError(f"bad argument type: consp {to_string(x, True)}")
+
+
+def _cdr(x):
+    if x is None:
+        return None
+    if isinstance(x, list):
+        return x[1:] or None
+    if isinstance(x, Pair):
+        return x.cdr
+    raise LispError(f"bad argument type: consp {to_string(x, True)}")
+
+
+def _group_value(groups, code):
+    for g in groups:
+        if _car(g) == code:
+            return _cdr(g)
+    return None
+
+
+def _is_number(x):
+    return isinstance(x, (int, float)) and not isinstance(x, bool)
+
+
+def _num(x):
+    if _is_number(x):
+        return x
+    raise LispError(f"bad argument type: numberp: {to_string(x, True)}")
+
+
+def _str(x):
+    if isinstance(x, str) and not isinstance(x, Symbol):
+        return x
+    raise LispError(f"bad argument type: stringp {to_string(x, True)}")
+
+
+def _list_arg(x):
+    if x is None or isinstance(x, list):
+        return x or []
+    raise LispError(f"bad argument type: listp {to_string(x, True)}")
+
+
+def _int(x):
+    if isinstance(x, int) and not isinstance(x, bool):
+        return x
+    raise LispError(f"bad argument type: fixnump: {to_string(x, True)}")
+
+
+def _real_text(value):
+    text = f"{value:.6g}"
+    return text if any(c in text for c in '.en') else text + '.0'
+
+
+def to_string(value, quoted=False) -> str:
+    """The printed form of a value, as princ (or prin1 when `quoted`) shows it."""
+    if value is None:
+        return "nil"
+    if isinstance(value, Symbol):
+        return value.upper()
+    if isinstance(value, str):
+        if not quoted:
+            return value
+        return '"' + value.replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') + '"'
+    if isinstance(value, bool):
+        return "T" if value else "nil"
+    if isinstance(value, int):
+        return str(value)
+    if isinstance(value, float):
+        return _real_text(value)
+    if isinstance(value, list):
+        return '(' + ' '.join(to_string(v, quoted) for v in value) + ')'
+    if isinstance(value, Pair):
+        return f"({to_string(value.car, quoted)} . {to_string(value.cdr, quoted)})"
+    if isinstance(value, Ename):
+        return f"<Entity name: {value.entity.handle:x}>"
+    if isinstance(value, SelectionSet):
+        return f"<Selection set: {len(value.entities)}>"
+    if isinstance(value, LispFunction):
+        return f"#<USUBR {value.name.upper()}>"
+    return f"#<SUBR {getattr(value, '__name__', 'builtin')}>"
+
+
+def _unescape(text: str) -> str:
+    def replace(m):
+        code = m.group(1)
+        if len(code) == 3:
+            return chr(int(code, 8))
+        return _ESCAPES.get(code, code)
+    return _ESCAPE_RE.sub(replace, text) if '\\' in text else text
+
+
+def _literal(expr):
+    """Converts a quoted expression of the parse tree into its value."""
+    if isinstance(expr, LispString):
+        return _unescape(expr)
+    if isinstance(expr, Symbol):
+        return None if expr == 'nil' else expr
+    if isinstance(expr, list):
+        if len(expr) == 3 and expr[1] == '.':
+            return Pair(_literal(expr[0]), _literal(expr[2]))
+        if '.' in expr:
+            raise LispError("dotted lists longer than a pair are not supported")
+        return _lst(_literal(e) for e in expr)
+    return expr
+
+
+def _prepare(expr):
+    """Turns the parse tree into code: strings unescaped, quoted forms converted once."""
+    if isinstance(expr, LispString):
+        return _unescape(expr)
+    if isinstance(expr, Symbol):
+        return None if expr == 'nil' else expr
+    if isinstance(expr, LispList):
+        if expr and expr[0] in ('quote', 'function') and len(expr) == 2:
+            return Quote(_literal(expr[1]))
+        return LispList([_prepare(e) for e in expr], line=expr.line)
+    return expr
+
+
+def _option(token):
+    """'_.C' / '_C' / 'C' -> 'C' for a command option token; None for anything that is not a string."""
+    if isinstance(token, str) and not isinstance(token, Symbol):
+        return token.lstrip('_.-').upper()
+    return None
+
+
+def _norm_command(name: str) -> str:
+    return name.lstrip('_.-').upper()
+
+
+# ==============================================================================
+# Pure Functions
+# ==============================================================================
+def _add(*args):
+    result = 0
+    for a in args:
+        result += _num(a)
+    return result
+
+
+def _sub(*args):
+    if not args:
+        return 0
+    if len(args) == 1:
+        return -_num(args[0])
+    result = _num(args[0])
+    for a in args[1:]:
+        result -= _num(a)
+    return result
+
+
+def _mul(*args):
+    result = 1
+    for a in args:
+        result *= _num(a)
+    return result
+
+
+def _div(*args):
+    if not args:
+        return 0
+    result = _num(args[0])
+    for a in args[1:]:
+        a = _num(a)
+        if a == 0:
+            raise LispError("divide by zero")
+        if isinstance(result, int) and isinstance(a, int):
+            quotient = abs(result) // abs(a)
+            result = quotient if (result >= 0) == (a >= 0) else -quotient
+        else:
+            result /= a
+    return result
+
+
+def _compare(op, identity=False):
+    """A comparison of numbers or strings; with `identity`, other values compare with eq (as = and /= do)."""
+    def compare(*args):
+        if not args:
+            raise LispError("too few arguments")
+        for a, b in zip(args, args[1:]):
+            if _is_number(a) and _is_number(b):
+                ok = op(a, b)
+            elif isinstance(a, str) and isinstance(b, str):
+                ok = op(a, b)
+            elif identity:
+                ok = _eq(a, b)
+            else:
+                raise LispError(f"bad argument type: {to_string(a, True)} {to_string(b, True)}")
+            if not ok:
+                return None
+        return T
+    return compare
+
+
+def _equal(a, b, fuzz=0.0):
+    if _is_number(a) and _is_number(b):
+        return abs(a - b) <= fuzz
+    if isinstance(a, list) and isinstance(b, list):
+        return len(a) == len(b) and all(_equal(x, y, fuzz) for x, y in zip(a, b))
+    if isinstance(a, Pair) and isinstance(b, Pair):
+        return _equal(a.car, b.car, fuzz) and _equal(a.cdr, b.cdr, fuzz)
+    return a is b or (type(a) is type(b) and isinstance(a, str) and a == b)
+
+
+def _eq(a, b):
+    if (_is_number(a) and _is_number(b)) or (isinstance(a, Symbol) and isinstance(b, Symbol)):
+        return a == b
+    return a is b
+
+
+def _cons(a, b):
+    if b is None:
+        return [a]
+    if isinstance(b, list):
+        return [a] + b
+    return Pair(a, b)
+
+
+def _append(*lists):
+    out = []
+    for lst in lists:
+        out.extend(_list_arg(lst))
+    return _lst(out)
+
+
+def _nth(i, lst):
+    lst = _list_arg(lst)
+    i = _int(i)
+    return lst[i] if 0 <= i < len(lst) else None
+
+
+def _member(x, lst):
+    lst = _list_arg(lst)
+    for i, item in enumerate(lst):
+        if _equal(item, x):
+            return lst[i:]
+    return None
+
+
+def _assoc(key, alist):
+    for item in _list_arg(alist):
+        if isinstance(item, (list, Pair)) and _equal(_car(item), key):
+            return item
+    return None
+
+
+def _subst(new, old, lst):
+    return _lst(new if _equal(item, old) else item for item in _list_arg(lst))
+
+
+def _point(p, name='point'):
+    if isinstance(p, list) and len(p) in (2, 3) and all(_is_number(v) for v in p):
+        return p
+    raise LispError(f"bad argument type: {name} {to_string(p, True)}")
+
+
+def _polar(p, angle, dist):
+    p = _point(p)
+    angle, dist = _num(angle), _num(dist)
+    return [p[0] + dist * math.cos(angle), p[1] + dist * math.sin(angle)] + ([float(p[2])] if len(p) == 3 else [])
+
+
+def _distance(p1, p2):
+    p1, p2 = _point(p1), _point(p2)
+    dz = (p2[2] - p1[2]) if len(p1) == 3 and len(p2) == 3 else 0.0
+    return math.sqrt((p2[0] - p1[0]) ** 2 + (p2[1] - p1[1]) ** 2 + dz ** 2)
+
+
+def _angle(p1, p2):
+    p1, p2 = _point(p1), _point(p2)
+    return math.atan2(p2[1] - p1[1], p2[0] - p1[0]) % (2 * math.pi)
+
+
+def _atan(y, x=None):
+    return math.atan2(_num(y), _num(x)) if x is not None else math.atan(_num(y))
+
+
+def _sqrt(x):
+    x = _num(x)
+    if x < 0:
+        raise LispError(f"function undefined for argument: {to_string(x)}")
+    return math.sqrt(x)
+
+
+def _rem(*args):
+    result = _num(args[0])
+    for a in args[1:]:
+        a = _num(a)
+        if a == 0:
+            raise LispError("divide by zero")
+        result = math.fmod(result, a) if isinstance(result, float) or isinstance(a, float) else \
+            int(math.copysign(abs(result) % abs(a), result))
+    return result
+
+
+def _fix(x):
+    return int(_num(x))
+
+
+def _rtos(x, mode=2, precision=4):
+    x, mode, precision = _num(x), _int(mode), _int(precision)
+    if mode not in (1, 2):
+        raise LispError(f"rtos: unit mode {mode} is not supported in a dry run")
+    return f"{x:.{precision}E}" if mode == 1 else f"{x:.{precision}f}"
+
+
+def _substr(s, start, length=None):
+    s, start = _str(s), _int(start)
+    if start < 1:
+        raise LispError(f"bad argument value: positive {start}")
+    return s[start - 1:] if length is None else s[start - 1:start - 1 + _int(length)]
+
+
+def _strcase(s, lower=None):
+    return _str(s).lower() if lower is not None else _str(s).upper()
+
+
+def _atoi(s):
+    m = re.match(r'\s*[+-]?\d+', _str(s))
+    return int(m.group()) if m else 0
+
+
+def _atof(s):
+    m = re.match(r'\s*[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?', _str(s))
+    return float(m.group()) if m else 0.0
+
+
+def _vl_string_subst(new, pattern, s, start=0):
+    s = _str(s)
+    i = s.find(_str(pattern), _int(start))
+    return s if i < 0 else s[:i] + _str(new) + s[i + len(pattern):]
+
+
+def _type(x):
+    if x is None:
+        return None
+    for kind, name in ((Symbol, 'sym'), (str, 'str'), (bool, 'sym'), (int, 'int'), (float, 'real'),
+                       ((list, Pair), 'list'), (Ename, 'ename'), (SelectionSet, 'pickset'),
+                       (LispFunction, 'usubr')):
+        if isinstance(x, kind):
+            return Symbol(name)
+    return Symbol('subr')
+
+
+def _predicate(test):
+    return lambda *args: T if test(*args) else None
+
+
+_PURE_FUNCTIONS = {
+    '+': _add, '-': _sub, '*': _mul, '/': _div,
+    '=': _compare(lambda a, b: a == b, True), '<': _compare(lambda a, b: a < b), '>': _compare(lambda a, b: a > b),
+    '<=': _compare(lambda a, b: a <= b), '>=': _compare(lambda a, b: a >= b),
+    '/=': lambda a, b: None if _compare(lambda x, y: x == y, True)(a, b) else T,
+    '1+': lambda x: _num(x) + 1, '1-': lambda x: _num(x) - 1,
+    'abs': lambda x: abs(_num(x)), 'fix': _fix, 'float': lambda x: float(_num(x)),
+    'max': lambda *a: max(_num(x) for x in a), 'min': lambda *a: min(_num(x) for x in a),
+    'sin': lambda x: math.sin(_num(x)), 'cos': lambda x: math.cos(_num(x)), 'atan': _atan, 'sqrt': _sqrt,
+    'exp': lambda x: math.exp(_num(x)), 'expt': lambda b, e: _num(b) ** _num(e), 'rem': _rem,
+    'zerop': _predicate(lambda x: _num(x) == 0), 'minusp': _predicate(lambda x: _num(x) < 0),
+    'numberp': _predicate(_is_number), 'listp': _predicate(lambda x: x is None or isinstance(x, (list, Pair))),
+    'atom': _predicate(lambda x: not isinstance(x, (list, Pair))),
+    'not': _predicate(lambda x: x is None), 'null': _predicate(lambda x: x is None),
+    'eq': _predicate(_eq), 'equal': _predicate(lambda a, b, fuzz=0.0: _equal(a, b, _num(fuzz))),
+    'car': _car, 'cdr': _cdr, 'cadr': lambda x: _car(_cdr(x)), 'cddr': lambda x: _cdr(_cdr(x)),
+    'caar': lambda x: _car(_car(x)), 'cdar': lambda x: _cdr(_car(x)), 'caddr': lambda x: _car(_cdr(_cdr(x))),
+    'cadar': lambda x: _car(_cdr(_car(x))),
+    'cons': _cons, 'list': lambda *a: _lst(a), 'append': _append, 'length': lambda x: len(_list_arg(x)),
+    'nth': _nth, 'last': lambda x: (_list_arg(x) or [None])[-1], 'reverse': lambda x: _lst(reversed(_list_arg(x))),
+    'member': _member, 'assoc': _assoc, 'subst': _subst,
+    'polar': _polar, 'distance': _distance, 'angle': _angle,
+    'strcat': lambda *a: ''.join(_str(s) for s in a), 'strlen': lambda *a: sum(len(_str(s)) for s in a),
+    'substr': _substr, 'strcase': _strcase, 'itoa': lambda x: str(_int(x)), 'atoi': _atoi, 'atof': _atof,
+    'rtos': _rtos, 'vl-princ-to-string': to_string, 'vl-prin1-to-string': lambda x: to_string(x, True),
+    'vl-string-subst': _vl_string_subst, 'vl-load-com': lambda: None, 'type': _type,
+}
+
+
+# ==============================================================================
+# Interpreter
+# ==============================================================================
+class LispInterpreter:
+    """
+    Runs AutoLISP source against a modeled drawing database.
+
+        interp = LispInterpreter(load_paths=['./lsp_out'])
+        interp.run(source)              # load the file and run its C: commands
+        report = interp.report()
+    """
+
+    def __init__(self, load_paths=()):
+        self.load_paths = list(load_paths)
+        self.env = {'t': T, 'pi': math.pi}
+        self.sysvars = dict(DEFAULT_SYSVARS)
+        self.tables = {name: {} for name in TABLE_TYPES}
+        self.entities = []          # drawn entities, in creation order
+        self.commands = []          # (command name, line)
+        self.command_counts = Counter()
+        self.entmake_count = 0
+        self.errors = []
+        self.warnings = []
+        self.output = []
+        self.line = 0
+        self._handle = 0x20
+        self._depth = 0
+        self._pending = None        # the running command: a generator waiting for its next input
+        self._pending_name = None
+        self._undo_depth = 0
+        self._sections, self._section_lines, self.section = [], [], None
+        self._special = {
+            'quote': self._quote, 'function': self._quote, 'setq': self._setq, 'defun': self._defun,
+            'lambda': self._lambda, 'if': self._if, 'cond': self._cond, 'progn': self._progn,
+            'while': self._while, 'repeat': self._repeat, 'foreach': self._foreach, 'and': self._and, 'or': self._or,
+        }
+        self.builtins = dict(_PURE_FUNCTIONS)
+        self.builtins.update({
+            'command': self._command, 'command-s': self._command, 'princ': self._princ, 'prin1': self._prin1,
+            'print': self._print, 'terpri': self._terpri, 'alert': self._princ, 'mapcar': self._mapcar,
+            'apply': self._apply, 'set': self._set, 'boundp': self._boundp, 'load': self._load,
+            'getvar': self._getvar, 'setvar': self._setvar, 'regapp': self._regapp,
+            'tblsearch': self._tblsearch, 'tblobjname': self._tblobjname,
+            'entmake': self._entmake, 'entmod': self._entmod, 'entget': self._entget, 'entlast': self._entlast,
+            'entnext': self._entnext, 'entdel': self._entdel, 'entupd': lambda e: e, 'redraw': lambda *a: None,
+            'ssget': self._ssget, 'ssadd': self._ssadd, 'sslength': self._sslength, 'ssname': self._ssname,
+        })
+        for name in ('getpoint', 'getreal', 'getint', 'getstring', 'getdist', 'getangle', 'getkword', 'entsel'):
+            self.builtins[name] = self._interactive(name)
+        self._commands = {
+            'LINE': self._cmd_line, 'PLINE': self._cmd_pline, 'RECTANG': self._cmd_rectang,
+            'CIRCLE': self._cmd_circle, 'ARC': self._cmd_arc, 'POLYGON': self._cmd_polygon, 'TEXT': self._cmd_text,
+            'DIMLINEAR': self._cmd_dimlinear, 'DIMDIAMETER': self._cmd_dimdiameter, 'LEADER': self._cmd_leader,
+            'HATCH': self._cmd_hatch, 'LAYER': self._cmd_layer, 'LINETYPE': self._cmd_linetype,
+            'DIMSTYLE': self._cmd_dimstyle, 'UNDO': self._cmd_undo, 'ZOOM': self._cmd_zoom,
+            'VPOINT': self._cmd_vpoint, 'SHADEMODE': self._cmd_one_option, 'VSCURRENT': self._cmd_one_option,
+            'REGEN': self._cmd_none, 'BOX': self._cmd_box, 'CYLINDER': self._cmd_cylinder,
+            'TORUS': self._cmd_torus, 'EXTRUDE': self._cmd_extrude, 'UNION': self._cmd_union,
+            'SUBTRACT': self._cmd_subtract, 'MOVE': self._cmd_move, 'ERASE': self._cmd_erase,
+        }
+        self._add_record('LTYPE', [Pair(0, "LTYPE"), Pair(2, "ByBlock")])
+        self._add_record('LTYPE', [Pair(0, "LTYPE"), Pair(2, "ByLayer")])
+        self._add_record('LTYPE', [Pair(0, "LTYPE"), Pair(2, "Continuous")])
+        self._add_record('LAYER', [Pair(0, "LAYER"), Pair(2, "0"), Pair(70, 0), Pair(62, 7), Pair(6, "Continuous")])
+        self._add_record('STYLE', [Pair(0, "STYLE"), Pair(2, "Standard"), Pair(40, 0.0)])
+        self._add_record('DIMSTYLE', [Pair(0, "DIMSTYLE"), Pair(2, "Standard")])
+        self._add_record('APPID', [Pair(0, "APPID"), Pair(2, "ACAD")])
+
+    # --- Running ---
+    def run(self, source: str, entry=None) -> 'LispInterpreter':
+        """
+        Loads `source` and runs its C: commands (all of them in definition order, or only `entry`).
+        Errors are recorded in self.errors rather than raised.
+        """
+        defined_before = set(self.env)
+        try:
+            self._eval_source(source)
+            commands = [name for name, value in self.env.items()
+                        if name.startswith('c:') and isinstance(value, LispFunction) and name not in defined_before]
+            if entry:
+                if entry.lower() not in self.env:
+                    raise LispError(f"no function definition: {entry.upper()}")
+                commands = [entry.lower()]
+            for name in commands:
+                self._call(self.env[name], [])
+            if self._pending is not None:
+                self._problem(f"{self._pending_name} was left waiting for input at the end of the run")
+            if self._undo_depth > 0:
+                self._problem("UNDO Begin has no matching UNDO End")
+        except LispSyntaxError as e:
+            self.errors.append(f"line {e.line}: syntax error: {e}")
+        except LispError as e:
+            where = f" (in {e.function.upper()})" if e.function else ""
+            self.errors.append(f"line {e.line or self.line}{where}: error: {e}")
+        except RecursionError:
+            self.errors.append(f"line {self.line}: error: call stack overflow")
+        return self
+
+    def _eval_source(self, source: str):
+        code = [_prepare(expr) for expr in parse(source)]
+        saved = self._sections, self._section_lines, self.section
+        sections = [(source.count('\n', 0, m.start()) + 1, m.group(1)) for m in _SECTION_RE.finditer(source)]
+        self._sections, self._section_lines = [s for _, s in sections], [line for line, _ in sections]
+        depth, self._depth = self._depth, 0
+        try:
+            result = None
+            for form in code:
+                result = self.eval(form)
+            return result
+        finally:
+            self._depth = depth
+            if saved[0] or saved[2] is not None:
+                self._sections, self._section_lines, self.section = saved
+
+    def eval(self, expr):
+        if isinstance(expr, Symbol):
+            return self.env.get(expr)
+        if isinstance(expr, Quote):
+            return expr.value
+        if not isinstance(expr, list):
+            return expr
+        if not expr:
+            return None
+        line = getattr(expr, 'line', 0)
+        if line:
+            self.line = line
+            if self._depth <= 1 and self._section_lines:
+                i = bisect.bisect_right(self._section_lines, line)
+                if i:
+                    self.section = self._sections[i - 1]
+        head = expr[0]
+        if isinstance(head, Symbol):
+            special = self._special.get(head)
+            if special:
+                return special(expr)
+            func = self.env.get(head)
+            if not isinstance(func, LispFunction):
+                func = self.builtins.get(head)
+            if func is None:
+                raise LispError(f"no function definition: {head.upper()}")
+        else:
+            func = self._callable(self.eval(head))
+        return self._call(func, [self.eval(arg) for arg in expr[1:]])
+
+    def _call(self, func, args):
+        if not isinstance(func, LispFunction):
+            try:
+                return func(*args)
+            except TypeError as e:
+                if 'argument' in str(e):
+                    raise LispError(f"wrong number of arguments: {getattr(func, '__name__', 'builtin')}")
+                raise
+        if len(args) != len(func.params):
+            raise LispError(f"too {'few' if len(args) < len(func.params) else 'many'} arguments: {func.name.upper()}")
+        if self._depth >= MAX_CALL_DEPTH:
+            raise LispError(f"call depth exceeds {MAX_CALL_DEPTH} in {func.name.upper()}")
+        names = func.params + func.local_vars
+        saved = [(name, self.env.get(name)) for name in names]
+        for name, value in zip(func.params, args):
+            self.env[name] = value
+        for name in func.local_vars:
+            self.env[name] = None
+        self._depth += 1
+        line = self.line
+        try:
+            result = None
+            for form in func.body:
+                result = self.eval(form)
+            return result
+        except LispError as e:
+            if e.function is None:
+                e.line, e.function = self.line, func.name
+            raise
+        finally:
+            self._depth -= 1
+            self.line = line
+            for name, value in saved:
+                self.env[name] = value
+
+    def _callable(self, value):
+        if isinstance(value, LispFunction) or callable(value):
+            return value
+        if isinstance(value, Symbol):
+            func = self.env.get(value)
+            func = func if isinstance(func, LispFunction) else self.builtins.get(value)
+            if func is None:
+                raise LispError(f"no function definition: {value.upper()}")
+            return func
+        if isinstance(value, list) and value[0] == 'lambda':
+            return self._make_function('lambda', value[1], value[2:])
+        raise LispError(f"bad function: {to_string(value, True)}")
+
+    def _problem(self, message):
+        self.errors.append(f"line {self.line}: {message}")
+
+    def _warn(self, message):
+        self.warnings.append(f"line {self.line}: {message}")
+
+    # --- Special forms ---
+    def _quote(self, expr):
+        value = expr[1]
+        return value.value if isinstance(value, Quote) else value
+
+    def _setq(self, expr):
+        if len(expr) % 2 == 0:
+            raise LispError("too few arguments: SETQ")
+        value = None
+        for name, value_expr in zip(expr[1::2], expr[2::2]):
+            if not isinstance(name, Symbol):
+                raise LispError(f"bad argument type: symbolp {to_string(name, True)}")
+            value = self.eval(value_expr)
+            self.env[name] = value
+        return value
+
+    def _make_function(self, name, arglist, body):
+        names = list(arglist or [])
+        if not all(isinstance(n, Symbol) for n in names):
+            raise LispError(f"bad argument list in {name.upper()}")
+        split = names.index('/') if '/' in names else len(names)
+        return LispFunction(name, names[:split], names[split + 1:], list(body))
+
+    def _defun(self, expr):
+        name = expr[1]
+        self.env[name] = self._make_function(name, expr[2], expr[3:])
+        return name
+
+    def _lambda(self, expr):
+        return self._make_function('lambda', expr[1], expr[2:])
+
+    def _if(self, expr):
+        if len(expr) not in (3, 4):
+            raise LispError("wrong number of arguments: IF")
+        if self.eval(expr[1]) is not None:
+            return self.eval(expr[2])
+        return self.eval(expr[3]) if len(expr) == 4 else None
+
+    def _cond(self, expr):
+        for clause in expr[1:]:
+            value = self.eval(clause[0])
+            if value is not None:
+                for form in clause[1:]:
+                    value = self.eval(form)
+                return value
+        return None
+
+    def _progn(self, expr):
+        result = None
+        for form in expr[1:]:
+            result = self.eval(form)
+        return result
+
+    def _while(self, expr):
+        result, count = None, 0
+        while self.eval(expr[1]) is not None:
+            count += 1
+            if count > MAX_LOOP_ITERATIONS:
+                raise LispError(f"WHILE loop did not end after {MAX_LOOP_ITERATIONS} iterations")
+            for form in expr[2:]:
+                result = self.eval(form)
+        return result
+
+    def _repeat(self, expr):
+        result = None
+        for _ in range(_int(self.eval(expr[1]))):
+            for form in expr[2:]:
+                result = self.eval(form)
+        return result
+
+    def _foreach(self, expr):
+        name, result = expr[1], None
+        saved = self.env.get(name)
+        try:
+            for item in _list_arg(self.eval(expr[2])):
+                self.env[name] = item
+                for form in expr[3:]:
+                    result = self.eval(form)
+        finally:
+            self.env[name] = saved
+        return result
+
+    def _and(self, expr):
+        return T if all(self.eval(e) is not None for e in expr[1:]) else None
+
+    def _or(self, expr):
+        return T if any(self.eval(e) is not None for e in expr[1:]) else None
+
+    # --- Functions that need the interpreter ---
+    def _princ(self, value=Quote, *_):
+        if value is Quote:
+            return None  # (princ) prints nothing: the usual quiet exit
+        self.output.append(to_string(value))
+        return value
+
+    def _prin1(self, value=Quote, *_):
+        if value is Quote:
+            return None
+        self.output.append(to_string(value, True))
+        return value
+
+    def _print(self, value=None, *_):
+        self.output.append('\n' + to_string(value, True) + ' ')
+        return value
+
+    def _terpri(self):
+        self.output.append('\n')
+        return None
+
+    def _mapcar(self, func, *lists):
+        func = self._callable(func)
+        lists = [_list_arg(lst) for lst in lists]
+        return _lst(self._call(func, list(args)) for args in zip(*lists))
+
+    def _apply(self, func, args):
+        return self._call(self._callable(func), _list_arg(args))
+
+    def _set(self, name, value):
+        if not isinstance(name, Symbol):
+            raise LispError(f"bad argument type: symbolp {to_string(name, True)}")
+        self.env[name] = value
+        return value
+
+    def _boundp(self, name):
+        return T if self.env.get(name) is not None else None
+
+    def _interactive(self, name):
+        def ask(*_):
+            raise LispError(f"{name.upper()} needs user input, which a dry run cannot give")
+        return ask
+
+    def _load(self, filename, on_failure=Quote):
+        filename = _str(filename)
+        names = [filename] if os.path.splitext(filename)[1] else [filename + '.lsp', filename]
+        for directory in self.load_paths:
+            for name in names:
+                path = os.path.join(directory, name)
+                if os.path.isfile(path):
+                    with open(path, 'r', encoding='utf-8') as f:
+                        return self._eval_source(f.read())
+        if on_failure is not Quote:
+            return on_failure
+        raise LispError(f"LOAD failed: {to_string(filename, True)}")
+
+    def _getvar(self, name):
+        return self.sysvars.get(_str(name).upper())
+
+    def _setvar(self, name, value):
+        key = _str(name).upper()
+        if key not in self.sysvars:
+            raise LispError(f"unknown system variable {key}")
+        current = self.sysvars[key]
+        valid = (isinstance(value, str) if isinstance(current, str) else _is_number(value))
+        if key == 'CLAYER' and valid:
+            valid = value.upper() in self.tables['LAYER']
+        elif key in ('TEXTSTYLE', 'DIMSTYLE') and valid:
+            valid = value.upper() in self.tables['STYLE' if key == 'TEXTSTYLE' else 'DIMSTYLE']
+        if not valid:
+            raise LispError(f"AutoCAD variable setting rejected: {key} {to_string(value, True)}")
+        self.sysvars[key] = float(value) if isinstance(current, float) else value
+        return value
+
+    # --- Symbol tables ---
+    def _next_handle(self):
+        self._handle += 1
+        return self._handle
+
+    def _add_record(self, table, groups):
+        record = Entity(self._next_handle(), groups)
+        self.tables[table][str(_group_value(groups, 2)).upper()] = record
+        return record
+
+    def _regapp(self, name):
+        if _str(name).upper() in self.tables['APPID']:
+            return None
+        self._add_record('APPID', [Pair(0, "APPID"), Pair(2, name), Pair(70, 0)])
+        return name
+
+    def _tblsearch(self, table, name, *_):
+        record = self.tables.get(_str(table).upper(), {}).get(_str(name).upper())
+        return list(record.groups) if record else None
+
+    def _tblobjname(self, table, name):
+        record = self.tables.get(_str(table).upper(), {}).get(_str(name).upper())
+        return record.ename if record else None
+
+    # --- Entities ---
+    def _check_groups(self, data):
+        """Returns the reason an entmake/entmod list would be refused, or None."""
+        if not isinstance(data, list) or not all(isinstance(g, (list, Pair)) and isinstance(_car(g), int)
+                                                 for g in data):
+            return "not a list of DXF groups"
+        kind = _group_value(data, 0)
+        if not isinstance(kind, str):
+            return "no (0 . type) group"
+        kind = kind.upper()
+        if kind in TABLE_TYPES:
+            if not isinstance(_group_value(data, 2), str):
+                return f"{kind} record without a (2 . name) group"
+            if kind == 'LAYER':
+                ltype = _group_value(data, 6)
+                if ltype is not None and str(ltype).upper() not in self.tables['LTYPE']:
+                    return f"linetype {ltype} is not loaded"
+            return None
+        if kind not in REQUIRED_GROUPS:
+            return f"unknown entity type {kind}"
+        codes = {_car(g) for g in data}
+        missing = [code for code in REQUIRED_GROUPS[kind] if code not in codes]
+        if kind == 'DIMENSION':
+            subclasses = [_cdr(g) for g in data if _car(g) == 100]
+            if 'AcDbAlignedDimension' in subclasses:
+                missing += [code for code in (13, 14) if code not in codes]
+            if 'AcDbDiametricDimension' in subclasses:
+                missing += [code for code in (15,) if code not in codes]
+        if missing:
+            return f"{kind} without group(s) {', '.join(map(str, missing))}"
+        for g in data:
+            code, value = _car(g), _cdr(g)
+            if 10 <= code <= 18 and not (isinstance(value, list) and len(value) in (2, 3)
+                                         and all(_is_number(v) for v in value)):
+                return f"group {code} is not a point: {to_string(value, True)}"
+            if code in (40, 41, 50, 51) and not _is_number(value):
+                return f"group {code} is not a number: {to_string(value, True)}"
+        if kind == 'LWPOLYLINE':
+            count = _group_value(data, 90)
+            vertices = sum(1 for g in data if _car(g) == 10)
+            if count is not None and count != vertices:
+                return f"LWPOLYLINE has (90 . {count}) but {vertices} vertices"
+        ltype = _group_value(data, 6)
+        if ltype is not None and str(ltype).upper() not in self.tables['LTYPE']:
+            return f"linetype {ltype} is not loaded"
+        for g in data:
+            if _car(g) == -3:
+                for block in _list_arg(_cdr(g)):
+                    if not isinstance(block, list) or not isinstance(block[0], str):
+                        return "malformed XDATA"
+                    if block[0].upper() not in self.tables['APPID']:
+                        return f"XDATA application {block[0]} is not registered (regapp)"
+        return None
+
+    def _add_entity(self, groups, command=None, extents=None):
+        """Adds a drawn entity on the current layer (unless it names its own) and returns it."""
+        if _group_value(groups, 8) is None:
+            groups = [groups[0], Pair(8, self.sysvars['CLAYER'])] + groups[1:]
+        layer = str(_group_value(groups, 8))
+        if layer.upper() not in self.tables['LAYER']:
+            self._add_record('LAYER', [Pair(0, "LAYER"), Pair(2, layer), Pair(70, 0), Pair(62, 7),
+                                       Pair(6, "Continuous")])
+        entity = Entity(self._next_handle(), groups, self.section, self.line, command, extents)
+        self.entities.append(entity)
+        return entity
+
+    def _entmake(self, data=None):
+        self.entmake_count += 1
+        reason = self._check_groups(data)
+        if reason:
+            self._problem(f"entmake failed: {reason}")
+            return None
+        kind = _group_value(data, 0).upper()
+        if kind in TABLE_TYPES:
+            self._add_record(kind, [g for g in data if _car(g) != -1])
+        else:
+            self._add_entity([g for g in data if _car(g) != -1], 'entmake')
+        return data
+
+    def _entity(self, ename):
+        if not isinstance(ename, Ename):
+            raise LispError(f"bad argument type: lentityp {to_string(ename, True)}")
+        return ename.entity
+
+    def _entget(self, ename, apps=None):
+        entity = self._entity(ename)
+        if entity.deleted:
+            return None
+        wanted = {str(a).upper() for a in _list_arg(apps)}
+        groups = [g for g in entity.groups if _car(g) != -3]
+        for g in entity.groups:
+            if _car(g) == -3 and wanted:
+                blocks = [b for b in _cdr(g) if '*' in wanted or str(b[0]).upper() in wanted]
+                if blocks:
+                    groups.append([-3] + blocks)
+        return [Pair(-1, ename)] + groups
+
+    def _entmod(self, data):
+        ename = _group_value(data, -1) if isinstance(data, list) else None
+        if not isinstance(ename, Ename):
+            self._problem("entmod failed: no (-1 . entity name) group")
+            return None
+        reason = self._check_groups(data)
+        if reason is None and _group_value(data, 0) != ename.entity.type:
+            reason = "the entity type cannot be changed"
+        if reason:
+            self._problem(f"entmod failed: {reason}")
+            return None
+        groups = [g for g in data if _car(g) != -1]
+        xdata = [g for g in groups if _car(g) == -3]
+        if not xdata:
+            # entmod keeps the XDATA of applications the list does not mention.
+            groups += [g for g in ename.entity.groups if _car(g) == -3]
+        ename.entity.groups = groups
+        return data
+
+    def _live(self):
+        return [e for e in self.entities if not e.deleted]
+
+    def _entlast(self):
+        live = self._live()
+        return live[-1].ename if live else None
+
+    def _entnext(self, ename=None):
+        entities = self.entities
+        start = 0 if ename is None else entities.index(self._entity(ename)) + 1
+        for entity in entities[start:]:
+            if not entity.deleted:
+                return entity.ename
+        return None
+
+    def _entdel(self, ename):
+        entity = self._entity(ename)
+        entity.deleted = not entity.deleted
+        return ename
+
+    def _ssget(self, mode=None, *args):
+        if _option(mode) != 'X':
+            raise LispError(f"ssget mode {to_string(mode, True)} is not supported in a dry run")
+        filters = _list_arg(args[-1]) if args else []
+        selected = []
+        for entity in self._live():
+            for f in filters:
+                code, value = _car(f), _cdr(f)
+                if code == -3:
+                    if not all(entity.tag(str(_car(app))) is not None for app in _list_arg(value)):
+                        break
+                elif code in (0, 8, 2):
+                    if str(_group_value(entity.groups, code) or '').upper() != str(value).upper():
+                        break
+                else:
+                    raise LispError(f"ssget filter group {code} is not supported in a dry run")
+            else:
+                selected.append(entity)
+        return SelectionSet(selected) if selected else None
+
+    def _ssadd(self, ename=None, selection=None):
+        if ename is None:
+            return SelectionSet()
+        entity = self._entity(ename)
+        if selection is None:
+            return SelectionSet([entity])
+        if entity not in selection.entities:
+            selection.entities.append(entity)
+        return selection
+
+    def _sslength(self, selection):
+        if not isinstance(selection, SelectionSet):
+            raise LispError(f"bad argument type: lselsetp {to_string(selection, True)}")
+        return len(selection.entities)
+
+    def _ssname(self, selection, index):
+        if not isinstance(selection, SelectionSet):
+            raise LispError(f"bad argument type: lselsetp {to_string(selection, True)}")
+        index = _int(index)
+        return selection.entities[index].ename if 0 <= index < len(selection.entities) else None
+
+    # ==========================================================================
+    # Command Processor
+    # ==========================================================================
+    def _command(self, *tokens):
+        if not tokens:
+            # (command) with no arguments cancels the running command, like ESC.
+            if self._pending is not None:
+                self._pending.close()
+                self._pending = None
+            return None
+        for token in tokens:
+            self._feed(token)
+        if self._pending_name == '?':
+            self._pending = self._pending_name = None
+        return None
+
+    def _feed(self, token):
+        if token is None:
+            raise LispError(f"nil is not valid input{' for ' + self._pending_name if self._pending else ''}")
+        if self._pending is None:
+            if token == "":
+                return  # Enter at an idle command line
+            if self._pending_name == '?':
+                return  # input of a command this dry run does not model
+            if not isinstance(token, str) or isinstance(token, Symbol):
+                raise LispError(f"{to_string(token, True)} is not a command name")
+            name = _norm_command(token)
+            self.commands.append((name, self.line))
+            self.command_counts[name] += 1
+            handler = self._commands.get(name)
+            if handler is None:
+                self._warn(f"command {name} is not modeled; its input is skipped")
+                self._pending_name = '?'
+                return
+            self._pending, self._pending_name = handler(name), name
+            try:
+                next(self._pending)
+            except StopIteration:
+                self._pending = None
+            return
+        try:
+            self._pending.send(token)
+        except StopIteration:
+            self._pending = None
+
+    # --- Input helpers ---
+    def _in_point(self, token, name, prompt='a point'):
+        if isinstance(token, list) and len(token) in (2, 3) and all(_is_number(v) for v in token):
+            return (float(token[0]), float(token[1]), float(token[2]) if len(token) == 3 else 0.0)
+        if isinstance(token, str) and re.fullmatch(r'\s*[-+.\d eE]+(,[-+.\d eE]+){1,2}\s*', token):
+            values = [float(v) for v in token.split(',')]
+            return tuple(values + [0.0] * (3 - len(values)))
+        hint = " (is the previous command missing its closing \"\"?)" if _is_command_like(token) else ""
+        raise LispError(f"{name}: expected {prompt}, got {to_string(token, True)}{hint}")
+
+    def _in_number(self, token, name, prompt='a number'):
+        if _is_number(token):
+            return float(token)
+        if isinstance(token, str) and re.fullmatch(r'\s*[-+]?(\d+\.?\d*|\.\d+)([eE][-+]?\d+)?\s*', token):
+            return float(token)
+        raise LispError(f"{name}: expected {prompt}, got {to_string(token, True)}")
+
+    def _in_objects(self, name):
+        """Generator part: reads object selections up to the closing "" and returns the entities."""
+        selected = []
+        while True:
+            token = yield
+            if token == "":
+                return selected
+            if isinstance(token, Ename):
+                entities = [token.entity]
+            elif isinstance(token, SelectionSet):
+                entities = token.entities
+            elif _option(token) in ('L', 'LAST'):
+                entities = self._live()[-1:]
+            elif _option(token) == 'ALL':
+                entities = self._live()
+            else:
+                raise LispError(f"{name}: expected an object selection, got {to_string(token, True)}")
+            for entity in entities:
+                if entity.deleted:
+                    self._problem(f"{name}: selected entity {entity.handle:x} was erased")
+                elif entity not in selected:
+                    selected.append(entity)
+
+    def _in_layers(self, token):
+        """A -LAYER name list ("" is the current layer)."""
+        names = [self.sysvars['CLAYER']] if token == "" else str(token).split(',')
+        return [self.tables['LAYER'][n.upper()] for n in names if n.upper() in self.tables['LAYER']]
+
+    # --- 2D commands ---
+    def _cmd_line(self, name):
+        first = prev = self._in_point((yield), name)
+        while True:
+            token = yield
+            if token == "":
+                return
+            if _option(token) in ('C', 'CLOSE'):
+                self._add_entity([Pair(0, "LINE"), [10, *prev], [11, *first]], name)
+                return
+            point = self._in_point(token, name)
+            self._add_entity([Pair(0, "LINE"), [10, *prev], [11, *point]], name)
+            prev = point
+
+    def _lwpolyline(self, points, closed, name):
+        groups = [Pair(0, "LWPOLYLINE"), Pair(100, "AcDbEntity"), Pair(100, "AcDbPolyline"),
+                  Pair(90, len(points)), Pair(70, 1 if closed else 0)]
+        if points and points[0][2]:
+            groups.append(Pair(38, points[0][2]))
+        self._add_entity(groups + [[10, p[0], p[1]] for p in points], name)
+
+    def _cmd_pline(self, name):
+        points = [self._in_point((yield), name)]
+        while True:
+            token = yield
+            option = _option(token)
+            if token == "" or option in ('C', 'CLOSE'):
+                if len(points) < 2:
+                    self._warn(f"{name} with a single point draws nothing")
+                    return
+                self._lwpolyline(points, token != "", name)
+                return
+            if option in ('W', 'WIDTH', 'H', 'HALFWIDTH'):
+                self._in_number((yield), name, 'a width')
+                self._in_number((yield), name, 'a width')
+                continue
+            if option is not None and not _is_command_like(token) and option.isalpha():
+                raise LispError(f"{name}: option {token} is not supported in a dry run")
+            points.append(self._in_point(token, name))
+
+    def _cmd_rectang(self, name):
+        x1, y1, z = self._in_point((yield), name)
+        x2, y2, _ = self._in_point((yield), name, 'the other corner')
+        self._lwpolyline([(x1, y1, z), (x2, y1, z), (x2, y2, z), (x1, y2, z)], True, name)
+
+    def _radius(self, token, name):
+        """Generator part: a radius, or _D and a diameter."""
+        if _option(token) in ('D', 'DIAMETER'):
+            return self._in_number((yield), name, 'a diameter') / 2.0
+        return self._in_number(token, name, 'a radius')
+
+    def _cmd_circle(self, name):
+        center = self._in_point((yield), name, 'a center point')
+        radius = yield from self._radius((yield), name)
+        self._add_entity([Pair(0, "CIRCLE"), [10, *center], Pair(40, radius)], name)
+
+    def _cmd_arc(self, name):
+        token = yield
+        if _option(token) in ('C', 'CENTER'):
+            center = self._in_point((yield), name, 'a center point')
+            start = self._in_point((yield), name, 'a start point')
+            end = self._in_point((yield), name, 'an end point')
+        else:
+            start = self._in_point(token, name, 'a start point')
+            token = yield
+            if _option(token) in ('C', 'CENTER'):
+                center = self._in_point((yield), name, 'a center point')
+                end = self._in_point((yield), name, 'an end point')
+            else:
+                second = self._in_point(token, name, 'a second point')
+                end = self._in_point((yield), name, 'an end point')
+                center = _circumcenter(start, second, end)
+                if center is None:
+                    raise LispError(f"{name}: the three points are collinear")
+                if not _ccw_between(center, start, second, end):
+                    start, end = end, start
+        radius = math.hypot(start[0] - center[0], start[1] - center[1])
+        a0 = math.atan2(start[1] - center[1], start[0] - center[0]) % (2 * math.pi)
+        a1 = math.atan2(end[1] - center[1], end[0] - center[0]) % (2 * math.pi)
+        self._add_entity([Pair(0, "ARC"), [10, *center], Pair(40, radius), Pair(50, a0), Pair(51, a1)], name)
+
+    def _cmd_polygon(self, name):
+        sides = self._in_number((yield), name, 'the number of sides')
+        if sides != int(sides) or not 3 <= sides <= 1024:
+            raise LispError(f"{name}: the number of sides must be an integer from 3 to 1024, got {sides:g}")
+        sides = int(sides)
+        center = self._in_point((yield), name, 'a center point')
+        option = _option((yield))
+        if option not in ('I', 'INSCRIBED', 'C', 'CIRCUMSCRIBED'):
+            raise LispError(f"{name}: expected _I or _C, got {option}")
+        token = yield
+        if isinstance(token, list):
+            point = self._in_point(token, name)
+            radius = math.hypot(point[0] - center[0], point[1] - center[1])
+            start = math.atan2(point[1] - center[1], point[0] - center[0])
+            if option.startswith('C'):
+                start -= math.pi / sides
+        else:
+            # A typed radius draws the bottom edge horizontal.
+            radius = self._in_number(token, name, 'a radius')
+            start = -math.pi / 2 - math.pi / sides
+        if option.startswith('C'):
+            radius /= math.cos(math.pi / sides)
+        points = [(center[0] + radius * math.cos(start + 2 * math.pi * k / sides),
+                   center[1] + radius * math.sin(start + 2 * math.pi * k / sides), center[2]) for k in range(sides)]
+        self._lwpolyline(points, True, name)
+
+    _JUSTIFICATIONS = {'L': (0, 0), 'C': (1, 0), 'R': (2, 0), 'M': (4, 0), 'TL': (0, 3), 'TC': (1, 3),
+                       'TR': (2, 3), 'ML': (0, 2), 'MC': (1, 2), 'MR': (2, 2), 'BL': (0, 1), 'BC': (1, 1),
+                       'BR': (2, 1)}
+
+    def _cmd_text(self, name):
+        align = (0, 0)
+        style = self.sysvars['TEXTSTYLE']
+        while True:
+            token = yield
+            option = _option(token)
+            if option in ('J', 'JUSTIFY'):
+                just = _option((yield))
+                if just not in self._JUSTIFICATIONS:
+                    raise LispError(f"{name}: justification {just} is not supported in a dry run")
+                align = self._JUSTIFICATIONS[just]
+            elif option in ('S', 'STYLE'):
+                style = str((yield))
+                if style.upper() not in self.tables['STYLE']:
+                    raise LispError(f"{name}: text style {style} not found")
+            else:
+                break
+        point = self._in_point(token, name, 'a text insertion point')
+        height = self._in_number((yield), name, 'a text height')
+        rotation = self._in_number((yield), name, 'a rotation angle')
+        text = yield
+        if text == "":
+            return
+        text = text if isinstance(text, str) else to_string(text)
+        groups = [Pair(0, "TEXT"), [10, *point], Pair(40, height), Pair(1, text), Pair(50, math.radians(rotation)),
+                  Pair(7, style), Pair(72, align[0]), Pair(73, align[1])]
+        if align != (0, 0):
+            groups.insert(2, [11, *point])
+        self._add_entity(groups, name)
+
+    def _dimension_text(self, name):
+        """
+        Generator part: _T/_A/_H/_V/_R options before the dimension line location.
+        Returns (text, location, rotation); rotation is None unless _H, _V or _R chose it.
+        """
+        text = rotation = None
+        while True:
+            token = yield
+            option = _option(token)
+            if option in ('T', 'TEXT'):
+                text = yield
+                if not isinstance(text, str):
+                    raise LispError(f"{name}: expected the dimension text, got {to_string(text, True)}")
+            elif option in ('A', 'ANGLE'):
+                self._in_number((yield), name, 'an angle')
+            elif option in ('R', 'ROTATED'):
+                rotation = self._in_number((yield), name, 'an angle')
+            elif option in ('H', 'HORIZONTAL', 'V', 'VERTICAL'):
+                rotation = 0.0 if option[0] == 'H' else 90.0
+            else:
+                return text, self._in_point(token, name, 'the dimension line location'), rotation
+
+    def _dimension(self, subclass, points, text, name, tail=()):
+        groups = [Pair(0, "DIMENSION"), Pair(100, "AcDbEntity"), Pair(100, "AcDbDimension"),
+                  Pair(1, text or ""), Pair(3, self.sysvars['DIMSTYLE']), Pair(100, subclass)]
+        self._add_entity(groups + [[code, *p] for code, p in points] + list(tail), name)
+
+    def _cmd_dimlinear(self, name):
+        token = yield
+        if token == "":
+            raise LispError(f"{name}: selecting an object to dimension is not supported in a dry run")
+        p1 = self._in_point(token, name, 'the first extension line origin')
+        p2 = self._in_point((yield), name, 'the second extension line origin')
+        text, location, rotation = yield from self._dimension_text(name)
+        if rotation is None:
+            # Horizontal unless the location lies beside the span (DIMLINEAR's automatic orientation).
+            dx, dy = abs(p2[0] - p1[0]), abs(p2[1] - p1[1])
+            beside = not min(p1[0], p2[0]) <= location[0] <= max(p1[0], p2[0])
+            rotation = 90.0 if dx < 1e-9 or (dy >= 1e-9 and beside) else 0.0
+        # Group 10 is where the second extension line meets the dimension line; 11 is the text midpoint.
+        ux, uy = math.cos(math.radians(rotation)), math.sin(math.radians(rotation))
+
+        def on_line(x, y):
+            t = (x - location[0]) * ux + (y - location[1]) * uy
+            return location[0] + t * ux, location[1] + t * uy, location[2]
+
+        points = [(10, on_line(p2[0], p2[1])), (11, on_line((p1[0] + p2[0]) / 2, (p1[1] + p2[1]) / 2)),
+                  (13, p1), (14, p2)]
+        self._dimension('AcDbAlignedDimension', points, text, name,
+                        (Pair(50, math.radians(rotation)), Pair(100, "AcDbRotatedDimension")))
+
+    def _cmd_dimdiameter(self, name):
+        token = yield
+        if isinstance(token, Ename):
+            target = token.entity
+            pick = None
+        else:
+            # "" and then a point on the circle, or the point directly, picks the arc or circle there.
+            pick = self._in_point((yield) if token == "" else token, name, 'a point on an arc or circle')
+            target = self._curve_at(pick)
+        if target is None or target.type not in ('CIRCLE', 'ARC'):
+            self._warn(f"{name}: no arc or circle passes through ({pick[0]:g}, {pick[1]:g})" if pick else
+                       f"{name}: the selected object is not an arc or circle")
+        text, location, _ = yield from self._dimension_text(name)
+        points = [(11, location)]
+        if target is not None and target.type in ('CIRCLE', 'ARC'):
+            cx, cy = _group_value(target.groups, 10)[:2]
+            r = _group_value(target.groups, 40)
+            a = math.atan2(location[1] - cy, location[0] - cx)
+            points += [(10, (cx - r * math.cos(a), cy - r * math.sin(a), 0.0)),
+                       (15, (cx + r * math.cos(a), cy + r * math.sin(a), 0.0))]
+        else:
+            points += [(10, location), (15, pick or location)]
+        self._dimension('AcDbDiametricDimension', points, text, name)
+
+    def _curve_at(self, point, tolerance=1e-3):
+        for entity in reversed(self._live()):
+            if entity.type in ('CIRCLE', 'ARC'):
+                cx, cy = _group_value(entity.groups, 10)[:2]
+                r = _group_value(entity.groups, 40)
+                if abs(math.hypot(point[0] - cx, point[1] - cy) - r) <= max(tolerance, r * 1e-3):
+                    return entity
+        return None
+
+    def _cmd_leader(self, name):
+        points = [self._in_point((yield), name, 'the leader start point')]
+        while True:
+            token = yield
+            if token == "":
+                break
+            if _option(token) in ('F', 'FORMAT', 'U', 'UNDO'):
+                raise LispError(f"{name}: option {token} is not supported in a dry run")
+            points.append(self._in_point(token, name))
+        if len(points) < 2:
+            raise LispError(f"{name}: a leader needs at least two points")
+        token = yield
+        if token == "":
+            option = _option((yield))
+            if option not in ('N', 'NONE'):
+                raise LispError(f"{name}: annotation option {option} is not supported in a dry run")
+        else:
+            while token != "":
+                token = yield
+        self._add_entity([Pair(0, "LEADER"), Pair(100, "AcDbEntity"), Pair(100, "AcDbLeader"),
+                          Pair(3, self.sysvars['DIMSTYLE'])] + [[10, *p] for p in points], name)
+
+    def _cmd_hatch(self, name):
+        pattern, scale, angle = self.sysvars['HPNAME'], self.sysvars['HPSCALE'], self.sysvars['HPANG']
+        seeds = []
+        while True:
+            token = yield
+            option = _option(token)
+            if token == "":
+                break
+            if isinstance(token, list):
+                seeds.append(self._in_point(token, name, 'an internal point'))
+            elif option in ('P', 'PROPERTIES'):
+                pattern = yield
+                if not isinstance(pattern, str) or not pattern:
+                    raise LispError(f"{name}: expected a pattern name, got {to_string(pattern, True)}")
+                if pattern.upper() != 'SOLID':
+                    token = yield
+                    scale = scale if token == "" else self._in_number(token, name, 'a pattern scale')
+                    token = yield
+                    angle = angle if token == "" else self._in_number(token, name, 'a pattern angle')
+            else:
+                raise LispError(f"{name}: option {token} is not supported in a dry run")
+        if not seeds:
+            self._warn(f"{name} without internal points draws nothing")
+            return
+        self._add_entity([Pair(0, "HATCH"), Pair(100, "AcDbEntity"), Pair(100, "AcDbHatch"), Pair(2, pattern),
+                          Pair(41, scale), Pair(52, angle), Pair(98, len(seeds))] + [[10, *p] for p in seeds], name)
+
+    # --- Setup commands ---
+    def _cmd_layer(self, name):
+        while True:
+            option = _option((yield))
+            if option == "":
+                return
+            if option in ('M', 'MAKE', 'N', 'NEW'):
+                for layer in str((yield)).split(','):
+                    if layer.upper() not in self.tables['LAYER']:
+                        self._add_record('LAYER', [Pair(0, "LAYER"), Pair(2, layer), Pair(70, 0), Pair(62, 7),
+                                                   Pair(6, "Continuous")])
+                    if option in ('M', 'MAKE'):
+                        self.sysvars['CLAYER'] = self.tables['LAYER'][layer.upper()].groups[1].cdr
+            elif option in ('S', 'SET'):
+                layer = str((yield))
+                if layer.upper() not in self.tables['LAYER']:
+                    self._problem(f"{name}: cannot find layer {layer}")
+                else:
+                    self.sysvars['CLAYER'] = _group_value(self.tables['LAYER'][layer.upper()].groups, 2)
+            elif option in ('C', 'COLOR'):
+                color = self._in_number((yield), name, 'a color number')
+                if color != int(color) or not 1 <= color <= 255:
+                    self._problem(f"{name}: color {color:g} is not an ACI color (1-255)")
+                for record in self._in_layers((yield)):
+                    record.groups = _subst(Pair(62, int(color)), Pair(62, _group_value(record.groups, 62)),
+                                           record.groups)
+            elif option in ('L', 'LTYPE'):
+                ltype = str((yield))
+                layers = self._in_layers((yield))
+                if ltype.upper() not in self.tables['LTYPE']:
+                    self._problem(f"{name}: linetype {ltype} is not loaded")
+                    continue
+                for record in layers:
+                    record.groups = _subst(Pair(6, ltype), Pair(6, _group_value(record.groups, 6)), record.groups)
+            elif option in ('ON', 'OFF', 'F', 'FREEZE', 'T', 'THAW', 'LO', 'LOCK', 'U', 'UNLOCK', 'P', 'PLOT'):
+                yield
+            elif option in ('LW', 'LWEIGHT', 'TR', 'TRANSPARENCY'):
+                yield
+                yield
+            else:
+                raise LispError(f"{name}: option {option or to_string(option, True)} is not supported in a dry run")
+
+    def _cmd_linetype(self, name):
+        while True:
+            option = _option((yield))
+            if option == "":
+                return
+            if option not in ('L', 'LOAD'):
+                raise LispError(f"{name}: option {option} is not supported in a dry run")
+            names = str((yield)).split(',')
+            (yield)  # linetype file
+            for ltype in names:
+                if ltype.upper() in self.tables['LTYPE']:
+                    (yield)  # "already loaded, reload it?"
+                else:
+                    self._add_record('LTYPE', [Pair(0, "LTYPE"), Pair(2, ltype), Pair(70, 0)])
+
+    def _cmd_dimstyle(self, name):
+        option = _option((yield))
+        if option in ('S', 'SAVE'):
+            style = str((yield))
+            if style.upper() in self.tables['DIMSTYLE']:
+                answer = _option((yield))
+                if answer not in ('Y', 'YES', 'N', 'NO', ''):
+                    raise LispError(f"{name}: expected a yes/no answer to overwrite {style}, got {answer}")
+            else:
+                self._add_record('DIMSTYLE', [Pair(0, "DIMSTYLE"), Pair(2, style), Pair(70, 0)])
+            self.sysvars['DIMSTYLE'] = style
+        elif option in ('R', 'RESTORE'):
+            style = str((yield))
+            if style.upper() not in self.tables['DIMSTYLE']:
+                self._problem(f"{name}: dimension style {style} not found")
+            else:
+                self.sysvars['DIMSTYLE'] = style
+        else:
+            raise LispError(f"{name}: option {option} is not supported in a dry run")
+
+    def _cmd_undo(self, name):
+        option = _option((yield))
+        if option in ('BE', 'BEGIN'):
+            self._undo_depth += 1
+        elif option in ('E', 'END'):
+            if self._undo_depth == 0:
+                self._warn("UNDO End without UNDO Begin")
+            self._undo_depth = max(0, self._undo_depth - 1)
+        elif option in ('A', 'AUTO', 'C', 'CONTROL'):
+            yield
+        elif option not in ('M', 'MARK', 'B', 'BACK') and not option.isdigit():
+            raise LispError(f"{name}: option {option} is not supported in a dry run")
+
+    def _cmd_zoom(self, name):
+        option = _option((yield))
+        if option in ('W', 'WINDOW'):
+            self._in_point((yield), name)
+            self._in_point((yield), name)
+        elif option not in ('E', 'EXTENTS', 'A', 'ALL', 'P', 'PREVIOUS'):
+            raise LispError(f"{name}: option {option} is not supported in a dry run")
+
+    def _cmd_vpoint(self, name):
+        token = yield
+        if not isinstance(token, list):
+            self._in_number(token, name)
+            self._in_number((yield), name)
+            self._in_number((yield), name)
+
+    def _cmd_one_option(self, name):
+        yield
+
+    def _cmd_none(self, name):
+        return
+        yield
+
+    # --- 3D solid commands ---
+    def _solid(self, lo, hi, name):
+        lo, hi = tuple(map(min, lo, hi)), tuple(map(max, lo, hi))
+        return self._add_entity([Pair(0, "3DSOLID"), Pair(100, "AcDbEntity"), Pair(100, "AcDb3dSolid")],
+                                name, extents=(lo, hi))
+
+    def _cmd_box(self, name):
+        token = yield
+        centered = _option(token) in ('C', 'CENTER')
+        corner = self._in_point((yield) if centered else token, name, 'a corner point')
+        token = yield
+        if _option(token) in ('L', 'LENGTH'):
+            size = []
+            for _ in range(3):
+                size.append(self._in_number((yield), name, 'a length'))
+        elif _option(token) in ('C', 'CUBE'):
+            size = [self._in_number((yield), name, 'a length')] * 3
+        else:
+            other = self._in_point(token, name, 'the other corner')
+            height = self._in_number((yield), name, 'a height')
+            size = [other[0] - corner[0], other[1] - corner[1], height]
+        if centered:
+            corner = tuple(c - s / 2.0 for c, s in zip(corner, size))
+        if any(s == 0 for s in size):
+            self._problem(f"{name}: a box needs a non-zero length, width and height")
+        self._solid(corner, tuple(c + s for c, s in zip(corner, size)), name)
+
+    def _cmd_cylinder(self, name):
+        center = self._in_point((yield), name, 'a base center point')
+        radius = yield from self._radius((yield), name)
+        height = self._in_number((yield), name, 'a height')
+        cx, cy, cz = center
+        self._solid((cx - radius, cy - radius, cz), (cx + radius, cy + radius, cz + height), name)
+
+    def _cmd_torus(self, name):
+        center = self._in_point((yield), name, 'a center point')
+        radius = yield from self._radius((yield), name)
+        tube = yield from self._radius((yield), name)
+        r = radius + tube
+        cx, cy, cz = center
+        self._solid((cx - r, cy - r, cz - tube), (cx + r, cy + r, cz + tube), name)
+
+    def _cmd_extrude(self, name):
+        profiles = yield from self._in_objects(name)
+        height = self._in_number((yield), name, 'an extrusion height')
+        for profile in profiles:
+            kind = profile.type
+            closed = kind in ('CIRCLE',) or (kind == 'LWPOLYLINE' and _group_value(profile.groups, 70) & 1)
+            if not closed:
+                self._problem(f"{name}: {kind} {profile.handle:x} is not a closed profile")
+                continue
+            points = profile.points()
+            z = _group_value(profile.groups, 38) or (_group_value(profile.groups, 10) + [0.0, 0.0])[2]
+            lo = (min(p[0] for p in points), min(p[1] for p in points), z)
+            hi = (max(p[0] for p in points), max(p[1] for p in points), z + height)
+            profile.deleted = True
+            self._solid(lo, hi, name)
+
+    def _solids(self, entities, name):
+        solids = [e for e in entities if e.extents]
+        for e in entities:
+            if not e.extents:
+                self._problem(f"{name}: {e.type} {e.handle:x} is not a 3D solid")
+        return solids
+
+    def _cmd_union(self, name):
+        solids = self._solids((yield from self._in_objects(name)), name)
+        if len(solids) < 2:
+            self._problem(f"{name}: at least 2 solids must be selected")
+            return
+        first = solids[0]
+        for other in solids[1:]:
+            first.extents = (tuple(map(min, first.extents[0], other.extents[0])),
+                             tuple(map(max, first.extents[1], other.extents[1])))
+            other.deleted = True
+        # The result is a new object as far as entlast is concerned.
+        self.entities.remove(first)
+        self.entities.append(first)
+
+    def _cmd_subtract(self, name):
+        targets = self._solids((yield from self._in_objects(name)), name)
+        tools = self._solids((yield from self._in_objects(name)), name)
+        if not targets or not tools:
+            self._problem(f"{name}: nothing to subtract from or nothing to subtract")
+        for tool in tools:
+            tool.deleted = True
+        for target in targets:
+            self.entities.remove(target)
+            self.entities.append(target)
+
+    def _cmd_move(self, name):
+        entities = yield from self._in_objects(name)
+        base = self._in_point((yield), name, 'a base point')
+        token = yield
+        delta = base if token == "" else tuple(b - a for a, b in zip(base, self._in_point(token, name)))
+        for entity in entities:
+            _translate(entity, delta)
+
+    def _cmd_erase(self, name):
+        for entity in (yield from self._in_objects(name)):
+            entity.deleted = True
+
+    # ==========================================================================
+    # Report
+    # ==========================================================================
+    def report(self) -> dict:
+        """Counts of commands and entities by type and the bounding box of every view."""
+        views = {}
+        for entity in self._live():
+            view = views.setdefault(entity.view, {'entities': 0, 'types': Counter(), 'bbox': None})
+            view['entities'] += 1
+            view['types'][entity.type] += 1
+            for x, y in entity.points():
+                box = view['bbox']
+                view['bbox'] = [x, y, x, y] if box is None else [min(box[0], x), min(box[1], y),
+                                                                   max(box[2], x), max(box[3], y)]
+        boxes = [v['bbox'] for v in views.values() if v['bbox']]
+        extents = ([min(b[0] for b in boxes), min(b[1] for b in boxes), max(b[2] for b in boxes),
+                    max(b[3] for b in boxes)] if boxes else None)
+        return {
+            'ok': not self.errors,
+            'errors': list(self.errors),
+            'warnings': list(self.warnings),
+            'commands': dict(self.command_counts.most_common()),
+            'entmake': self.entmake_count,
+            'entities': dict(Counter(e.type for e in self._live()).most_common()),
+            'views': {name: {'entities': v['entities'], 'types': dict(v['types'].most_common()),
+                             'bbox': [round(c, 6) for c in v['bbox']] if v['bbox'] else None}
+                      for name, v in views.items()},
+            'extents': [round(c, 6) for c in extents] if extents else None,
+            'layers': sorted(_group_value(r.groups, 2) for r in self.tables['LAYER'].values()),
+            'output': ''.join(self.output),
+        }
+
+
+def _is_command_like(token) -> bool:
+    return isinstance(token, str) and (token.startswith('_.') or token.startswith('_-') or token.startswith('.'))
+
+
+def _circumcenter(a, b, c):
+    d = 2 * (a[0] * (b[1] - c[1]) + b[0] * (c[1] - a[1]) + c[0] * (a[1] - b[1]))
+    if abs(d) < 1e-12:
+        return None
+    ux = ((a[0] ** 2 + a[1] ** 2) * (b[1] - c[1]) + (b[0] ** 2 + b[1] ** 2) * (c[1] - a[1])
+          + (c[0] ** 2 + c[1] ** 2) * (a[1] - b[1])) / d
+    uy = ((a[0] ** 2 + a[1] ** 2) * (c[0] - b[0]) + (b[0] ** 2 + b[1] ** 2) * (a[0] - c[0])
+          + (c[0] ** 2 + c[1] ** 2) * (b[0] - a[0])) / d
+    return (ux, uy, a[2])
+
+
+def _ccw_between(center, start, middle, end) -> bool:
+    """Whether `middle` lies on the counter-clockwise sweep from `start` to `end`."""
+    def angle(p):
+        return math.atan2(p[1] - center[1], p[0] - center[0])
+    a0 = angle(start)
+    return (angle(middle) - a0) % (2 * math.pi) <= (angle(end) - a0) % (2 * math.pi)
+
+
+def _translate(entity, delta):
+    dx, dy, dz = delta
+    if entity.extents:
+        entity.extents = tuple((p[0] + dx, p[1] + dy, p[2] + dz) for p in entity.extents)
+        return
+    groups = []
+    for g in entity.groups:
+        code, value = _car(g), _cdr(g)
+        if 10 <= code <= 18 and isinstance(value, list):
+            moved = [value[0] + dx, value[1] + dy] + ([value[2] + dz] if len(value) == 3 else [])
+            g = [code] + moved
+        elif code == 38:
+            g = Pair(38, value + dz)
+        groups.append(g)
+    entity.groups = groups
+
+
+def dry_run(source: str, entry: str = None, load_paths=()) -> dict:
+    """Runs a generated AutoLISP program headlessly and returns the report (see LispInterpreter.report)."""
+    start = time.perf_counter()
+    report = LispInterpreter(load_paths).run(source, entry).report()
+    report['seconds'] = round(time.perf_counter() - start, 6)
+    return report
+
+
+def dry_run_file(path: str, entry: str = None, load_paths=()) -> dict:
+    """Dry-runs a .lsp file; `load` also searches the file's own directory."""
+    with open(path, 'r', encoding='utf-8') as f:
+        source = f.read()
+    return dry_run(source, entry, [os.path.dirname(os.path.abspath(path))] + list(load_paths))
+
+
+def _lisp_files(paths) -> list:
+    files = []
+    for path in paths:
+        if os.path.isdir(path):
+            for root, _, names in sorted(os.walk(path)):
+                files += [os.path.join(root, n) for n in sorted(names)
+                          if n.lower().endswith('.lsp') and n != RUNTIME_FILE_NAME]
+        else:
+            files.append(path)
+    return files
+
+
+def _summary(counts: dict, limit: int = 6) -> str:
+    items = list(counts.items())
+    text = ', '.join(f"{name} {count}" for name, count in items[:limit])
+    return text + (', ...' if len(items) > limit else '')
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Run generated AutoLISP programs headlessly and check what they draw.")
+    parser.add_argument('paths', nargs='+', help=".lsp files or directories of them.")
+    parser.add_argument('-L', '--load-path', action='append', default=[],
+                        help="Extra directory searched by (load ...), e.g. for the shared runtime (repeatable).")
+    parser.add_argument('--entry', default=None, help="C: command to run (default: every C: command the file defines).")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Also list the views with their bounding boxes.")
+    parser.add_argument('--json', dest='json_path', default=None, help="Write all reports to this JSON file.")
+    args = parser.parse_args(argv)
+
+    files = _lisp_files(args.paths)
+    reports, failed = {}, 0
+    for path in files:
+        try:
+            report = dry_run_file(path, args.entry, args.load_path)
+        except OSError as e:
+            report = {'ok': False, 'errors': [str(e)], 'warnings': [], 'entities': {}, 'commands': {}, 'views': {},
+                      'seconds': 0.0}
+        reports[path] = report
+        failed += not report['ok']
+        print(f"[{'OK' if report['ok'] else 'FAIL'}] {path}: {sum(report['entities'].values())} entities in "
+              f"{len(report['views'])} view(s) ({_summary(report['entities'])}); "
+              f"{sum(report['commands'].values())} commands ({_summary(report['commands'])}), "
+              f"{report['seconds'] * 1000:.1f} ms")
+        for message in report['errors']:
+            print(f"    {message}")
+        for message in report['warnings']:
+            print(f"    warning: {message}")
+        if args.verbose:
+            for name, view in report['views'].items():
+                box = ', '.join(f"{c:g}" for c in view['bbox']) if view['bbox'] else '-'
+                print(f"    {name}: {view['entities']} entities, bbox ({box})")
+    if args.json_path:
+        with open(args.json_path, 'w', encoding='utf-8') as f:
+            json.dump(reports, f, indent=2, ensure_ascii=False)
+    print(f"{len(files) - failed}/{len(files)} program(s) ran cleanly.")
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
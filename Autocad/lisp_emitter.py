@@ -0,0 +1,406 @@
+"""
+AutoLISP emitter for the drawing IR (drawing_ir.Drawing).
+
+Serializes a Drawing into a `C:DrawMyObject` command. Two modes are available:
+
+- 'command' (default, compatibility): every entity is drawn through
+  `(command ...)` calls. Layer switches are only emitted when the layer
+  actually changes, and chained line segments on one layer share a single
+  LINE command.
+- 'entmake': entities are created directly from DXF group lists with
+  `entmake`, each carrying its own layer, so no command-processor round trip
+  (echo, osnap, undo recording) is paid per entity. Layers are created as
+  table records, dimensions use a saved dimension style, and the annotation
+  helpers run in entmake mode as well. Hatches, and diameter dimensions whose
+  circle is unknown, still go through `(command ...)`.
+
+The annotation and table helpers come from the shared runtime (see
+lisp_runtime.py), which a drawing either embeds or loads once per session.
+Output is assembled from a list of fragments and joined once.
+
+With tagging enabled, every entity carries XDATA under the DAEDALUS
+application: its component, view and feature (see Drawing.tags). entmake
+lists carry the XDATA directly; entities made by commands or runtime helpers
+are tagged after the fact by `dm-tag`. drawing_update.py uses the tags to patch
+a drawing in place.
+"""
+import math
+import textwrap
+
+from lisp_runtime import TAG_APP_NAME, get_runtime_prelude
+
+EMITTER_MODES = ('command', 'entmake')
+DIMSTYLE_NAME = "Daedalus"
+
+
+def get_lisp_header(layers: dict, dim_opts: dict) -> str:
+    """Generates a generic LISP header, dynamically creating all required layers."""
+    layer_setup_commands = []
+    all_layers = layers.copy()
+    all_layers['param_table'] = {'name': 'Parameter_Table', 'color': 7}
+
+    for layer_info in all_layers.values():
+        name = layer_info['name']
+        color = layer_info['color']
+        linetype = layer_info.get('linetype')
+
+        if linetype:
+            cmd = (f'(if (not (tblsearch "LTYPE" "{linetype}")) '
+                   f'(command "_.-LINETYPE" "_L" "{linetype}" "acad.lin" "" ""))'
+                   f'(command "_.-LAYER" "_M" "{name}" "_C" "{color}" "" "_L" "{linetype}" "" "")')
+        else:
+            cmd = f'(command "_.-LAYER" "_M" "{name}" "_C" "{color}" "" "")'
+        layer_setup_commands.append(cmd)
+
+    return textwrap.dedent(f"""
+(defun C:DrawMyObject ()
+  (command "_.UNDO" "Begin")
+  (setvar "CMDECHO" 0)
+  ;; --- Dynamic Layer Setup ---
+  {''.join(layer_setup_commands)}
+  ;; --- Dimension and System Variable Setup ---
+  (setvar "LTSCALE" 5.0)
+  (setvar "DIMTXT" {dim_opts['text_height']})
+  (setvar "DIMASZ" {dim_opts['arrow_size']})
+  (setvar "DIMCLRD" {layers['dimensions']['color']})
+  (setvar "DIMCLRE" {layers['dimensions']['color']})
+  (setvar "DIMCLRT" {layers['dimensions']['color']})
+  (setvar "DIMDEC" 2)
+""")
+
+
+def get_lisp_footer(shape_name: str) -> str:
+    """Generates a generic LISP footer."""
+    return f"""
+  (setvar "CMDECHO" 1)(command "_.ZOOM" "_E")(command "_.UNDO" "End")
+  (princ "\\n{shape_name} drawing completed!\\n")(princ))
+(princ "\\nLISP file loaded. Type 'DrawMyObject' to run.")(princ)"""
+
+
+# ==============================================================================
+# Value Formatting
+# ==============================================================================
+def fmt_num(value) -> str:
+    """Formats a number as a compact AutoLISP literal, keeping reals real."""
+    if isinstance(value, bool):
+        return 'T' if value else 'nil'
+    if isinstance(value, int):
+        return str(value)
+    text = f"{float(value):.12g}"
+    if '.' not in text and 'e' not in text and 'n' not in text:
+        text += '.0'
+    return text
+
+
+def fmt_str(value) -> str:
+    return '"' + str(value).replace('\\', '\\\\').replace('"', '\\"') + '"'
+
+
+def fmt_pt(x, y) -> str:
+    return f"'({fmt_num(x)} {fmt_num(y)})"
+
+
+def fmt_str_list(values) -> str:
+    return f"'({' '.join(fmt_str(v) for v in values)})" if values else 'nil'
+
+
+# ==============================================================================
+# Entity Tags
+# ==============================================================================
+def fmt_tag_call(component, view, features) -> str:
+    """Tags the entities created since the last mark; the i-th gets the i-th feature, any extra ones the last."""
+    return f'(dm-tag {fmt_str(component)} {fmt_str(view)} {fmt_str_list(features)})'
+
+
+def fmt_tag_key(tag) -> str:
+    """The key dm-tag-index files a tagged entity under."""
+    return fmt_str('|'.join(tag))
+
+
+def _dxf_xdata(tag) -> str:
+    component, view, feature = tag
+    return (f'(-3 ({fmt_str(TAG_APP_NAME)} {_dxf_str(1000, component)} {_dxf_str(1000, view)} '
+            f'{_dxf_str(1000, feature)}))')
+
+
+# ==============================================================================
+# Command Emitter
+# ==============================================================================
+# Entities drawn by a helper defun switch the current layer themselves.
+_HELPER_KINDS = {'datum', 'gdt', 'roughness', 'balloon', 'table'}
+
+
+def _emit_helper_call(entity) -> str:
+    kind = entity.kind
+    if kind == 'datum':
+        return f'(draw-datum-symbol {fmt_pt(entity.ax, entity.ay)} {fmt_pt(entity.lx, entity.ly)} {fmt_str(entity.label)})'
+    if kind == 'gdt':
+        return (f'(draw-gdt-frame {fmt_pt(entity.ax, entity.ay)} {fmt_pt(entity.fx, entity.fy)} '
+                f'{fmt_str(entity.symbol)} {fmt_str(entity.tolerance)} {fmt_str_list(entity.datums)} '
+                f'{fmt_str(entity.leader_side)})')
+    if kind == 'roughness':
+        return (f'(draw-roughness-symbol {fmt_pt(entity.x, entity.y)} {fmt_str(entity.text)} '
+                f'{fmt_num(entity.size)} {fmt_num(entity.rotation)})')
+    if kind == 'balloon':
+        return (f'(Draw-Balloon {fmt_pt(entity.cx, entity.cy)} {fmt_num(entity.radius)} '
+                f'{fmt_str(entity.text)} {fmt_num(entity.text_height)})')
+    # Tables
+    rows = ' '.join(f"({' '.join(fmt_str(cell) for cell in row)})" for row in entity.rows)
+    func = 'Draw-Parameter-Table' if entity.style == 'parameters' else 'Draw-Bom-Table'
+    widths = ' '.join(fmt_num(w) for w in entity.col_widths)
+    return (f"({func} {fmt_pt(entity.x, entity.y)} {fmt_str(entity.title)} '({rows}) '({widths}) "
+            f"{fmt_num(entity.row_height)} {fmt_num(entity.text_height)})")
+
+
+def _emit_command(entity) -> str:
+    kind = entity.kind
+    if kind == 'rect':
+        return f'(command "_.RECTANG" {fmt_pt(entity.x1, entity.y1)} {fmt_pt(entity.x2, entity.y2)})'
+    if kind == 'circle':
+        return f'(command "_.CIRCLE" {fmt_pt(entity.cx, entity.cy)} {fmt_num(entity.r)})'
+    if kind == 'arc':
+        return (f'(command "_.ARC" "_C" {fmt_pt(entity.cx, entity.cy)} {fmt_pt(entity.sx, entity.sy)} '
+                f'{fmt_pt(entity.ex, entity.ey)})')
+    if kind == 'polygon':
+        mode = '"_I"' if entity.inscribed else '"_C"'
+        return f'(command "_.POLYGON" {entity.sides} {fmt_pt(entity.cx, entity.cy)} {mode} {fmt_num(entity.radius)})'
+    if kind == 'dim_linear':
+        text = f' "_T" {fmt_str(entity.text)}' if entity.text is not None else ''
+        return (f'(command "_.DIMLINEAR" {fmt_pt(entity.x1, entity.y1)} {fmt_pt(entity.x2, entity.y2)}{text} '
+                f'{fmt_pt(entity.tx, entity.ty)})')
+    if kind == 'dim_diameter':
+        text = f' "_T" {fmt_str(entity.text)}' if entity.text is not None else ''
+        return f'(command "_.DIMDIAMETER" "" {fmt_pt(entity.px, entity.py)}{text} {fmt_pt(entity.tx, entity.ty)})'
+    if kind == 'leader':
+        return f'(command "_.LEADER" {fmt_pt(entity.x1, entity.y1)} {fmt_pt(entity.x2, entity.y2)} "" "" "_N")'
+    if kind == 'hatch':
+        points = ' '.join(fmt_pt(x, y) for x, y in entity.pick_points)
+        return f'(command "_-HATCH" "_P" {fmt_str(entity.pattern)} {fmt_num(entity.scale)} "" {points} "")'
+    raise ValueError(f"Entity kind '{kind}' cannot be emitted as a command.")
+
+
+def emit_body(entities, current_layer=None, tags=None) -> str:
+    """Serializes an entity stream into the body statements of C:DrawMyObject."""
+    return emit_body_section(entities, current_layer, tags)[0]
+
+
+def emit_body_section(entities, current_layer=None, tags=None) -> tuple:
+    """
+    Serializes a run of entities that starts with `current_layer` active.
+    Returns (statements, layer active afterwards), so runs can be emitted separately and spliced.
+    `tags` (parallel to `entities`, see Drawing.tags) adds a dm-tag call after every statement.
+    """
+    out = []
+    chain = None  # points of a LINE command still open for chaining
+    chain_tags = None  # tags of the chained segments
+
+    def flush_chain():
+        if chain:
+            tag_call = fmt_tag_call(*chain_tags[0][:2], [tag[2] for tag in chain_tags]) if chain_tags else ''
+            out.append(f'  (command "_.LINE" {" ".join(fmt_pt(x, y) for x, y in chain)} ""){tag_call}\n')
+
+    for i, entity in enumerate(entities):
+        kind = entity.kind
+        tag = tags[i] if tags else None
+        if (kind == 'line' and chain and entity.layer == current_layer and chain[-1] == (entity.x1, entity.y1)
+                and (tag is None or tag[:2] == chain_tags[-1][:2])):
+            chain.append((entity.x2, entity.y2))
+            if tag:
+                chain_tags.append(tag)
+            continue
+        flush_chain()
+        chain = None
+        if kind == 'comment':
+            out.append(f'\n  ;; --- {entity.text} ---\n')
+            continue
+        tag_call = fmt_tag_call(tag[0], tag[1], (tag[2],)) if tag else ''
+        if kind in _HELPER_KINDS:
+            out.append(f'  {_emit_helper_call(entity)}{tag_call}\n')
+            current_layer = entity.layer
+            continue
+        if entity.layer != current_layer:
+            out.append(f'  (command "_.-LAYER" "_S" {fmt_str(entity.layer)} "")\n')
+            current_layer = entity.layer
+        if kind == 'line':
+            chain = [(entity.x1, entity.y1), (entity.x2, entity.y2)]
+            chain_tags = [tag] if tag else None
+            continue
+        out.append(f'  {_emit_command(entity)}{tag_call}\n')
+    flush_chain()
+    return ''.join(out), current_layer
+
+
+# ==============================================================================
+# Entmake Emitter
+# ==============================================================================
+def fmt_real(value) -> str:
+    return fmt_num(float(value))
+
+
+def _dxf_pt(code, x, y) -> str:
+    return f'({code} {fmt_real(x)} {fmt_real(y)} 0.0)'
+
+
+def _dxf_str(code, value) -> str:
+    return f'({code} . {fmt_str(value)})'
+
+
+def _dxf_lwpolyline(layer, vertices, closed=True) -> str:
+    verts = ' '.join(f'(10 {fmt_real(x)} {fmt_real(y)})' for x, y in vertices)
+    return (f'(0 . "LWPOLYLINE") (100 . "AcDbEntity") {_dxf_str(8, layer)} (100 . "AcDbPolyline") '
+            f'(90 . {len(vertices)}) (70 . {1 if closed else 0}) {verts}')
+
+
+def _angle(cx, cy, x, y) -> float:
+    return math.atan2(y - cy, x - cx) % (2 * math.pi)
+
+
+def dxf_groups(entity):
+    """Returns the DXF group list of an entity, or None when it has no entmake form."""
+    kind, layer = entity.kind, entity.layer
+    if kind == 'line':
+        return (f'(0 . "LINE") {_dxf_str(8, layer)} '
+                f'{_dxf_pt(10, entity.x1, entity.y1)} {_dxf_pt(11, entity.x2, entity.y2)}')
+    if kind == 'rect':
+        x1, y1, x2, y2 = entity.x1, entity.y1, entity.x2, entity.y2
+        return _dxf_lwpolyline(layer, ((x1, y1), (x2, y1), (x2, y2), (x1, y2)))
+    if kind == 'polygon':
+        return _dxf_lwpolyline(layer, entity.vertices())
+    if kind == 'circle':
+        return f'(0 . "CIRCLE") {_dxf_str(8, layer)} {_dxf_pt(10, entity.cx, entity.cy)} (40 . {fmt_real(entity.r)})'
+    if kind == 'arc':
+        start = _angle(entity.cx, entity.cy, entity.sx, entity.sy)
+        end = _angle(entity.cx, entity.cy, entity.ex, entity.ey)
+        return (f'(0 . "ARC") {_dxf_str(8, layer)} {_dxf_pt(10, entity.cx, entity.cy)} '
+                f'(40 . {fmt_real(entity.radius)}) (50 . {fmt_real(start)}) (51 . {fmt_real(end)})')
+    if kind == 'dim_linear':
+        # Group 10 lies on the dimension line; group 11 is the (recomputed) text midpoint.
+        if entity.rotation == 0.0:
+            defpoint, midpoint = (entity.x2, entity.ty), ((entity.x1 + entity.x2) / 2, entity.ty)
+        else:
+            defpoint, midpoint = (entity.tx, entity.y2), (entity.tx, (entity.y1 + entity.y2) / 2)
+        return (f'(0 . "DIMENSION") (100 . "AcDbEntity") {_dxf_str(8, layer)} (100 . "AcDbDimension") '
+                f'{_dxf_pt(10, *defpoint)} {_dxf_pt(11, *midpoint)} (70 . 32) {_dxf_str(1, entity.text or "")} '
+                f'{_dxf_str(3, DIMSTYLE_NAME)} (100 . "AcDbAlignedDimension") '
+                f'{_dxf_pt(13, entity.x1, entity.y1)} {_dxf_pt(14, entity.x2, entity.y2)} '
+                f'(50 . {fmt_real(math.radians(entity.rotation))}) (100 . "AcDbRotatedDimension")')
+    if kind == 'dim_diameter' and entity.r is not None:
+        ang = math.atan2(entity.py - entity.cy, entity.px - entity.cx)
+        chord = (entity.cx + entity.r * math.cos(ang), entity.cy + entity.r * math.sin(ang))
+        far = (entity.cx - entity.r * math.cos(ang), entity.cy - entity.r * math.sin(ang))
+        # 70: diameter type (3) + unique block (32) + text at the picked location (128).
+        return (f'(0 . "DIMENSION") (100 . "AcDbEntity") {_dxf_str(8, layer)} (100 . "AcDbDimension") '
+                f'{_dxf_pt(10, *far)} {_dxf_pt(11, entity.tx, entity.ty)} (70 . 163) {_dxf_str(1, entity.text or "")} '
+                f'{_dxf_str(3, DIMSTYLE_NAME)} (100 . "AcDbDiametricDimension") {_dxf_pt(15, *chord)} (40 . 0.0)')
+    if kind == 'leader':
+        return (f'(0 . "LEADER") (100 . "AcDbEntity") {_dxf_str(8, layer)} (100 . "AcDbLeader") '
+                f'{_dxf_str(3, DIMSTYLE_NAME)} (71 . 1) (72 . 0) (73 . 3) (76 . 2) '
+                f'{_dxf_pt(10, entity.x1, entity.y1)} {_dxf_pt(10, entity.x2, entity.y2)}')
+    return None
+
+
+def get_entmake_header() -> str:
+    """Opens C:DrawMyObject; layers are set up as table records by get_entmake_table_setup."""
+    return textwrap.dedent("""
+(defun C:DrawMyObject ()
+  (command "_.UNDO" "Begin")
+  (setvar "CMDECHO" 0)
+""")
+
+
+def get_entmake_table_setup(layers: dict, dim_opts: dict) -> str:
+    """Creates the layers as table records and saves the dimension settings as a named style."""
+    all_layers = layers.copy()
+    all_layers['param_table'] = {'name': 'Parameter_Table', 'color': 7}
+    out = ['  ;; --- Layer Table Setup ---\n']
+    for layer_info in all_layers.values():
+        linetype = layer_info.get('linetype') or 'Continuous'
+        if linetype.upper() != 'CONTINUOUS':
+            out.append(f'  (if (not (tblsearch "LTYPE" {fmt_str(linetype)})) '
+                       f'(command "_.-LINETYPE" "_L" {fmt_str(linetype)} "acad.lin" "" ""))\n')
+        out.append(f'  (dm-layer {fmt_str(layer_info["name"])} {int(layer_info["color"])} {fmt_str(linetype)})\n')
+    dim_color = layers['dimensions']['color']
+    text_height, arrow_size = dim_opts['text_height'], dim_opts['arrow_size']
+    out.append('  ;; --- Dimension and System Variable Setup ---\n')
+    out.append(f'  (setvar "LTSCALE" 5.0)(setvar "DIMTXT" {text_height})(setvar "DIMASZ" {arrow_size})\n')
+    out.append(f'  (setvar "DIMCLRD" {dim_color})(setvar "DIMCLRE" {dim_color})(setvar "DIMCLRT" {dim_color})(setvar "DIMDEC" 2)\n')
+    # Entmade dimensions read their settings from a style, not from the current overrides.
+    out.append(f'  (if (tblsearch "DIMSTYLE" "{DIMSTYLE_NAME}") (command "_.-DIMSTYLE" "_S" "{DIMSTYLE_NAME}" "_Y") '
+               f'(command "_.-DIMSTYLE" "_S" "{DIMSTYLE_NAME}"))\n')
+    return ''.join(out)
+
+
+def emit_entmake_body(entities, current_layer=None, tags=None) -> str:
+    """Serializes an entity stream as entmake calls, falling back to commands where needed."""
+    return emit_entmake_body_section(entities, current_layer, tags)[0]
+
+
+def emit_entmake_body_section(entities, current_layer=None, tags=None) -> tuple:
+    """entmake counterpart of emit_body_section: returns (statements, layer active afterwards)."""
+    out = []
+    for i, entity in enumerate(entities):
+        kind = entity.kind
+        if kind == 'comment':
+            out.append(f'\n  ;; --- {entity.text} ---\n')
+            continue
+        tag = tags[i] if tags else None
+        # Entities not created by entmake are tagged by dm-tag from a fresh mark.
+        mark, tag_call = ('(dm-mark)', fmt_tag_call(tag[0], tag[1], (tag[2],))) if tag else ('', '')
+        if kind in _HELPER_KINDS:
+            out.append(f'  {mark}{_emit_helper_call(entity)}{tag_call}\n')
+            continue
+        dxf = dxf_groups(entity)
+        if dxf is not None:
+            xdata = f' {_dxf_xdata(tag)}' if tag else ''
+            out.append(f"  (entmake '({dxf}{xdata}))\n")
+            continue
+        if entity.layer != current_layer:
+            out.append(f'  (setvar "CLAYER" {fmt_str(entity.layer)})\n')
+            current_layer = entity.layer
+        out.append(f'  {mark}{_emit_command(entity)}{tag_call}\n')
+    return ''.join(out), current_layer
+
+
+# ==============================================================================
+# Program Assembly
+# ==============================================================================
+def get_runtime_settings(drawing, entmake: bool, tagging: bool = False) -> str:
+    """Sets the globals the runtime helpers read for this drawing."""
+    settings = (f'  (setq *daedalus-annot-layer* {fmt_str(drawing.annotation_layer)} '
+                f'*daedalus-text-height* {fmt_num(drawing.dim_opts.get("text_height", 3.5))} '
+                f'*daedalus-entmake* {"T" if entmake else "nil"})\n')
+    if tagging:
+        settings += f'  (regapp {fmt_str(TAG_APP_NAME)})(dm-mark)\n'
+    return settings
+
+
+def emit_program_head(drawing, mode: str = 'command', runtime: str = 'inline', tagging: bool = False) -> str:
+    """Everything before the body: runtime prelude, the C:DrawMyObject opening, layer/dimension setup and runtime settings."""
+    if mode not in EMITTER_MODES:
+        raise ValueError(f"Unknown emitter mode '{mode}'. Expected one of: {', '.join(EMITTER_MODES)}.")
+    if mode == 'entmake':
+        return ''.join((
+            get_runtime_prelude(runtime),
+            get_entmake_header(),
+            get_runtime_settings(drawing, True, tagging),
+            get_entmake_table_setup(drawing.layers, drawing.dim_opts),
+        ))
+    return ''.join((
+        get_runtime_prelude(runtime),
+        get_lisp_header(drawing.layers, drawing.dim_opts),
+        get_runtime_settings(drawing, False, tagging),
+    ))
+
+
+def emit_lisp(drawing, mode: str = 'command', runtime: str = 'inline', tagging: bool = False) -> str:
+    """
+    Serializes a complete Drawing into a loadable AutoLISP program.
+
+    `mode` selects the emitter ('command' or 'entmake'); `runtime` whether the
+    helper runtime is embedded ('inline') or loaded from the shared module ('shared');
+    `tagging` whether every entity is tagged with its component, view and feature.
+    """
+    head = emit_program_head(drawing, mode, runtime, tagging)
+    tags = drawing.tags() if tagging else None
+    emit_body_func = emit_entmake_body if mode == 'entmake' else emit_body
+    return ''.join((head, emit_body_func(drawing.entities, None, tags), get_lisp_footer(drawing.title)))
@@ -1,153 +1,81 @@
+import functools
 import json
 import math
 import sys
 import textwrap
 import os
-from dotenv import load_dotenv
 
-# --- Load environment variables from .env file ---
-current_dir = os.path.dirname(os.path.abspath(__file__))
-dotenv_path = os.path.join(current_dir, '.env')
-
-if os.path.exists(dotenv_path):
-    print(f"✅ .env file found. Loading environment variables from '{dotenv_path}'...")
-    load_dotenv(dotenv_path=dotenv_path)
-else:
-    print(f"❌ [FATAL ERROR] .env file not found at '{dotenv_path}'. Please check the file location.")
+from drawing_ir import Drawing
+from generation_cache import GenerationCache
+from lisp_emitter import emit_lisp
 
 # ==============================================================================
-# Generic LISP Code Generation Module
+# Environment and Optional Components
 # ==============================================================================
+# Importing this module has no side effects. The .env file, the LLM validator (and
+# with it the openai SDK), the standard parts catalog (NumPy) and the static
+# validator are loaded by the command-line entry point only when it needs them.
+current_dir = os.path.dirname(os.path.abspath(__file__))
 
-try:
-    from llm_validator import LLMValidator
-    VALIDATOR_AVAILABLE = True
-except ImportError:
-    VALIDATOR_AVAILABLE = False
-    print("[WARNING] 'llm_validator.py' file not found. LLM validation feature will be unavailable.")
-
-def get_lisp_header(layers: dict, dim_opts: dict) -> str:
-    """Generates a generic LISP header, dynamically creating all required layers."""
-    layer_setup_commands = []
-    all_layers = layers.copy()
-    all_layers['param_table'] = {'name': 'Parameter_Table', 'color': 7}
-
-    for layer_info in all_layers.values():
-        name = layer_info['name']
-        color = layer_info['color']
-        linetype = layer_info.get('linetype')
-
-        if linetype:
-            cmd = (f'(if (not (tblsearch "LTYPE" "{linetype}")) '
-                   f'(command "_.-LINETYPE" "_L" "{linetype}" "acad.lin" "" ""))'
-                   f'(command "_.-LAYER" "_M" "{name}" "_C" "{color}" "" "_L" "{linetype}" "" "")')
-        else:
-            cmd = f'(command "_.-LAYER" "_M" "{name}" "_C" "{color}" "" "")'
-        layer_setup_commands.append(cmd)
 
-    return textwrap.dedent(f"""
-(defun C:DrawMyObject ()
-  (command "_.UNDO" "Begin")
-  (setvar "CMDECHO" 0)
-  ;; --- Dynamic Layer Setup ---
-  {''.join(layer_setup_commands)}
-  ;; --- Dimension and System Variable Setup ---
-  (setvar "LTSCALE" 5.0)
-  (setvar "DIMTXT" {dim_opts['text_height']})
-  (setvar "DIMASZ" {dim_opts['arrow_size']})
-  (setvar "DIMCLRD" {layers['dimensions']['color']})
-  (setvar "DIMCLRE" {layers['dimensions']['color']})
-  (setvar "DIMCLRT" {layers['dimensions']['color']})
-  (setvar "DIMDEC" 2)
-""")
+def load_environment() -> bool:
+    """Loads the .env file next to this module into os.environ; returns whether it was loaded."""
+    dotenv_path = os.path.join(current_dir, '.env')
+    if not os.path.exists(dotenv_path):
+        print(f"❌ [FATAL ERROR] .env file not found at '{dotenv_path}'. Please check the file location.")
+        return False
+    try:
+        from dotenv import load_dotenv
+    except ImportError:
+        print("[WARNING] python-dotenv is not installed, '.env' was not loaded. Run 'pip install python-dotenv'.")
+        return False
+    print(f"✅ .env file found. Loading environment variables from '{dotenv_path}'...")
+    load_dotenv(dotenv_path=dotenv_path)
+    return True
 
 
-def get_lisp_footer(shape_name: str) -> str:
-    """Generates a generic LISP footer."""
-    return f"""
-  (setvar "CMDECHO" 1)(command "_.ZOOM" "_E")(command "_.UNDO" "End")
-  (princ "\\n{shape_name} drawing completed!\\n")(princ))
-(princ "\\nLISP file loaded. Type 'DrawMyObject' to run.")(princ)"""
-
-
-def generate_lisp_utility_functions(layers: dict, dim_opts: dict) -> str:
-    """Generates LISP helper functions for drawing complex annotations and tables."""
-    annotations_layer = layers.get('annotations', {'name': 'Annotations', 'color': 6})
-    dim_text_height = dim_opts.get('text_height', 3.5)
-    lisp_functions_string = f"""
-    ;; =============================================================================
-    ;; == Helper Annotation Function Definitions (Generated by Python)
-    ;; =============================================================================
-    (defun dtr (a) (* pi (/ a 180.0)))
-    (defun draw-roughness-symbol (ins_pt text_val sym_size rotation / p1 p2 p3 p4 ang1 ang2 text_height text_pt) (setq text_height (* sym_size 0.4)) (setq ang1 (dtr (+ rotation 60.0))) (setq ang2 (dtr (+ rotation 120.0))) (setq p1 ins_pt) (setq p2 (polar p1 ang1 sym_size)) (setq p3 (polar p2 ang2 sym_size)) (setq p4 (polar p3 (dtr rotation) (* sym_size 1.5))) (command "_.-LAYER" "_S" "{annotations_layer['name']}" "") (command "_.PLINE" p1 p2 p3 "") (command "_.LINE" p3 p4 "") (setq text_pt (polar p2 (dtr (+ rotation 90)) (* text_height 0.4))) (command "_.TEXT" "_J" "_BL" text_pt text_height rotation text_val) )
-    (defun draw-datum-symbol (attach_pt label_pt label / frame_size p1 p2) (setq frame_size (* {dim_text_height} 2.0)) (command "_.-LAYER" "_S" "{annotations_layer['name']}" "") (command "_.LEADER" attach_pt label_pt "" "" "_N") (setq p1 (list (- (car label_pt) (/ frame_size 2.0)) (- (cadr label_pt) (/ frame_size 2.0)))) (setq p2 (list (+ (car label_pt) (/ frame_size 2.0)) (+ (cadr label_pt) (/ frame_size 2.0)))) (command "_.RECTANG" p1 p2) (command "_.TEXT" "_J" "_MC" label_pt {dim_text_height} 0 (strcat "-" label "-")) )
-    (defun draw-gdt-frame (attach_pt frame_loc gdt_sym tolerance datums leader_side / total_width current_x box_w box_h leader_start_pt) (setq box_w (* {dim_text_height} 2.5)) (setq box_h (* {dim_text_height} 2.0)) (setq current_x (car frame_loc)) (setq total_width (+ box_w (* box_w 2) (* (if datums (length datums) 0) box_w))) (command "_.-LAYER" "_S" "{annotations_layer['name']}" "") (if (or (not leader_side) (= (strcase leader_side) "LEFT")) (setq leader_start_pt (list (car frame_loc) (+ (cadr frame_loc) (/ box_h 2.0)))) (setq leader_start_pt (list (+ (car frame_loc) total_width) (+ (cadr frame_loc) (/ box_h 2.0))))) (command "_.LEADER" attach_pt leader_start_pt "" "" "_N") (command "_.RECTANG" (list current_x (cadr frame_loc)) (list (+ current_x box_w) (+ (cadr frame_loc) box_h))) (command "_.TEXT" "_J" "_MC" (list (+ current_x (/ box_w 2.0)) (+ (cadr frame_loc) (/ box_h 2.0))) {dim_text_height} 0 gdt_sym) (setq current_x (+ current_x box_w)) (command "_.RECTANG" (list current_x (cadr frame_loc)) (list (+ current_x (* box_w 2)) (+ (cadr frame_loc) box_h))) (command "_.TEXT" "_J" "_MC" (list (+ current_x box_w) (+ (cadr frame_loc) (/ box_h 2.0))) {dim_text_height} 0 tolerance) (setq current_x (+ current_x (* box_w 2))) (if datums (foreach datum datums (command "_.RECTANG" (list current_x (cadr frame_loc)) (list (+ current_x box_w) (+ (cadr frame_loc) box_h))) (command "_.TEXT" "_J" "_MC" (list (+ current_x (/ box_w 2.0)) (+ (cadr frame_loc) (/ box_h 2.0))) {dim_text_height} 0 datum) (setq current_x (+ current_x box_w)))) )
-    (defun Draw-Parameter-Table (start_pt title data_list col_widths row_height text_height / num_rows total_height total_width header_height current_y p1 p2 p3 p4 text_mid_y row_data i col_div_x) (command "_.-LAYER" "_S" "Parameter_Table" "") (setq num_rows (length data_list)) (if (> num_rows 0) (progn (setq header_height (* row_height 1.5)) (setq total_height (+ header_height (* num_rows row_height))) (setq total_width (apply '+ col_widths)) (setq p1 start_pt) (setq p2 (list (+ (car p1) total_width) (cadr p1))) (setq p3 (list (+ (car p1) total_width) (- (cadr p1) total_height))) (setq p4 (list (car p1) (- (cadr p1) total_height))) (command "_.RECTANG" p1 p3) (command "_.LINE" (list (car p1) (- (cadr p1) header_height)) (list (car p2) (- (cadr p2) header_height)) "") (setq col_div_x (+ (car p1) (car col_widths))) (command "_.LINE" (list col_div_x (- (cadr p1) header_height)) (list col_div_x (cadr p3)) "") (setq text_mid_y (- (cadr p1) (/ header_height 2.0))) (command "_.TEXT" "_J" "_MC" (list (+ (car p1) (/ total_width 2.0)) text_mid_y) (* text_height 1.2) 0 title) (setq current_y (- (cadr p1) header_height)) (setq i 0) (foreach row_data data_list (setq text_mid_y (- current_y (/ row_height 2.0))) (command "_.TEXT" "_J" "_MC" (list (+ (car p1) (/ (car col_widths) 2.0)) text_mid_y) text_height 0 (car row_data)) (command "_.TEXT" "_J" "_MC" (list (+ col_div_x (/ (cadr col_widths) 2.0)) text_mid_y) text_height 0 (cadr row_data)) (setq current_y (- current_y row_height)) (setq i (1+ i)) (if (< i num_rows) (command "_.LINE" (list (car p1) current_y) (list (car p2) current_y) ""))) (princ))))
-    (defun Draw-Bom-Table (start_pt title data_list col_widths row_height text_height / num_rows total_height total_width header_height current_y p1 p2 p3 p4 text_mid_y row_data i col_count current_x col_idx col_width temp_widths width) (command "_.-LAYER" "_S" "Parameter_Table" "" "") (setq num_rows (length data_list)) (setq col_count (length col_widths)) (if (> num_rows 0) (progn (setq header_height (* row_height 1.5)) (setq total_height (+ header_height (* num_rows row_height))) (setq total_width (apply '+ col_widths)) (setq p1 start_pt) (setq p2 (list (+ (car p1) total_width) (cadr p1))) (setq p3 (list (+ (car p1) total_width) (- (cadr p1) total_height))) (setq p4 (list (car p1) (- (cadr p1) total_height))) (command "_.RECTANG" p1 p3) (command "_.LINE" (list (car p1) (- (cadr p1) header_height)) (list (car p2) (- (cadr p2) header_height)) "") (setq current_x (car p1)) (setq temp_widths col_widths) (while (setq width (car temp_widths)) (setq current_x (+ current_x width)) (setq temp_widths (cdr temp_widths)) (if temp_widths (command "_.LINE" (list current_x (cadr p1)) (list current_x (cadr p3)) ""))) (setq text_mid_y (- (cadr p1) (/ header_height 2.0))) (command "_.TEXT" "_J" "_MC" (list (+ (car p1) (/ total_width 2.0)) text_mid_y) (* text_height 1.2) 0 title) (setq current_y (- (cadr p1) header_height)) (setq i 0) (foreach row_data data_list (setq text_mid_y (- current_y (/ row_height 2.0))) (setq current_x (car p1)) (setq col_idx 0) (foreach item row_data (setq col_width (nth col_idx col_widths)) (command "_.TEXT" "_J" "_MC" (list (+ current_x (/ col_width 2.0)) text_mid_y) text_height 0 (vl-princ-to-string item)) (setq current_x (+ current_x col_width)) (setq col_idx (1+ col_idx))) (setq current_y (- current_y row_height)) (setq i (1+ i)) (if (< i num_rows) (command "_.LINE" (list (car p1) current_y) (list (car p2) current_y) ""))) (princ))) )
-    (defun Draw-Balloon (center_pt radius text_val text_height) (command "_.-LAYER" "_S" "{annotations_layer['name']}" "") (command "_.CIRCLE" center_pt radius) (command "_.TEXT" "_J" "_MC" center_pt text_height 0 text_val))
-    """
-    return textwrap.dedent(lisp_functions_string)
+def load_llm_validator():
+    """Returns the (LLMValidator, ValidationCache) classes, or None when the validator cannot be imported."""
+    try:
+        from llm_validator import LLMValidator
+        from validation_cache import ValidationCache
+    except ImportError as e:
+        print(f"[WARNING] The LLM validator could not be loaded ({e}). LLM validation feature will be unavailable.")
+        return None
+    return LLMValidator, ValidationCache
+
+
+def init_spec_files(file_names) -> list:
+    """Creates a placeholder spec for every missing file in `file_names`; returns the names created."""
+    created = []
+    for fname in sorted(set(file_names)):
+        if not os.path.exists(fname):
+            with open(fname, 'w', encoding='utf-8') as f:
+                f.write('{"shape": "unknown"}')
+            created.append(fname)
+    return created
 
 
 # ==============================================================================
-# Table Helper Functions
+# Part Generation Functions
 # ==============================================================================
-def _generate_lisp_for_parameter_table(params: dict, dim_opts: dict, right_most_x: float, top_y: float,
-                                       spacing: float) -> str:
-    def escape(s):
-        return str(s).replace('\\', '\\\\').replace('"', '\\"')
-
-    flat_params = {}
-    for key, value in params.items():
-        if isinstance(value, dict):
-            for sub_key, sub_value in value.items():
-                flat_key = f"{key}_{sub_key}".replace('_', ' ').title()
-                flat_params[flat_key] = sub_value
-        else:
-            flat_key = key.replace('_', ' ').title()
-            flat_params[flat_key] = value
-
-    if not flat_params: return ""
-    list_items = [f'(list "{escape(k)}" "{escape(v)}")' for k, v in flat_params.items()]
-    lisp_data_list = f"(list {' '.join(list_items)})"
-    table_start_x = right_most_x + spacing
-    table_start_y = top_y
-    text_height = dim_opts.get('text_height', 3.5)
-
-    return f"""
-  ;; --- Draw Parameter Table ---
-  (setq table_start_pt (list {table_start_x} {table_start_y}))
-  (setq param_data {lisp_data_list})
-  (Draw-Parameter-Table table_start_pt "Parameter List" param_data '(150 80) 15 {text_height})
-"""
-
-
-def _generate_lisp_for_bom_table(components: dict, dim_opts: dict, right_most_x: float, top_y: float,
-                                 spacing: float) -> str:
-    if not components: return ""
-    rows = []
-    item_num = 1
-    for key, val in components.items():
-        part_name = val.get('name', key.replace('_', ' ').title())
-        quantity = val.get('quantity', 1)
-        rows.append(f'(list "{item_num}" "{part_name}" "{quantity}")')
-        item_num += 1
-    lisp_data_list = f"(list {' '.join(rows)})"
-    table_start_x = right_most_x + spacing
-    table_start_y = top_y
-    text_height = dim_opts.get('text_height', 3.5)
-    return f"""
-  ;; --- Draw Bill of Materials ---
-  (setq table_start_pt (list {table_start_x} {table_start_y}))
-  (setq bom_data {lisp_data_list})
-  (Draw-Bom-Table table_start_pt "Bill of Materials" bom_data '(40 150 50) 15 {text_height})
-"""
+# Each 2D part is described once as a drawing_ir.Drawing by its build_*_drawing
+# function; generate_lisp_for_* serializes that drawing to AutoLISP. The hexagonal
+# parts split this into *_geometry (pure arithmetic, also evaluated on NumPy arrays
+# for whole size families by family_sweep.py) and draw_* (one part from scalars).
+SQRT3 = math.sqrt(3)
 
 
-# ==============================================================================
-# Part Generation Functions
-# ==============================================================================
-def generate_lisp_for_cylinder(data: dict) -> str:
+def _emit(drawing: Drawing, data: dict) -> str:
+    """
+    Serializes a drawing as chosen by drawing_options['emitter'] ('command'/'entmake'), ['runtime']
+    ('inline'/'shared') and ['tagging'] (XDATA identity on every entity, for in-place updates).
+    """
+    opts = data['drawing_options']
+    return emit_lisp(drawing, opts.get('emitter', 'command'), opts.get('runtime', 'inline'), opts.get('tagging', False))
+
+
+def build_cylinder_drawing(data: dict) -> Drawing:
     params, opts = data['parameters'], data['drawing_options']
     layers, dim_opts = opts['layers'], opts['dimension_options']
     surface_finish, gts, datums = data.get('surface_finish', {}), data.get('geometric_tolerances', []), data.get(
@@ -159,178 +87,329 @@ def generate_lisp_for_cylinder(data: dict) -> str:
     right_p1_x, right_p2_x = ix + 2 * radius + spacing, ix + 4 * radius + spacing
     top_center_x, top_center_y = ix + radius, iy + height + spacing + radius
     right_view_center_x = right_p1_x + (right_p2_x - right_p1_x) / 2
-    lisp_code = get_lisp_header(layers, dim_opts) + generate_lisp_utility_functions(layers, dim_opts)
-    lisp_code += f"""
-  (command "_.-LAYER" "_S" "{layers['outline']['name']}" "")(command "_.RECTANG" "{front_p1_x},{front_p1_y}" "{front_p2_x},{front_p2_y}")(command "_.RECTANG" "{right_p1_x},{iy}" "{right_p2_x},{iy + height}")(command "_.CIRCLE" "{top_center_x},{top_center_y}" "{radius}")
-  (command "_.-LAYER" "_S" "{layers['centerline']['name']}" "")(command "_.LINE" "{ix + radius},{iy - 10}" "{ix + radius},{iy + height + 10}" "")(command "_.LINE" "{ix - 10},{top_center_y}" "{ix + 2 * radius + 10},{top_center_y}" "")(command "_.LINE" "{top_center_x},{top_center_y - radius - 10}" "{top_center_x},{top_center_y + radius + 10}" "")(command "_.LINE" "{right_view_center_x},{iy - 10}" "{right_view_center_x},{iy + height + 10}" "")(command "_.LINE" "{ix - 10},{iy + height / 2}" "{right_p2_x + 10},{iy + height / 2}" "")
-  (command "_.-LAYER" "_S" "{layers['dimensions']['name']}" "")(command "_.DIMLINEAR" "{ix},{iy}" "{ix},{iy + height}" "_T" "<>{params.get('height_tolerance', '')}" "{ix - 20 - spacing / 2},{iy + height / 2}")(command "_.DIMLINEAR" "{top_center_x - radius},{top_center_y}" "{top_center_x + radius},{top_center_y}" "_T" "%%c<>{params.get('diameter_tolerance', '')}" "{top_center_x},{top_center_y + radius + 20}")"""
-    lisp_code += "\n  ;; --- Advanced Annotations ---\n"
+    d = Drawing("Cylinder", layers, dim_opts)
+    d.view("Views")
+    d.rect('outline', front_p1_x, front_p1_y, front_p2_x, front_p2_y)
+    d.rect('outline', right_p1_x, iy, right_p2_x, iy + height)
+    d.circle('outline', top_center_x, top_center_y, radius)
+    d.view("Centerlines")
+    d.line('centerline', ix + radius, iy - 10, ix + radius, iy + height + 10)
+    d.line('centerline', ix - 10, top_center_y, ix + 2 * radius + 10, top_center_y)
+    d.line('centerline', top_center_x, top_center_y - radius - 10, top_center_x, top_center_y + radius + 10)
+    d.line('centerline', right_view_center_x, iy - 10, right_view_center_x, iy + height + 10)
+    d.line('centerline', ix - 10, iy + height / 2, right_p2_x + 10, iy + height / 2)
+    d.view("Dimensions")
+    d.dim_linear(ix, iy, ix, iy + height, ix - 20 - spacing / 2, iy + height / 2,
+                 f"<>{params.get('height_tolerance', '')}")
+    d.dim_linear(top_center_x - radius, top_center_y, top_center_x + radius, top_center_y,
+                 top_center_x, top_center_y + radius + 20, f"%%c<>{params.get('diameter_tolerance', '')}")
+    d.view("Advanced Annotations")
     for datum in datums:
         if datum['attach_face'] == 'bottom':
-            lisp_code += f'  (draw-datum-symbol (list {front_p1_x + radius} {front_p1_y}) (list {front_p1_x + radius} {front_p1_y - 20}) "{datum["label"]}")\n'
+            d.datum(front_p1_x + radius, front_p1_y, front_p1_x + radius, front_p1_y - 20, datum["label"])
         elif datum['attach_face'] == 'centerline':
-            lisp_code += f'  (draw-datum-symbol (list {right_p1_x} {iy + height / 2}) (list {right_p1_x - 20} {iy + height / 2 - 10}) "{datum["label"]}")\n'
-    gdt_symbols = {"perpendicularity": "\\\\U+22A5", "parallelism": "\\\\U+2225"}
+            d.datum(right_p1_x, iy + height / 2, right_p1_x - 20, iy + height / 2 - 10, datum["label"])
+    gdt_symbols = {"perpendicularity": "\\U+22A5", "parallelism": "\\U+2225"}
     for gdt in gts:
         symbol_str = gdt_symbols.get(gdt["type"], "?")
-        datums_str = " ".join([f'"{d}"' for d in gdt.get('datum_references', [])])
-        datum_arg = f"(list {datums_str})" if datums_str else "nil"
+        datum_refs = gdt.get('datum_references', [])
         box_h = dim_opts['text_height'] * 2.0
         if gdt['leader_attach_point'] == 'left_side':
-            lisp_code += f'  (draw-gdt-frame (list {front_p1_x} {front_p1_y + height / 2}) (list {front_p1_x - 40} {front_p1_y + height / 2 - box_h / 2}) "{symbol_str}" "{gdt["tolerance"]}" {datum_arg} "RIGHT")\n'
+            d.gdt(front_p1_x, front_p1_y + height / 2, front_p1_x - 40, front_p1_y + height / 2 - box_h / 2,
+                  symbol_str, gdt["tolerance"], datum_refs, "RIGHT")
         elif gdt['leader_attach_point'] == 'right_side':
-            lisp_code += f'  (draw-gdt-frame (list {right_p2_x} {iy + height / 2}) (list {right_p2_x + 20} {iy + height / 2 - box_h / 2}) "{symbol_str}" "{gdt["tolerance"]}" {datum_arg} "LEFT")\n'
-    if 'side_surface' in surface_finish: ss = surface_finish['side_surface']; lisp_code += f'  (draw-roughness-symbol (list {right_p2_x} {iy + height / 2}) "{ss[0]}" {ss[2]} {ss[1]})\n'
-    if 'top_surface' in surface_finish: ts = surface_finish['top_surface']; lisp_code += f'  (draw-roughness-symbol (list {front_p1_x + radius} {front_p2_y}) "{ts[0]}" {ts[2]} {ts[1]})\n'
-    lisp_code += _generate_lisp_for_parameter_table(params, dim_opts, right_p2_x, 100, spacing)
-    lisp_code += get_lisp_footer("Cylinder")
-    return lisp_code
+            d.gdt(right_p2_x, iy + height / 2, right_p2_x + 20, iy + height / 2 - box_h / 2,
+                  symbol_str, gdt["tolerance"], datum_refs, "LEFT")
+    if 'side_surface' in surface_finish: d.roughness(right_p2_x, iy + height / 2, surface_finish['side_surface'])
+    if 'top_surface' in surface_finish: d.roughness(front_p1_x + radius, front_p2_y, surface_finish['top_surface'])
+    d.view("Parameter Table")
+    d.parameter_table(params, right_p2_x + spacing, 100)
+    return d
 
-def generate_lisp_for_hex_nut(data: dict) -> str:
+
+def generate_lisp_for_cylinder(data: dict) -> str:
+    return _emit(build_cylinder_drawing(data), data)
+
+
+def hex_nut_geometry(side_length, height, hole_diameter, ix, iy, spacing) -> dict:
+    """Derived view coordinates of a hexagonal nut; works on scalars or on NumPy arrays (a whole size family)."""
+    flat_distance, vertex_distance = side_length * SQRT3, 2 * side_length
+    right_start_x = ix + vertex_distance + spacing
+    top_view_center_y = iy + height + spacing + vertex_distance / 2
+    section_start_y = iy + height + spacing
+    return {'side_length': side_length, 'height': height, 'hole_radius': hole_diameter / 2.0,
+            'ix': ix, 'iy': iy, 'spacing': spacing,
+            'flat_distance': flat_distance, 'vertex_distance': vertex_distance, 'inner_edge_radius': side_length / 2.0,
+            'front_center_x': ix + vertex_distance / 2,
+            'right_start_x': right_start_x, 'right_center_x': right_start_x + flat_distance / 2,
+            'top_view_center_y': top_view_center_y, 'top_view_bottom_y': top_view_center_y - flat_distance / 2,
+            'section_start_y': section_start_y, 'section_center_x': right_start_x + vertex_distance / 2,
+            'section_mid_y': section_start_y + height / 2}
+
+
+def build_hex_nut_drawing(data: dict) -> Drawing:
     params, opts = data['parameters'], data['drawing_options']
-    layers, dim_opts = opts['layers'], opts['dimension_options']
-    side_length, height, hole_diameter = params['side_length'], params['height'], params['hole']['diameter']
-    hole_radius = hole_diameter / 2.0
     ix, iy = opts['insertion_point']
-    spacing = opts['spacing']
+    g = hex_nut_geometry(params['side_length'], params['height'], params['hole']['diameter'], ix, iy, opts['spacing'])
+    d = Drawing("Hexagonal Nut", opts['layers'], opts['dimension_options'])
+    draw_hex_nut(d, data, g)
+    return d
+
+
+def draw_hex_nut(d: Drawing, data: dict, g: dict, table: bool = True):
+    """Adds one hexagonal nut, laid out by hex_nut_geometry (scalar values), to drawing d."""
+    params, opts = data['parameters'], data['drawing_options']
     hatch_opts = opts.get('hatch_options', {'pattern': 'ANSI31', 'scale': 15.0})
     datums, gts, finish = data.get('datums', []), data.get('geometric_tolerances', []), data.get('surface_finish', {})
-    flat_distance, vertex_distance, inner_edge_radius = side_length * math.sqrt(3), 2 * side_length, side_length / 2.0
-    front_view_width, front_center_x = vertex_distance, ix + vertex_distance / 2
-    right_view_width, right_start_x, right_center_x = flat_distance, ix + front_view_width + spacing, ix + front_view_width + spacing + flat_distance / 2
-    top_view_center_y, top_view_bottom_y = iy + height + spacing + vertex_distance / 2, iy + height + spacing + vertex_distance / 2 - flat_distance / 2
-    top_view_center = f"{front_center_x},{top_view_center_y}"
-    section_start_y, section_center_x = iy + height + spacing, right_start_x + vertex_distance / 2
-    lisp_code = get_lisp_header(layers, dim_opts)
-    lisp_code += generate_lisp_utility_functions(layers, dim_opts)
-    hatch_pick_points_str = ' '.join(
-        [f'"{section_center_x - (hole_radius + inner_edge_radius) / 2},{section_start_y + height / 2}"',
-         f'"{section_center_x + (hole_radius + inner_edge_radius) / 2},{section_start_y + height / 2}"',
-         f'"{section_center_x - (inner_edge_radius + side_length) / 2},{section_start_y + height / 2}"',
-         f'"{section_center_x + (inner_edge_radius + side_length) / 2},{section_start_y + height / 2}"']) if hole_radius < inner_edge_radius else ' '.join(
-        [f'"{section_center_x - (hole_radius + side_length) / 2},{section_start_y + height / 2}"',
-         f'"{section_center_x + (hole_radius + side_length) / 2},{section_start_y + height / 2}"'])
-    lisp_code += f"""
-  (command "_.-LAYER" "_S" "{layers['outline']['name']}" "")(command "_.POLYGON" "6" "{top_view_center}" "_Inscribed" "{side_length}")(command "_.CIRCLE" "{top_view_center}" "{hole_radius}")(command "_.RECTANG" "{ix},{iy}" "{ix + front_view_width},{iy + height}")(command "_.LINE" "{front_center_x - inner_edge_radius},{iy}" "{front_center_x - inner_edge_radius},{iy + height}" "")(command "_.LINE" "{front_center_x + inner_edge_radius},{iy}" "{front_center_x + inner_edge_radius},{iy + height}" "")(command "_.RECTANG" "{right_start_x},{iy}" "{right_start_x + right_view_width},{iy + height}")(command "_.LINE" "{right_center_x},{iy}" "{right_center_x},{iy + height}" "")
-  (command "_.-LAYER" "_S" "{layers['hidden']['name']}" "")(command "_.LINE" "{front_center_x - hole_radius},{iy}" "{front_center_x - hole_radius},{iy + height}" "")(command "_.LINE" "{front_center_x + hole_radius},{iy}" "{front_center_x + hole_radius},{iy + height}" "")(command "_.LINE" "{right_center_x - hole_radius},{iy}" "{right_center_x - hole_radius},{iy + height}" "")(command "_.LINE" "{right_center_x + hole_radius},{iy}" "{right_center_x + hole_radius},{iy + height}" "")
-  (command "_.-LAYER" "_S" "{layers['outline']['name']}" "")(command "_.RECTANG" "{right_start_x},{section_start_y}" "{right_start_x + vertex_distance},{section_start_y + height}")(command "_.LINE" "{section_center_x - hole_radius},{section_start_y}" "{section_center_x - hole_radius},{section_start_y + height}" "")(command "_.LINE" "{section_center_x + hole_radius},{section_start_y}" "{section_center_x + hole_radius},{section_start_y + height}" "")
-  (command "_.-LAYER" "_S" "{layers['outline_hidden']['name']}" "")(command "_.LINE" "{section_center_x - inner_edge_radius},{section_start_y}" "{section_center_x - inner_edge_radius},{section_start_y + height}" "")(command "_.LINE" "{section_center_x + inner_edge_radius},{section_start_y}" "{section_center_x + inner_edge_radius},{section_start_y + height}" "")
-  (command "_.SETVAR" "HPNAME" "{hatch_opts['pattern']}")(command "_.SETVAR" "HPSCALE" {hatch_opts['scale']})(command "_-HATCH" {hatch_pick_points_str} "")
-  (command "_.-LAYER" "_S" "{layers['centerline']['name']}" "")(command "_.LINE" "{front_center_x},{iy - 5}" "{front_center_x},{iy + height + 5}" "")(command "_.LINE" "{ix - 5},{top_view_center_y}" "{ix + vertex_distance + 5},{top_view_center_y}" "")(command "_.LINE" "{front_center_x},{iy + height + spacing - 5}" "{front_center_x},{top_view_center_y + vertex_distance / 2 + 5}" "")(command "_.LINE" "{section_center_x},{section_start_y - 5}" "{section_center_x},{section_start_y + height + 5}" "")
-  (command "_.-LAYER" "_S" "{layers['dimensions']['name']}" "")(command "_.DIMLINEAR" "{ix},{iy}" "{ix},{iy + height}" "_T" "<>{params.get('height_tolerance', '')}" "{ix - spacing / 2},{iy + height / 2}")(command "_.DIMLINEAR" "{ix},{iy + height}" "{ix + vertex_distance},{iy + height}" "{front_center_x},{iy + height + spacing / 2}")(command "_.DIMLINEAR" "{front_center_x - hole_radius},{top_view_center_y}" "{front_center_x + hole_radius},{top_view_center_y}" "_T" "%%c<>{params['hole'].get('diameter_tolerance', '')}" "{front_center_x},{top_view_center_y + vertex_distance / 2 + spacing / 2}")(command "_.DIMLINEAR" "{front_center_x - side_length / 2},{top_view_bottom_y}" "{front_center_x + side_length / 2},{top_view_bottom_y}" "_T" "<>{params.get('side_length_tolerance', '')}" "{front_center_x},{top_view_bottom_y - spacing / 2}")"""
-    lisp_code += "\n  ;; --- Advanced Annotations ---\n"
-    gdt_symbols = {"perpendicularity": "\\\\U+22A5", "parallelism": "\\\\U+2225", "flatness": "\\\\U+25B1",
-                   "position": "\\\\U+2316"}
+    side_length, height, hole_radius = g['side_length'], g['height'], g['hole_radius']
+    ix, iy, spacing = g['ix'], g['iy'], g['spacing']
+    flat_distance, vertex_distance, inner_edge_radius = g['flat_distance'], g['vertex_distance'], g['inner_edge_radius']
+    front_view_width, front_center_x = vertex_distance, g['front_center_x']
+    right_view_width, right_start_x, right_center_x = flat_distance, g['right_start_x'], g['right_center_x']
+    top_view_center_y, top_view_bottom_y = g['top_view_center_y'], g['top_view_bottom_y']
+    section_start_y, section_center_x, section_mid_y = g['section_start_y'], g['section_center_x'], g['section_mid_y']
+    if hole_radius < inner_edge_radius:
+        hatch_pick_points = [(section_center_x - (hole_radius + inner_edge_radius) / 2, section_mid_y),
+                             (section_center_x + (hole_radius + inner_edge_radius) / 2, section_mid_y),
+                             (section_center_x - (inner_edge_radius + side_length) / 2, section_mid_y),
+                             (section_center_x + (inner_edge_radius + side_length) / 2, section_mid_y)]
+    else:
+        hatch_pick_points = [(section_center_x - (hole_radius + side_length) / 2, section_mid_y),
+                             (section_center_x + (hole_radius + side_length) / 2, section_mid_y)]
+    d.view("Top View")
+    d.polygon('outline', front_center_x, top_view_center_y, 6, side_length)
+    d.circle('outline', front_center_x, top_view_center_y, hole_radius)
+    d.view("Front and Right Views")
+    d.rect('outline', ix, iy, ix + front_view_width, iy + height)
+    d.line('outline', front_center_x - inner_edge_radius, iy, front_center_x - inner_edge_radius, iy + height)
+    d.line('outline', front_center_x + inner_edge_radius, iy, front_center_x + inner_edge_radius, iy + height)
+    d.rect('outline', right_start_x, iy, right_start_x + right_view_width, iy + height)
+    d.line('outline', right_center_x, iy, right_center_x, iy + height)
+    d.line('hidden', front_center_x - hole_radius, iy, front_center_x - hole_radius, iy + height)
+    d.line('hidden', front_center_x + hole_radius, iy, front_center_x + hole_radius, iy + height)
+    d.line('hidden', right_center_x - hole_radius, iy, right_center_x - hole_radius, iy + height)
+    d.line('hidden', right_center_x + hole_radius, iy, right_center_x + hole_radius, iy + height)
+    d.view("Section View")
+    d.rect('outline', right_start_x, section_start_y, right_start_x + vertex_distance, section_start_y + height)
+    d.line('outline', section_center_x - hole_radius, section_start_y, section_center_x - hole_radius, section_start_y + height)
+    d.line('outline', section_center_x + hole_radius, section_start_y, section_center_x + hole_radius, section_start_y + height)
+    d.line('outline_hidden', section_center_x - inner_edge_radius, section_start_y, section_center_x - inner_edge_radius, section_start_y + height)
+    d.line('outline_hidden', section_center_x + inner_edge_radius, section_start_y, section_center_x + inner_edge_radius, section_start_y + height)
+    d.hatch('outline_hidden', hatch_opts['pattern'], hatch_opts['scale'], hatch_pick_points)
+    d.view("Centerlines")
+    d.line('centerline', front_center_x, iy - 5, front_center_x, iy + height + 5)
+    d.line('centerline', ix - 5, top_view_center_y, ix + vertex_distance + 5, top_view_center_y)
+    d.line('centerline', front_center_x, iy + height + spacing - 5, front_center_x, top_view_center_y + vertex_distance / 2 + 5)
+    d.line('centerline', section_center_x, section_start_y - 5, section_center_x, section_start_y + height + 5)
+    d.view("Dimensions")
+    d.dim_linear(ix, iy, ix, iy + height, ix - spacing / 2, iy + height / 2, f"<>{params.get('height_tolerance', '')}")
+    d.dim_linear(ix, iy + height, ix + vertex_distance, iy + height, front_center_x, iy + height + spacing / 2)
+    d.dim_linear(front_center_x - hole_radius, top_view_center_y, front_center_x + hole_radius, top_view_center_y,
+                 front_center_x, top_view_center_y + vertex_distance / 2 + spacing / 2,
+                 f"%%c<>{params['hole'].get('diameter_tolerance', '')}")
+    d.dim_linear(front_center_x - side_length / 2, top_view_bottom_y, front_center_x + side_length / 2, top_view_bottom_y,
+                 front_center_x, top_view_bottom_y - spacing / 2, f"<>{params.get('side_length_tolerance', '')}")
+    d.view("Advanced Annotations")
+    gdt_symbols = {"perpendicularity": "\\U+22A5", "parallelism": "\\U+2225", "flatness": "\\U+25B1",
+                   "position": "\\U+2316"}
     for datum in datums:
         if datum.get('attach_face') == 'bottom':
-            lisp_code += f'  (draw-datum-symbol (list {front_center_x} {iy}) (list {front_center_x} {iy - 20}) "{datum["label"]}")\n'
+            d.datum(front_center_x, iy, front_center_x, iy - 20, datum["label"])
         elif datum.get('attach_face') == 'side_face_right_view':
-            lisp_code += f'  (draw-datum-symbol (list {right_start_x + right_view_width} {iy + height / 2}) (list {right_start_x + right_view_width + 20} {iy + height / 2}) "{datum["label"]}")\n'
+            d.datum(right_start_x + right_view_width, iy + height / 2, right_start_x + right_view_width + 20, iy + height / 2, datum["label"])
         elif datum.get('attach_face') == 'inner_hole_top_view':
-            lisp_code += f'  (draw-datum-symbol (list {front_center_x + hole_radius} {top_view_center_y}) (list {front_center_x + hole_radius + 60} {top_view_center_y}) "{datum["label"]}")\n'
+            d.datum(front_center_x + hole_radius, top_view_center_y, front_center_x + hole_radius + 60, top_view_center_y, datum["label"])
     for gdt in gts:
         symbol_str = gdt_symbols.get(gdt["type"], "?")
-        datums_str = " ".join([f'"{d}"' for d in gdt.get('datum_references', [])])
-        datum_arg = f"(list {datums_str})" if datums_str else "nil"
+        datum_refs = gdt.get('datum_references', [])
         if gdt.get('attach_to') == 'side_face_of_right_view':
-            lisp_code += f'  (draw-gdt-frame (list {right_start_x + right_view_width} {iy + height * 0.75}) (list {right_start_x + right_view_width + 10} {iy + height * 0.75}) "{symbol_str}" "{gdt["tolerance"]}" {datum_arg} "LEFT")\n'
+            d.gdt(right_start_x + right_view_width, iy + height * 0.75, right_start_x + right_view_width + 10, iy + height * 0.75,
+                  symbol_str, gdt["tolerance"], datum_refs, "LEFT")
         elif gdt.get('attach_to') == 'side_face_of_front_view':
-            lisp_code += f'  (draw-gdt-frame (list {ix} {iy + height * 0.25}) (list {ix - 100} {iy + height * 0.25}) "{symbol_str}" "{gdt["tolerance"]}" {datum_arg} "RIGHT")\n'
+            d.gdt(ix, iy + height * 0.25, ix - 100, iy + height * 0.25, symbol_str, gdt["tolerance"], datum_refs, "RIGHT")
         elif gdt.get('attach_to') == 'inner_hole_top_view':
-            lisp_code += f'  (draw-gdt-frame (list {front_center_x + hole_radius} {top_view_center_y}) (list {ix + 100} {top_view_center_y + 30}) "{symbol_str}" "{gdt["tolerance"]}" {datum_arg} "LEFT")\n'
+            d.gdt(front_center_x + hole_radius, top_view_center_y, ix + 100, top_view_center_y + 30,
+                  symbol_str, gdt["tolerance"], datum_refs, "LEFT")
     for key, val in finish.items():
         if key == 'top_face':
-            lisp_code += f'  (draw-roughness-symbol (list {front_center_x} {iy + height}) "{val[0]}" {val[2]} {val[1]})\n'
+            d.roughness(front_center_x, iy + height, val)
         elif key == 'side_face_right_view':
-            lisp_code += f'  (draw-roughness-symbol (list {right_start_x + right_view_width} {iy + height / 2}) "{val[0]}" {val[2]} {val[1]})\n'
+            d.roughness(right_start_x + right_view_width, iy + height / 2, val)
         elif key == 'inner_hole_top_view':
-            lisp_code += f'  (draw-roughness-symbol (list {front_center_x + hole_radius * math.cos(math.radians(45))} {top_view_center_y + hole_radius * math.sin(math.radians(45))}) "{val[0]}" {val[2]} {val[1]})\n'
+            d.roughness(front_center_x + hole_radius * math.cos(math.radians(45)),
+                        top_view_center_y + hole_radius * math.sin(math.radians(45)), val)
 
-    table_x, table_y = right_start_x + right_view_width, iy + height
-    lisp_code += _generate_lisp_for_parameter_table(params, dim_opts, table_x, 100, spacing)
-    lisp_code += get_lisp_footer("Hexagonal Nut")
-    return lisp_code
+    if table:
+        d.view("Parameter Table")
+        table_x = right_start_x + right_view_width
+        d.parameter_table(params, table_x + spacing, 100)
 
-def generate_lisp_for_hex_prism(data: dict) -> str:
+
+def generate_lisp_for_hex_nut(data: dict) -> str:
+    return _emit(build_hex_nut_drawing(data), data)
+
+
+def hex_prism_geometry(side_length, height, ix, iy, spacing) -> dict:
+    """Derived view coordinates of a hexagonal prism; works on scalars or on NumPy arrays (a whole size family)."""
+    flat_distance, vertex_distance = side_length * SQRT3, 2 * side_length
+    right_sx = ix + vertex_distance + spacing
+    top_cy = iy + height + spacing + side_length
+    return {'side_length': side_length, 'height': height, 'ix': ix, 'iy': iy, 'spacing': spacing,
+            'flat_distance': flat_distance, 'vertex_distance': vertex_distance,
+            'front_cx': ix + vertex_distance / 2, 'right_sx': right_sx, 'right_cx': right_sx + flat_distance / 2,
+            'top_cy': top_cy, 'top_flat_y': top_cy + side_length * SQRT3 / 2}
+
+
+def build_hex_prism_drawing(data: dict) -> Drawing:
     params, opts = data['parameters'], data['drawing_options']
-    layers, dim_opts = opts['layers'], opts['dimension_options']
+    ix, iy = opts['insertion_point']
+    g = hex_prism_geometry(params['side_length'], params['height'], ix, iy, opts['spacing'])
+    d = Drawing("Hexagonal Prism", opts['layers'], opts['dimension_options'])
+    draw_hex_prism(d, data, g)
+    return d
+
+
+def draw_hex_prism(d: Drawing, data: dict, g: dict, table: bool = True):
+    """Adds one hexagonal prism, laid out by hex_prism_geometry (scalar values), to drawing d."""
+    params, dim_opts = data['parameters'], data['drawing_options']['dimension_options']
     datums, gts, finish = data.get('datums', []), data.get('geometric_tolerances', []), data.get('surface_finish', {})
-    side_length, height = params['side_length'], params['height']
+    side_length, height = g['side_length'], g['height']
     height_tol, width_tol = params.get('height_tolerance', ''), params.get('width_tolerance', '')
-    ix, iy = opts['insertion_point']
-    spacing = opts['spacing']
-    flat_distance, vertex_distance = side_length * math.sqrt(3), 2 * side_length
-    front_w, front_cx = vertex_distance, ix + vertex_distance / 2
-    right_w, right_sx, right_cx = flat_distance, ix + front_w + spacing, ix + front_w + spacing + flat_distance / 2
-    top_cx, top_cy = front_cx, iy + height + spacing + side_length
-    lisp_code = get_lisp_header(layers, dim_opts)
-    lisp_code += generate_lisp_utility_functions(layers, dim_opts)
-    lisp_code += f"""
-  (command "_.-LAYER" "_S" "{layers['outline']['name']}" "")(command "_.POLYGON" "6" "{top_cx},{top_cy}" "_Inscribed" "{side_length}")(command "_.RECTANG" "{ix},{iy}" "{ix + front_w},{iy + height}")(command "_.LINE" "{front_cx - side_length / 2},{iy}" "{front_cx - side_length / 2},{iy + height}" "")(command "_.LINE" "{front_cx + side_length / 2},{iy}" "{front_cx + side_length / 2},{iy + height}" "")(command "_.RECTANG" "{right_sx},{iy}" "{right_sx + right_w},{iy + height}")(command "_.LINE" "{right_cx},{iy}" "{right_cx},{iy + height}" "")
-  (command "_.-LAYER" "_S" "{layers['centerline']['name']}" "")(command "_.LINE" "{front_cx},{iy - 25}" "{front_cx},{top_cy + side_length + 10}" "")(command "_.LINE" "{right_cx},{iy - 45}" "{right_cx},{iy + height + 10}" "")(command "_.LINE" "{ix - 10},{iy + height / 2}" "{right_sx + right_w + 45},{iy + height / 2}" "")(command "_.LINE" "{top_cx - side_length - 10},{top_cy}" "{top_cx + side_length + 10},{top_cy}" "")
-  (command "_.-LAYER" "_S" "{layers['dimensions']['name']}" "")(command "_.DIMLINEAR" "{ix},{iy}" "{ix},{iy + height}" "_T" "<>{height_tol}" "{ix - 30},{iy + height / 2}")(command "_.DIMLINEAR" "{ix},{iy + height}" "{ix + front_w},{iy + height}" "_T" "{vertex_distance:.2f}{width_tol}" "{front_cx},{iy + height + 20}")(command "_.DIMLINEAR" "{top_cx - side_length / 2},{top_cy + side_length * math.sqrt(3) / 2}" "{top_cx + side_length / 2},{top_cy + side_length * math.sqrt(3) / 2}" "_T" "{side_length:.2f}" "{top_cx},{top_cy + side_length * math.sqrt(3) / 2 + 20}")(command "_.DIMLINEAR" "{right_sx},{iy}" "{right_sx + right_w},{iy}" "_T" "{flat_distance:.2f}" "{right_cx},{iy - 40}")"""
-    lisp_code += "\n  ;; --- Advanced Annotations ---\n"
-    gdt_symbols = {"perpendicularity": "\\\\U+22A5", "parallelism": "\\\\U+2225"}
+    ix, iy, spacing = g['ix'], g['iy'], g['spacing']
+    flat_distance, vertex_distance = g['flat_distance'], g['vertex_distance']
+    front_w, front_cx = vertex_distance, g['front_cx']
+    right_w, right_sx, right_cx = flat_distance, g['right_sx'], g['right_cx']
+    top_cx, top_cy, top_flat_y = front_cx, g['top_cy'], g['top_flat_y']
+    d.view("Top View")
+    d.polygon('outline', top_cx, top_cy, 6, side_length)
+    d.view("Front and Right Views")
+    d.rect('outline', ix, iy, ix + front_w, iy + height)
+    d.line('outline', front_cx - side_length / 2, iy, front_cx - side_length / 2, iy + height)
+    d.line('outline', front_cx + side_length / 2, iy, front_cx + side_length / 2, iy + height)
+    d.rect('outline', right_sx, iy, right_sx + right_w, iy + height)
+    d.line('outline', right_cx, iy, right_cx, iy + height)
+    d.view("Centerlines")
+    d.line('centerline', front_cx, iy - 25, front_cx, top_cy + side_length + 10)
+    d.line('centerline', right_cx, iy - 45, right_cx, iy + height + 10)
+    d.line('centerline', ix - 10, iy + height / 2, right_sx + right_w + 45, iy + height / 2)
+    d.line('centerline', top_cx - side_length - 10, top_cy, top_cx + side_length + 10, top_cy)
+    d.view("Dimensions")
+    d.dim_linear(ix, iy, ix, iy + height, ix - 30, iy + height / 2, f"<>{height_tol}")
+    d.dim_linear(ix, iy + height, ix + front_w, iy + height, front_cx, iy + height + 20, f"{vertex_distance:.2f}{width_tol}")
+    d.dim_linear(top_cx - side_length / 2, top_flat_y, top_cx + side_length / 2, top_flat_y, top_cx, top_flat_y + 20,
+                 f"{side_length:.2f}")
+    d.dim_linear(right_sx, iy, right_sx + right_w, iy, right_cx, iy - 40, f"{flat_distance:.2f}")
+    d.view("Advanced Annotations")
+    gdt_symbols = {"perpendicularity": "\\U+22A5", "parallelism": "\\U+2225"}
     for datum in datums:
         if datum['attach_to'] == 'front_view_centerline_bottom':
-            lisp_code += f'  (draw-datum-symbol (list {front_cx} {iy}) (list {front_cx} {iy - 20}) "{datum["label"]}")\n'
+            d.datum(front_cx, iy, front_cx, iy - 20, datum["label"])
         elif datum['attach_to'] == 'right_view_right_side_midpoint':
-            lisp_code += f'  (draw-datum-symbol (list {right_sx + right_w} {iy + height / 2}) (list {right_sx + right_w + 40} {iy + height / 2}) "{datum["label"]}")\n'
+            d.datum(right_sx + right_w, iy + height / 2, right_sx + right_w + 40, iy + height / 2, datum["label"])
     for gdt in gts:
         symbol_str = gdt_symbols.get(gdt["type"], "?")
-        datums_str = " ".join([f'"{d}"' for d in gdt.get('datum_references', [])])
-        datum_arg = f"(list {datums_str})" if datums_str else "nil"
+        datum_refs = gdt.get('datum_references', [])
         box_h, frame_w = dim_opts['text_height'] * 2.0, dim_opts['text_height'] * 7.5
         if gdt['attach_to'] == 'front_view_left_side':
-            lisp_code += f'  (draw-gdt-frame (list {ix} {iy + height / 2}) (list {ix - 40 - frame_w} {iy + height / 2 - box_h / 2}) "{symbol_str}" "{gdt["tolerance"]}" {datum_arg} "RIGHT")\n'
+            d.gdt(ix, iy + height / 2, ix - 40 - frame_w, iy + height / 2 - box_h / 2,
+                  symbol_str, gdt["tolerance"], datum_refs, "RIGHT")
         elif gdt['attach_to'] == 'right_view_top_surface':
-            lisp_code += f'  (draw-gdt-frame (list {right_sx + right_w} {iy + height}) (list {right_sx + right_w + 15} {iy + height - box_h * 1.5}) "{symbol_str}" "{gdt["tolerance"]}" {datum_arg} "LEFT")\n'
-    if 'top_surface' in finish: ts = finish['top_surface']; lisp_code += f'  (draw-roughness-symbol (list {front_cx + side_length / 2 + 10} {iy + height}) "{ts[0]}" {ts[2]} {ts[1]})\n'
-    lisp_code += _generate_lisp_for_parameter_table(params, dim_opts, right_sx + right_w, 100, spacing)
-    return lisp_code + get_lisp_footer("Hexagonal Prism")
+            d.gdt(right_sx + right_w, iy + height, right_sx + right_w + 15, iy + height - box_h * 1.5,
+                  symbol_str, gdt["tolerance"], datum_refs, "LEFT")
+    if 'top_surface' in finish: d.roughness(front_cx + side_length / 2 + 10, iy + height, finish['top_surface'])
+    if table:
+        d.view("Parameter Table")
+        d.parameter_table(params, right_sx + right_w + spacing, 100)
 
-def generate_lisp_for_hex_screw(data: dict) -> str:
+
+def generate_lisp_for_hex_prism(data: dict) -> str:
+    return _emit(build_hex_prism_drawing(data), data)
+
+
+def hex_screw_geometry(side_length, head_height, shaft_dia, shaft_len, ix, iy, spacing) -> dict:
+    """Derived view coordinates of a hexagonal screw; works on scalars or on NumPy arrays (a whole size family)."""
+    total_h = head_height + shaft_len
+    flat_dist, vertex_dist = side_length * SQRT3, 2 * side_length
+    right_sx = ix + vertex_dist + spacing
+    return {'side_length': side_length, 'head_height': head_height, 'shaft_len': shaft_len,
+            'shaft_rad': shaft_dia / 2.0, 'total_h': total_h, 'ix': ix, 'iy': iy, 'spacing': spacing,
+            'flat_dist': flat_dist, 'vertex_dist': vertex_dist,
+            'front_cx': ix + vertex_dist / 2, 'right_sx': right_sx, 'right_cx': right_sx + flat_dist / 2,
+            'top_cy': iy + total_h + spacing + side_length}
+
+
+def build_hex_screw_drawing(data: dict) -> Drawing:
     params, opts = data['parameters'], data['drawing_options']
-    layers, dim_opts = opts['layers'], opts['dimension_options']
-    datums, gts, finish = data.get('datums', []), data.get('geometric_tolerances', []), data.get('surface_finish', {})
     head, shaft = params['head'], params['shaft']
-    side_length, head_height, shaft_dia, shaft_len = head['side_length'], head['height'], shaft['diameter'], shaft['length']
-    height_tol, width_tol = params.get('total_height_tolerance', ''), params.get('head_width_tolerance', '')
     ix, iy = opts['insertion_point']
-    spacing = opts['spacing']
-    shaft_rad, total_h = shaft_dia / 2.0, head_height + shaft_len
-    flat_dist, vertex_dist = side_length * math.sqrt(3), 2 * side_length
-    front_w, front_cx = vertex_dist, ix + vertex_dist / 2
-    right_w, right_sx, right_cx = flat_dist, ix + front_w + spacing, ix + front_w + spacing + flat_dist / 2
-    top_cy, top_center_str = iy + total_h + spacing + side_length, f"{front_cx},{iy + total_h + spacing + side_length}"
-    lisp_code = get_lisp_header(layers, dim_opts)
-    lisp_code += generate_lisp_utility_functions(layers, dim_opts)
-    lisp_code += f"""
-  (command "_.-LAYER" "_S" "{layers['outline']['name']}" "")(command "_.POLYGON" "6" "{top_center_str}" "_Inscribed" "{side_length}")(command "_.CIRCLE" "{top_center_str}" "{shaft_rad}")(command "_.RECTANG" "{ix},{iy + shaft_len}" "{ix + front_w},{iy + total_h}")(command "_.RECTANG" "{front_cx - shaft_rad},{iy}" "{front_cx + shaft_rad},{iy + shaft_len}")(command "_.LINE" "{front_cx - side_length / 2},{iy + shaft_len}" "{front_cx - side_length / 2},{iy + total_h}" "")(command "_.LINE" "{front_cx + side_length / 2},{iy + shaft_len}" "{front_cx + side_length / 2},{iy + total_h}" "")(command "_.RECTANG" "{right_sx},{iy + shaft_len}" "{right_sx + right_w},{iy + total_h}")(command "_.RECTANG" "{right_cx - shaft_rad},{iy}" "{right_cx + shaft_rad},{iy + shaft_len}")(command "_.LINE" "{right_cx},{iy + shaft_len}" "{right_cx},{iy + total_h}" "")
-  (command "_.-LAYER" "_S" "{layers['centerline']['name']}" "")(command "_.LINE" "{front_cx},{iy - 25}" "{front_cx},{top_cy + 25}" "")(command "_.LINE" "{right_cx},{iy - 10}" "{right_cx},{iy + total_h + 10}" "")(command "_.LINE" "{ix - 10},{iy + total_h / 2}" "{right_sx + right_w + 10},{iy + total_h / 2}" "")
-  (command "_.-LAYER" "_S" "{layers['dimensions']['name']}" "")(command "_.DIMLINEAR" "{ix},{iy}" "{ix},{iy + total_h}" "_T" "<>{height_tol}" "{ix - 30},{iy + total_h / 2}")(command "_.DIMLINEAR" "{ix},{iy + total_h}" "{ix + vertex_dist},{iy + total_h}" "_T" "{vertex_dist:.2f}{width_tol}" "{front_cx},{iy + total_h + 20}")(command "_.DIMLINEAR" "{front_cx - shaft_rad},{iy}" "{front_cx + shaft_rad},{iy}" "_T" "%%c<>" "{front_cx},{iy - 20}")(command "_.DIMLINEAR" "{right_sx},{iy + total_h}" "{right_sx + right_w},{iy + total_h}" "_T" "{flat_dist:.2f}" "{right_cx},{iy + total_h + 20}")"""
-    lisp_code += "\n  ;; --- Advanced Annotations ---\n"
-    gdt_symbols = {"perpendicularity": "\\\\U+22A5", "parallelism": "\\\\U+2225"}
+    g = hex_screw_geometry(head['side_length'], head['height'], shaft['diameter'], shaft['length'],
+                           ix, iy, opts['spacing'])
+    d = Drawing("Hexagonal Screw", opts['layers'], opts['dimension_options'])
+    draw_hex_screw(d, data, g)
+    return d
+
+
+def draw_hex_screw(d: Drawing, data: dict, g: dict, table: bool = True):
+    """Adds one hexagonal screw, laid out by hex_screw_geometry (scalar values), to drawing d."""
+    params, dim_opts = data['parameters'], data['drawing_options']['dimension_options']
+    datums, gts, finish = data.get('datums', []), data.get('geometric_tolerances', []), data.get('surface_finish', {})
+    side_length, head_height, shaft_len = g['side_length'], g['head_height'], g['shaft_len']
+    height_tol, width_tol = params.get('total_height_tolerance', ''), params.get('head_width_tolerance', '')
+    ix, iy, spacing = g['ix'], g['iy'], g['spacing']
+    shaft_rad, total_h = g['shaft_rad'], g['total_h']
+    flat_dist, vertex_dist = g['flat_dist'], g['vertex_dist']
+    front_w, front_cx = vertex_dist, g['front_cx']
+    right_w, right_sx, right_cx = flat_dist, g['right_sx'], g['right_cx']
+    top_cy = g['top_cy']
+    d.view("Top View")
+    d.polygon('outline', front_cx, top_cy, 6, side_length)
+    d.circle('outline', front_cx, top_cy, shaft_rad)
+    d.view("Front and Right Views")
+    d.rect('outline', ix, iy + shaft_len, ix + front_w, iy + total_h)
+    d.rect('outline', front_cx - shaft_rad, iy, front_cx + shaft_rad, iy + shaft_len)
+    d.line('outline', front_cx - side_length / 2, iy + shaft_len, front_cx - side_length / 2, iy + total_h)
+    d.line('outline', front_cx + side_length / 2, iy + shaft_len, front_cx + side_length / 2, iy + total_h)
+    d.rect('outline', right_sx, iy + shaft_len, right_sx + right_w, iy + total_h)
+    d.rect('outline', right_cx - shaft_rad, iy, right_cx + shaft_rad, iy + shaft_len)
+    d.line('outline', right_cx, iy + shaft_len, right_cx, iy + total_h)
+    d.view("Centerlines")
+    d.line('centerline', front_cx, iy - 25, front_cx, top_cy + 25)
+    d.line('centerline', right_cx, iy - 10, right_cx, iy + total_h + 10)
+    d.line('centerline', ix - 10, iy + total_h / 2, right_sx + right_w + 10, iy + total_h / 2)
+    d.view("Dimensions")
+    d.dim_linear(ix, iy, ix, iy + total_h, ix - 30, iy + total_h / 2, f"<>{height_tol}")
+    d.dim_linear(ix, iy + total_h, ix + vertex_dist, iy + total_h, front_cx, iy + total_h + 20, f"{vertex_dist:.2f}{width_tol}")
+    d.dim_linear(front_cx - shaft_rad, iy, front_cx + shaft_rad, iy, front_cx, iy - 20, "%%c<>")
+    d.dim_linear(right_sx, iy + total_h, right_sx + right_w, iy + total_h, right_cx, iy + total_h + 20, f"{flat_dist:.2f}")
+    d.view("Advanced Annotations")
+    gdt_symbols = {"perpendicularity": "\\U+22A5", "parallelism": "\\U+2225"}
     for datum in datums:
         if datum['attach_to'] == 'bottom_surface':
-            lisp_code += f'  (draw-datum-symbol (list {front_cx} {iy}) (list {front_cx} {iy - 20}) "{datum["label"]}")\n'
+            d.datum(front_cx, iy, front_cx, iy - 20, datum["label"])
         elif datum['attach_to'] == 'centerline_of_right_view':
-            lisp_code += f'  (draw-datum-symbol (list {right_sx} {iy + total_h / 2}) (list {right_sx - 20} {iy + total_h / 2}) "{datum["label"]}")\n'
+            d.datum(right_sx, iy + total_h / 2, right_sx - 20, iy + total_h / 2, datum["label"])
     for gdt in gts:
         symbol_str = gdt_symbols.get(gdt["type"], "?")
-        datums_str = " ".join([f'"{d}"' for d in gdt.get('datum_references', [])])
-        datum_arg = f"(list {datums_str})" if datums_str else "nil"
+        datum_refs = gdt.get('datum_references', [])
         box_h, frame_w = dim_opts['text_height'] * 2.0, dim_opts['text_height'] * 7.5
         if gdt['attach_to'] == 'front_view_left_side_of_head':
-            lisp_code += f'  (draw-gdt-frame (list {ix} {iy + shaft_len + head_height / 2}) (list {ix - 40 - frame_w} {iy + shaft_len + head_height / 2 - box_h / 2}) "{symbol_str}" "{gdt["tolerance"]}" {datum_arg} "RIGHT")\n'
+            d.gdt(ix, iy + shaft_len + head_height / 2, ix - 40 - frame_w, iy + shaft_len + head_height / 2 - box_h / 2,
+                  symbol_str, gdt["tolerance"], datum_refs, "RIGHT")
         elif gdt['attach_to'] == 'right_view_top_surface':
-            lisp_code += f'  (draw-gdt-frame (list {right_cx} {iy + total_h}) (list {right_sx + right_w + 15} {iy + total_h - box_h / 2}) "{symbol_str}" "{gdt["tolerance"]}" {datum_arg} "LEFT")\n'
-    if 'top_surface' in finish: ts = finish['top_surface']; lisp_code += f'  (draw-roughness-symbol (list {front_cx} {iy + total_h}) "{ts[0]}" {ts[2]} {ts[1]})\n'
-    if 'side_surface' in finish: ss = finish['side_surface']; lisp_code += f'  (draw-roughness-symbol (list {right_sx + right_w} {iy + shaft_len + head_height / 2}) "{ss[0]}" {ss[2]} {ss[1]})\n'
-    lisp_code += _generate_lisp_for_parameter_table(params, dim_opts, right_sx + right_w, 100, spacing)
-    return lisp_code + get_lisp_footer("Hexagonal Screw")
+            d.gdt(right_cx, iy + total_h, right_sx + right_w + 15, iy + total_h - box_h / 2,
+                  symbol_str, gdt["tolerance"], datum_refs, "LEFT")
+    if 'top_surface' in finish: d.roughness(front_cx, iy + total_h, finish['top_surface'])
+    if 'side_surface' in finish: d.roughness(right_sx + right_w, iy + shaft_len + head_height / 2, finish['side_surface'])
+    if table:
+        d.view("Parameter Table")
+        d.parameter_table(params, right_sx + right_w + spacing, 100)
 
-def generate_lisp_for_cuboid(data: dict) -> str:
+
+def generate_lisp_for_hex_screw(data: dict) -> str:
+    return _emit(build_hex_screw_drawing(data), data)
+
+
+def build_cuboid_drawing(data: dict) -> Drawing:
     params, opts = data['parameters'], data['drawing_options']
     layers, dim_opts = opts['layers'], opts['dimension_options']
     datums, gts, finish = data.get('datums', []), data.get('geometric_tolerances', []), data.get('surface_finish', {})
@@ -340,38 +419,52 @@ def generate_lisp_for_cuboid(data: dict) -> str:
     front_p1, front_p2 = (ix, iy), (ix + length, iy + height)
     top_p1, top_p2 = (ix, iy + height + spacing), (ix + length, iy + height + spacing + width)
     side_p1, side_p2 = (ix + length + spacing, iy), (ix + length + spacing + width, iy + height)
-    lisp_code = get_lisp_header(layers, dim_opts)
-    lisp_code += generate_lisp_utility_functions(layers, dim_opts)
-    lisp_code += f"""
-  (command "_.-LAYER" "_S" "{layers['outline']['name']}" "")(command "_.RECTANG" (list {front_p1[0]} {front_p1[1]}) (list {front_p2[0]} {front_p2[1]}))(command "_.RECTANG" (list {top_p1[0]} {top_p1[1]}) (list {top_p2[0]} {top_p2[1]}))(command "_.RECTANG" (list {side_p1[0]} {side_p1[1]}) (list {side_p2[0]} {side_p2[1]}))
-  (command "_.-LAYER" "_S" "{layers['centerline']['name']}" "")(command "_.LINE" (list {ix + length / 2} {iy - 10}) (list {ix + length / 2} {top_p2[1] + 10}) "")(command "_.LINE" (list {ix - 10} {iy + height / 2}) (list {side_p2[0] + 10} {iy + height / 2}) "")(command "_.LINE" (list {ix - 10} {top_p1[1] + width / 2}) (list {top_p2[0] + 10} {top_p1[1] + width / 2}) "")(command "_.LINE" (list {side_p1[0] + width / 2} {iy - 10}) (list {side_p1[0] + width / 2} {iy + height + 10}) "")
-  (command "_.-LAYER" "_S" "{layers['dimensions']['name']}" "")(command "_.DIMLINEAR" (list {front_p1[0]} {front_p1[1]}) (list {front_p1[0]} {front_p2[1]}) (list {front_p1[0] - spacing / 2} {iy + height / 2}))(command "_.DIMLINEAR" (list {front_p1[0]} {front_p1[1]}) (list {front_p2[0]} {front_p1[1]}) (list {ix + length / 2} {iy - spacing / 2}))(command "_.DIMLINEAR" (list {side_p1[0]} {side_p1[1]}) (list {side_p2[0]} {side_p1[1]}) (list {side_p1[0] + width / 2} {iy - spacing / 2}))"""
-    lisp_code += "\n  ;; --- Advanced Annotations ---\n"
-    gdt_symbols = {"perpendicularity": "\\\\U+22A5", "parallelism": "\\\\U+2225", "flatness": "\\\\U+25AF"}
+    d = Drawing("Cuboid", layers, dim_opts)
+    d.view("Views")
+    d.rect('outline', front_p1[0], front_p1[1], front_p2[0], front_p2[1])
+    d.rect('outline', top_p1[0], top_p1[1], top_p2[0], top_p2[1])
+    d.rect('outline', side_p1[0], side_p1[1], side_p2[0], side_p2[1])
+    d.view("Centerlines")
+    d.line('centerline', ix + length / 2, iy - 10, ix + length / 2, top_p2[1] + 10)
+    d.line('centerline', ix - 10, iy + height / 2, side_p2[0] + 10, iy + height / 2)
+    d.line('centerline', ix - 10, top_p1[1] + width / 2, top_p2[0] + 10, top_p1[1] + width / 2)
+    d.line('centerline', side_p1[0] + width / 2, iy - 10, side_p1[0] + width / 2, iy + height + 10)
+    d.view("Dimensions")
+    d.dim_linear(front_p1[0], front_p1[1], front_p1[0], front_p2[1], front_p1[0] - spacing / 2, iy + height / 2)
+    d.dim_linear(front_p1[0], front_p1[1], front_p2[0], front_p1[1], ix + length / 2, iy - spacing / 2)
+    d.dim_linear(side_p1[0], side_p1[1], side_p2[0], side_p1[1], side_p1[0] + width / 2, iy - spacing / 2)
+    d.view("Advanced Annotations")
+    gdt_symbols = {"perpendicularity": "\\U+22A5", "parallelism": "\\U+2225", "flatness": "\\U+25AF"}
     for datum in datums:
         if datum['attach_to'] == 'front_view_bottom_mid':
-            lisp_code += f'  (draw-datum-symbol (list {ix + length / 2} {iy}) (list {ix + length / 2} {iy - 20}) "{datum["label"]}")\n'
+            d.datum(ix + length / 2, iy, ix + length / 2, iy - 20, datum["label"])
         elif datum['attach_to'] == 'side_view_left_mid':
-            lisp_code += f'  (draw-datum-symbol (list {side_p1[0]} {iy + height / 2}) (list {side_p1[0] - 20} {iy + height / 2}) "{datum["label"]}")\n'
+            d.datum(side_p1[0], iy + height / 2, side_p1[0] - 20, iy + height / 2, datum["label"])
     for gdt in gts:
         symbol_str = gdt_symbols.get(gdt["type"], "?")
-        datums_str = " ".join([f'"{d}"' for d in gdt.get('datum_references', [])])
-        datum_arg = f"(list {datums_str})" if datums_str else "nil"
+        datum_refs = gdt.get('datum_references', [])
         box_h = dim_opts['text_height'] * 2.0
         if gdt['attach_to'] == 'front_view_left_side':
-            lisp_code += f'  (draw-gdt-frame (list {front_p1[0]} {iy + height / 2}) (list {front_p1[0] - 80} {iy + height / 2 - box_h / 2}) "{symbol_str}" "{gdt["tolerance"]}" {datum_arg} "RIGHT")\n'
+            d.gdt(front_p1[0], iy + height / 2, front_p1[0] - 80, iy + height / 2 - box_h / 2,
+                  symbol_str, gdt["tolerance"], datum_refs, "RIGHT")
         elif gdt['attach_to'] == 'side_view_right_side':
-            lisp_code += f'  (draw-gdt-frame (list {side_p2[0]} {iy + height / 2}) (list {side_p2[0] + 20} {iy + height / 2 - box_h / 2}) "{symbol_str}" "{gdt["tolerance"]}" {datum_arg} "LEFT")\n'
-    if 'top_surface' in finish: ts = finish['top_surface']; lisp_code += f'  (draw-roughness-symbol (list {ix + length / 2} {front_p2[1]}) "{ts[0]}" {ts[2]} {ts[1]})\n'
-    if 'right_side_surface' in finish: ss = finish['right_side_surface']; lisp_code += f'  (draw-roughness-symbol (list {side_p2[0]} {iy + height * 0.75}) "{ss[0]}" {ss[2]} {ss[1]})\n'
-    lisp_code += _generate_lisp_for_parameter_table(params, dim_opts, side_p2[0], 100, spacing)
-    return lisp_code + get_lisp_footer("Cuboid")
+            d.gdt(side_p2[0], iy + height / 2, side_p2[0] + 20, iy + height / 2 - box_h / 2,
+                  symbol_str, gdt["tolerance"], datum_refs, "LEFT")
+    if 'top_surface' in finish: d.roughness(ix + length / 2, front_p2[1], finish['top_surface'])
+    if 'right_side_surface' in finish: d.roughness(side_p2[0], iy + height * 0.75, finish['right_side_surface'])
+    d.view("Parameter Table")
+    d.parameter_table(params, side_p2[0] + spacing, 100)
+    return d
+
+
+def generate_lisp_for_cuboid(data: dict) -> str:
+    return _emit(build_cuboid_drawing(data), data)
 
 
 # ==============================================================================
 # Assembly Generation Functions
 # ==============================================================================
-def generate_lisp_for_screw_nut_assembly(data: dict) -> str:
+def build_screw_nut_assembly_drawing(data: dict) -> Drawing:
     opts = data['drawing_options']
     components = data['components']
     layers, dim_opts = opts['layers'], opts['dimension_options']
@@ -384,7 +477,7 @@ def generate_lisp_for_screw_nut_assembly(data: dict) -> str:
     total_height_tol = top_level_params.get('total_height_tolerance', '')
     head_width_tol = top_level_params.get('head_width_tolerance', '')
     hatch_opts = opts.get('hatch_options', {'pattern': 'ANSI31', 'scale': 1.5, 'color': 7})
-    layers['hatch'] = {'name': 'Hatch', 'color': hatch_opts.get('color', 7)}
+    layers = dict(layers, hatch={'name': 'Hatch', 'color': hatch_opts.get('color', 7)})
     screw_p = components['screw']['parameters']
     nut_p = components['nut']['parameters']
     if screw_p.get('shaft_diameter', 0) != nut_p.get('hole_diameter', 0):
@@ -411,130 +504,123 @@ def generate_lisp_for_screw_nut_assembly(data: dict) -> str:
     top_sy = y_head_top + spacing
     top_cx = front_cx
     top_cy = top_sy + max(screw_head_w, nut_w) / 2
-    lisp_code = get_lisp_header(layers, dim_opts)
-    lisp_code += generate_lisp_utility_functions(layers, dim_opts)
-    lisp_code += "\n  ;; --- 1. Draw Standard Three Views ---\n"
-    lisp_code += '  ;; Front View\n'
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["outline"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.RECTANG" (list {ix} {y_head_bottom}) (list {ix + front_view_w} {y_head_top}))\n'
-    lisp_code += f'  (command "_.LINE" (list {front_cx - screw_side_len / 2} {y_head_bottom}) (list {front_cx - screw_side_len / 2} {y_head_top}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {front_cx + screw_side_len / 2} {y_head_bottom}) (list {front_cx + screw_side_len / 2} {y_head_top}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {front_cx - screw_shaft_r} {y_nut_top}) (list {front_cx - screw_shaft_r} {y_head_bottom}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {front_cx + screw_shaft_r} {y_nut_top}) (list {front_cx + screw_shaft_r} {y_head_bottom}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {front_cx - nut_w / 2} {y_nut_bottom}) (list {front_cx + nut_w / 2} {y_nut_bottom}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {front_cx - nut_w / 2} {y_nut_top}) (list {front_cx + nut_w / 2} {y_nut_top}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {front_cx - nut_w / 2} {y_nut_bottom}) (list {front_cx - nut_w / 2} {y_nut_top}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {front_cx + nut_w / 2} {y_nut_bottom}) (list {front_cx + nut_w / 2} {y_nut_top}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {front_cx - nut_side_len / 2} {y_nut_bottom}) (list {front_cx - nut_side_len / 2} {y_nut_top}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {front_cx + nut_side_len / 2} {y_nut_bottom}) (list {front_cx + nut_side_len / 2} {y_nut_top}) "")\n'
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["hidden"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.LINE" (list {front_cx - screw_shaft_r} {y_nut_bottom}) (list {front_cx - screw_shaft_r} {y_nut_top}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {front_cx + screw_shaft_r} {y_nut_bottom}) (list {front_cx + screw_shaft_r} {y_nut_top}) "")\n'
-    lisp_code += '  ;; Right View\n'
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["outline"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.RECTANG" (list {right_sx} {y_head_bottom}) (list {right_sx + side_view_w} {y_head_top}))\n'
-    lisp_code += f'  (command "_.LINE" (list {right_cx - screw_shaft_r} {y_nut_top}) (list {right_cx - screw_shaft_r} {y_head_bottom}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_cx + screw_shaft_r} {y_nut_top}) (list {right_cx + screw_shaft_r} {y_head_bottom}) "")\n'
+    d = Drawing("Screw-Nut Assembly (with Advanced Annotations)", layers, dim_opts)
+    d.comment("1. Draw Standard Three Views")
+    d.view("Front View")
+    d.rect('outline', ix, y_head_bottom, ix + front_view_w, y_head_top)
+    d.line('outline', front_cx - screw_side_len / 2, y_head_bottom, front_cx - screw_side_len / 2, y_head_top)
+    d.line('outline', front_cx + screw_side_len / 2, y_head_bottom, front_cx + screw_side_len / 2, y_head_top)
+    d.line('outline', front_cx - screw_shaft_r, y_nut_top, front_cx - screw_shaft_r, y_head_bottom)
+    d.line('outline', front_cx + screw_shaft_r, y_nut_top, front_cx + screw_shaft_r, y_head_bottom)
+    d.line('outline', front_cx - nut_w / 2, y_nut_bottom, front_cx + nut_w / 2, y_nut_bottom)
+    d.line('outline', front_cx - nut_w / 2, y_nut_top, front_cx + nut_w / 2, y_nut_top)
+    d.line('outline', front_cx - nut_w / 2, y_nut_bottom, front_cx - nut_w / 2, y_nut_top)
+    d.line('outline', front_cx + nut_w / 2, y_nut_bottom, front_cx + nut_w / 2, y_nut_top)
+    d.line('outline', front_cx - nut_side_len / 2, y_nut_bottom, front_cx - nut_side_len / 2, y_nut_top)
+    d.line('outline', front_cx + nut_side_len / 2, y_nut_bottom, front_cx + nut_side_len / 2, y_nut_top)
+    d.line('hidden', front_cx - screw_shaft_r, y_nut_bottom, front_cx - screw_shaft_r, y_nut_top)
+    d.line('hidden', front_cx + screw_shaft_r, y_nut_bottom, front_cx + screw_shaft_r, y_nut_top)
+    d.view("Right View")
+    d.rect('outline', right_sx, y_head_bottom, right_sx + side_view_w, y_head_top)
+    d.line('outline', right_cx - screw_shaft_r, y_nut_top, right_cx - screw_shaft_r, y_head_bottom)
+    d.line('outline', right_cx + screw_shaft_r, y_nut_top, right_cx + screw_shaft_r, y_head_bottom)
     nut_right_view_half_w = nut_flat_w / 4 * math.sqrt(3)
-    lisp_code += f'  (command "_.LINE" (list {right_cx - nut_right_view_half_w} {y_nut_bottom}) (list {right_cx + nut_right_view_half_w} {y_nut_bottom}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_cx - nut_right_view_half_w} {y_nut_top}) (list {right_cx + nut_right_view_half_w} {y_nut_top}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_cx - nut_right_view_half_w} {y_nut_bottom}) (list {right_cx - nut_right_view_half_w} {y_nut_top}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_cx + nut_right_view_half_w} {y_nut_bottom}) (list {right_cx + nut_right_view_half_w} {y_nut_top}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_cx} {y_head_bottom}) (list {right_cx} {y_head_top}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_cx} {y_nut_bottom}) (list {right_cx} {y_nut_top}) "")\n'
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["hidden"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_cx - screw_shaft_r} {y_nut_bottom}) (list {right_cx - screw_shaft_r} {y_nut_top}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_cx + screw_shaft_r} {y_nut_bottom}) (list {right_cx + screw_shaft_r} {y_nut_top}) "")\n'
+    d.line('outline', right_cx - nut_right_view_half_w, y_nut_bottom, right_cx + nut_right_view_half_w, y_nut_bottom)
+    d.line('outline', right_cx - nut_right_view_half_w, y_nut_top, right_cx + nut_right_view_half_w, y_nut_top)
+    d.line('outline', right_cx - nut_right_view_half_w, y_nut_bottom, right_cx - nut_right_view_half_w, y_nut_top)
+    d.line('outline', right_cx + nut_right_view_half_w, y_nut_bottom, right_cx + nut_right_view_half_w, y_nut_top)
+    d.line('outline', right_cx, y_head_bottom, right_cx, y_head_top)
+    d.line('outline', right_cx, y_nut_bottom, right_cx, y_nut_top)
+    d.line('hidden', right_cx - screw_shaft_r, y_nut_bottom, right_cx - screw_shaft_r, y_nut_top)
+    d.line('hidden', right_cx + screw_shaft_r, y_nut_bottom, right_cx + screw_shaft_r, y_nut_top)
     if y_nut_bottom > y_shaft_bottom:
-        lisp_code += f'  (command "_.LINE" (list {right_cx - screw_shaft_r} {y_shaft_bottom}) (list {right_cx - screw_shaft_r} {y_nut_bottom}) "")\n'
-        lisp_code += f'  (command "_.LINE" (list {right_cx + screw_shaft_r} {y_shaft_bottom}) (list {right_cx + screw_shaft_r} {y_nut_bottom}) "")\n'
-    lisp_code += '  ;; Top View\n'
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["outline"]["name"]}" "")\n'
+        d.line('hidden', right_cx - screw_shaft_r, y_shaft_bottom, right_cx - screw_shaft_r, y_nut_bottom)
+        d.line('hidden', right_cx + screw_shaft_r, y_shaft_bottom, right_cx + screw_shaft_r, y_nut_bottom)
+    d.view("Top View")
     if screw_head_w > nut_w:
-        lisp_code += f'  (command "_.POLYGON" 6 (list {top_cx} {top_cy}) "_C" {screw_head_w / 4 * math.sqrt(3)})\n'
-        lisp_code += f'  (command "_.-LAYER" "_S" "{layers["hidden"]["name"]}" "")\n'
-        lisp_code += f'  (command "_.POLYGON" 6 (list {top_cx} {top_cy}) "_C" {nut_w / 4 * math.sqrt(3)})\n'
+        d.polygon('outline', top_cx, top_cy, 6, screw_head_w / 4 * math.sqrt(3), inscribed=False)
+        d.polygon('hidden', top_cx, top_cy, 6, nut_w / 4 * math.sqrt(3), inscribed=False)
     elif nut_w > screw_head_w:
-        lisp_code += f'  (command "_.POLYGON" 6 (list {top_cx} {top_cy}) "_C" {nut_w / 4 * math.sqrt(3)})\n'
-        lisp_code += f'  (command "_.POLYGON" 6 (list {top_cx} {top_cy}) "_C" {screw_head_w / 4 * math.sqrt(3)})\n'
+        d.polygon('outline', top_cx, top_cy, 6, nut_w / 4 * math.sqrt(3), inscribed=False)
+        d.polygon('outline', top_cx, top_cy, 6, screw_head_w / 4 * math.sqrt(3), inscribed=False)
     else:
-        lisp_code += f'  (command "_.POLYGON" 6 (list {top_cx} {top_cy}) "_C" {screw_head_w / 4 * math.sqrt(3)})\n'
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["outline"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.CIRCLE" (list {top_cx} {top_cy}) {screw_shaft_r})\n'
+        d.polygon('outline', top_cx, top_cy, 6, screw_head_w / 4 * math.sqrt(3), inscribed=False)
+    d.circle('outline', top_cx, top_cy, screw_shaft_r)
     draw_section = opts.get('draw_section_view', False)
     if draw_section:
-        lisp_code += "\n  ;; --- Draw Section View ---\n"
+        d.view("Section View")
         y_sec_base = y_head_top + spacing
         sec_y_head_bottom, sec_y_head_top, sec_y_shaft_top, sec_y_nut_bottom, sec_y_nut_top, sec_y_shaft_bottom = y_head_bottom - iy + y_sec_base, y_head_top - iy + y_sec_base, y_head_bottom - iy + y_sec_base, y_nut_bottom - iy + y_sec_base, y_nut_top - iy + y_sec_base, y_shaft_bottom - iy + y_sec_base
         sec_ix, sec_cx, sec_nut_right_view_half_w = right_sx, right_cx, nut_flat_w / 4 * math.sqrt(3)
-        lisp_code += f'  (command "_.-LAYER" "_S" "{layers["outline"]["name"]}" "")\n'
-        lisp_code += f'  (command "_.RECTANG" (list {sec_ix} {sec_y_head_bottom}) (list {sec_ix + side_view_w} {sec_y_head_top}))\n'
-        lisp_code += f'  (command "_.LINE" (list {sec_cx} {sec_y_head_bottom}) (list {sec_cx} {sec_y_head_top}) "")\n'
-        lisp_code += f'  (command "_.RECTANG" (list {sec_cx - screw_shaft_r} {sec_y_shaft_bottom}) (list {sec_cx + screw_shaft_r} {sec_y_shaft_top}))\n'
-        lisp_code += f'  (command "_.LINE" (list {sec_cx - sec_nut_right_view_half_w} {sec_y_nut_top}) (list {sec_cx - screw_shaft_r} {sec_y_nut_top}) "")\n'
-        lisp_code += f'  (command "_.LINE" (list {sec_cx + screw_shaft_r} {sec_y_nut_top}) (list {sec_cx + sec_nut_right_view_half_w} {sec_y_nut_top}) "")\n'
-        lisp_code += f'  (command "_.LINE" (list {sec_cx - sec_nut_right_view_half_w} {sec_y_nut_bottom}) (list {sec_cx - screw_shaft_r} {sec_y_nut_bottom}) "")\n'
-        lisp_code += f'  (command "_.LINE" (list {sec_cx + screw_shaft_r} {sec_y_nut_bottom}) (list {sec_cx + sec_nut_right_view_half_w} {sec_y_nut_bottom}) "")\n'
-        lisp_code += f'  (command "_.LINE" (list {sec_cx - sec_nut_right_view_half_w} {sec_y_nut_bottom}) (list {sec_cx - sec_nut_right_view_half_w} {sec_y_nut_top}) "")\n'
-        lisp_code += f'  (command "_.LINE" (list {sec_cx + sec_nut_right_view_half_w} {sec_y_nut_bottom}) (list {sec_cx + sec_nut_right_view_half_w} {sec_y_nut_top}) "")\n'
-        lisp_code += f'  (command "_.-LAYER" "_S" "{layers["hidden"]["name"]}" "")\n'
-        lisp_code += f'  (command "_.LINE" (list {sec_cx} {sec_y_nut_bottom}) (list {sec_cx} {sec_y_nut_top}) "")\n'
+        d.rect('outline', sec_ix, sec_y_head_bottom, sec_ix + side_view_w, sec_y_head_top)
+        d.line('outline', sec_cx, sec_y_head_bottom, sec_cx, sec_y_head_top)
+        d.rect('outline', sec_cx - screw_shaft_r, sec_y_shaft_bottom, sec_cx + screw_shaft_r, sec_y_shaft_top)
+        d.line('outline', sec_cx - sec_nut_right_view_half_w, sec_y_nut_top, sec_cx - screw_shaft_r, sec_y_nut_top)
+        d.line('outline', sec_cx + screw_shaft_r, sec_y_nut_top, sec_cx + sec_nut_right_view_half_w, sec_y_nut_top)
+        d.line('outline', sec_cx - sec_nut_right_view_half_w, sec_y_nut_bottom, sec_cx - screw_shaft_r, sec_y_nut_bottom)
+        d.line('outline', sec_cx + screw_shaft_r, sec_y_nut_bottom, sec_cx + sec_nut_right_view_half_w, sec_y_nut_bottom)
+        d.line('outline', sec_cx - sec_nut_right_view_half_w, sec_y_nut_bottom, sec_cx - sec_nut_right_view_half_w, sec_y_nut_top)
+        d.line('outline', sec_cx + sec_nut_right_view_half_w, sec_y_nut_bottom, sec_cx + sec_nut_right_view_half_w, sec_y_nut_top)
+        d.line('hidden', sec_cx, sec_y_nut_bottom, sec_cx, sec_y_nut_top)
         hatch_pattern, hatch_scale = hatch_opts.get('pattern', 'ANSI31'), hatch_opts.get('scale', 1.5)
-        pick_pt_head_left, pick_pt_head_right, pick_pt_nut_left, pick_pt_nut_right, pick_pt_shaft = f'(list {(sec_ix + sec_cx) / 2.0} {sec_y_head_bottom + screw_head_h / 2.0})', f'(list {(sec_cx + sec_ix + side_view_w) / 2.0} {sec_y_head_bottom + screw_head_h / 2.0})', f'(list {(sec_cx - sec_nut_right_view_half_w + sec_cx - screw_shaft_r) / 2.0} {sec_y_nut_bottom + nut_h / 2.0})', f'(list {(sec_cx + screw_shaft_r + sec_cx + sec_nut_right_view_half_w) / 2.0} {sec_y_nut_bottom + nut_h / 2.0})', f'(list {sec_cx} {sec_y_shaft_bottom + (sec_y_shaft_top - sec_y_shaft_bottom) / 2.0})'
-        hatch_pick_points_str = f"{pick_pt_head_left} {pick_pt_head_right} {pick_pt_nut_left} {pick_pt_nut_right} {pick_pt_shaft}"
-        lisp_code += f'  (command "_.-LAYER" "_S" "{layers["hatch"]["name"]}" "")\n'
-        lisp_code += f'  (command "_.SETVAR" "HPNAME" "{hatch_pattern}")(command "_.SETVAR" "HPSCALE" {hatch_scale})\n'
-        lisp_code += f'  (command "_-HATCH" {hatch_pick_points_str} "")\n'
-        lisp_code += f'  (command "_.-LAYER" "_S" "{layers["hidden"]["name"]}" "")\n'
-        lisp_code += f'  (command "_.LINE" (list {sec_cx - screw_shaft_r} {sec_y_nut_top}) (list {sec_cx + screw_shaft_r} {sec_y_nut_top}) "")\n'
+        d.hatch('hatch', hatch_pattern, hatch_scale, [
+            ((sec_ix + sec_cx) / 2.0, sec_y_head_bottom + screw_head_h / 2.0),
+            ((sec_cx + sec_ix + side_view_w) / 2.0, sec_y_head_bottom + screw_head_h / 2.0),
+            ((sec_cx - sec_nut_right_view_half_w + sec_cx - screw_shaft_r) / 2.0, sec_y_nut_bottom + nut_h / 2.0),
+            ((sec_cx + screw_shaft_r + sec_cx + sec_nut_right_view_half_w) / 2.0, sec_y_nut_bottom + nut_h / 2.0),
+            (sec_cx, sec_y_shaft_bottom + (sec_y_shaft_top - sec_y_shaft_bottom) / 2.0)])
+        d.line('hidden', sec_cx - screw_shaft_r, sec_y_nut_top, sec_cx + screw_shaft_r, sec_y_nut_top)
     cl_ext = 15.0
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["centerline"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.LINE" (list {front_cx} {iy - cl_ext}) (list {front_cx} {top_cy + max(screw_head_w, nut_w) / 2 + cl_ext}) "")\n'
+    d.view("Centerlines")
+    d.line('centerline', front_cx, iy - cl_ext, front_cx, top_cy + max(screw_head_w, nut_w) / 2 + cl_ext)
     y_highest_on_right = (y_sec_base + total_h) if draw_section else y_head_top
-    lisp_code += f'  (command "_.LINE" (list {right_cx} {iy - cl_ext}) (list {right_cx} {y_highest_on_right + cl_ext}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {ix - cl_ext} {y_head_bottom - (y_head_bottom - y_nut_top) / 2}) (list {right_sx + side_view_w + cl_ext} {y_head_bottom - (y_head_bottom - y_nut_top) / 2}) "")\n'
-    lisp_code += "\n  ;; --- 3. Dimensions and Balloons ---\n"
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["dimensions"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.DIMLINEAR" (list {ix} {iy}) (list {ix} {y_head_top}) "_T" "<>{total_height_tol}" (list {ix - spacing / 2} {iy + total_h / 2}))\n'
-    lisp_code += f'  (command "_.DIMLINEAR" (list {ix} {y_head_top}) (list {ix + front_view_w} {y_head_top}) "_T" "<>{head_width_tol}" (list {front_cx} {y_head_top + spacing / 2}))\n'
+    d.line('centerline', right_cx, iy - cl_ext, right_cx, y_highest_on_right + cl_ext)
+    d.line('centerline', ix - cl_ext, y_head_bottom - (y_head_bottom - y_nut_top) / 2,
+           right_sx + side_view_w + cl_ext, y_head_bottom - (y_head_bottom - y_nut_top) / 2)
+    d.view("3. Dimensions and Balloons")
+    d.dim_linear(ix, iy, ix, y_head_top, ix - spacing / 2, iy + total_h / 2, f"<>{total_height_tol}")
+    d.dim_linear(ix, y_head_top, ix + front_view_w, y_head_top, front_cx, y_head_top + spacing / 2, f"<>{head_width_tol}")
     balloon_r, balloon_txt_h = dim_opts['text_height'] * 1.5, dim_opts['text_height']
-    lisp_code += f'  (command "_.LEADER" (list {ix + front_view_w * 0.8} {y_head_bottom + screw_head_h * 0.5}) (list {ix + front_view_w + 20} {y_head_top + 20}) "" "" "N")\n'
-    lisp_code += f'  (Draw-Balloon (list {ix + front_view_w + 20 + balloon_r} {y_head_top + 20}) {balloon_r} "1" {balloon_txt_h})\n'
-    lisp_code += f'  (command "_.LEADER" (list {front_cx - nut_w / 2 + 5} {y_nut_bottom + nut_h / 2}) (list {ix - 40} {y_nut_bottom + nut_h / 2}) "" "" "N")\n'
-    lisp_code += f'  (Draw-Balloon (list {ix - 40 - balloon_r} {y_nut_bottom + nut_h / 2}) {balloon_r} "2" {balloon_txt_h})\n'
-    lisp_code += "\n  ;; --- 4. Advanced Annotations ---\n"
-    gdt_symbols = {"perpendicularity": "\\\\U+22A5", "parallelism": "\\\\U+2225"}
+    d.leader(ix + front_view_w * 0.8, y_head_bottom + screw_head_h * 0.5, ix + front_view_w + 20, y_head_top + 20)
+    d.balloon(ix + front_view_w + 20 + balloon_r, y_head_top + 20, balloon_r, "1", balloon_txt_h)
+    d.leader(front_cx - nut_w / 2 + 5, y_nut_bottom + nut_h / 2, ix - 40, y_nut_bottom + nut_h / 2)
+    d.balloon(ix - 40 - balloon_r, y_nut_bottom + nut_h / 2, balloon_r, "2", balloon_txt_h)
+    d.view("4. Advanced Annotations")
+    gdt_symbols = {"perpendicularity": "\\U+22A5", "parallelism": "\\U+2225"}
     for datum in datums:
         if datum['attach_to'] == 'underside_of_screw_head':
-            lisp_code += f'  (command "_.-LAYER" "_S" "{layers["dimensions"]["name"]}" "")\n'
-            lisp_code += f'  (command "_.LINE" (list {front_cx} {y_head_bottom}) (list {front_cx} {y_head_bottom - 15}) "")\n'
-            lisp_code += f'  (draw-datum-symbol (list {front_cx} {y_head_bottom - 15}) (list {front_cx} {y_head_bottom - 30}) "{datum["label"]}")\n'
+            d.line('dimensions', front_cx, y_head_bottom, front_cx, y_head_bottom - 15)
+            d.datum(front_cx, y_head_bottom - 15, front_cx, y_head_bottom - 30, datum["label"])
         elif datum['attach_to'] == 'screw_axis_right_view':
-            lisp_code += f'  (draw-datum-symbol (list {right_cx} {y_nut_top}) (list {right_cx - 20} {y_nut_top - 20}) "{datum["label"]}")\n'
+            d.datum(right_cx, y_nut_top, right_cx - 20, y_nut_top - 20, datum["label"])
     for gdt in gts:
         symbol_str = gdt_symbols.get(gdt["type"], "?")
-        datums_str = " ".join([f'"{d}"' for d in gdt.get('datum_references', [])])
-        datum_arg = f'(list {datums_str})' if datums_str else "nil"
+        datum_refs = gdt.get('datum_references', [])
         if gdt['attach_to'] == 'underside_of_screw_head_gdt':
-            lisp_code += f'  (draw-gdt-frame (list {ix + front_view_w * 0.1} {y_head_bottom}) (list {ix - 50} {y_head_bottom - 30}) "{symbol_str}" "{gdt["tolerance"]}" {datum_arg} "RIGHT")\n'
+            d.gdt(ix + front_view_w * 0.1, y_head_bottom, ix - 50, y_head_bottom - 30,
+                  symbol_str, gdt["tolerance"], datum_refs, "RIGHT")
         elif gdt['attach_to'] == 'nut_top_face':
-            lisp_code += f'  (draw-gdt-frame (list {front_cx + nut_w / 2 * 0.8} {y_nut_top}) (list {ix + front_view_w + 30} {y_nut_top + 30}) "{symbol_str}" "{gdt["tolerance"]}" {datum_arg} "LEFT")\n'
+            d.gdt(front_cx + nut_w / 2 * 0.8, y_nut_top, ix + front_view_w + 30, y_nut_top + 30,
+                  symbol_str, gdt["tolerance"], datum_refs, "LEFT")
     for key, val in finish.items():
         if key == 'underside_of_screw_head':
-            lisp_code += f'  (draw-roughness-symbol (list {ix + front_view_w * 0.6} {y_head_bottom}) "{val[0]}" {val[2]} {val[1]})\n'
+            d.roughness(ix + front_view_w * 0.6, y_head_bottom, val)
         elif key == 'top_of_screw_head':
-            lisp_code += f'  (draw-roughness-symbol (list {ix + front_view_w * 0.4} {y_head_top}) "{val[0]}" {val[2]} {val[1]})\n'
+            d.roughness(ix + front_view_w * 0.4, y_head_top, val)
     right_most_x_for_bom = right_sx + side_view_w
-    top_most_y_for_bom = (y_sec_base + total_h) if draw_section else y_head_top
-    lisp_code += "\n  ;; --- 5. Generate BOM and Parameter Tables ---\n"
-    lisp_code += _generate_lisp_for_bom_table(components, dim_opts, right_most_x_for_bom, 100, spacing)
+    d.view("5. Generate BOM and Parameter Tables")
+    d.bom_table(components, right_most_x_for_bom + spacing, 100)
     unified_params = {comp_name.title(): comp_data.get('parameters', {}) for comp_name, comp_data in components.items()}
     if 'parameters' in data and data['parameters']: unified_params.update(data['parameters'])
-    lisp_code += _generate_lisp_for_parameter_table(unified_params, dim_opts, ix, iy - spacing, 0)
-    lisp_code += get_lisp_footer("Screw-Nut Assembly (with Advanced Annotations)")
-    return lisp_code
+    d.parameter_table(unified_params, ix, iy - spacing)
+    return d
 
-def generate_lisp_for_cuboid_cylinder_assembly(data: dict) -> str:
+
+def generate_lisp_for_screw_nut_assembly(data: dict) -> str:
+    return _emit(build_screw_nut_assembly_drawing(data), data)
+
+
+def build_cuboid_cylinder_assembly_drawing(data: dict) -> Drawing:
     opts = data['drawing_options']
     components = data['components']
     layers, dim_opts = opts['layers'], opts['dimension_options']
@@ -546,7 +632,7 @@ def generate_lisp_for_cuboid_cylinder_assembly(data: dict) -> str:
     hatch_scale_value = 1.5
     hatch_opts_cuboid = {'pattern': 'ANSI31', 'scale': hatch_scale_value}
     hatch_opts_cyl = {'pattern': 'ANSI32', 'scale': hatch_scale_value}
-    layers['hatch'] = {'name': 'Hatch', 'color': 7}
+    layers = dict(layers, hatch={'name': 'Hatch', 'color': 7})
     cuboid_p = components['cuboid']['parameters']
     cyl_p = components['cylinder']['parameters']
     cuboid_l, cuboid_w, cuboid_h = cuboid_p['length'], cuboid_p['width'], cuboid_p['height']
@@ -563,116 +649,104 @@ def generate_lisp_for_cuboid_cylinder_assembly(data: dict) -> str:
     side_view_cx = side_view_sx + cuboid_w / 2
     sec_view_sx = side_view_sx + cuboid_w + spacing
     sec_view_cx = sec_view_sx + cuboid_w / 2
-    lisp_code = get_lisp_header(layers, dim_opts)
-    lisp_code += generate_lisp_utility_functions(layers, dim_opts)
-    lisp_code += f'\n  ;; --- Draw Front View ---\n'
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["outline"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.RECTANG" (list {ix} {iy}) (list {ix + cuboid_l} {iy + cuboid_h}))\n'
+    d = Drawing("Cuboid-Cylinder Assembly (Annotation Fixed)", layers, dim_opts)
+    d.view("Draw Front View")
+    d.rect('outline', ix, iy, ix + cuboid_l, iy + cuboid_h)
     if cyl_h > cuboid_h:
-        lisp_code += f'  (command "_.RECTANG" (list {front_view_cx - cyl_r} {iy + cuboid_h}) (list {front_view_cx + cyl_r} {iy + cyl_h}))\n'
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["hidden"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.LINE" (list {front_view_cx - cyl_r} {iy}) (list {front_view_cx - cyl_r} {iy + min(cuboid_h, cyl_h)}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {front_view_cx + cyl_r} {iy}) (list {front_view_cx + cyl_r} {iy + min(cuboid_h, cyl_h)}) "")\n'
+        d.rect('outline', front_view_cx - cyl_r, iy + cuboid_h, front_view_cx + cyl_r, iy + cyl_h)
+    d.line('hidden', front_view_cx - cyl_r, iy, front_view_cx - cyl_r, iy + min(cuboid_h, cyl_h))
+    d.line('hidden', front_view_cx + cyl_r, iy, front_view_cx + cyl_r, iy + min(cuboid_h, cyl_h))
     if cuboid_h > cyl_h:
-        lisp_code += f'  (command "_.LINE" (list {front_view_cx - cyl_r} {iy + cyl_h}) (list {front_view_cx + cyl_r} {iy + cyl_h}) "")\n'
-    lisp_code += f'\n  ;; --- Draw Top View ---\n'
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["outline"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.RECTANG" (list {ix} {y_top_view_start}) (list {ix + cuboid_l} {y_top_view_start + cuboid_w}))\n'
-    lisp_code += f'  (command "_.CIRCLE" (list {top_view_center[0]} {top_view_center[1]}) {cyl_r})\n'
-    lisp_code += "\n  ;; --- Draw Standard Right View ---\n"
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["outline"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.RECTANG" (list {side_view_sx} {iy}) (list {side_view_sx + cuboid_w} {iy + cuboid_h}))\n'
+        d.line('hidden', front_view_cx - cyl_r, iy + cyl_h, front_view_cx + cyl_r, iy + cyl_h)
+    d.view("Draw Top View")
+    d.rect('outline', ix, y_top_view_start, ix + cuboid_l, y_top_view_start + cuboid_w)
+    d.circle('outline', top_view_center[0], top_view_center[1], cyl_r)
+    d.view("Draw Standard Right View")
+    d.rect('outline', side_view_sx, iy, side_view_sx + cuboid_w, iy + cuboid_h)
     if cyl_h > cuboid_h:
-        lisp_code += f'  (command "_.RECTANG" (list {side_view_cx - cyl_r} {iy + cuboid_h}) (list {side_view_cx + cyl_r} {iy + cyl_h}))\n'
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["hidden"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.LINE" (list {side_view_cx - cyl_r} {iy}) (list {side_view_cx - cyl_r} {iy + min(cuboid_h, cyl_h)}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {side_view_cx + cyl_r} {iy}) (list {side_view_cx + cyl_r} {iy + min(cuboid_h, cyl_h)}) "")\n'
+        d.rect('outline', side_view_cx - cyl_r, iy + cuboid_h, side_view_cx + cyl_r, iy + cyl_h)
+    d.line('hidden', side_view_cx - cyl_r, iy, side_view_cx - cyl_r, iy + min(cuboid_h, cyl_h))
+    d.line('hidden', side_view_cx + cyl_r, iy, side_view_cx + cyl_r, iy + min(cuboid_h, cyl_h))
     if cuboid_h > cyl_h:
-        lisp_code += f'  (command "_.LINE" (list {side_view_cx - cyl_r} {iy + cyl_h}) (list {side_view_cx + cyl_r} {iy + cyl_h}) "")\n'
+        d.line('hidden', side_view_cx - cyl_r, iy + cyl_h, side_view_cx + cyl_r, iy + cyl_h)
     if draw_section:
-        lisp_code += f"\n  ;; --- Draw Section View to the right of the Right View ---\n"
+        d.view("Draw Section View to the right of the Right View")
         sec_base_y, sec_cuboid_top_y, sec_cyl_top_y = iy, iy + cuboid_h, iy + cyl_h
         contact_height = min(cuboid_h, cyl_h)
-        lisp_code += f'  (command "_.-LAYER" "_S" "{layers["outline"]["name"]}" "")\n'
-        lisp_code += f'  (command "_.RECTANG" (list {sec_view_sx} {sec_base_y}) (list {sec_view_cx - cyl_r} {sec_cuboid_top_y}))\n'
-        lisp_code += f'  (command "_.RECTANG" (list {sec_view_cx + cyl_r} {sec_base_y}) (list {sec_view_sx + cuboid_w} {sec_cuboid_top_y}))\n'
-        lisp_code += f'  (command "_.RECTANG" (list {sec_view_cx - cyl_r} {sec_base_y}) (list {sec_view_cx + cyl_r} {sec_cyl_top_y}))\n'
-        lisp_code += f'  (command "_.LINE" (list {sec_view_cx - cyl_r} {sec_base_y}) (list {sec_view_cx - cyl_r} {sec_base_y + contact_height}) "")\n'
-        lisp_code += f'  (command "_.LINE" (list {sec_view_cx + cyl_r} {sec_base_y}) (list {sec_view_cx + cyl_r} {sec_base_y + contact_height}) "")\n'
-        lisp_code += f'  (command "_.-LAYER" "_S" "{layers["hatch"]["name"]}" "")\n'
-        pick_pt_cuboid_left = f'(list {(sec_view_sx + sec_view_cx - cyl_r) / 2.0} {sec_base_y + cuboid_h / 2.0})'
-        pick_pt_cuboid_right = f'(list {(sec_view_cx + cyl_r + sec_view_sx + cuboid_w) / 2.0} {sec_base_y + cuboid_h / 2.0})'
-        lisp_code += f'  (command "_-HATCH" "_P" "{hatch_opts_cuboid["pattern"]}" {hatch_opts_cuboid["scale"]} "" {pick_pt_cuboid_left} {pick_pt_cuboid_right} "")\n'
-        pick_pt_cylinder = f'(list {sec_view_cx} {sec_base_y + cyl_h / 2.0})'
-        lisp_code += f'  (command "_-HATCH" "_P" "{hatch_opts_cyl["pattern"]}" {hatch_opts_cyl["scale"]} "" {pick_pt_cylinder} "")\n'
-        if cuboid_h > cyl_h:
-            lisp_code += f'  (command "_.-LAYER" "_S" "{layers["outline"]["name"]}" "")\n'
-            lisp_code += f'  (command "_.LINE" (list {sec_view_cx - cyl_r} {sec_cuboid_top_y}) (list {sec_view_cx + cyl_r} {sec_cuboid_top_y}) "")\n'
-        else:
-            lisp_code += f'  (command "_.-LAYER" "_S" "{layers["hidden"]["name"]}" "")\n'
-            lisp_code += f'  (command "_.LINE" (list {sec_view_cx - cyl_r} {sec_cuboid_top_y}) (list {sec_view_cx + cyl_r} {sec_cuboid_top_y}) "")\n'
+        d.rect('outline', sec_view_sx, sec_base_y, sec_view_cx - cyl_r, sec_cuboid_top_y)
+        d.rect('outline', sec_view_cx + cyl_r, sec_base_y, sec_view_sx + cuboid_w, sec_cuboid_top_y)
+        d.rect('outline', sec_view_cx - cyl_r, sec_base_y, sec_view_cx + cyl_r, sec_cyl_top_y)
+        d.line('outline', sec_view_cx - cyl_r, sec_base_y, sec_view_cx - cyl_r, sec_base_y + contact_height)
+        d.line('outline', sec_view_cx + cyl_r, sec_base_y, sec_view_cx + cyl_r, sec_base_y + contact_height)
+        d.hatch('hatch', hatch_opts_cuboid["pattern"], hatch_opts_cuboid["scale"], [
+            ((sec_view_sx + sec_view_cx - cyl_r) / 2.0, sec_base_y + cuboid_h / 2.0),
+            ((sec_view_cx + cyl_r + sec_view_sx + cuboid_w) / 2.0, sec_base_y + cuboid_h / 2.0)])
+        d.hatch('hatch', hatch_opts_cyl["pattern"], hatch_opts_cyl["scale"], [(sec_view_cx, sec_base_y + cyl_h / 2.0)])
+        top_line_layer = 'outline' if cuboid_h > cyl_h else 'hidden'
+        d.line(top_line_layer, sec_view_cx - cyl_r, sec_cuboid_top_y, sec_view_cx + cyl_r, sec_cuboid_top_y)
     rightmost_x_for_centerline = (sec_view_sx + cuboid_w) if draw_section else (side_view_sx + cuboid_w)
-    lisp_code += f'\n  ;; --- Draw Centerlines ---\n'
+    d.view("Draw Centerlines")
     cl_ext = 20.0
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["centerline"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.LINE" (list {front_view_cx} {iy - cl_ext}) (list {front_view_cx} {y_top_view_start + cuboid_w + cl_ext}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {side_view_cx} {iy - cl_ext}) (list {side_view_cx} {y_top_overall + cl_ext}) "")\n'
+    d.line('centerline', front_view_cx, iy - cl_ext, front_view_cx, y_top_view_start + cuboid_w + cl_ext)
+    d.line('centerline', side_view_cx, iy - cl_ext, side_view_cx, y_top_overall + cl_ext)
     if draw_section:
-        lisp_code += f'  (command "_.LINE" (list {sec_view_cx} {iy - cl_ext}) (list {sec_view_cx} {y_top_overall + cl_ext}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {ix - cl_ext} {iy + cuboid_h / 2}) (list {rightmost_x_for_centerline + cl_ext} {iy + cuboid_h / 2}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {ix - cl_ext} {top_view_center[1]}) (list {ix + cuboid_l + cl_ext} {top_view_center[1]}) "")\n'
-    lisp_code += "\n  ;; --- 2. Dimensions and Balloons ---\n"
+        d.line('centerline', sec_view_cx, iy - cl_ext, sec_view_cx, y_top_overall + cl_ext)
+    d.line('centerline', ix - cl_ext, iy + cuboid_h / 2, rightmost_x_for_centerline + cl_ext, iy + cuboid_h / 2)
+    d.line('centerline', ix - cl_ext, top_view_center[1], ix + cuboid_l + cl_ext, top_view_center[1])
+    d.view("2. Dimensions and Balloons")
     dim_height_text_pt = (ix - spacing * 0.7, iy + total_h / 2.0)
     dim_length_text_pt = (front_view_cx, iy - spacing * 0.7)
     dim_dia_end_pt = (top_view_center[0] - cyl_r - 20, top_view_center[1] + cyl_r + 20)
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["dimensions"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.DIMLINEAR" (list {ix} {iy}) (list {ix} {iy + cuboid_h}) "_T" "<>{height_tol}" (list {dim_height_text_pt[0]} {dim_height_text_pt[1]}))\n'
-    lisp_code += f'  (command "_.DIMLINEAR" (list {ix} {iy}) (list {ix + cuboid_l} {iy}) (list {dim_length_text_pt[0]} {dim_length_text_pt[1]}))\n'
-    lisp_code += f'  (command "_.DIMDIAMETER" "" (list {top_view_center[0] - cyl_r * 0.707} {top_view_center[1] + cyl_r * 0.707}) "_T" "%%c<>{dia_tol}" (list {dim_dia_end_pt[0]} {dim_dia_end_pt[1]}))\n'
+    d.dim_linear(ix, iy, ix, iy + cuboid_h, dim_height_text_pt[0], dim_height_text_pt[1], f"<>{height_tol}")
+    d.dim_linear(ix, iy, ix + cuboid_l, iy, dim_length_text_pt[0], dim_length_text_pt[1])
+    d.dim_diameter(top_view_center[0] - cyl_r * 0.707, top_view_center[1] + cyl_r * 0.707,
+                   dim_dia_end_pt[0], dim_dia_end_pt[1], f"%%c<>{dia_tol}", center=top_view_center, radius=cyl_r)
     balloon_r, balloon_txt_h = dim_opts['text_height'] * 1.5, dim_opts['text_height']
-    lisp_code += f'  (command "_.LEADER" (list {ix + cuboid_l * 0.8} {iy + cuboid_h * 0.5}) (list {ix + cuboid_l + 20} {iy + cuboid_h * 0.5}) "" "" "N")\n'
-    lisp_code += f'  (Draw-Balloon (list {ix + cuboid_l + 20 + balloon_r} {iy + cuboid_h * 0.5}) {balloon_r} "1" {balloon_txt_h})\n'
+    d.leader(ix + cuboid_l * 0.8, iy + cuboid_h * 0.5, ix + cuboid_l + 20, iy + cuboid_h * 0.5)
+    d.balloon(ix + cuboid_l + 20 + balloon_r, iy + cuboid_h * 0.5, balloon_r, "1", balloon_txt_h)
     leader_y_cyl = iy + min(cyl_h, cuboid_h) * 0.7
-    lisp_code += f'  (command "_.LEADER" (list {front_view_cx + cyl_r * 0.7} {leader_y_cyl}) (list {front_view_cx + cyl_r + 20} {leader_y_cyl + 20}) "" "" "N")\n'
-    lisp_code += f'  (Draw-Balloon (list {front_view_cx + cyl_r + 20 + balloon_r} {leader_y_cyl + 20}) {balloon_r} "2" {balloon_txt_h})\n'
-    lisp_code += "\n  ;; --- 3. Advanced Annotations ---\n"
-    gdt_symbols = {"perpendicularity": "\\\\U+22A5", "parallelism": "\\\\U+2225"}
+    d.leader(front_view_cx + cyl_r * 0.7, leader_y_cyl, front_view_cx + cyl_r + 20, leader_y_cyl + 20)
+    d.balloon(front_view_cx + cyl_r + 20 + balloon_r, leader_y_cyl + 20, balloon_r, "2", balloon_txt_h)
+    d.view("3. Advanced Annotations")
+    gdt_symbols = {"perpendicularity": "\\U+22A5", "parallelism": "\\U+2225"}
     for datum in datums:
         label = datum["label"]
         if datum['attach_to'] == 'front_view_bottom_mid':
-            lisp_code += f'  (draw-datum-symbol (list {front_view_cx} {iy}) (list {front_view_cx} {iy - 20}) "{label}")\n'
+            d.datum(front_view_cx, iy, front_view_cx, iy - 20, label)
         elif datum['attach_to'] == 'side_view_left_mid':
-            lisp_code += f'  (draw-datum-symbol (list {side_view_sx} {iy + cuboid_h / 2}) (list {side_view_sx - 20} {iy + cuboid_h / 2}) "{label}")\n'
+            d.datum(side_view_sx, iy + cuboid_h / 2, side_view_sx - 20, iy + cuboid_h / 2, label)
         elif datum['attach_to'] == 'front_view_left_mid':
-            lisp_code += f'  (draw-datum-symbol (list {ix} {iy + cuboid_h / 2}) (list {ix - 20} {iy + cuboid_h / 2}) "{label}")\n'
+            d.datum(ix, iy + cuboid_h / 2, ix - 20, iy + cuboid_h / 2, label)
     for gdt in gts:
         symbol_str = gdt_symbols.get(gdt["type"], "?")
-        datums_str = " ".join([f'"{d}"' for d in gdt.get('datum_references', [])])
-        datum_arg = f'(list {datums_str})' if datums_str else "nil"
+        datum_refs = gdt.get('datum_references', [])
         if gdt['attach_to'] == 'hole_outline_top_view':
             attach_pt_x = top_view_center[0] + cyl_r * math.cos(math.radians(135))
             attach_pt_y = top_view_center[1] + cyl_r * math.sin(math.radians(135))
             frame_loc_x, frame_loc_y = attach_pt_x - 40, attach_pt_y + 40
-            lisp_code += f'  (draw-gdt-frame (list {attach_pt_x} {attach_pt_y}) (list {frame_loc_x} {frame_loc_y}) "{symbol_str}" "{gdt["tolerance"]}" {datum_arg} "RIGHT")\n'
+            d.gdt(attach_pt_x, attach_pt_y, frame_loc_x, frame_loc_y, symbol_str, gdt["tolerance"], datum_refs, "RIGHT")
         elif gdt['attach_to'] == 'front_view_top_surface':
-            lisp_code += f'  (draw-gdt-frame (list {front_view_cx} {iy + cuboid_h}) (list {front_view_cx + 40} {iy + cuboid_h + 20}) "{symbol_str}" "{gdt["tolerance"]}" {datum_arg} "LEFT")\n'
+            d.gdt(front_view_cx, iy + cuboid_h, front_view_cx + 40, iy + cuboid_h + 20,
+                  symbol_str, gdt["tolerance"], datum_refs, "LEFT")
     for key, val in finish.items():
         if key == 'top_surface':
-            lisp_code += f'  (draw-roughness-symbol (list {ix + cuboid_l * 0.75} {iy + cuboid_h}) "{val[0]}" {val[2]} {val[1]})\n'
+            d.roughness(ix + cuboid_l * 0.75, iy + cuboid_h, val)
         elif key == 'hole_bottom' and draw_section:
-            lisp_code += f'  (draw-roughness-symbol (list {sec_view_cx} {iy + cyl_h}) "{val[0]}" {val[2]} {val[1]})\n'
+            d.roughness(sec_view_cx, iy + cyl_h, val)
         elif key == 'hole_wall' and draw_section:
-            lisp_code += f'  (draw-roughness-symbol (list {sec_view_cx - cyl_r} {iy + cyl_h / 2}) "{val[0]}" {val[2]} {val[1]})\n'
+            d.roughness(sec_view_cx - cyl_r, iy + cyl_h / 2, val)
     bom_start_x = (sec_view_sx + cuboid_w) if draw_section else (side_view_sx + cuboid_w)
-    bom_start_y = y_top_overall
-    lisp_code += "\n  ;; --- 4. Generate BOM and Parameter Tables ---\n"
-    lisp_code += _generate_lisp_for_bom_table(components, dim_opts, bom_start_x + spacing, 100, spacing)
+    d.view("4. Generate BOM and Parameter Tables")
+    d.bom_table(components, bom_start_x + spacing + spacing, 100)
     unified_params = {comp_name.title(): comp_data.get('parameters', {}) for comp_name, comp_data in components.items()}
     if 'parameters' in data and data['parameters']: unified_params.update(data['parameters'])
     param_table_start_x, param_table_start_y = ix, iy - spacing * 2.5
-    lisp_code += _generate_lisp_for_parameter_table(unified_params, dim_opts, param_table_start_x, param_table_start_y, 0)
-    lisp_code += get_lisp_footer("Cuboid-Cylinder Assembly (Annotation Fixed)")
-    return lisp_code
+    d.parameter_table(unified_params, param_table_start_x, param_table_start_y)
+    return d
+
+
+def generate_lisp_for_cuboid_cylinder_assembly(data: dict) -> str:
+    return _emit(build_cuboid_cylinder_assembly_drawing(data), data)
 
 
 # ==============================================================================
@@ -1000,8 +1074,31 @@ def generate_3d_lisp_for_socket_head_cap_screw(data: dict) -> str:
     return lisp_code
 
 
-def generate_lisp_for_socket_head_cap_screw(data: dict) -> str:
-    params = data['parameters']
+@functools.lru_cache(maxsize=None)
+def socket_profile(socket_width_across_flats, socket_countersink_diameter) -> tuple:
+    """
+    Size-dependent socket geometry, computed once per socket size: half widths across
+    flats/corners, countersink half width, inner edge offset, how far below the head top
+    the 30-degree countersink meets the flats/corners/inner edges (None when it does not),
+    and the heights of the 120-degree drill-point cone across flats and corners.
+    """
+    half_flats = socket_width_across_flats / 2.0
+    half_corners = half_flats / math.cos(math.radians(30))
+    countersink_half = socket_countersink_diameter / 2.0
+    inner_edge_offset = socket_width_across_flats / math.sqrt(3) / 2.0
+    countersink_angle_rad = math.radians(30)
+    drops = []
+    for half_width in (half_flats, half_corners, inner_edge_offset):
+        dx = countersink_half - half_width
+        drops.append(dx * math.tan(countersink_angle_rad) if dx > 0 else None)
+    drill_point_angle_rad = math.radians(60)
+    return (half_flats, half_corners, countersink_half, inner_edge_offset, *drops,
+            half_flats / math.tan(drill_point_angle_rad), half_corners / math.tan(drill_point_angle_rad))
+
+
+def build_socket_head_cap_screw_drawing(data: dict) -> Drawing:
+    # Defaults go into a copy; the caller's spec is never modified.
+    params = dict(data['parameters'])
     opts = data['drawing_options']
     layers, dim_opts = opts['layers'], opts['dimension_options']
     params.setdefault('thread_length', 18)
@@ -1026,11 +1123,9 @@ def generate_lisp_for_socket_head_cap_screw(data: dict) -> str:
     spacing = opts['spacing']
     head_radius = head_diameter / 2.0
     shaft_radius = shaft_diameter / 2.0
-    socket_half_width_flats = socket_width_across_flats / 2.0
-    socket_half_width_corners = socket_half_width_flats / math.cos(math.radians(30))
-    socket_countersink_half_width = socket_countersink_diameter / 2.0
-    side_length = socket_width_across_flats / math.sqrt(3)
-    socket_inner_edge_offset = side_length / 2.0
+    (socket_half_width_flats, socket_half_width_corners, socket_countersink_half_width, socket_inner_edge_offset,
+     drop_flats, drop_corners, drop_inner, cone_height_flats, cone_height_corners) = socket_profile(
+        socket_width_across_flats, socket_countersink_diameter)
 
     x_center = ix + head_radius
     y_shaft_bottom = iy
@@ -1046,111 +1141,182 @@ def generate_lisp_for_socket_head_cap_screw(data: dict) -> str:
     top_view_cy = y_head_top + spacing + head_radius
     total_height = head_height + shaft_length
 
-    countersink_angle_rad = math.radians(30)
-    dx_flats = socket_countersink_half_width - socket_half_width_flats
-    y_intersection_flats = y_head_top - (dx_flats * math.tan(countersink_angle_rad)) if dx_flats > 0 else y_head_top
-    dx_corners = socket_countersink_half_width - socket_half_width_corners
-    y_intersection_corners = y_head_top - (dx_corners * math.tan(countersink_angle_rad)) if dx_corners > 0 else y_head_top
-    dx_inner = socket_countersink_half_width - socket_inner_edge_offset
-    y_intersection_inner = y_head_top - (dx_inner * math.tan(countersink_angle_rad)) if dx_inner > 0 else y_head_top
-
-    drill_point_angle_rad = math.radians(60)
-    cone_height_flats = socket_half_width_flats / math.tan(drill_point_angle_rad)
+    y_intersection_flats = y_head_top - drop_flats if drop_flats is not None else y_head_top
+    y_intersection_corners = y_head_top - drop_corners if drop_corners is not None else y_head_top
+    y_intersection_inner = y_head_top - drop_inner if drop_inner is not None else y_head_top
     y_socket_tip_flats = y_socket_bottom - cone_height_flats
-    cone_height_corners = socket_half_width_corners / math.tan(drill_point_angle_rad)
     y_socket_tip_corners = y_socket_bottom - cone_height_corners
 
-    lisp_code = get_lisp_header(layers, dim_opts)
-    lisp_code += generate_lisp_utility_functions(layers, dim_opts)
+    d = Drawing("Socket Head Cap Screw", layers, dim_opts)
 
     def draw_view_outline(cx):
-        code = f'  (command "_.-LAYER" "_S" "{layers["outline"]["name"]}" "")\n'
-        code += f'  (command "_.LINE" (list {cx - head_radius} {y_head_top}) (list {cx + head_radius} {y_head_top}) "")\n'
-        code += f'  (command "_.LINE" (list {cx - head_radius} {y_head_top}) (list {cx - head_radius} {y_head_bottom}) "")\n'
-        code += f'  (command "_.LINE" (list {cx + head_radius} {y_head_top}) (list {cx + head_radius} {y_head_bottom}) "")\n'
-        code += f'  (command "_.LINE" (list {cx - head_radius} {y_head_bottom}) (list {cx - shaft_radius - fillet_radius} {y_head_bottom}) "")\n'
-        code += f'  (command "_.LINE" (list {cx + head_radius} {y_head_bottom}) (list {cx + shaft_radius + fillet_radius} {y_head_bottom}) "")\n'
-        code += f'  (command "_.LINE" (list {cx - shaft_radius} {y_shaft_bottom + end_chamfer_size}) (list {cx - shaft_radius} {y_fillet_start}) "")\n'
-        code += f'  (command "_.LINE" (list {cx + shaft_radius} {y_shaft_bottom + end_chamfer_size}) (list {cx + shaft_radius} {y_fillet_start}) "")\n'
-        code += f'  (command "_.LINE" (list {cx - shaft_radius} {y_shaft_bottom + end_chamfer_size}) (list {cx - (shaft_radius - end_chamfer_size)} {y_shaft_bottom}) "")\n'
-        code += f'  (command "_.LINE" (list {cx + shaft_radius} {y_shaft_bottom + end_chamfer_size}) (list {cx + (shaft_radius - end_chamfer_size)} {y_shaft_bottom}) "")\n'
-        code += f'  (command "_.LINE" (list {cx - (shaft_radius - end_chamfer_size)} {y_shaft_bottom}) (list {cx + (shaft_radius - end_chamfer_size)} {y_shaft_bottom}) "")\n'
-        code += f'  (command "_.ARC" "_C" (list {cx - shaft_radius - fillet_radius} {y_fillet_start}) (list {cx - shaft_radius} {y_fillet_start}) (list {cx - shaft_radius - fillet_radius} {y_head_bottom}))\n'
-        code += f'  (command "_.ARC" "_C" (list {cx + shaft_radius + fillet_radius} {y_fillet_start}) (list {cx + shaft_radius + fillet_radius} {y_head_bottom}) (list {cx + shaft_radius} {y_fillet_start}))\n'
-        code += f'  (command "_.LINE" (list {cx - (shaft_radius - end_chamfer_size)} {y_shaft_bottom}) (list {cx - (shaft_radius - end_chamfer_size)} {y_thread_end}) "")\n'
-        code += f'  (command "_.LINE" (list {cx + (shaft_radius - end_chamfer_size)} {y_shaft_bottom}) (list {cx + (shaft_radius - end_chamfer_size)} {y_thread_end}) "")\n'
-        code += f'  (command "_.LINE" (list {cx - shaft_radius} {y_shaft_bottom + end_chamfer_size}) (list {cx + shaft_radius} {y_shaft_bottom + end_chamfer_size}) "")\n'
-        return code
-
-    lisp_code += "\n  ;; --- Draw Front View ---\n"
-    lisp_code += draw_view_outline(x_center)
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["outline"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.LINE" (list {x_center - shaft_radius} {y_head_bottom}) (list {x_center + shaft_radius} {y_head_bottom}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {x_center - shaft_radius} {y_thread_end}) (list {x_center + shaft_radius} {y_thread_end}) "")\n'
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["hidden"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.LINE" (list {x_center - socket_half_width_flats} {y_socket_bottom}) (list {x_center} {y_socket_tip_flats}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {x_center} {y_socket_tip_flats}) (list {x_center + socket_half_width_flats} {y_socket_bottom}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {x_center - socket_half_width_flats} {y_socket_bottom}) (list {x_center - socket_half_width_flats} {y_intersection_flats}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {x_center - socket_half_width_flats} {y_intersection_flats}) (list {x_center - socket_countersink_half_width} {y_head_top}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {x_center + socket_half_width_flats} {y_socket_bottom}) (list {x_center + socket_half_width_flats} {y_intersection_flats}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {x_center + socket_half_width_flats} {y_intersection_flats}) (list {x_center + socket_countersink_half_width} {y_head_top}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {x_center - socket_inner_edge_offset} {y_socket_bottom}) (list {x_center - socket_inner_edge_offset} {y_intersection_inner}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {x_center + socket_inner_edge_offset} {y_socket_bottom}) (list {x_center + socket_inner_edge_offset} {y_intersection_inner}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {x_center - socket_half_width_flats} {y_socket_bottom}) (list {x_center + socket_half_width_flats} {y_socket_bottom}) "")\n'
-    lisp_code += "\n  ;; --- Draw Right View ---\n"
-    lisp_code += draw_view_outline(right_view_cx)
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["outline"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_view_cx - shaft_radius} {y_head_bottom}) (list {right_view_cx + shaft_radius} {y_head_bottom}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_view_cx - shaft_radius} {y_thread_end}) (list {right_view_cx + shaft_radius} {y_thread_end}) "")\n'
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["hidden"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_view_cx - socket_half_width_corners} {y_socket_bottom}) (list {right_view_cx} {y_socket_tip_corners}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_view_cx} {y_socket_tip_corners}) (list {right_view_cx + socket_half_width_corners} {y_socket_bottom}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_view_cx - socket_half_width_corners} {y_socket_bottom}) (list {right_view_cx - socket_half_width_corners} {y_intersection_corners}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_view_cx - socket_half_width_corners} {y_intersection_corners}) (list {right_view_cx - socket_countersink_half_width} {y_head_top}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_view_cx + socket_half_width_corners} {y_socket_bottom}) (list {right_view_cx + socket_half_width_corners} {y_intersection_corners}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_view_cx + socket_half_width_corners} {y_intersection_corners}) (list {right_view_cx + socket_countersink_half_width} {y_head_top}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_view_cx} {y_socket_bottom}) (list {right_view_cx} {y_intersection_flats}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_view_cx - socket_half_width_corners} {y_socket_bottom}) (list {right_view_cx + socket_half_width_corners} {y_socket_bottom}) "")\n'
-    lisp_code += "\n  ;; --- Draw Top View ---\n"
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["outline"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.CIRCLE" (list {top_view_cx} {top_view_cy}) {head_radius})\n'
-    lisp_code += f'  (command "_.POLYGON" 6 (list {top_view_cx} {top_view_cy}) "_I" {socket_half_width_flats})\n'
-    lisp_code += f'  (command "_.CIRCLE" (list {top_view_cx} {top_view_cy}) {socket_countersink_half_width})\n'
-    p_start = f'(polar (list {top_view_cx} {top_view_cy}) (dtr 135) {shaft_radius - thread_depth})'
-    p_end = f'(polar (list {top_view_cx} {top_view_cy}) (dtr 45) {shaft_radius - thread_depth})'
-    lisp_code += f'  (command "_.ARC" "_C" (list {top_view_cx} {top_view_cy}) {p_start} {p_end})\n'
-
-    lisp_code += "\n  ;; --- Draw Centerlines ---\n"
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["centerline"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.LINE" (list {x_center} {iy - 20}) (list {x_center} {top_view_cy + head_radius + 20}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {right_view_cx} {iy - 20}) (list {right_view_cx} {y_head_top + 20}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {x_center - head_radius - 20} {top_view_cy}) (list {x_center + head_radius + 20} {top_view_cy}) "")\n'
-    lisp_code += f'  (command "_.LINE" (list {ix - 20} {iy + shaft_length / 2}) (list {right_view_cx + head_radius + 20} {iy + shaft_length / 2}) "")\n'
-    lisp_code += "\n  ;; --- Dimensions ---\n"
-    lisp_code += f'  (command "_.-LAYER" "_S" "{layers["dimensions"]["name"]}" "")\n'
-    lisp_code += f'  (command "_.DIMLINEAR" (list {x_center - head_radius} {y_shaft_bottom}) (list {x_center - head_radius} {y_head_top}) (list {ix - spacing} {iy + total_height / 2}))\n'
-    lisp_code += f'  (command "_.DIMLINEAR" (list {x_center + head_radius} {y_head_bottom}) (list {x_center + head_radius} {y_head_top}) (list {x_center + head_radius + spacing / 2} {y_head_bottom + head_height / 2}))\n'
-    lisp_code += f'  (command "_.DIMDIAMETER" "" (list {x_center - shaft_radius * 0.707} {y_head_bottom - 10}) (list {x_center - shaft_radius - spacing} {y_head_bottom - 10}))\n'
-    lisp_code += f'  (command "_.DIMDIAMETER" "" (list {top_view_cx - head_radius * 0.707} {top_view_cy + head_radius * 0.707}) (list {top_view_cx - head_radius - spacing} {top_view_cy + head_radius + spacing}))\n'
-    lisp_code += f'  (command "_.DIMLINEAR" (list {top_view_cx - socket_half_width_flats} {top_view_cy}) (list {top_view_cx + socket_half_width_flats} {top_view_cy}) (list {top_view_cx} {top_view_cy - head_radius - spacing}))\n'
-    lisp_code += f'  (command "_.DIMLINEAR" (list {x_center + shaft_radius} {y_shaft_bottom}) (list {x_center + shaft_radius} {y_thread_end}) (list {x_center + shaft_radius + spacing} {y_shaft_bottom + thread_length / 2}))\n'
-    lisp_code += "\n  ;; --- Advanced Annotations (Example) ---\n"
+        d.line('outline', cx - head_radius, y_head_top, cx + head_radius, y_head_top)
+        d.line('outline', cx - head_radius, y_head_top, cx - head_radius, y_head_bottom)
+        d.line('outline', cx + head_radius, y_head_top, cx + head_radius, y_head_bottom)
+        d.line('outline', cx - head_radius, y_head_bottom, cx - shaft_radius - fillet_radius, y_head_bottom)
+        d.line('outline', cx + head_radius, y_head_bottom, cx + shaft_radius + fillet_radius, y_head_bottom)
+        d.line('outline', cx - shaft_radius, y_shaft_bottom + end_chamfer_size, cx - shaft_radius, y_fillet_start)
+        d.line('outline', cx + shaft_radius, y_shaft_bottom + end_chamfer_size, cx + shaft_radius, y_fillet_start)
+        d.line('outline', cx - shaft_radius, y_shaft_bottom + end_chamfer_size, cx - (shaft_radius - end_chamfer_size), y_shaft_bottom)
+        d.line('outline', cx + shaft_radius, y_shaft_bottom + end_chamfer_size, cx + (shaft_radius - end_chamfer_size), y_shaft_bottom)
+        d.line('outline', cx - (shaft_radius - end_chamfer_size), y_shaft_bottom, cx + (shaft_radius - end_chamfer_size), y_shaft_bottom)
+        d.arc('outline', cx - shaft_radius - fillet_radius, y_fillet_start,
+              cx - shaft_radius, y_fillet_start, cx - shaft_radius - fillet_radius, y_head_bottom)
+        d.arc('outline', cx + shaft_radius + fillet_radius, y_fillet_start,
+              cx + shaft_radius + fillet_radius, y_head_bottom, cx + shaft_radius, y_fillet_start)
+        d.line('outline', cx - (shaft_radius - end_chamfer_size), y_shaft_bottom, cx - (shaft_radius - end_chamfer_size), y_thread_end)
+        d.line('outline', cx + (shaft_radius - end_chamfer_size), y_shaft_bottom, cx + (shaft_radius - end_chamfer_size), y_thread_end)
+        d.line('outline', cx - shaft_radius, y_shaft_bottom + end_chamfer_size, cx + shaft_radius, y_shaft_bottom + end_chamfer_size)
+
+    d.view("Draw Front View")
+    draw_view_outline(x_center)
+    d.line('outline', x_center - shaft_radius, y_head_bottom, x_center + shaft_radius, y_head_bottom)
+    d.line('outline', x_center - shaft_radius, y_thread_end, x_center + shaft_radius, y_thread_end)
+    d.line('hidden', x_center - socket_half_width_flats, y_socket_bottom, x_center, y_socket_tip_flats)
+    d.line('hidden', x_center, y_socket_tip_flats, x_center + socket_half_width_flats, y_socket_bottom)
+    d.line('hidden', x_center - socket_half_width_flats, y_socket_bottom, x_center - socket_half_width_flats, y_intersection_flats)
+    d.line('hidden', x_center - socket_half_width_flats, y_intersection_flats, x_center - socket_countersink_half_width, y_head_top)
+    d.line('hidden', x_center + socket_half_width_flats, y_socket_bottom, x_center + socket_half_width_flats, y_intersection_flats)
+    d.line('hidden', x_center + socket_half_width_flats, y_intersection_flats, x_center + socket_countersink_half_width, y_head_top)
+    d.line('hidden', x_center - socket_inner_edge_offset, y_socket_bottom, x_center - socket_inner_edge_offset, y_intersection_inner)
+    d.line('hidden', x_center + socket_inner_edge_offset, y_socket_bottom, x_center + socket_inner_edge_offset, y_intersection_inner)
+    d.line('hidden', x_center - socket_half_width_flats, y_socket_bottom, x_center + socket_half_width_flats, y_socket_bottom)
+    d.view("Draw Right View")
+    draw_view_outline(right_view_cx)
+    d.line('outline', right_view_cx - shaft_radius, y_head_bottom, right_view_cx + shaft_radius, y_head_bottom)
+    d.line('outline', right_view_cx - shaft_radius, y_thread_end, right_view_cx + shaft_radius, y_thread_end)
+    d.line('hidden', right_view_cx - socket_half_width_corners, y_socket_bottom, right_view_cx, y_socket_tip_corners)
+    d.line('hidden', right_view_cx, y_socket_tip_corners, right_view_cx + socket_half_width_corners, y_socket_bottom)
+    d.line('hidden', right_view_cx - socket_half_width_corners, y_socket_bottom, right_view_cx - socket_half_width_corners, y_intersection_corners)
+    d.line('hidden', right_view_cx - socket_half_width_corners, y_intersection_corners, right_view_cx - socket_countersink_half_width, y_head_top)
+    d.line('hidden', right_view_cx + socket_half_width_corners, y_socket_bottom, right_view_cx + socket_half_width_corners, y_intersection_corners)
+    d.line('hidden', right_view_cx + socket_half_width_corners, y_intersection_corners, right_view_cx + socket_countersink_half_width, y_head_top)
+    d.line('hidden', right_view_cx, y_socket_bottom, right_view_cx, y_intersection_flats)
+    d.line('hidden', right_view_cx - socket_half_width_corners, y_socket_bottom, right_view_cx + socket_half_width_corners, y_socket_bottom)
+    d.view("Draw Top View")
+    d.circle('outline', top_view_cx, top_view_cy, head_radius)
+    d.polygon('outline', top_view_cx, top_view_cy, 6, socket_half_width_flats)
+    d.circle('outline', top_view_cx, top_view_cy, socket_countersink_half_width)
+    thread_root_radius = shaft_radius - thread_depth
+    d.arc('outline', top_view_cx, top_view_cy,
+          top_view_cx + thread_root_radius * math.cos(math.radians(135)),
+          top_view_cy + thread_root_radius * math.sin(math.radians(135)),
+          top_view_cx + thread_root_radius * math.cos(math.radians(45)),
+          top_view_cy + thread_root_radius * math.sin(math.radians(45)))
+
+    d.view("Draw Centerlines")
+    d.line('centerline', x_center, iy - 20, x_center, top_view_cy + head_radius + 20)
+    d.line('centerline', right_view_cx, iy - 20, right_view_cx, y_head_top + 20)
+    d.line('centerline', x_center - head_radius - 20, top_view_cy, x_center + head_radius + 20, top_view_cy)
+    d.line('centerline', ix - 20, iy + shaft_length / 2, right_view_cx + head_radius + 20, iy + shaft_length / 2)
+    d.view("Dimensions")
+    d.dim_linear(x_center - head_radius, y_shaft_bottom, x_center - head_radius, y_head_top, ix - spacing, iy + total_height / 2)
+    d.dim_linear(x_center + head_radius, y_head_bottom, x_center + head_radius, y_head_top,
+                 x_center + head_radius + spacing / 2, y_head_bottom + head_height / 2)
+    d.dim_diameter(x_center - shaft_radius * 0.707, y_head_bottom - 10, x_center - shaft_radius - spacing, y_head_bottom - 10,
+                   center=(x_center, y_head_bottom - 10), radius=shaft_radius)
+    d.dim_diameter(top_view_cx - head_radius * 0.707, top_view_cy + head_radius * 0.707,
+                   top_view_cx - head_radius - spacing, top_view_cy + head_radius + spacing,
+                   center=(top_view_cx, top_view_cy), radius=head_radius)
+    d.dim_linear(top_view_cx - socket_half_width_flats, top_view_cy, top_view_cx + socket_half_width_flats, top_view_cy,
+                 top_view_cx, top_view_cy - head_radius - spacing)
+    d.dim_linear(x_center + shaft_radius, y_shaft_bottom, x_center + shaft_radius, y_thread_end,
+                 x_center + shaft_radius + spacing, y_shaft_bottom + thread_length / 2)
+    d.view("Advanced Annotations (Example)")
     for datum in datums:
         if datum['attach_to'] == 'head_underside':
-            lisp_code += f'  (draw-datum-symbol (list {x_center + head_radius} {y_head_bottom}) (list {x_center + head_radius + spacing} {y_head_bottom}) "{datum["label"]}")\n'
+            d.datum(x_center + head_radius, y_head_bottom, x_center + head_radius + spacing, y_head_bottom, datum["label"])
 
+    d.view("Parameter Table")
     right_most_x = right_view_cx + head_radius
-    lisp_code += _generate_lisp_for_parameter_table(params, dim_opts, right_most_x, y_head_top, spacing)
-    lisp_code += get_lisp_footer("Socket Head Cap Screw")
-    return lisp_code
+    d.parameter_table(params, right_most_x + spacing, y_head_top)
+    return d
+
+
+def generate_lisp_for_socket_head_cap_screw(data: dict) -> str:
+    return _emit(build_socket_head_cap_screw_drawing(data), data)
+
+# ==============================================================================
+# Generator Registry
+# ==============================================================================
+shape_generators = {
+    'cylinder': generate_lisp_for_cylinder,
+    'hexagonal_nut': generate_lisp_for_hex_nut,
+    'hexagonal_prism': generate_lisp_for_hex_prism,
+    'hexagonal_screw': generate_lisp_for_hex_screw,
+    'cuboid': generate_lisp_for_cuboid,
+    'screw_nut_assembly': generate_lisp_for_screw_nut_assembly,
+    'cuboid_cylinder_assembly': generate_lisp_for_cuboid_cylinder_assembly,
+    'socket_head_cap_screw': generate_lisp_for_socket_head_cap_screw,
+    'screw_nut_assembly_3d': generate_3d_lisp_for_screw_nut_assembly,
+    'cuboid_cylinder_assembly_3d': generate_3d_lisp_for_cuboid_cylinder_assembly,
+    'hex_screw_3d': generate_3d_lisp_for_hex_screw,
+    'hex_nut_3d': generate_3d_lisp_for_hex_nut,
+    'cylinder_3d': generate_3d_lisp_for_cylinder,
+    'cuboid_3d': generate_3d_lisp_for_cuboid,
+    'hex_prism_3d': generate_3d_lisp_for_hex_prism,
+    'socket_head_cap_screw_3d': generate_3d_lisp_for_socket_head_cap_screw
+}
+
+# 2D shapes whose drawing is built as a drawing_ir.Drawing, for emitters other than LISP.
+drawing_builders = {
+    'cylinder': build_cylinder_drawing,
+    'hexagonal_nut': build_hex_nut_drawing,
+    'hexagonal_prism': build_hex_prism_drawing,
+    'hexagonal_screw': build_hex_screw_drawing,
+    'cuboid': build_cuboid_drawing,
+    'screw_nut_assembly': build_screw_nut_assembly_drawing,
+    'cuboid_cylinder_assembly': build_cuboid_cylinder_assembly_drawing,
+    'socket_head_cap_screw': build_socket_head_cap_screw_drawing
+}
+
+# Maps the 'shape' key of a 2D spec to the generator of its 3D solid model.
+SOLID_SHAPE_MAP = {
+    'cylinder': 'cylinder_3d',
+    'hexagonal_nut': 'hex_nut_3d',
+    'hexagonal_prism': 'hex_prism_3d',
+    'hexagonal_screw': 'hex_screw_3d',
+    'cuboid': 'cuboid_3d',
+    'screw_nut_assembly': 'screw_nut_assembly_3d',
+    'cuboid_cylinder_assembly': 'cuboid_cylinder_assembly_3d',
+    'socket_head_cap_screw': 'socket_head_cap_screw_3d'
+}
+
+# ==============================================================================
+# Memoized Generation
+# ==============================================================================
+# Generators never modify their spec, so one spec always yields the same program
+# and repeated requests (menu re-runs, duplicate batch specs, threads sharing a
+# parsed spec) are answered from the cache.
+_generation_cache = GenerationCache()
+
+
+def generate(shape_type: str, data: dict, use_cache: bool = True) -> str:
+    """Generates the LISP program for shape_type through the registry, memoized on the spec's hash."""
+    generator_func = shape_generators.get(shape_type)
+    if not generator_func:
+        raise TypeError(f"No generator function found for shape '{shape_type}'.")
+    if not use_cache:
+        return generator_func(data)
+    return _generation_cache.get_or_generate(shape_type, data, generator_func)
+
 
 # ==============================================================================
 # Main Program Entry Point
 # ==============================================================================
 if __name__ == "__main__":
+    if len(sys.argv) > 1 and sys.argv[1] == '--batch':
+        from batch_build import main as batch_main
+        sys.exit(batch_main(sys.argv[2:]))
+    if len(sys.argv) > 1 and sys.argv[1] == '--family':
+        from family_sweep import main as family_main
+        sys.exit(family_main(sys.argv[2:]))
+
+    load_environment()
     API_KEY = os.getenv("OPENAI_API_KEY")
     API_BASE_URL = os.getenv("OPENAI_API_BASE_URL")
     MODEL_NAME = os.getenv("AI_MODEL_NAME", "gemini-1.5-flash-latest")
+    VALIDATION_CACHE_DIR_NAME = ".validation_cache"
     SHAPE_TO_FILE_MAP = {
         '1': 'cylinder_data.json',
         '2': 'hex_nut_data.json',
@@ -1170,30 +1336,11 @@ if __name__ == "__main__":
         '16': 'socket_head_cap_screw_data.json'
     }
 
-    shape_generators = {
-        'cylinder': generate_lisp_for_cylinder,
-        'hexagonal_nut': generate_lisp_for_hex_nut,
-        'hexagonal_prism': generate_lisp_for_hex_prism,
-        'hexagonal_screw': generate_lisp_for_hex_screw,
-        'cuboid': generate_lisp_for_cuboid,
-        'screw_nut_assembly': generate_lisp_for_screw_nut_assembly,
-        'cuboid_cylinder_assembly': generate_lisp_for_cuboid_cylinder_assembly,
-        'socket_head_cap_screw': generate_lisp_for_socket_head_cap_screw,
-        'screw_nut_assembly_3d': generate_3d_lisp_for_screw_nut_assembly,
-        'cuboid_cylinder_assembly_3d': generate_3d_lisp_for_cuboid_cylinder_assembly,
-        'hex_screw_3d': generate_3d_lisp_for_hex_screw,
-        'hex_nut_3d': generate_3d_lisp_for_hex_nut,
-        'cylinder_3d': generate_3d_lisp_for_cylinder,
-        'cuboid_3d': generate_3d_lisp_for_cuboid,
-        'hex_prism_3d': generate_3d_lisp_for_hex_prism,
-        'socket_head_cap_screw_3d': generate_3d_lisp_for_socket_head_cap_screw
-    }
-
-    for fname in set(SHAPE_TO_FILE_MAP.values()):
-        if not os.path.exists(fname):
-            with open(fname, 'w', encoding='utf-8') as f:
-                f.write('{"shape": "unknown"}')
-            print(f"Warning: '{fname}' does not exist, it has been created automatically. Please fill this file with the correct data.")
+    if len(sys.argv) > 1 and sys.argv[1] == '--init':
+        for fname in init_spec_files(SHAPE_TO_FILE_MAP.values()):
+            print(f"'{fname}' has been created. Please fill this file with the correct data.")
+        print("All spec files are in place.")
+        sys.exit(0)
 
     try:
         menu_prompt = textwrap.dedent("""
@@ -1224,9 +1371,16 @@ if __name__ == "__main__":
         if not input_json_file:
             raise ValueError(f"Invalid choice '{user_choice}'. Please enter a number between 1 and 16.")
 
+        if not os.path.exists(input_json_file):
+            raise FileNotFoundError(f"'{input_json_file}' does not exist. "
+                                    f"Run 'python lisp_generator.py --init' to create placeholder spec files.")
         with open(input_json_file, "r", encoding="utf-8") as f:
             drawing_data = json.load(f)
         print(f"Successfully loaded data from '{input_json_file}'.")
+        if drawing_data.get('designation'):
+            from fastener_catalog import expand_spec
+            drawing_data = expand_spec(drawing_data)
+            print(f"Parameters filled in from the standard parts catalog for '{drawing_data['designation']}'.")
 
         shape_type_mapping = {
             '8': 'screw_nut_assembly_3d',
@@ -1269,17 +1423,17 @@ if __name__ == "__main__":
                 else:
                     print("  [Error] Invalid format. Please use 'key:value' format.")
 
-        generator_func = shape_generators.get(shape_type)
-        if not generator_func:
-            raise TypeError(f"No generator function found for shape '{shape_type}'.")
-
-        lisp_output = generator_func(drawing_data)
+        lisp_output = generate(shape_type, drawing_data)
         
-        if VALIDATOR_AVAILABLE and API_KEY:
+        validator_classes = load_llm_validator() if API_KEY else None
+        if validator_classes:
+            LLMValidator, ValidationCache = validator_classes
             llm_validator = LLMValidator(
                 api_key=API_KEY,
                 base_url=API_BASE_URL,
-                model_name=MODEL_NAME
+                model_name=MODEL_NAME,
+                cache=ValidationCache(os.path.join(current_dir, VALIDATION_CACHE_DIR_NAME)),
+                stream=True
             )
             is_valid_by_llm = llm_validator.validate(lisp_output, drawing_data)
 
@@ -1288,8 +1442,19 @@ if __name__ == "__main__":
                 if proceed.lower() != 'y':
                     print("Operation canceled.")
                     sys.exit(1)
-        elif not API_KEY:
-            print("\n[INFO] OPENAI_API_KEY environment variable not found or not set. Skipping LLM validation.")
+        else:
+            if not API_KEY:
+                print("\n[INFO] OPENAI_API_KEY environment variable not found or not set. Skipping LLM validation.")
+            from static_validator import StaticValidator
+            static_validator = StaticValidator()
+            is_valid_locally = static_validator.validate(lisp_output, drawing_data)
+            static_validator.print_report()
+
+            if not is_valid_locally:
+                proceed = input("Local static checks found critical errors. Do you still want to generate the .lsp file? (y/n): ")
+                if proceed.lower() != 'y':
+                    print("Operation canceled.")
+                    sys.exit(1)
 
         output_lisp_file = "draw_object.lsp"
         with open(output_lisp_file, "w", encoding="utf-8") as f:
@@ -0,0 +1,196 @@
+"""
+Shared AutoLISP runtime for the generated drawings.
+
+The annotation and table helpers (dtr, draw-roughness-symbol,
+draw-datum-symbol, draw-gdt-frame, Draw-Parameter-Table, Draw-Bom-Table,
+Draw-Balloon) live in one versioned runtime module instead of being re-emitted
+into every drawing. A drawing either embeds the runtime ('inline', a
+self-contained file) or carries only a guarded loader ('shared'), so the
+runtime is loaded once per AutoCAD session no matter how many drawings run.
+
+The helpers are parameterized through globals that each drawing sets before
+it draws: *daedalus-annot-layer*, *daedalus-text-height* and
+*daedalus-entmake* (create entities with entmake instead of command calls).
+
+The tagging helpers (dm-mark, dm-tag) attach the DAEDALUS XDATA that
+identifies an entity; the update helpers (dm-tag-index, dm-erase, dm-patch)
+find tagged entities again and erase or modify them in place.
+"""
+import functools
+import os
+
+RUNTIME_VERSION = 2
+RUNTIME_FILE_NAME = "daedalus_runtime.lsp"
+RUNTIME_MODES = ('inline', 'shared')
+TAG_APP_NAME = "DAEDALUS"
+
+_RUNTIME_SOURCE = """\
+;; =============================================================================
+;; == CAD-Daedalus LISP runtime, version {version} (generated by lisp_runtime.py)
+;; == Drawings set *daedalus-annot-layer*, *daedalus-text-height* and
+;; == *daedalus-entmake* before calling the helpers below.
+;; =============================================================================
+(setq *daedalus-runtime-version* {version})
+(defun dtr (a) (* pi (/ a 180.0)))
+
+;; --- Primitives: entmake when *daedalus-entmake* is set, command calls otherwise ---
+(defun dm-use-layer (lay) (if (/= (strcase (getvar "CLAYER")) (strcase lay)) (setvar "CLAYER" lay)))
+(defun dm-layer (name color ltype / ent)
+  (if (setq ent (tblobjname "LAYER" name))
+    (progn (setq ent (entget ent)) (entmod (subst (cons 62 color) (assoc 62 ent) (subst (cons 6 ltype) (assoc 6 ent) ent))))
+    (entmake (list '(0 . "LAYER") '(100 . "AcDbSymbolTableRecord") '(100 . "AcDbLayerTableRecord") (cons 2 name) '(70 . 0) (cons 62 color) (cons 6 ltype)))))
+(defun dm-line (lay p1 p2)
+  (if *daedalus-entmake*
+    (entmake (list '(0 . "LINE") (cons 8 lay) (cons 10 p1) (cons 11 p2)))
+    (progn (dm-use-layer lay) (command "_.LINE" p1 p2 ""))))
+(defun dm-pline (lay pts closed)
+  (if *daedalus-entmake*
+    (entmake (append (list '(0 . "LWPOLYLINE") '(100 . "AcDbEntity") (cons 8 lay) '(100 . "AcDbPolyline") (cons 90 (length pts)) (cons 70 (if closed 1 0)))
+                     (mapcar '(lambda (p) (cons 10 p)) pts)))
+    (progn (dm-use-layer lay) (command "_.PLINE") (foreach p pts (command p)) (command (if closed "_C" "")))))
+(defun dm-rect (lay p1 p2)
+  (if *daedalus-entmake*
+    (dm-pline lay (list p1 (list (car p2) (cadr p1)) p2 (list (car p1) (cadr p2))) T)
+    (progn (dm-use-layer lay) (command "_.RECTANG" p1 p2))))
+(defun dm-circle (lay c r)
+  (if *daedalus-entmake*
+    (entmake (list '(0 . "CIRCLE") (cons 8 lay) (cons 10 c) (cons 40 r)))
+    (progn (dm-use-layer lay) (command "_.CIRCLE" c r))))
+(defun dm-text (lay pt h rot str mid)
+  (if *daedalus-entmake*
+    (entmake (list '(0 . "TEXT") (cons 8 lay) (cons 10 pt) (cons 11 pt) (cons 40 h) (cons 50 (dtr rot)) (cons 1 str)
+                   (cons 7 (getvar "TEXTSTYLE")) (cons 72 (if mid 1 0)) (cons 73 (if mid 2 0))))
+    (progn (dm-use-layer lay) (command "_.TEXT" "_J" (if mid "_MC" "_BL") pt h rot str))))
+(defun dm-leader (lay p1 p2)
+  (if *daedalus-entmake*
+    (entmake (list '(0 . "LEADER") '(100 . "AcDbEntity") (cons 8 lay) '(100 . "AcDbLeader") (cons 3 (getvar "DIMSTYLE"))
+                   '(71 . 1) '(72 . 0) '(73 . 3) '(76 . 2) (cons 10 p1) (cons 10 p2)))
+    (progn (dm-use-layer lay) (command "_.LEADER" p1 p2 "" "" "_N"))))
+
+;; --- Entity tags: XDATA (1000 component) (1000 view) (1000 feature) under {app} ---
+(defun dm-mark () (setq *daedalus-mark* (entlast)))
+(defun dm-tag (comp view feats / e)
+  (setq e (if *daedalus-mark* (entnext *daedalus-mark*) (entnext)))
+  (while e
+    (entmod (append (entget e) (list (list -3 (list "{app}" (cons 1000 comp) (cons 1000 view) (cons 1000 (car feats)))))))
+    (if (cdr feats) (setq feats (cdr feats)))
+    (setq *daedalus-mark* e e (entnext e))))
+(defun dm-tag-index (/ ss i e x idx)
+  (if (setq ss (ssget "_X" '((-3 ("{app}")))))
+    (repeat (setq i (sslength ss))
+      (setq e (ssname ss (setq i (1- i))) x (cdr (cadr (assoc -3 (entget e '("{app}"))))))
+      (setq idx (cons (cons (strcat (cdr (nth 0 x)) "|" (cdr (nth 1 x)) "|" (cdr (nth 2 x))) e) idx))))
+  idx)
+(defun dm-tagged (key / out)
+  (foreach p *daedalus-index* (if (= (car p) key) (setq out (cons (cdr p) out))))
+  out)
+(defun dm-erase (key) (foreach e (dm-tagged key) (entdel e)))
+(defun dm-drop-first (x lst)
+  (if (or (null lst) (eq x (car lst))) (cdr lst) (cons (car lst) (dm-drop-first x (cdr lst)))))
+(defun dm-patch (key new / e out hit)
+  ;; The n-th group of each DXF code is replaced by the n-th one of that code in `new`;
+  ;; handles, type, subclass markers and the dimension style are kept.
+  (if (setq e (car (dm-tagged key)))
+    (progn
+      (foreach g (entget e)
+        (if (and (not (member (car g) '(-1 0 3 5 100 330))) (setq hit (assoc (car g) new)))
+          (setq out (cons hit out) new (dm-drop-first hit new))
+          (setq out (cons g out))))
+      (entmod (reverse out))
+      (entupd e))))
+
+;; --- Annotation helpers ---
+(defun draw-roughness-symbol (ins_pt text_val sym_size rotation / lay p2 p3 text_height)
+  (setq lay *daedalus-annot-layer* text_height (* sym_size 0.4))
+  (setq p2 (polar ins_pt (dtr (+ rotation 60.0)) sym_size))
+  (setq p3 (polar p2 (dtr (+ rotation 120.0)) sym_size))
+  (dm-pline lay (list ins_pt p2 p3) nil)
+  (dm-line lay p3 (polar p3 (dtr rotation) (* sym_size 1.5)))
+  (dm-text lay (polar p2 (dtr (+ rotation 90)) (* text_height 0.4)) text_height rotation text_val nil))
+(defun draw-datum-symbol (attach_pt label_pt label / lay th)
+  (setq lay *daedalus-annot-layer* th *daedalus-text-height*)
+  (dm-leader lay attach_pt label_pt)
+  (dm-rect lay (list (- (car label_pt) th) (- (cadr label_pt) th)) (list (+ (car label_pt) th) (+ (cadr label_pt) th)))
+  (dm-text lay label_pt th 0 (strcat "-" label "-") T))
+(defun draw-gdt-frame (attach_pt frame_loc gdt_sym tolerance datums leader_side / lay th box_w box_h x y0 mid_y total_width)
+  (setq lay *daedalus-annot-layer* th *daedalus-text-height*)
+  (setq box_w (* th 2.5) box_h (* th 2.0) x (car frame_loc) y0 (cadr frame_loc) mid_y (+ y0 (/ box_h 2.0)))
+  (setq total_width (+ box_w (* box_w 2) (* (length datums) box_w)))
+  (dm-leader lay attach_pt (if (or (not leader_side) (= (strcase leader_side) "LEFT")) (list x mid_y) (list (+ x total_width) mid_y)))
+  (dm-rect lay (list x y0) (list (+ x box_w) (+ y0 box_h)))
+  (dm-text lay (list (+ x (/ box_w 2.0)) mid_y) th 0 gdt_sym T)
+  (setq x (+ x box_w))
+  (dm-rect lay (list x y0) (list (+ x (* box_w 2)) (+ y0 box_h)))
+  (dm-text lay (list (+ x box_w) mid_y) th 0 tolerance T)
+  (setq x (+ x (* box_w 2)))
+  (foreach datum datums
+    (dm-rect lay (list x y0) (list (+ x box_w) (+ y0 box_h)))
+    (dm-text lay (list (+ x (/ box_w 2.0)) mid_y) th 0 datum T)
+    (setq x (+ x box_w))))
+(defun Draw-Balloon (center_pt radius text_val text_height)
+  (dm-circle *daedalus-annot-layer* center_pt radius)
+  (dm-text *daedalus-annot-layer* center_pt text_height 0 text_val T))
+
+;; --- Tables ---
+(defun dm-table (start_pt title data_list col_widths row_height text_height full_dividers / lay header_height total_height total_width x0 y0 x current_y text_mid_y i)
+  (setq lay "Parameter_Table")
+  (if data_list
+    (progn
+      (setq header_height (* row_height 1.5))
+      (setq total_height (+ header_height (* (length data_list) row_height)))
+      (setq total_width (apply '+ col_widths))
+      (setq x0 (car start_pt) y0 (cadr start_pt))
+      (dm-rect lay start_pt (list (+ x0 total_width) (- y0 total_height)))
+      (dm-line lay (list x0 (- y0 header_height)) (list (+ x0 total_width) (- y0 header_height)))
+      (setq x x0)
+      (foreach w (reverse (cdr (reverse col_widths)))
+        (setq x (+ x w))
+        (dm-line lay (list x (if full_dividers y0 (- y0 header_height))) (list x (- y0 total_height))))
+      (dm-text lay (list (+ x0 (/ total_width 2.0)) (- y0 (/ header_height 2.0))) (* text_height 1.2) 0 title T)
+      (setq current_y (- y0 header_height) i 0)
+      (foreach row_data data_list
+        (setq text_mid_y (- current_y (/ row_height 2.0)) x x0)
+        (mapcar '(lambda (item w) (dm-text lay (list (+ x (/ w 2.0)) text_mid_y) text_height 0 (vl-princ-to-string item) T) (setq x (+ x w)))
+                row_data col_widths)
+        (setq current_y (- current_y row_height) i (1+ i))
+        (if (< i (length data_list)) (dm-line lay (list x0 current_y) (list (+ x0 total_width) current_y))))))
+  (princ))
+(defun Draw-Parameter-Table (start_pt title data_list col_widths row_height text_height)
+  (dm-table start_pt title data_list col_widths row_height text_height nil))
+(defun Draw-Bom-Table (start_pt title data_list col_widths row_height text_height)
+  (dm-table start_pt title data_list col_widths row_height text_height T))
+(princ)
+"""
+
+
+@functools.lru_cache(maxsize=None)
+def get_runtime_source() -> str:
+    """Returns the runtime module text; it does not depend on the drawing, so it is built once."""
+    return _RUNTIME_SOURCE.format(version=RUNTIME_VERSION, app=TAG_APP_NAME)
+
+
+def get_runtime_loader() -> str:
+    """Top-level statement that loads the shared runtime unless this session already has the current version."""
+    return (f'(if (or (not draw-gdt-frame) (/= *daedalus-runtime-version* {RUNTIME_VERSION}))\n'
+            f'  (if (= (load "{RUNTIME_FILE_NAME}" "failed") "failed")\n'
+            f'    (princ "\\n[ERROR] {RUNTIME_FILE_NAME} (v{RUNTIME_VERSION}) was not found on the support path.")))\n')
+
+
+def get_runtime_prelude(runtime: str) -> str:
+    """What a drawing carries of the runtime: the whole module ('inline') or only its loader ('shared')."""
+    if runtime not in RUNTIME_MODES:
+        raise ValueError(f"Unknown runtime mode '{runtime}'. Expected one of: {', '.join(RUNTIME_MODES)}.")
+    return get_runtime_source() if runtime == 'inline' else get_runtime_loader()
+
+
+def write_runtime(directory: str) -> str:
+    """Writes the runtime module into `directory` (skipped when an identical copy is there) and returns its path."""
+    path = os.path.join(directory, RUNTIME_FILE_NAME)
+    source = get_runtime_source()
+    if os.path.exists(path):
+        with open(path, 'r', encoding='utf-8') as f:
+            if f.read() == source:
+                return path
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write(source)
+    return path
@@ -4,19 +4,158 @@ import os
 import json
 from openai import OpenAI
 
+from static_validator import StaticValidator, RATING_PASS, RATING_WARN, RATING_FAIL
+from validation_cache import ValidationCache, validation_cache_key
+from prompt_compaction import DEFAULT_TOKEN_BUDGET, compact_json, compact_lisp, estimate_tokens
+from verdict_stream import StreamingVerdictParser, RATING_PATH, ERRORS_PATH, extract_json_text, verdict_from_json
+
+# Prompt模板版本：修改 build_prompt 或Prompt压缩规则时必须加1，使旧的缓存结论失效
+PROMPT_VERSION = 2
+
+# 评级从轻到重的顺序，用于合并本地检查与LLM的结论
+_RATING_SEVERITY = {RATING_PASS: 0, RATING_WARN: 1, RATING_FAIL: 2}
+
+SYSTEM_MESSAGE = "You are a helpful assistant designed to output JSON."
+LLM_TEMPERATURE = 0.2
+
+
+# Prompt中与具体图纸无关的部分。它固定不变地放在Prompt开头，使服务商的Prompt缓存可以命中。
+PROMPT_STATIC_PREFIX = """# 角色设定
+你是一位资深的AutoCAD LISP专家程序员，也是一位一丝不苟的质量保证工程师。
+你的任务是分析根据JSON规范生成的LISP代码，检查其正确性、逻辑错误以及是否符合工程常识。
+**你的所有回答都必须使用简体中文。**
+
+# 审查指令
+请严格按照以下清单检查文末给出的JSON规范和LISP代码，并用中文提供你的分析：
+
+1.  **语法检查:** LISP的语法是否基本正确？（例如：括号是否匹配，引号是否闭合等）。
+2.  **逻辑与参数验证:** LISP代码是否准确地实现了JSON中的参数？
+    - 检查关键尺寸（如半径、高度、长度等）是否与JSON中的值一致。
+    - 验证图层、插入点和其他选项是否与JSON规范匹配。
+3.  **工程常识检查:** 从工程角度看，这个图纸的设计是否合理？
+    - 是否存在不可能的几何形状（例如：孔比零件本身还大）？
+    - 装配体的零件是否能正确配合（例如：螺钉直径与螺母孔径是否匹配）？
+    - 标注（尺寸、基准等）的放置是否符合逻辑，是否指向了相关的特征？
+4.  **最佳实践与潜在问题:** 代码中是否存在某些部分，虽然语法正确，但可能在AutoCAD中导致问题或违反了编程最佳实践？（例如：使用了过时的命令，绘图方法效率低下等）。
+
+为节省篇幅，LISP代码已被压缩：经过验证的运行库（dtr、dm-*、draw-*、Draw-* 等辅助函数）被省略为一行说明，
+缩进被去掉，连续的同类语句可能被概括为"省略了 N 条类似的 ... 语句"。这些省略不是错误，请不要据此报告问题。
+
+# 输出格式要求
+你的回复**必须**是一个结构化的JSON对象。根对象应依次包含三个键: "overall_rating", "analysis", "raw_thought_process"。
+- "overall_rating": 一个字符串, 必须是 "通过", "通过但有警告", 或 "失败" 中的一个。
+- "analysis": 一个对象，包含三个字符串列表: "errors", "warnings", "suggestions"。
+  - "errors" (错误): 用于描述那些会导致脚本失败或画出完全错误图形的严重问题。
+  - "warnings" (警告): 用于描述那些可能导致结果不正确或违反工程常识的问题。
+  - "suggestions" (建议): 用于提出可以改进代码风格或实践的建议。
+- "raw_thought_process" (原始思考过程): 一个字符串，包含你进行分析时的逐步思考过程。
+
+**请确保你的整个输出是一个单一、完整、且严格合法的JSON对象。**
+"""
+
+_PROMPT_CONTEXT_TEMPLATE = """
+# 任务上下文
+## 1. 原始设计图纸 (JSON格式)
+```json
+{json_str}
+```
+
+## 2. 生成的LISP代码
+```lisp
+{lisp_code}
+```
+"""
+
+
+def build_prompt(lisp_code: str, json_data: dict, token_budget: int = DEFAULT_TOKEN_BUDGET) -> tuple:
+    """
+    构建审查Prompt：固定的指令前缀 + 紧凑JSON + 压缩后的LISP代码。
+    返回 (prompt, stats)，stats 记录压缩前后的Token数和预算。
+    """
+    json_str = compact_json(json_data)
+    fixed_tokens = estimate_tokens(PROMPT_STATIC_PREFIX + _PROMPT_CONTEXT_TEMPLATE.format(json_str=json_str, lisp_code=""))
+
+    def fits(code: str) -> bool:
+        return fixed_tokens + estimate_tokens(code) <= token_budget
+
+    prompt = PROMPT_STATIC_PREFIX + _PROMPT_CONTEXT_TEMPLATE.format(
+        json_str=json_str, lisp_code=compact_lisp(lisp_code, fits))
+    uncompacted = PROMPT_STATIC_PREFIX + _PROMPT_CONTEXT_TEMPLATE.format(
+        json_str=json.dumps(json_data, indent=2, ensure_ascii=False), lisp_code=lisp_code)
+    tokens_after = estimate_tokens(prompt)
+    stats = {
+        "tokens_before": estimate_tokens(uncompacted),
+        "tokens_after": tokens_after,
+        "token_budget": token_budget,
+        "within_budget": tokens_after <= token_budget,
+    }
+    return prompt, stats
+
+
+def construct_prompt(lisp_code: str, json_data: dict, token_budget: int = DEFAULT_TOKEN_BUDGET) -> str:
+    """【中文版】构建用于审查的详细Prompt。"""
+    return build_prompt(lisp_code, json_data, token_budget)[0]
+
+
+def print_prompt_stats(stats: dict):
+    """打印一次请求的Token压缩情况。"""
+    note = "" if stats["within_budget"] else "，仍超出预算"
+    print(f"Prompt Token: 压缩前约 {stats['tokens_before']}，压缩后约 {stats['tokens_after']}"
+          f"（预算 {stats['token_budget']}{note}）")
+
+
+def build_messages(prompt: str) -> list:
+    """一次审查请求的对话消息。"""
+    return [
+        {"role": "system", "content": SYSTEM_MESSAGE},
+        {"role": "user", "content": prompt}
+    ]
+
+
+def parse_verdict(response_content: str) -> dict:
+    """把LLM回复（可能包在 ```json 代码块中）解析为结论字典。"""
+    return verdict_from_json(json.loads(extract_json_text(response_content)))
+
+
+def chunk_text(chunk) -> str:
+    """流式响应中一个数据块携带的文本（可能为空）。"""
+    return (chunk.choices[0].delta.content or "") if chunk.choices else ""
+
+
+def merge_static_result(result: dict, static_validator: StaticValidator) -> dict:
+    """把本地检查的结论并入LLM结论，评级取两者中较严重的一个。"""
+    merged = {
+        "overall_rating": result.get("overall_rating") or "UNKNOWN",
+        "errors": [f"[本地] {item}" for item in static_validator.errors] + list(result.get("errors") or []),
+        "warnings": [f"[本地] {item}" for item in static_validator.warnings] + list(result.get("warnings") or []),
+        "suggestions": ([f"[本地] {item}" for item in static_validator.suggestions]
+                        + list(result.get("suggestions") or [])),
+    }
+    if (merged["overall_rating"] in _RATING_SEVERITY and
+            _RATING_SEVERITY[static_validator.overall_rating] > _RATING_SEVERITY[merged["overall_rating"]]):
+        merged["overall_rating"] = static_validator.overall_rating
+    return merged
+
 
 class LLMValidator:
     """
     使用兼容OpenAI API的LLM（可通过代理访问Gemini等）进行代码审查。
     """
 
-    def __init__(self, api_key: str, base_url: str, model_name: str):
+    def __init__(self, api_key: str, base_url: str, model_name: str, static_check: bool = True,
+                 cache: ValidationCache = None, token_budget: int = DEFAULT_TOKEN_BUDGET,
+                 stream: bool = False, early_abort: bool = True):
         """
         初始化LLM验证器。
 
         :param api_key: 你的API密钥。
         :param base_url: 你的API代理地址。
         :param model_name: 要使用的模型名称。
+        :param static_check: 是否先执行本地静态检查（本地判定失败时不再调用LLM）。
+        :param cache: 可选的验证结论缓存；相同的规范、代码、模型和Prompt版本直接复用结论。
+        :param token_budget: Prompt的Token预算，超出时概括连续的同类LISP语句。
+        :param stream: 是否流式接收结论（评级和错误一到达就显示）。
+        :param early_abort: 流式接收时，评级为"失败"且错误列表完整后立即取消请求。
         """
         if not api_key:
             raise ValueError("API Key不能为空。")
@@ -25,6 +164,13 @@ class LLMValidator:
 
         self.client = OpenAI(api_key=api_key, base_url=base_url)
         self.model_name = model_name
+        self.static_check = static_check
+        self.cache = cache
+        self.token_budget = token_budget
+        self.prompt_stats = None
+        self.stream = stream
+        self.early_abort = early_abort
+        self.aborted_early = False
         self.errors = []
         self.warnings = []
         self.suggestions = []
@@ -32,88 +178,61 @@ class LLMValidator:
 
     def _construct_prompt(self, lisp_code: str, json_data: dict) -> str:
         """【中文版】构建用于审查的详细Prompt。"""
+        return construct_prompt(lisp_code, json_data, self.token_budget)
 
-        json_str = json.dumps(json_data, indent=2, ensure_ascii=False)  # ensure_ascii=False 保证JSON中的中文正常显示
-
-        prompt = f"""
-        # 角色设定
-        你是一位资深的AutoCAD LISP专家程序员，也是一位一丝不苟的质量保证工程师。
-        你的任务是分析根据JSON规范生成的LISP代码，检查其正确性、逻辑错误以及是否符合工程常识。
-        **你的所有回答都必须使用简体中文。**
-
-        # 任务上下文
-        ## 1. 原始设计图纸 (JSON格式)
-        这是定义图纸的原始JSON输入：
-        ```json
-        {json_str}
-        ```
-
-        ## 2. 生成的LISP代码
-        这是根据上述JSON生成的LISP代码：
-        ```lisp
-        {lisp_code}
-        ```
-
-        # 审查指令
-        请严格按照以下清单进行检查，并用中文提供你的分析：
-
-        1.  **语法检查:** LISP的语法是否基本正确？（例如：括号是否匹配，引号是否闭合等）。
-        2.  **逻辑与参数验证:** LISP代码是否准确地实现了JSON中的参数？
-            - 检查关键尺寸（如半径、高度、长度等）是否与JSON中的值一致。
-            - 验证图层、插入点和其他选项是否与JSON规范匹配。
-        3.  **工程常识检查:** 从工程角度看，这个图纸的设计是否合理？
-            - 是否存在不可能的几何形状（例如：孔比零件本身还大）？
-            - 装配体的零件是否能正确配合（例如：螺钉直径与螺母孔径是否匹配）？
-            - 标注（尺寸、基准等）的放置是否符合逻辑，是否指向了相关的特征？
-        4.  **最佳实践与潜在问题:** 代码中是否存在某些部分，虽然语法正确，但可能在AutoCAD中导致问题或违反了编程最佳实践？（例如：使用了过时的命令，绘图方法效率低下等）。
-
-        # 输出格式要求
-        你的回复**必须**是一个结构化的JSON对象。根对象应包含三个键: "overall_rating", "analysis", "raw_thought_process"。
-        - "overall_rating": 一个字符串, 必须是 "通过", "通过但有警告", 或 "失败" 中的一个。
-        - "analysis": 一个对象，包含三个字符串列表: "errors", "warnings", "suggestions"。
-          - "errors" (错误): 用于描述那些会导致脚本失败或画出完全错误图形的严重问题。
-          - "warnings" (警告): 用于描述那些可能导致结果不正确或违反工程常识的问题。
-          - "suggestions" (建议): 用于提出可以改进代码风格或实践的建议。
-        - "raw_thought_process" (原始思考过程): 一个字符串，包含你进行分析时的逐步思考过程。
-
-        **请确保你的整个输出是一个单一、完整、且严格合法的JSON对象。**
-        """
-        return prompt
     def validate(self, lisp_code: str, json_data: dict) -> bool:
         """使用LLM API执行验证。"""
         # --- 这里是完整的函数体 ---
+        static_validator = None
+        if self.static_check:
+            static_validator = StaticValidator()
+            static_validator.check(lisp_code, json_data)
+            if static_validator.overall_rating == RATING_FAIL:
+                # 本地检查已能确定失败，无需再花时间和费用调用LLM
+                print("\n--- [本地静态检查发现严重错误，跳过LLM验证] ---")
+                self.overall_rating = static_validator.overall_rating
+                self.errors = list(static_validator.errors)
+                self.warnings = list(static_validator.warnings)
+                self.suggestions = list(static_validator.suggestions)
+                self.print_report()
+                return False
+
+        cache_key = None
+        if self.cache is not None:
+            cache_key = validation_cache_key(json_data, lisp_code, self.model_name, PROMPT_VERSION)
+            cached = self.cache.get(cache_key)
+            if cached is not None:
+                print("\n--- [LLM 验证器: 使用缓存的验证结论，未调用API] ---")
+                self._apply_result(cached, static_validator)
+                self.print_report()
+                return self.overall_rating != RATING_FAIL
+
         print("\n--- [LLM 验证器开始 (通过OpenAI兼容代理)] ---")
         print(f"正在使用模型 '{self.model_name}' 进行分析，请稍候...")
 
-        prompt = self._construct_prompt(lisp_code, json_data)
+        prompt, self.prompt_stats = build_prompt(lisp_code, json_data, self.token_budget)
+        print_prompt_stats(self.prompt_stats)
 
+        self.aborted_early = False
         try:
-            response = self.client.chat.completions.create(
-                model=self.model_name,
-                messages=[
-                    {"role": "system", "content": "You are a helpful assistant designed to output JSON."},
-                    {"role": "user", "content": prompt}
-                ],
-                temperature=0.2
-            )
-
-            response_content = response.choices[0].message.content
-
-            if "```json" in response_content:
-                response_content = response_content.split("```json\n", 1)[1].split("```")[0]
-
-            analysis_result = json.loads(response_content)
-
-            self.overall_rating = analysis_result.get("overall_rating", "UNKNOWN")
-            analysis = analysis_result.get("analysis", {})
-            self.errors = analysis.get("errors", [])
-            self.warnings = analysis.get("warnings", [])
-            self.suggestions = analysis.get("suggestions", [])
+            if self.stream:
+                result = self._stream_verdict(prompt)
+            else:
+                response = self.client.chat.completions.create(
+                    model=self.model_name,
+                    messages=build_messages(prompt),
+                    temperature=LLM_TEMPERATURE
+                )
+                result = parse_verdict(response.choices[0].message.content)
+            if self.cache is not None and not self.aborted_early:
+                # 提前取消时结论只有评级和错误，不缓存，以免之后的完整验证命中残缺的结论
+                self.cache.put(cache_key, result)
+            self._apply_result(result, static_validator)
 
             print("--- [LLM 验证器结束] ---")
             self.print_report()
 
-            return self.overall_rating != "FAIL"
+            return self.overall_rating != RATING_FAIL
 
         except Exception as e:
             print(f"--- [LLM 验证器错误] ---")
@@ -121,6 +240,43 @@ class LLMValidator:
             self.overall_rating = "VALIDATION_ERROR"
             return False
 
+    def _stream_verdict(self, prompt: str) -> dict:
+        """流式接收结论：评级和错误一到达就打印；评级为"失败"且错误列表完整时提前取消请求。"""
+        stream = self.client.chat.completions.create(
+            model=self.model_name,
+            messages=build_messages(prompt),
+            temperature=LLM_TEMPERATURE,
+            stream=True
+        )
+        parser = StreamingVerdictParser()
+        try:
+            for chunk in stream:
+                for path, value in parser.feed(chunk_text(chunk)):
+                    if path == RATING_PATH:
+                        print(f"  总体评级: {value}")
+                    elif path[:-1] == ERRORS_PATH:
+                        print(f"  🔴 {value}")
+                if parser.done:
+                    break
+                if self.early_abort and parser.is_fatal(RATING_FAIL):
+                    print("  评级为“失败”，已提前取消LLM请求。")
+                    self.aborted_early = True
+                    break
+        finally:
+            stream.close()
+        if not parser.done and not self.aborted_early:
+            raise ValueError("LLM的流式响应在结论完整之前就结束了。")
+        return parser.verdict()
+
+    def _apply_result(self, result: dict, static_validator: StaticValidator = None):
+        """采用一次LLM结论（新请求或缓存），再并入本地检查的结论。"""
+        if static_validator is not None:
+            result = merge_static_result(result, static_validator)
+        self.overall_rating = result.get("overall_rating") or "UNKNOWN"
+        self.errors = list(result.get("errors") or [])
+        self.warnings = list(result.get("warnings") or [])
+        self.suggestions = list(result.get("suggestions") or [])
+
     def print_report(self):
         """打印LLM生成的验证报告。"""
         # --- 这里是完整的函数体 ---
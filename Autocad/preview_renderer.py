@@ -0,0 +1,395 @@
+"""
+Fast SVG/PNG previews of the 2D drawings.
+
+The web front end shows what a spec will look like while the user edits it,
+without going through AutoCAD. A preview is drawn from the same drawing IR and
+the same primitives as the DXF writer (dxf_writer.entity_primitives). It
+includes the views with their layer colors and linetypes (outline, hidden,
+centerline, ...), the dimensions with arrows and measured text, hatching, and
+the annotation symbols and tables.
+
+  - SVG: one element per primitive, grouped by layer. Linetypes become
+    stroke-dasharray values in drawing units (acad.lin dashes times LTSCALE,
+    as in the drawing), so dashes keep their length when the SVG is zoomed.
+  - PNG: rasterized with NumPy into an RGB array and encoded with zlib. Curves
+    are split into chords, dashes are applied along each polyline, and
+    texts are drawn as greeked bars, since a pure NumPy rasterizer has no
+    font renderer.
+
+A typical drawing renders in a few milliseconds. Previews are cached by the
+hash of the shape, the spec and the render settings, so a spec that comes
+back (undo, toggling a value) is served from memory. The spec is hashed in
+its own key order (generation_cache.generation_key), since the parameter
+table lists its rows in that order.
+
+Usage:
+    python preview_renderer.py SPEC.json [-o preview.svg] [--width PX]
+"""
+import argparse
+import json
+import math
+import re
+import struct
+import sys
+import zlib
+from xml.sax.saxutils import escape
+
+import numpy as np
+
+from dxf_writer import (HATCH_PATTERNS, DEFAULT_HATCH_PATTERN, LINETYPES, LTSCALE, arrowhead, dimension_block,
+                        entity_primitives, hatch_segments, primitive_extents, text_box)
+from generation_cache import GenerationCache
+
+PREVIEW_FORMATS = ('svg', 'png')
+DEFAULT_WIDTH = 800
+MARGIN_PX = 12
+BACKGROUND = (255, 255, 255)
+THICK_LINETYPES = ('CONTINUOUS',)
+
+# AutoCAD color index -> RGB; color 7 is black on the white preview background.
+ACI_COLORS = {1: (255, 0, 0), 2: (204, 170, 0), 3: (0, 160, 0), 4: (0, 170, 204), 5: (0, 0, 255),
+              6: (204, 0, 204), 7: (0, 0, 0), 8: (128, 128, 128), 9: (192, 192, 192)}
+DEFAULT_COLOR = (90, 90, 90)
+
+_SPECIAL_TEXT = {'%%c': '\u2300', '%%C': '\u2300', '%%d': '\u00b0', '%%D': '\u00b0', '%%p': '\u00b1', '%%P': '\u00b1'}
+_UNICODE_ESCAPE = re.compile(r'\\U\+([0-9A-Fa-f]{4})')
+
+
+def display_text(text: str) -> str:
+    """Text as AutoCAD shows it: %%c/%%d/%%p control codes and \\U+XXXX escapes resolved."""
+    for code, char in _SPECIAL_TEXT.items():
+        text = text.replace(code, char)
+    return _UNICODE_ESCAPE.sub(lambda m: chr(int(m.group(1), 16)), text)
+
+
+# ==============================================================================
+# Drawable Primitives
+# ==============================================================================
+def _layer_styles(drawing) -> dict:
+    """Layer name -> (RGB color, dash pattern in drawing units or None)."""
+    styles = {}
+    for info in drawing.layers.values():
+        linetype = (info.get('linetype') or 'Continuous').upper()
+        dashes = LINETYPES.get(linetype, (None, None))[1]
+        styles[info['name']] = (ACI_COLORS.get(int(info.get('color', 7)), DEFAULT_COLOR),
+                                tuple(d * LTSCALE for d in dashes) if dashes else None)
+    return styles
+
+
+def hatch_lines(box, pattern: str, scale: float) -> list:
+    """(x1, y1, x2, y2, dashes) of the pattern lines of one hatch boundary box."""
+    definition = HATCH_PATTERNS.get(pattern.upper(), HATCH_PATTERNS[DEFAULT_HATCH_PATTERN])
+    x1, y1, x2, y2 = box
+    if pattern.upper() == 'SOLID':
+        return []
+    out = []
+    for angle, bx, by, _, dy, dashes in definition:
+        a = math.radians(angle)
+        ux, uy, nx, ny = math.cos(a), math.sin(a), -math.sin(a), math.cos(a)
+        spacing = abs(dy * scale)
+        if spacing < 1e-9:
+            continue
+        base = (bx * nx + by * ny) * scale
+        levels = [cx * nx + cy * ny for cx, cy in ((x1, y1), (x2, y1), (x2, y2), (x1, y2))]
+        k0, k1 = math.ceil((min(levels) - base) / spacing), math.floor((max(levels) - base) / spacing)
+        scaled_dashes = tuple(d * scale for d in dashes) or None
+        for k in range(k0, k1 + 1):
+            # Point on the line closest to the origin, then clip the infinite line to the box (Liang-Barsky).
+            level = base + k * spacing
+            px, py = level * nx, level * ny
+            t0, t1 = -math.inf, math.inf
+            for p, d, lo, hi in ((px, ux, x1, x2), (py, uy, y1, y2)):
+                if abs(d) < 1e-12:
+                    if not lo <= p <= hi:
+                        t0, t1 = 1, 0
+                    continue
+                ta, tb = (lo - p) / d, (hi - p) / d
+                t0, t1 = max(t0, min(ta, tb)), min(t1, max(ta, tb))
+            if t1 > t0:
+                out.append((px + t0 * ux, py + t0 * uy, px + t1 * ux, py + t1 * uy, scaled_dashes))
+    return out
+
+
+def preview_primitives(drawing):
+    """
+    Yields (primitive, color, dashes) for every visible element of the drawing: the primitives of
+    dxf_writer with dimensions expanded into their block geometry, leaders given arrowheads and
+    hatches into their pattern lines ('HATCHLINE', layer, x1, y1, x2, y2).
+    """
+    styles = _layer_styles(drawing)
+    text_height = drawing.dim_opts.get('text_height', 3.5)
+    arrow_size = drawing.dim_opts.get('arrow_size', 2.5)
+    segments = hatch_segments(drawing.entities)
+    for entity in drawing.entities:
+        if entity.kind == 'comment':
+            continue
+        color, dashes = styles.get(entity.layer, (ACI_COLORS[7], None))
+        for p in entity_primitives(entity, text_height, segments):
+            kind = p[0]
+            if kind == 'DIMENSION':
+                for q in dimension_block(entity, drawing.dim_opts)[1]:
+                    yield q, color, None
+            elif kind == 'LEADER':
+                points = p[2]
+                for (ax, ay), (bx, by) in zip(points, points[1:]):
+                    yield ('LINE', p[1], ax, ay, bx, by), color, None
+                yield arrowhead(points[0], points[1], arrow_size), color, None
+            elif kind == 'HATCH':
+                for box in p[4]:
+                    for x1, y1, x2, y2, line_dashes in hatch_lines(box, p[2], p[3]):
+                        yield ('HATCHLINE', p[1], x1, y1, x2, y2), color, line_dashes
+            elif kind == 'TEXT' or kind == 'SOLID':
+                yield p, color, None
+            else:
+                yield p, color, dashes
+
+
+def _arc_points(cx, cy, r, start_deg, end_deg, chord: float):
+    sweep = (end_deg - start_deg) % 360.0 or 360.0
+    n = max(8, min(720, int(math.ceil(math.radians(sweep) * r / max(chord, 1e-9)))))
+    angles = np.radians(start_deg + np.linspace(0.0, sweep, n + 1))
+    return cx + r * np.cos(angles), cy + r * np.sin(angles)
+
+
+# ==============================================================================
+# SVG
+# ==============================================================================
+def _hex(color) -> str:
+    return '#%02x%02x%02x' % color
+
+
+def _canvas(drawing):
+    """(primitives, extents): what preview_primitives yields, and the bounds of all of it, texts included."""
+    primitives = list(preview_primitives(drawing))
+    return primitives, primitive_extents(p for p, _, _ in primitives) or (0.0, 0.0, 100.0, 100.0)
+
+
+def render_svg(drawing, width: int = DEFAULT_WIDTH) -> str:
+    """SVG document of the drawing, `width` pixels wide; y points up as in the drawing."""
+    primitives, extents = _canvas(drawing)
+    min_x, min_y, max_x, max_y = extents
+    px_per_unit = (width - 2 * MARGIN_PX) / max(max_x - min_x, 1e-9)
+    margin = MARGIN_PX / px_per_unit
+    view_w, view_h = max_x - min_x + 2 * margin, max_y - min_y + 2 * margin
+    height = int(math.ceil(view_h * px_per_unit))
+    stroke = 1.0 / px_per_unit
+    top = max_y + margin
+
+    def X(x):
+        return f"{x - min_x + margin:.3f}"
+
+    def Y(y):
+        return f"{top - y:.3f}"
+
+    out = [f'<svg xmlns="http://www.w3.org/2000/svg" width="{width}" height="{height}" '
+           f'viewBox="0 0 {view_w:.3f} {view_h:.3f}">\n'
+           f'<rect width="100%" height="100%" fill="{_hex(BACKGROUND)}"/>\n'
+           f'<g fill="none" stroke-width="{stroke:.4f}" stroke-linecap="round" font-family="sans-serif">\n']
+    for p, color, dashes in primitives:
+        kind, rgb = p[0], _hex(color)
+        dash = f' stroke-dasharray="{",".join(f"{max(abs(d), stroke):.3f}" for d in dashes)}"' if dashes else ''
+        if kind in ('LINE', 'HATCHLINE'):
+            width_attr = f' stroke-width="{stroke * 1.6:.4f}"' if kind == 'LINE' and not dashes else ''
+            out.append(f'<line x1="{X(p[2])}" y1="{Y(p[3])}" x2="{X(p[4])}" y2="{Y(p[5])}" stroke="{rgb}"{dash}{width_attr}/>\n')
+        elif kind == 'LWPOLYLINE':
+            tag = 'polygon' if p[3] else 'polyline'
+            points = ' '.join(f"{X(x)},{Y(y)}" for x, y in p[2])
+            out.append(f'<{tag} points="{points}" stroke="{rgb}"{dash}/>\n')
+        elif kind == 'CIRCLE':
+            out.append(f'<circle cx="{X(p[2])}" cy="{Y(p[3])}" r="{p[4]:.3f}" stroke="{rgb}"{dash}/>\n')
+        elif kind == 'ARC':
+            _, _, cx, cy, r, a0, a1 = p
+            sx, sy = cx + r * math.cos(math.radians(a0)), cy + r * math.sin(math.radians(a0))
+            ex, ey = cx + r * math.cos(math.radians(a1)), cy + r * math.sin(math.radians(a1))
+            large = 1 if (a1 - a0) % 360.0 > 180.0 else 0
+            # Counter-clockwise in the drawing is clockwise on screen (sweep flag 1) once y is flipped.
+            out.append(f'<path d="M{X(sx)},{Y(sy)} A{r:.3f},{r:.3f} 0 {large} 1 {X(ex)},{Y(ey)}" stroke="{rgb}"{dash}/>\n')
+        elif kind == 'SOLID':
+            points = ' '.join(f"{X(x)},{Y(y)}" for x, y in p[2])
+            out.append(f'<polygon points="{points}" fill="{rgb}"/>\n')
+        elif kind == 'TEXT':
+            _, _, x, y, h, rotation, text, align = p
+            anchor = {'bl': 'start', 'ml': 'start', 'mc': 'middle', 'mr': 'end'}[align]
+            baseline = '' if align == 'bl' else ' dominant-baseline="central"'
+            rotate = f' transform="rotate({-rotation:.3f} {X(x)} {Y(y)})"' if rotation else ''
+            out.append(f'<text x="{X(x)}" y="{Y(y)}" font-size="{h * 1.4:.3f}" fill="{rgb}" stroke="none" '
+                       f'text-anchor="{anchor}"{baseline}{rotate}>{escape(display_text(str(text)))}</text>\n')
+    out.append('</g>\n</svg>\n')
+    return ''.join(out)
+
+
+# ==============================================================================
+# PNG (NumPy rasterizer)
+# ==============================================================================
+class _Raster:
+    """RGB canvas; drawing coordinates map to pixels with y pointing up."""
+
+    def __init__(self, extents, width: int):
+        min_x, min_y, max_x, max_y = extents
+        self.scale = (width - 2 * MARGIN_PX) / max(max_x - min_x, 1e-9)
+        self.width = width
+        self.height = int(math.ceil((max_y - min_y) * self.scale)) + 2 * MARGIN_PX
+        self.min_x, self.max_y = min_x, max_y
+        self.image = np.empty((self.height, self.width, 3), dtype=np.uint8)
+        self.image[:] = BACKGROUND
+        # Pending polylines per (color, dashes, thick): lists of (xs, ys) in drawing units.
+        self._strokes = {}
+
+    def to_px(self, xs, ys):
+        return ((np.asarray(xs, dtype=float) - self.min_x) * self.scale + MARGIN_PX,
+                (self.max_y - np.asarray(ys, dtype=float)) * self.scale + MARGIN_PX)
+
+    def polyline(self, xs, ys, color, dashes=None, thick=False):
+        self._strokes.setdefault((color, dashes, thick), []).append((xs, ys))
+
+    def flush(self):
+        """Rasterizes every pending polyline; all strokes of one style are sampled in one vectorized pass."""
+        for (color, dashes, thick), lines in self._strokes.items():
+            x1, y1, x2, y2, starts = [], [], [], [], []
+            for xs, ys in lines:
+                xs, ys = np.asarray(xs, dtype=float), np.asarray(ys, dtype=float)
+                lengths = np.hypot(np.diff(xs), np.diff(ys))
+                x1.append(xs[:-1]), y1.append(ys[:-1]), x2.append(xs[1:]), y2.append(ys[1:])
+                # Distance along its polyline at which each segment starts, so dashes run across vertices.
+                starts.append(np.cumsum(lengths) - lengths)
+            x1, y1, x2, y2, starts = (np.concatenate(a) for a in (x1, y1, x2, y2, starts))
+            seg_len = np.hypot(x2 - x1, y2 - y1)
+            px1, py1 = self.to_px(x1, y1)
+            px2, py2 = self.to_px(x2, y2)
+            samples = np.ceil(np.maximum(np.abs(px2 - px1), np.abs(py2 - py1))).astype(np.int64) + 1
+            seg = np.repeat(np.arange(len(samples)), samples)
+            t = (np.arange(len(seg)) - np.repeat(np.cumsum(samples) - samples, samples)) / np.maximum(samples - 1, 1)[seg]
+            xs = np.rint(px1[seg] + t * (px2 - px1)[seg]).astype(np.int64)
+            ys = np.rint(py1[seg] + t * (py2 - py1)[seg]).astype(np.int64)
+            if dashes:
+                pattern = np.array([max(abs(d), 1.0 / self.scale) if d >= 0 else abs(d) for d in dashes])
+                position = (starts[seg] + t * seg_len[seg]) % pattern.sum()
+                on = np.array([d >= 0 for d in dashes])[np.searchsorted(np.cumsum(pattern), position, side='right')
+                                                         .clip(0, len(pattern) - 1)]
+                xs, ys = xs[on], ys[on]
+            self._plot(xs, ys, color)
+            if thick:
+                self._plot(xs + 1, ys, color)
+                self._plot(xs, ys + 1, color)
+        self._strokes = {}
+
+    def _plot(self, xs, ys, color):
+        keep = (xs >= 0) & (xs < self.width) & (ys >= 0) & (ys < self.height)
+        self.image[ys[keep], xs[keep]] = color
+
+    def fill_polygon(self, points, color):
+        """Fills a small convex polygon (arrowheads, greeked text) by testing the pixels of its bounding box."""
+        xs, ys = self.to_px([p[0] for p in points], [p[1] for p in points])
+        x0, x1 = max(int(xs.min()), 0), min(int(math.ceil(xs.max())), self.width - 1)
+        y0, y1 = max(int(ys.min()), 0), min(int(math.ceil(ys.max())), self.height - 1)
+        if x1 < x0 or y1 < y0:
+            return
+        gx, gy = np.meshgrid(np.arange(x0, x1 + 1) + 0.5, np.arange(y0, y1 + 1) + 0.5)
+        inside_pos = np.ones(gx.shape, dtype=bool)
+        inside_neg = np.ones(gx.shape, dtype=bool)
+        for i in range(len(xs)):
+            ax, ay, bx, by = xs[i - 1], ys[i - 1], xs[i], ys[i]
+            cross = (bx - ax) * (gy - ay) - (by - ay) * (gx - ax)
+            inside_pos &= cross >= 0
+            inside_neg &= cross <= 0
+        mask = inside_pos | inside_neg
+        region = self.image[y0:y1 + 1, x0:x1 + 1]
+        region[mask] = color
+
+    def png(self) -> bytes:
+        raw = np.concatenate([np.zeros((self.height, 1), dtype=np.uint8),
+                              self.image.reshape(self.height, self.width * 3)], axis=1).tobytes()
+
+        def chunk(kind: bytes, data: bytes) -> bytes:
+            return struct.pack('>I', len(data)) + kind + data + struct.pack('>I', zlib.crc32(kind + data) & 0xffffffff)
+
+        return (b'\x89PNG\r\n\x1a\n' + chunk(b'IHDR', struct.pack('>IIBBBBB', self.width, self.height, 8, 2, 0, 0, 0))
+                + chunk(b'IDAT', zlib.compress(raw, 6)) + chunk(b'IEND', b''))
+
+
+def _greeked_text(p):
+    """Corners of the bar a text is drawn as: its text box, at 0.6 of the text height."""
+    return text_box(p, 0.6)
+
+
+def render_png(drawing, width: int = DEFAULT_WIDTH) -> bytes:
+    """PNG image of the drawing, `width` pixels wide, rasterized with NumPy."""
+    primitives, extents = _canvas(drawing)
+    raster = _Raster(extents, width)
+    chord = 2.0 / raster.scale  # curves are split into chords of about two pixels
+    deferred = []
+    for p, color, dashes in primitives:
+        kind = p[0]
+        thick = kind == 'LINE' and dashes is None
+        if kind in ('LINE', 'HATCHLINE'):
+            raster.polyline((p[2], p[4]), (p[3], p[5]), color, dashes, thick)
+        elif kind == 'LWPOLYLINE':
+            points = list(p[2]) + ([p[2][0]] if p[3] else [])
+            raster.polyline([x for x, _ in points], [y for _, y in points], color, dashes)
+        elif kind in ('CIRCLE', 'ARC'):
+            start, end = (0.0, 360.0) if kind == 'CIRCLE' else (p[5], p[6])
+            raster.polyline(*_arc_points(p[2], p[3], p[4], start, end, chord), color, dashes)
+        elif kind == 'SOLID':
+            deferred.append((p[2], color))
+        elif kind == 'TEXT':
+            deferred.append((_greeked_text(p), tuple(int(c + (255 - c) * 0.55) for c in color)))
+    raster.flush()
+    for points, color in deferred:
+        raster.fill_polygon(points, color)
+    return raster.png()
+
+
+# ==============================================================================
+# Cached Previews
+# ==============================================================================
+_preview_cache = GenerationCache()
+
+
+def preview(data: dict, shape_type: str = None, fmt: str = 'svg', width: int = DEFAULT_WIDTH):
+    """
+    Preview of a 2D spec: SVG text or PNG bytes. Results are cached by the hash of the shape,
+    the spec (key order included) and the render settings, so an unchanged spec is not drawn twice.
+    """
+    from lisp_generator import drawing_builders
+
+    if fmt not in PREVIEW_FORMATS:
+        raise ValueError(f"Unknown preview format '{fmt}'. Expected one of: {', '.join(PREVIEW_FORMATS)}.")
+    shape_type = shape_type or data.get('shape')
+    builder = drawing_builders.get(shape_type)
+    if builder is None:
+        raise TypeError(f"Shape '{shape_type}' has no 2D drawing to preview.")
+    render = render_svg if fmt == 'svg' else render_png
+    return _preview_cache.get_or_generate(f"{shape_type}|{fmt}|{int(width)}", data,
+                                          lambda spec: render(builder(spec), int(width)))
+
+
+def main(argv=None) -> int:
+    parser = argparse.ArgumentParser(description="Render a preview of the 2D drawing of a spec as SVG or PNG.")
+    parser.add_argument('spec', help="Spec JSON file.")
+    parser.add_argument('-o', '--output', default='preview.svg', help="Output file; a .png name renders a PNG.")
+    parser.add_argument('--shape', default=None, help="Shape to draw (default: the spec's 'shape').")
+    parser.add_argument('--width', type=int, default=DEFAULT_WIDTH, help=f"Width in pixels (default: {DEFAULT_WIDTH}).")
+    args = parser.parse_args(argv)
+
+    from fastener_catalog import expand_spec
+
+    with open(args.spec, 'r', encoding='utf-8') as f:
+        data = json.load(f)
+    fmt = 'png' if args.output.lower().endswith('.png') else 'svg'
+    try:
+        result = preview(expand_spec(data, args.shape), args.shape, fmt, args.width)
+    except (TypeError, ValueError, KeyError) as e:
+        print(f"[Error] {type(e).__name__}: {e}")
+        return 1
+    if fmt == 'png':
+        with open(args.output, 'wb') as f:
+            f.write(result)
+    else:
+        with open(args.output, 'w', encoding='utf-8') as f:
+            f.write(result)
+    print(f"'{args.output}' written.")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
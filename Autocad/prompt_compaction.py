@@ -0,0 +1,117 @@
+# prompt_compaction.py
+"""
+审查Prompt的压缩与Token预算。
+
+送给LLM的LISP代码中有大量不需要审查的内容。按以下顺序压缩，直到满足Token预算：
+  1. 去掉内嵌的运行库（daedalus_runtime，经过验证的辅助函数），只留一行说明；
+  2. 合并连续的图层切换（-LAYER _S / CLAYER），只保留最后一次；
+  3. 去掉缩进、行尾空白和多余空行；
+  4. 仍超出预算时，把连续的同类语句（如几十条 LINE）概括为前几条 + 省略说明 + 最后一条，
+     保留的条数逐步减少。
+JSON规范以紧凑格式输出。
+"""
+
+import json
+import re
+
+from lisp_runtime import RUNTIME_VERSION, get_runtime_source
+
+try:
+    import tiktoken
+    TIKTOKEN_AVAILABLE = True
+except ImportError:
+    TIKTOKEN_AVAILABLE = False
+
+DEFAULT_TOKEN_BUDGET = 6000
+
+# 概括连续同类语句时，每段依次尝试保留的前几条语句数
+_SUMMARY_KEEP_STEPS = (8, 4, 2, 1)
+
+_LAYER_SWITCH_RE = re.compile(r'^\(command "[_.]*-LAYER" "_?S" "[^"]*" ""\)$|^\(setvar "CLAYER" "[^"]*"\)$', re.I)
+_STATEMENT_KEY_RES = (
+    re.compile(r'^\(command "([^"]+)"'),
+    re.compile(r'^\(entmake \'\(\(0 \. "([^"]+)"\)'),
+)
+
+_encoding = None
+
+
+def estimate_tokens(text: str) -> int:
+    """估算文本的Token数：有tiktoken时精确计数，否则按 ASCII 4字符/Token、其他字符1字符/Token 估算。"""
+    global _encoding
+    if TIKTOKEN_AVAILABLE:
+        if _encoding is None:
+            _encoding = tiktoken.get_encoding("cl100k_base")
+        return len(_encoding.encode(text))
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def compact_json(json_data: dict) -> str:
+    """不带缩进和多余空格的JSON。"""
+    return json.dumps(json_data, ensure_ascii=False, separators=(',', ':'))
+
+
+def strip_runtime(lisp_code: str) -> str:
+    """把内嵌的运行库替换为一行说明。"""
+    return lisp_code.replace(
+        get_runtime_source(),
+        f";; [daedalus_runtime v{RUNTIME_VERSION} 已省略：经过验证的辅助函数库 (dtr, dm-*, draw-*, Draw-*)]\n")
+
+
+def _normalize_lines(lisp_code: str) -> list:
+    """去掉缩进/行尾空白和空行，并合并连续的图层切换。"""
+    lines = []
+    for raw in lisp_code.splitlines():
+        line = raw.strip()
+        if not line:
+            continue
+        if lines and _LAYER_SWITCH_RE.match(line) and _LAYER_SWITCH_RE.match(lines[-1]):
+            lines[-1] = line
+            continue
+        lines.append(line)
+    return lines
+
+
+def _statement_key(line: str):
+    for pattern in _STATEMENT_KEY_RES:
+        match = pattern.match(line)
+        if match:
+            return match.group(1).lstrip('_.-').upper()
+    return None
+
+
+def _summarize_runs(lines: list, keep: int) -> list:
+    """连续超过 keep+1 条的同类语句只保留前 keep 条和最后一条。"""
+    result, i = [], 0
+    while i < len(lines):
+        key = _statement_key(lines[i])
+        j = i + 1
+        while key and j < len(lines) and _statement_key(lines[j]) == key:
+            j += 1
+        run = lines[i:j]
+        if key and len(run) > keep + 1:
+            omitted = len(run) - keep - 1
+            result.extend(run[:keep])
+            result.append(f";; ... 省略了 {omitted} 条类似的 {key} 语句 ...")
+            result.append(run[-1])
+        else:
+            result.extend(run)
+        i = j
+    return result
+
+
+def compact_lisp(lisp_code: str, fits=None) -> str:
+    """
+    压缩LISP代码。fits(code) -> bool 判断是否已满足预算；
+    满足预算后不再做有损的概括。
+    """
+    lines = _normalize_lines(strip_runtime(lisp_code))
+    code = "\n".join(lines)
+    if fits is None or fits(code):
+        return code
+    for keep in _SUMMARY_KEEP_STEPS:
+        code = "\n".join(_summarize_runs(lines, keep))
+        if fits(code):
+            break
+    return code
@@ -0,0 +1,42 @@
+"""
+Canonical form and content hash of drawing specs.
+
+Two specs that differ only in key order, whitespace or in writing a whole
+number as 50 vs 50.0 describe the same drawing, so they get the same
+canonical JSON text and the same hash. The hash is used as a content address
+for anything derived from a spec (validation verdicts, generated drawings).
+"""
+import hashlib
+import json
+
+
+def _normalize(value):
+    """Integral floats become ints and tuples become lists, recursively."""
+    if isinstance(value, float) and value.is_integer():
+        return int(value)
+    if isinstance(value, dict):
+        return {str(k): _normalize(v) for k, v in value.items()}
+    if isinstance(value, (list, tuple)):
+        return [_normalize(v) for v in value]
+    return value
+
+
+def canonical_json(value, normalize_numbers: bool = True) -> str:
+    """
+    Compact JSON with sorted keys and normalized numbers. With normalize_numbers=False,
+    50 and 50.0 stay distinct, for uses where the exact output text matters
+    (the generators print reals and integers differently).
+    """
+    return json.dumps(_normalize(value) if normalize_numbers else value,
+                      sort_keys=True, separators=(',', ':'), ensure_ascii=False)
+
+
+def spec_hash(*parts) -> str:
+    """SHA-256 over the given parts; dicts/lists are hashed in canonical form, anything else by str()."""
+    digest = hashlib.sha256()
+    for part in parts:
+        text = part if isinstance(part, str) else canonical_json(part) if isinstance(part, (dict, list, tuple)) else str(part)
+        data = text.encode('utf-8')
+        digest.update(len(data).to_bytes(8, 'big'))
+        digest.update(data)
+    return digest.hexdigest()
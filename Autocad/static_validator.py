@@ -0,0 +1,700 @@
+# static_validator.py
+"""
+本地确定性静态检查器 —— 在调用LLM之前对生成的LISP代码进行审查。
+
+它完成LLM审查清单中可以由程序精确判断的部分，耗时仅为毫秒级：
+  1. 语法检查：AutoLISP分词/解析（括号是否匹配、字符串是否闭合、函数是否已定义）。
+  2. 参数验证：从LISP的几何命令/entmake中提取尺寸，与JSON中的关键尺寸交叉核对。
+  3. 工程常识检查：孔径与外形、螺钉与螺母孔径是否匹配等规则。
+  4. 最佳实践：UNDO/CMDECHO是否成对、运行中的对象捕捉等。
+
+结果结构与 LLMValidator 相同（overall_rating + errors/warnings/suggestions）。
+"""
+
+import functools
+import math
+import re
+
+RATING_PASS = "通过"
+RATING_WARN = "通过但有警告"
+RATING_FAIL = "失败"
+
+
+# ==============================================================================
+# AutoLISP 分词与解析
+# ==============================================================================
+
+class Symbol(str):
+    """LISP符号（AutoLISP不区分大小写，统一存为小写）。"""
+
+
+class LispString(str):
+    """LISP字符串字面量。"""
+
+
+class LispList(list):
+    """LISP表，记录其左括号所在的行号。"""
+
+    def __init__(self, items=(), line=0):
+        super().__init__(items)
+        self.line = line
+
+
+class LispSyntaxError(Exception):
+    """无法完成解析的语法错误，带行号。"""
+
+    def __init__(self, message, line):
+        super().__init__(message)
+        self.line = line
+
+
+_NUMBER_RE = re.compile(r'^[+-]?(\d+\.?\d*|\.\d+)([eE][+-]?\d+)?$')
+_DELIMITERS = set('()\'";') | set(' \t\r\n')
+
+
+def tokenize(source: str) -> list:
+    """
+    把AutoLISP源码切分为 (类型, 值, 行号) 列表。
+    类型为 '(' ')' "'" 'str' 'num' 'sym' '.' 之一；注释（; 与 ;| |;）被丢弃。
+    """
+    tokens = []
+    i, n, line = 0, len(source), 1
+    while i < n:
+        ch = source[i]
+        if ch == '\n':
+            line += 1
+            i += 1
+        elif ch in ' \t\r':
+            i += 1
+        elif ch == ';':
+            if source.startswith(';|', i):
+                end = source.find('|;', i + 2)
+                if end < 0:
+                    raise LispSyntaxError("块注释 ';|' 没有对应的 '|;' 结束标记", line)
+                line += source.count('\n', i, end)
+                i = end + 2
+            else:
+                end = source.find('\n', i)
+                i = n if end < 0 else end
+        elif ch in '()\'':
+            tokens.append((ch, ch, line))
+            i += 1
+        elif ch == '"':
+            start_line, j, chars = line, i + 1, []
+            while j < n and source[j] != '"':
+                if source[j] == '\\' and j + 1 < n:
+                    chars.append(source[j:j + 2])
+                    j += 2
+                    continue
+                if source[j] == '\n':
+                    line += 1
+                chars.append(source[j])
+                j += 1
+            if j >= n:
+                raise LispSyntaxError("字符串的引号没有闭合", start_line)
+            tokens.append(('str', ''.join(chars), start_line))
+            i = j + 1
+        else:
+            j = i
+            while j < n and source[j] not in _DELIMITERS:
+                j += 1
+            atom = source[i:j]
+            if atom == '.':
+                tokens.append(('.', atom, line))
+            elif _NUMBER_RE.match(atom):
+                tokens.append(('num', float(atom) if any(c in atom for c in '.eE') else int(atom), line))
+            else:
+                tokens.append(('sym', atom.lower(), line))
+            i = j
+    return tokens
+
+
+def parse(source: str) -> list:
+    """把源码解析为顶层表达式列表；括号不匹配时抛出 LispSyntaxError。"""
+    stack = [LispList()]
+    quote_marks = [[]]  # 每层中等待被引用的 "'" 的行号
+    for kind, value, line in tokenize(source):
+        if kind == '(':
+            stack.append(LispList(line=line))
+            quote_marks.append([])
+            continue
+        if kind == "'":
+            quote_marks[-1].append(line)
+            continue
+        if kind == ')':
+            if len(stack) == 1:
+                raise LispSyntaxError("多余的右括号 ')'", line)
+            if quote_marks[-1]:
+                raise LispSyntaxError("引号 ' 后面缺少被引用的表达式", quote_marks[-1][-1])
+            expr = stack.pop()
+            quote_marks.pop()
+        elif kind == 'str':
+            expr = LispString(value)
+        elif kind == 'sym':
+            expr = Symbol(value)
+        elif kind == '.':
+            expr = Symbol('.')
+        else:
+            expr = value
+        while quote_marks[-1]:
+            expr = LispList([Symbol('quote'), expr], line=quote_marks[-1].pop())
+        stack[-1].append(expr)
+    if len(stack) > 1:
+        raise LispSyntaxError(f"有 {len(stack) - 1} 个左括号 '(' 没有闭合", stack[1].line)
+    if quote_marks[0]:
+        raise LispSyntaxError("引号 ' 后面缺少被引用的表达式", quote_marks[0][-1])
+    return list(stack[0])
+
+
+# ==============================================================================
+# 几何提取
+# ==============================================================================
+
+# 生成代码及共享运行库中会用到的AutoLISP内置函数。
+_BUILTINS = frozenset("""
+    + - * / = /= < > <= >= 1+ 1- abs and append apply assoc atan atof atoi boundp car cadr caddr cdr cddr
+    command command-s cond cons cos defun defun-q distance entdel entget entlast entmake entmod entnext
+    entupd eq equal eval exp fix float foreach function getangle getdist getint getpoint getreal getstring
+    getvar if itoa lambda last length list listp load mapcar max member min minusp not nth null numberp
+    or polar princ prin1 print progn quote read redraw regapp repeat reverse rtos set setq setvar sin sqrt ssadd
+    ssget sslength ssname strcase strcat strlen subst substr tblnext tblobjname tblsearch terpri trans
+    type vl-load-com vl-princ-to-string vl-string-subst vl-string-trim while zerop alert
+""".split())
+
+# 这些表达式的参数不是函数调用，遍历时需要跳过。
+_NON_CALL_FORMS = frozenset({'quote', 'function'})
+
+
+def _norm_command(name: str) -> str:
+    """'_.LINE' / '_-HATCH' / 'LINE' 统一为 'LINE'。"""
+    return name.lstrip('_.-').upper()
+
+
+def _is_point(value) -> bool:
+    return isinstance(value, tuple) and len(value) in (2, 3)
+
+
+def _dist(p1, p2) -> float:
+    return math.hypot(p2[0] - p1[0], p2[1] - p1[1])
+
+
+class _GeometryCollector:
+    """顺序遍历解析树，对 setq 常量求值，并记录几何命令/entmake 中的尺寸。"""
+
+    def __init__(self):
+        self.env = {}
+        self.lengths = []          # (数值, 来源说明)
+        self.radii = []            # 圆/圆弧/圆柱的半径
+        self.dimension_texts = []  # (标注文字中的数值, 几何测量值, 行号)
+        self.defuns = set()
+        self.calls = []            # (函数名, 行号)
+        self.commands = []         # (命令名, 行号)
+        self.setvars = []          # (变量名, 值)
+        self.loads = []
+        self.undo_marks = []
+        self.coordinates = (set(), set())  # 几何点的X、Y坐标（取整到1e-4）
+        self.entmake_count = 0
+
+    # --- 常量求值 ---
+    def evaluate(self, expr):
+        if isinstance(expr, (int, float)) and not isinstance(expr, bool):
+            return float(expr)
+        if isinstance(expr, LispString):
+            return expr
+        if isinstance(expr, Symbol):
+            return self.env.get(expr)
+        if not isinstance(expr, LispList) or not expr:
+            return None
+        head = expr[0]
+        if head == 'quote' and len(expr) == 2:
+            return self._literal(expr[1])
+        args = [self.evaluate(a) for a in expr[1:]]
+        if head == 'list':
+            return tuple(args) if all(isinstance(a, float) for a in args) else None
+        if head in ('+', '-', '*', '/') and args and all(isinstance(a, float) for a in args):
+            if head == '-' and len(args) == 1:
+                return -args[0]
+            result = args[0]
+            for a in args[1:]:
+                if head == '+':
+                    result += a
+                elif head == '-':
+                    result -= a
+                elif head == '*':
+                    result *= a
+                elif a == 0:
+                    return None
+                else:
+                    result /= a
+            return result
+        return None
+
+    def _literal(self, expr):
+        if isinstance(expr, (int, float)):
+            return float(expr)
+        if isinstance(expr, LispList) and expr and all(isinstance(a, (int, float)) for a in expr):
+            return tuple(float(a) for a in expr)
+        return None
+
+    # --- 遍历 ---
+    def walk(self, expr):
+        if not isinstance(expr, LispList) or not expr:
+            return
+        head = expr[0]
+        if isinstance(head, LispList):
+            for item in expr:
+                self.walk(item)
+            return
+        if not isinstance(head, Symbol):
+            return
+        if head in _NON_CALL_FORMS:
+            return
+        self.calls.append((head, expr.line))
+        if head == 'defun' and len(expr) >= 3:
+            self.defuns.add(str(expr[1]))
+            for item in expr[3:]:
+                self.walk(item)
+            return
+        if head == 'lambda':
+            for item in expr[2:]:
+                self.walk(item)
+            return
+        if head == 'foreach' and len(expr) >= 3:
+            for item in expr[2:]:
+                self.walk(item)
+            return
+        for item in expr[1:]:
+            self.walk(item)
+        if head == 'setq':
+            for name, value in zip(expr[1::2], expr[2::2]):
+                if isinstance(name, Symbol):
+                    self.env[name] = self.evaluate(value)
+        elif head == 'setvar' and len(expr) >= 3 and isinstance(expr[1], LispString):
+            self.setvars.append((expr[1].upper(), self.evaluate(expr[2])))
+        elif head == 'load' and len(expr) >= 2 and isinstance(expr[1], LispString):
+            self.loads.append(str(expr[1]))
+        elif head == 'command' and len(expr) >= 2 and isinstance(expr[1], LispString):
+            self._command(_norm_command(expr[1]), [self.evaluate(a) for a in expr[2:]], expr.line)
+        elif head == 'entmake' and len(expr) == 2:
+            self.entmake_count += 1
+            data = expr[1]
+            if isinstance(data, LispList) and len(data) == 2 and data[0] == 'quote':
+                self._entmake(data[1], expr.line)
+
+    # --- 命令行调用 ---
+    def _add(self, value, source):
+        if isinstance(value, float) and value > 0:
+            self.lengths.append((value, source))
+
+    def _add_round(self, radius, source):
+        if isinstance(radius, float) and radius > 0:
+            self.radii.append(radius)
+            self._add(radius, source)
+            self._add(radius * 2, source)
+
+    def _add_coordinates(self, points):
+        for p in points:
+            self.coordinates[0].add(round(p[0], 4))
+            self.coordinates[1].add(round(p[1], 4))
+
+    def _add_points(self, points, source, closed=False):
+        self._add_coordinates(points)
+        for p1, p2 in zip(points, points[1:] + (points[:1] if closed else [])):
+            self._add(_dist(p1, p2), source)
+
+    def _command(self, name, args, line):
+        self.commands.append((name, line))
+        points = [a for a in args if _is_point(a)]
+        numbers = [a for a in args if isinstance(a, float)]
+        source = f"第{line}行 {name}"
+        if name == 'UNDO' and args and isinstance(args[0], str):
+            self.undo_marks.append(args[0].upper())
+        elif name in ('LINE', 'PLINE'):
+            self._add_points(points, source)
+        elif name == 'RECTANG' and len(points) >= 2:
+            self._add_coordinates(points[:2])
+            self._add(abs(points[1][0] - points[0][0]), source)
+            self._add(abs(points[1][1] - points[0][1]), source)
+        elif name == 'CIRCLE' and points and numbers:
+            radius = numbers[0]
+            if any(isinstance(a, str) and _norm_command(a) == 'D' for a in args):
+                radius /= 2.0
+            self._add_round(radius, source)
+        elif name == 'ARC' and len(points) >= 2:
+            self._add_coordinates(points)
+            self._add_round(_dist(points[0], points[1]), source)
+        elif name == 'POLYGON' and points and len(numbers) >= 2:
+            sides, radius = numbers[0], numbers[-1]
+            self._add(radius, source)
+            self._add(radius * 2, source)
+            if sides >= 3:
+                self._add(radius * 2 * math.cos(math.pi / sides), source)
+                self._add(radius * 2 * math.sin(math.pi / sides), source)
+        elif name in ('DIMLINEAR', 'DIMALIGNED') and len(points) >= 2:
+            p1, p2 = points[0], points[1]
+            dx, dy = abs(p2[0] - p1[0]), abs(p2[1] - p1[1])
+            for value in (dx, dy, _dist(p1, p2)):
+                self._add(value, source)
+            text_index = next((i + 1 for i, a in enumerate(args) if isinstance(a, str) and _norm_command(a) == 'T'), None)
+            if text_index is not None and text_index < len(args):
+                self._dimension_text(args[text_index], dx, dy, line)
+        elif name == 'CYLINDER' and points and len(numbers) >= 2:
+            self._add_round(numbers[0], source)
+            self._add(abs(numbers[1]), source)
+        elif name == 'BOX' and points:
+            if len(points) >= 2:
+                for a, b in zip(points[0], points[1]):
+                    self._add(abs(b - a), source)
+            for value in numbers:
+                self._add(abs(value), source)
+        elif name == 'EXTRUDE' and numbers:
+            self._add(abs(numbers[-1]), source)
+
+    def _dimension_text(self, text, dx, dy, line):
+        """记录写死在标注文字中的数值（不含 '<>' 测量值占位符时）。"""
+        if not isinstance(text, str) or '<>' in text:
+            return
+        match = re.match(r'\s*(?:%%[cC])?\s*(\d+(?:\.\d+)?)', text)
+        if match:
+            self.dimension_texts.append((float(match.group(1)), (dx, dy), line))
+
+    # --- entmake ---
+    def _entmake(self, data, line):
+        if not isinstance(data, LispList):
+            return
+        groups = []
+        for item in data:
+            if not isinstance(item, LispList) or not item or not isinstance(item[0], int):
+                return
+            if len(item) == 3 and item[1] == '.':
+                groups.append((item[0], item[2]))
+            elif all(isinstance(v, (int, float)) for v in item[1:]):
+                groups.append((item[0], tuple(float(v) for v in item[1:])))
+        codes = {}
+        for code, value in groups:
+            codes.setdefault(code, []).append(value)
+        entity = str(codes.get(0, [''])[0]).upper()
+        source = f"第{line}行 entmake {entity}"
+        if entity == 'LINE' and 10 in codes and 11 in codes:
+            self._add_coordinates([codes[10][0], codes[11][0]])
+            self._add(_dist(codes[10][0], codes[11][0]), source)
+        elif entity == 'LWPOLYLINE':
+            closed = bool(int(codes.get(70, [0])[0] or 0) & 1)
+            self._add_points([p for p in codes.get(10, []) if _is_point(p)], source, closed)
+        elif entity in ('CIRCLE', 'ARC') and 40 in codes:
+            self._add_round(float(codes[40][0]), source)
+        elif entity == 'DIMENSION' and 13 in codes and 14 in codes:
+            p1, p2 = codes[13][0], codes[14][0]
+            dx, dy = abs(p2[0] - p1[0]), abs(p2[1] - p1[1])
+            for value in (dx, dy, _dist(p1, p2)):
+                self._add(value, source)
+            text = codes.get(1, [''])[0]
+            if isinstance(text, str) and '<>' not in text and re.search(r'\d', text):
+                self._dimension_text(text, dx, dy, line)
+
+    def has_round(self, value: float) -> bool:
+        """value 是某个圆形特征的半径或直径。"""
+        return any(math.isclose(r, value, rel_tol=1e-6, abs_tol=1e-4)
+                   or math.isclose(2 * r, value, rel_tol=1e-6, abs_tol=1e-4) for r in self.radii)
+
+    def has_length(self, value: float) -> bool:
+        """value 是某个几何尺寸，或是两条轮廓边（同方向坐标）之间的距离。"""
+        if any(math.isclose(v, value, rel_tol=1e-6, abs_tol=1e-4) for v, _ in self.lengths):
+            return True
+        for axis in self.coordinates:
+            if any(round(c + value, 4) in axis for c in axis):
+                return True
+        return False
+
+
+@functools.lru_cache(maxsize=None)
+def _runtime_defuns() -> frozenset:
+    """共享运行库 daedalus_runtime.lsp 中定义的函数名。"""
+    from lisp_runtime import get_runtime_source
+    collector = _GeometryCollector()
+    for expr in parse(get_runtime_source()):
+        collector.walk(expr)
+    return frozenset(collector.defuns)
+
+
+# ==============================================================================
+# JSON 关键尺寸与工程规则
+# ==============================================================================
+
+def _get(data: dict, path: str):
+    """按 'a.b.c' 路径取值，缺失时返回None。"""
+    value = data
+    for key in path.split('.'):
+        if not isinstance(value, dict) or key not in value:
+            return None
+        value = value[key]
+    return value
+
+
+def _num(data: dict, path: str):
+    value = _get(data, path)
+    return float(value) if isinstance(value, (int, float)) and not isinstance(value, bool) else None
+
+
+_SCREW_P = 'components.screw.parameters.'
+_NUT_P = 'components.nut.parameters.'
+_CUBOID_P = 'components.cuboid.parameters.'
+_CYL_P = 'components.cylinder.parameters.'
+
+# 每种形状必须在LISP几何中出现的关键尺寸：(JSON路径, 类型)。
+# 'round' 必须对应圆/圆弧/圆柱的半径或直径，'length' 可以是任意几何尺寸或两条边之间的距离。
+KEY_DIMENSIONS = {
+    'cylinder': [('parameters.radius', 'round'), ('parameters.height', 'length')],
+    'hexagonal_nut': [('parameters.side_length', 'length'), ('parameters.height', 'length'),
+                      ('parameters.hole.diameter', 'round')],
+    'hexagonal_prism': [('parameters.side_length', 'length'), ('parameters.height', 'length')],
+    'hexagonal_screw': [('parameters.head.side_length', 'length'), ('parameters.head.height', 'length'),
+                        ('parameters.shaft.diameter', 'round'), ('parameters.shaft.length', 'length')],
+    'cuboid': [('parameters.length', 'length'), ('parameters.width', 'length'), ('parameters.height', 'length')],
+    'screw_nut_assembly': [(_SCREW_P + 'head_width', 'length'), (_SCREW_P + 'head_height', 'length'),
+                           (_SCREW_P + 'shaft_diameter', 'round'), (_SCREW_P + 'shaft_length', 'length'),
+                           (_NUT_P + 'width', 'length'), (_NUT_P + 'height', 'length'),
+                           (_NUT_P + 'hole_diameter', 'round')],
+    'cuboid_cylinder_assembly': [(_CUBOID_P + 'length', 'length'), (_CUBOID_P + 'width', 'length'),
+                                 (_CUBOID_P + 'height', 'length'), (_CYL_P + 'radius', 'round'),
+                                 (_CYL_P + 'height', 'length')],
+    'socket_head_cap_screw': [('parameters.head_diameter', 'round'), ('parameters.head_height', 'length'),
+                              ('parameters.shaft_diameter', 'length'), ('parameters.shaft_length', 'length'),
+                              ('parameters.socket_width_across_flats', 'length')],
+}
+
+_SIZE_KEYWORDS = ('diameter', 'radius', 'length', 'height', 'width', 'depth', 'side', 'pitch')
+
+
+def _check_positive(params, path, errors):
+    """所有尺寸类参数必须为正数。"""
+    if not isinstance(params, dict):
+        return
+    for key, value in params.items():
+        full = f"{path}.{key}" if path else key
+        if isinstance(value, dict):
+            _check_positive(value, full, errors)
+        elif (isinstance(value, (int, float)) and not isinstance(value, bool)
+              and any(k in key.lower() for k in _SIZE_KEYWORDS) and value <= 0):
+            errors.append(f"参数 '{full}' 的值为 {value}，尺寸必须为正数。")
+
+
+def _nominal_diameter(name):
+    """从 'Hex Screw M10x50'、'GB/T 70.1 M6x26' 等名称中取出公称直径。"""
+    match = re.search(r'\bM(\d+(?:\.\d+)?)', name or '')
+    return float(match.group(1)) if match else None
+
+
+def _rules_hex_nut(data, errors, warnings):
+    side, hole = _num(data, 'parameters.side_length'), _num(data, 'parameters.hole.diameter')
+    if side and hole and hole >= 2 * side:
+        errors.append(f"螺母孔径 {hole} 不小于六角外形尺寸 {2 * side}，孔比零件本身还大。")
+    elif side and hole and hole >= math.sqrt(3) * side:
+        warnings.append(f"螺母孔径 {hole} 超过六角对边宽度 {math.sqrt(3) * side:.2f}，孔会切穿侧面。")
+
+
+def _rules_hex_screw(data, errors, warnings):
+    side, shaft = _num(data, 'parameters.head.side_length'), _num(data, 'parameters.shaft.diameter')
+    if side and shaft and shaft >= 2 * side:
+        errors.append(f"螺杆直径 {shaft} 不小于六角头外形尺寸 {2 * side}，头部无法承载。")
+
+
+def _rules_screw_nut(data, errors, warnings):
+    shaft, hole = _num(data, _SCREW_P + 'shaft_diameter'), _num(data, _NUT_P + 'hole_diameter')
+    head_width, nut_width = _num(data, _SCREW_P + 'head_width'), _num(data, _NUT_P + 'width')
+    shaft_length, nut_height = _num(data, _SCREW_P + 'shaft_length'), _num(data, _NUT_P + 'height')
+    if shaft and hole:
+        if shaft > hole:
+            errors.append(f"螺钉直径 {shaft} 大于螺母孔径 {hole}，螺钉无法装入螺母。")
+        elif not math.isclose(shaft, hole):
+            warnings.append(f"螺钉直径 {shaft} 与螺母孔径 {hole} 不一致，螺纹无法配合。")
+    if head_width and shaft and head_width <= shaft:
+        errors.append(f"螺钉头宽度 {head_width} 不大于螺杆直径 {shaft}。")
+    if nut_width and hole and hole >= nut_width:
+        errors.append(f"螺母孔径 {hole} 不小于螺母宽度 {nut_width}，孔比零件本身还大。")
+    if shaft_length and nut_height and nut_height > shaft_length:
+        warnings.append(f"螺母高度 {nut_height} 大于螺杆长度 {shaft_length}，螺钉无法穿过螺母。")
+    for part, size in (('screw', shaft), ('nut', hole)):
+        nominal = _nominal_diameter(_get(data, f'components.{part}.name'))
+        if nominal and size and not math.isclose(nominal, size):
+            warnings.append(f"零件名称中的公称直径 M{nominal:g} 与参数中的直径 {size} 不一致（{part}）。")
+
+
+def _rules_cuboid_cylinder(data, errors, warnings):
+    length, width = _num(data, _CUBOID_P + 'length'), _num(data, _CUBOID_P + 'width')
+    height, radius = _num(data, _CUBOID_P + 'height'), _num(data, _CYL_P + 'radius')
+    cyl_height = _num(data, _CYL_P + 'height')
+    if length and width and radius and 2 * radius >= min(length, width):
+        errors.append(f"圆柱直径 {2 * radius} 不小于长方体的最小边 {min(length, width)}，无法嵌入。")
+    if height and cyl_height and cyl_height <= height:
+        warnings.append(f"圆柱高度 {cyl_height} 不大于长方体高度 {height}，圆柱没有伸出长方体。")
+
+
+def _rules_socket_head(data, errors, warnings):
+    p = 'parameters.'
+    head_d, head_h = _num(data, p + 'head_diameter'), _num(data, p + 'head_height')
+    shaft_d, socket_s = _num(data, p + 'shaft_diameter'), _num(data, p + 'socket_width_across_flats')
+    socket_depth, thread_depth = _num(data, p + 'socket_depth'), _num(data, p + 'thread_depth')
+    if head_d and shaft_d and shaft_d >= head_d:
+        errors.append(f"螺杆直径 {shaft_d} 不小于头部直径 {head_d}。")
+    if head_d and socket_s and socket_s >= head_d:
+        errors.append(f"内六角对边宽度 {socket_s} 不小于头部直径 {head_d}，内六角会切穿头部。")
+    if head_h and socket_depth and socket_depth >= head_h:
+        errors.append(f"内六角深度 {socket_depth} 不小于头部高度 {head_h}，内六角会切穿头部。")
+    if shaft_d and thread_depth and 2 * thread_depth >= shaft_d:
+        errors.append(f"螺纹深度 {thread_depth} 的两倍不小于螺杆直径 {shaft_d}。")
+    nominal = _nominal_diameter(_get(data, p + 'nominal_designation'))
+    if nominal and shaft_d and not math.isclose(nominal, shaft_d):
+        warnings.append(f"规格 M{nominal:g} 与螺杆直径 {shaft_d} 不一致。")
+
+
+ENGINEERING_RULES = {
+    'hexagonal_nut': _rules_hex_nut,
+    'hexagonal_screw': _rules_hex_screw,
+    'screw_nut_assembly': _rules_screw_nut,
+    'cuboid_cylinder_assembly': _rules_cuboid_cylinder,
+    'socket_head_cap_screw': _rules_socket_head,
+}
+
+
+# ==============================================================================
+# 静态验证器
+# ==============================================================================
+
+class StaticValidator:
+    """
+    本地静态验证器，接口与 LLMValidator 一致：validate() 之后读取
+    overall_rating / errors / warnings / suggestions，或调用 print_report()。
+    """
+
+    def __init__(self):
+        self.errors = []
+        self.warnings = []
+        self.suggestions = []
+        self.overall_rating = "UNKNOWN"
+        self.raw_thought_process = ""
+
+    def check(self, lisp_code: str, json_data: dict) -> dict:
+        """执行全部本地检查，返回与LLM回复相同结构的字典。"""
+        self.errors, self.warnings, self.suggestions, notes = [], [], [], []
+
+        try:
+            program = parse(lisp_code)
+        except LispSyntaxError as e:
+            self.errors.append(f"语法错误（第{e.line}行）：{e}")
+            program = None
+
+        if program is not None:
+            collector = _GeometryCollector()
+            for expr in program:
+                collector.walk(expr)
+            notes.append(f"解析了 {len(program)} 个顶层表达式，{len(collector.commands)} 个command调用，"
+                         f"{collector.entmake_count} 个entmake调用，提取 {len(collector.lengths)} 个几何尺寸。")
+            self._check_structure(collector)
+            self._check_dimensions(collector, json_data, notes)
+            self._check_practices(collector)
+
+        shape = json_data.get('shape')
+        for params_path in ['parameters'] + [f"components.{k}.parameters" for k in json_data.get('components', {})]:
+            _check_positive(_get(json_data, params_path), params_path, self.errors)
+        rules = ENGINEERING_RULES.get(shape)
+        if rules:
+            rules(json_data, self.errors, self.warnings)
+            notes.append(f"已应用形状 '{shape}' 的工程规则。")
+
+        if self.errors:
+            self.overall_rating = RATING_FAIL
+        elif self.warnings:
+            self.overall_rating = RATING_WARN
+        else:
+            self.overall_rating = RATING_PASS
+        self.raw_thought_process = " ".join(notes)
+        return {
+            "overall_rating": self.overall_rating,
+            "analysis": {"errors": self.errors, "warnings": self.warnings, "suggestions": self.suggestions},
+            "raw_thought_process": self.raw_thought_process,
+        }
+
+    def _check_structure(self, c: _GeometryCollector):
+        if 'c:drawmyobject' not in c.defuns:
+            self.errors.append("没有定义命令函数 C:DrawMyObject，加载后无法运行 'DrawMyObject'。")
+        available = set(_BUILTINS) | c.defuns
+        if any(name.lower() == 'daedalus_runtime.lsp' for name in c.loads):
+            available |= _runtime_defuns()
+        if any(name.lower() != 'daedalus_runtime.lsp' for name in c.loads):
+            return  # 加载了其他文件，无法确定哪些函数可用
+        reported = set()
+        for name, line in c.calls:
+            if name not in available and name not in reported:
+                reported.add(name)
+                self.errors.append(f"第{line}行调用了未定义的函数 '{name}'。")
+
+    def _check_dimensions(self, c: _GeometryCollector, json_data: dict, notes: list):
+        paths = KEY_DIMENSIONS.get(json_data.get('shape'))
+        if not paths:
+            notes.append("未知形状，跳过JSON与LISP尺寸交叉核对。")
+            return
+        if not c.lengths:
+            notes.append("未能从LISP中提取几何尺寸，尺寸交叉核对无法进行。")
+            return
+        checked = 0
+        for path, kind in paths:
+            expected = _num(json_data, path)
+            if expected is None or expected <= 0:
+                continue
+            checked += 1
+            if kind == 'round' and not c.has_round(expected):
+                self.errors.append(f"JSON中的 '{path}' = {expected:g}，但LISP中没有对应半径/直径的圆形特征。")
+            elif kind == 'length' and not c.has_length(expected):
+                self.errors.append(f"JSON中的 '{path}' = {expected:g}，但在LISP几何中找不到对应的尺寸。")
+        notes.append(f"核对了 {checked} 个关键尺寸。")
+        for text_value, (dx, dy), line in c.dimension_texts:
+            # 线性标注可能量取水平或竖直方向，文字与其中之一相符即可（按两位小数取整）
+            if not any(math.isclose(text_value, m, abs_tol=0.006) for m in (dx, dy, math.hypot(dx, dy))):
+                self.warnings.append(f"第{line}行的标注文字 {text_value:g} 与标注点之间的实际距离 "
+                                     f"({dx:.2f}, {dy:.2f}) 不一致。")
+
+    def _check_practices(self, c: _GeometryCollector):
+        names = [name for name, _ in c.commands]
+        if c.undo_marks.count('BEGIN') != c.undo_marks.count('END'):
+            self.warnings.append("UNDO Begin 与 UNDO End 没有成对出现，出错后无法一次撤销整个绘图。")
+        cmdecho = [value for name, value in c.setvars if name == 'CMDECHO']
+        if cmdecho and cmdecho[-1] == 0.0:
+            self.warnings.append("CMDECHO 被设为0后没有恢复。")
+        draws_by_command = any(n in ('LINE', 'PLINE', 'RECTANG', 'CIRCLE', 'ARC', 'POLYGON') for n in names)
+        if draws_by_command and not any(name == 'OSMODE' for name, _ in c.setvars):
+            self.suggestions.append("通过command输入点时运行中的对象捕捉(OSMODE)可能使点偏移，"
+                                    "建议绘图前临时将OSMODE设为0，或改用entmake输出模式。")
+
+    def validate(self, lisp_code: str, json_data: dict) -> bool:
+        """执行本地检查；存在错误时返回False。"""
+        self.check(lisp_code, json_data)
+        return self.overall_rating != RATING_FAIL
+
+    def print_report(self):
+        """打印本地静态检查报告。"""
+        print("\n本地静态检查报告:")
+        print("=" * 40)
+        print(f"总体评级: {self.overall_rating}")
+        print("=" * 40)
+
+        if not self.errors and not self.warnings and not self.suggestions:
+            print("✅ 本地检查通过，未发现任何问题。")
+            return
+
+        if self.errors:
+            print("\n--- 🔴 错误 (Errors) ---")
+            for item in self.errors:
+                print(f"- {item}")
+
+        if self.warnings:
+            print("\n--- 🟡 警告 (Warnings) ---")
+            for item in self.warnings:
+                print(f"- {item}")
+
+        if self.suggestions:
+            print("\n--- 💡 建议 (Suggestions) ---")
+            for item in self.suggestions:
+                print(f"- {item}")
+
+        print("=" * 40)
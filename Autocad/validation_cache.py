@@ -0,0 +1,109 @@
+# validation_cache.py
+"""
+LLM验证结论的磁盘缓存（按内容寻址）。
+
+缓存键是 规范化JSON规范 + 生成的LISP + 模型名称 + Prompt模板版本 的哈希，
+任何一项变化都会得到新的键，因此缓存永远不需要手动失效。
+每个条目是缓存目录下的一个 <键>.json 文件，文件的修改时间即最近使用时间：
+  - 命中时刷新修改时间（LRU）；
+  - 超过 ttl_seconds 的条目视为过期并删除（TTL）；
+  - 条目数超过 max_entries 时删除最久未使用的条目。
+"""
+
+import json
+import os
+import time
+
+from spec_hash import spec_hash
+
+DEFAULT_MAX_ENTRIES = 1024
+DEFAULT_TTL_SECONDS = 30 * 24 * 3600  # 30天
+
+# 缓存中保存的字段，与 LLMValidator 的结果一致
+CACHED_FIELDS = ("overall_rating", "errors", "warnings", "suggestions")
+
+
+def validation_cache_key(json_data: dict, lisp_code: str, model_name: str, prompt_version) -> str:
+    """计算一次验证请求的缓存键。"""
+    return spec_hash(json_data, lisp_code, model_name, f"prompt-v{prompt_version}")
+
+
+class ValidationCache:
+    """有大小上限（LRU）和有效期（TTL）的磁盘验证缓存，可被多个进程共享。"""
+
+    def __init__(self, directory: str, max_entries: int = DEFAULT_MAX_ENTRIES,
+                 ttl_seconds: float = DEFAULT_TTL_SECONDS):
+        if max_entries < 1:
+            raise ValueError("max_entries 必须大于0。")
+        self.directory = directory
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.hits = 0
+        self.misses = 0
+        os.makedirs(directory, exist_ok=True)
+
+    def _path(self, key: str) -> str:
+        return os.path.join(self.directory, f"{key}.json")
+
+    def get(self, key: str):
+        """返回缓存的结论字典；未命中或已过期时返回None。"""
+        path = self._path(key)
+        try:
+            age = time.time() - os.path.getmtime(path)
+            if age > self.ttl_seconds:
+                os.remove(path)
+                raise FileNotFoundError(path)
+            with open(path, 'r', encoding='utf-8') as f:
+                entry = json.load(f)
+            os.utime(path)  # 刷新最近使用时间
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+        self.hits += 1
+        return {field: entry.get(field) for field in CACHED_FIELDS}
+
+    def put(self, key: str, result: dict):
+        """写入一条结论（先写临时文件再原子替换），然后按LRU淘汰多余条目。"""
+        entry = {field: result.get(field) for field in CACHED_FIELDS}
+        entry["created_at"] = time.time()
+        path = self._path(key)
+        tmp_path = f"{path}.{os.getpid()}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp_path, path)
+        self._evict()
+
+    def _entries(self) -> list:
+        """(修改时间, 路径) 列表，从最久未使用到最近使用。"""
+        entries = []
+        for name in os.listdir(self.directory):
+            if name.endswith('.json'):
+                path = os.path.join(self.directory, name)
+                try:
+                    entries.append((os.path.getmtime(path), path))
+                except OSError:
+                    continue
+        entries.sort()
+        return entries
+
+    def _evict(self):
+        entries = self._entries()
+        now = time.time()
+        expired = [path for mtime, path in entries if now - mtime > self.ttl_seconds]
+        live = [path for mtime, path in entries if now - mtime <= self.ttl_seconds]
+        for path in expired + live[:max(0, len(live) - self.max_entries)]:
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def clear(self):
+        """删除全部缓存条目。"""
+        for _, path in self._entries():
+            try:
+                os.remove(path)
+            except OSError:
+                pass
+
+    def __len__(self):
+        return len(self._entries())
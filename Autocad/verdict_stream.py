@@ -0,0 +1,143 @@
+# verdict_stream.py
+"""
+LLM审查结论的增量JSON解析器，用于流式（stream=True）验证。
+
+模型逐块返回JSON文本；解析器在每个字符串值完整到达时立即报告它的路径和值，
+例如 ('overall_rating',) -> "失败"、('analysis', 'errors', 0) -> "..."，
+并记录哪些数组/对象已经结束。这样 overall_rating 和 errors 一出现就可以显示，
+评级为"失败"且错误列表已完整时即可提前取消请求，不再为后面的 raw_thought_process 付费。
+
+JSON之前的任何文本（如 ```json 代码块标记）都会被跳过。
+"""
+
+import json
+
+RATING_PATH = ('overall_rating',)
+ERRORS_PATH = ('analysis', 'errors')
+
+def verdict_from_json(data: dict) -> dict:
+    """从完整的回复JSON对象中取出结论字段。"""
+    analysis = data.get("analysis", {})
+    return {
+        "overall_rating": data.get("overall_rating", "UNKNOWN"),
+        "errors": analysis.get("errors", []),
+        "warnings": analysis.get("warnings", []),
+        "suggestions": analysis.get("suggestions", []),
+    }
+
+
+def extract_json_text(text: str) -> str:
+    """去掉回复中JSON对象前后的文本（如 ```json 代码块标记）。"""
+    start, end = text.find('{'), text.rfind('}')
+    return text[start:end + 1] if 0 <= start < end else text
+
+
+_ESCAPES = {'"': '"', '\\': '\\', '/': '/', 'b': '\b', 'f': '\f', 'n': '\n', 'r': '\r', 't': '\t'}
+
+
+class StreamingVerdictParser:
+    """逐块喂入JSON文本的增量解析器；只关心字符串值，数字/布尔值被跳过。"""
+
+    def __init__(self):
+        self.values = {}       # 路径 -> 已完整的字符串值
+        self.closed = set()    # 已结束的数组/对象的路径
+        self.done = False      # 根对象已结束
+        self._started = False
+        self._stack = []       # 每层: [类型('obj'/'arr'), 当前键或下标, 是否在等待键]
+        self._string = None    # 正在读取的字符串内容（None 表示不在字符串中）
+        self._escape = None    # 转义序列的缓冲
+        self._chunks = []      # 收到的全部文本块
+
+    def _path(self):
+        return tuple(frame[1] for frame in self._stack)
+
+    def feed(self, chunk: str) -> list:
+        """喂入一块文本，返回这块中完整到达的 (路径, 字符串值) 列表。"""
+        self._chunks.append(chunk)
+        events = []
+        for ch in chunk:
+            if self.done:
+                break
+            if self._string is not None:
+                self._string_char(ch, events)
+            elif not self._started:
+                if ch == '{':
+                    self._started = True
+                    self._stack.append(['obj', None, True])
+            elif ch == '"':
+                self._string = []
+            elif ch in '{[':
+                self._stack.append(['obj', None, True] if ch == '{' else ['arr', 0, False])
+            elif ch in '}]':
+                self._stack.pop()
+                if not self._stack:
+                    self.done = True
+                else:
+                    self.closed.add(self._path())
+            elif ch == ',':
+                frame = self._stack[-1]
+                if frame[0] == 'arr':
+                    frame[1] += 1
+                else:
+                    frame[2] = True
+            elif ch == ':':
+                self._stack[-1][2] = False
+        return events
+
+    def _string_char(self, ch, events):
+        if self._escape is not None:
+            self._escape += ch
+            if self._escape.startswith('u'):
+                if len(self._escape) == 5:
+                    self._string.append(chr(int(self._escape[1:], 16)))
+                    self._escape = None
+            else:
+                self._string.append(_ESCAPES.get(ch, ch))
+                self._escape = None
+        elif ch == '\\':
+            self._escape = ''
+        elif ch == '"':
+            value, self._string = ''.join(self._string), None
+            frame = self._stack[-1]
+            if frame[0] == 'obj' and frame[2]:
+                frame[1] = value
+            else:
+                path = self._path()
+                self.values[path] = value
+                events.append((path, value))
+        else:
+            self._string.append(ch)
+
+    # --- 便捷访问 ---
+    @property
+    def text(self) -> str:
+        return ''.join(self._chunks)
+
+    @property
+    def overall_rating(self):
+        return self.values.get(RATING_PATH)
+
+    def strings(self, path: tuple) -> list:
+        """path 下数组中已完整到达的字符串（按下标排序）。"""
+        n = len(path)
+        items = [(key[n], value) for key, value in self.values.items()
+                 if len(key) == n + 1 and key[:n] == path and isinstance(key[n], int)]
+        return [value for _, value in sorted(items)]
+
+    def verdict(self) -> dict:
+        """由已解析的部分组成的结论字典；完整结束时以标准JSON解析结果为准。"""
+        if self.done:
+            try:
+                return verdict_from_json(json.loads(extract_json_text(self.text)))
+            except ValueError:
+                pass
+        return {
+            "overall_rating": self.overall_rating or "UNKNOWN",
+            "errors": self.strings(ERRORS_PATH),
+            "warnings": self.strings(('analysis', 'warnings')),
+            "suggestions": self.strings(('analysis', 'suggestions')),
+        }
+
+    def is_fatal(self, fatal_rating: str) -> bool:
+        """评级为 fatal_rating 且错误列表已经完整（或根本没有错误列表且分析已结束）。"""
+        return self.overall_rating == fatal_rating and (ERRORS_PATH in self.closed or ('analysis',) in self.closed)
@@ -1,8 +1,18 @@
 # main_generator.py 
+import argparse
 import json
 import os
+import sys
 import textwrap
 
+# 生成服务等通过文件路径加载本模块时，Blender 目录不一定在 sys.path 上
+BLENDER_DIR = os.path.dirname(os.path.abspath(__file__))
+if BLENDER_DIR not in sys.path:
+    sys.path.insert(0, BLENDER_DIR)
+import tessellation
+
+MESH_EMITTERS = ('ops', 'data')
+
 def get_blender_script_header():
     
     return textwrap.dedent("""
@@ -22,11 +32,17 @@ clear_scene()
 """)
 
 
+def _vertices(radius, part_size, opts):
+    """圆柱的 vertices 参数：指定了 LOD 时按弦高误差计算段数（见 tessellation.py），否则沿用默认的 32 段。"""
+    settings = tessellation.policy(opts)
+    return "" if settings is None else f"vertices={tessellation.segments(radius, part_size, settings)}, "
+
+
 # --- 所有单个零件的生成函数 (保持不变，为简洁省略) ---
 def generate_cylinder_code(params, opts):
     radius, height = params['radius'], params['height'];
     ix, iy = opts.get('insertion_point', [0, 0])
-    return f"bpy.ops.mesh.primitive_cylinder_add(radius={radius}, depth={height}, location=({ix}, {iy}, {height / 2.0}))"
+    return f"bpy.ops.mesh.primitive_cylinder_add({_vertices(radius, max(2 * radius, height), opts)}radius={radius}, depth={height}, location=({ix}, {iy}, {height / 2.0}))"
 
 
 def generate_cuboid_code(params, opts):
@@ -48,8 +64,9 @@ def generate_hex_screw_code(params, opts):
     ix, iy = opts.get('insertion_point', [0, 0])
     head_radius, head_height = head_p['side_length'], head_p['height']
     shaft_radius, shaft_len = shaft_p['diameter'] / 2.0, shaft_p['length']
+    screw_size = max(2 * head_radius, 2 * shaft_radius, shaft_len + head_height)
     code = f"bpy.ops.mesh.primitive_cylinder_add(vertices=6, radius={head_radius}, depth={head_height}, location=({ix}, {iy}, {shaft_len + head_height / 2.0})); head_obj = bpy.context.active_object\n"
-    code += f"bpy.ops.mesh.primitive_cylinder_add(radius={shaft_radius}, depth={shaft_len}, location=({ix}, {iy}, {shaft_len / 2.0})); shaft_obj = bpy.context.active_object\n"
+    code += f"bpy.ops.mesh.primitive_cylinder_add({_vertices(shaft_radius, screw_size, opts)}radius={shaft_radius}, depth={shaft_len}, location=({ix}, {iy}, {shaft_len / 2.0})); shaft_obj = bpy.context.active_object\n"
     code += "bpy.ops.object.select_all(action='DESELECT'); head_obj.select_set(True); shaft_obj.select_set(True); bpy.context.view_layer.objects.active = head_obj; bpy.ops.object.join()"
     return code
 
@@ -59,7 +76,7 @@ def generate_hex_nut_code(params, opts):
     ix, iy = opts.get('insertion_point', [0, 0])
     nut_radius, hole_radius = side_length, hole_dia / 2.0
     code = f"bpy.ops.mesh.primitive_cylinder_add(vertices=6, radius={nut_radius}, depth={height}, location=({ix}, {iy}, {height / 2.0})); nut_obj = bpy.context.active_object\n"
-    code += f"bpy.ops.mesh.primitive_cylinder_add(radius={hole_radius}, depth={height * 1.2}, location=({ix}, {iy}, {height / 2.0})); tool_obj = bpy.context.active_object\n"
+    code += f"bpy.ops.mesh.primitive_cylinder_add({_vertices(hole_radius, max(2 * nut_radius, height), opts)}radius={hole_radius}, depth={height * 1.2}, location=({ix}, {iy}, {height / 2.0})); tool_obj = bpy.context.active_object\n"
     code += "mod = nut_obj.modifiers.new(name='Hole', type='BOOLEAN'); mod.operation = 'DIFFERENCE'; mod.object = tool_obj; bpy.context.view_layer.objects.active = nut_obj; bpy.ops.object.modifier_apply(modifier=mod.name); bpy.data.objects.remove(tool_obj, do_unlink=True)"
     return code
 
@@ -71,14 +88,17 @@ def generate_screw_nut_assembly_code(params_dict, opts):
     screw_shaft_radius, screw_shaft_len = screw_params['shaft']['diameter'] / 2.0, screw_params['shaft']['length']
     nut_radius, nut_height, nut_hole_radius = nut_params['side_length'], nut_params['height'], nut_params['hole'][
                                                                                                    'diameter'] / 2.0
+    shaft_vertices = _vertices(screw_shaft_radius, max(2 * screw_head_radius, 2 * screw_shaft_radius,
+                                                        screw_shaft_len + screw_head_height), opts)
+    hole_vertices = _vertices(nut_hole_radius, max(2 * nut_radius, nut_height), opts)
     return textwrap.dedent(f"""
 # --- 创建螺钉-螺母装配体 ---
 print("正在创建装配体...")
 bpy.ops.mesh.primitive_cylinder_add(vertices=6, radius={screw_head_radius}, depth={screw_head_height}, location=({ix}, {iy}, {screw_shaft_len + screw_head_height / 2.0})); head_obj = bpy.context.active_object
-bpy.ops.mesh.primitive_cylinder_add(radius={screw_shaft_radius}, depth={screw_shaft_len}, location=({ix}, {iy}, {screw_shaft_len / 2.0})); shaft_obj = bpy.context.active_object
+bpy.ops.mesh.primitive_cylinder_add({shaft_vertices}radius={screw_shaft_radius}, depth={screw_shaft_len}, location=({ix}, {iy}, {screw_shaft_len / 2.0})); shaft_obj = bpy.context.active_object
 bpy.ops.object.select_all(action='DESELECT'); head_obj.select_set(True); shaft_obj.select_set(True); bpy.context.view_layer.objects.active = head_obj; bpy.ops.object.join(); screw_obj = bpy.context.active_object; screw_obj.name = "Screw"
 bpy.ops.mesh.primitive_cylinder_add(vertices=6, radius={nut_radius}, depth={nut_height}, location=({ix}, {iy}, 0)); nut_body_obj = bpy.context.active_object
-bpy.ops.mesh.primitive_cylinder_add(radius={nut_hole_radius}, depth={nut_height * 1.2}, location=({ix}, {iy}, 0)); tool_obj = bpy.context.active_object
+bpy.ops.mesh.primitive_cylinder_add({hole_vertices}radius={nut_hole_radius}, depth={nut_height * 1.2}, location=({ix}, {iy}, 0)); tool_obj = bpy.context.active_object
 mod = nut_body_obj.modifiers.new(name='Hole', type='BOOLEAN'); mod.operation = 'DIFFERENCE'; mod.object = tool_obj; bpy.context.view_layer.objects.active = nut_body_obj; bpy.ops.object.modifier_apply(modifier=mod.name); bpy.data.objects.remove(tool_obj, do_unlink=True); nut_obj = nut_body_obj; nut_obj.name = "Nut"
 nut_obj.location.z = {screw_shaft_len - nut_height - 5.0}
 print("装配体创建完毕。")
@@ -93,6 +113,8 @@ def generate_cuboid_cylinder_assembly_code(params_dict, opts):
     cyl_r, cyl_h = cylinder_params['radius'], cylinder_params['height']
     center_x = ix + cuboid_l / 2.0;
     center_y = iy + cuboid_w / 2.0
+    hole_vertices = _vertices(cyl_r, max(cuboid_l, cuboid_w, cuboid_h), opts)
+    cyl_vertices = _vertices(cyl_r, max(2 * cyl_r, cyl_h), opts)
     return textwrap.dedent(f"""
 # --- 创建长方体-圆柱装配体 ---
 print("正在创建装配体...")
@@ -101,12 +123,12 @@ print("  - 创建并正确缩放长方体...")
 bpy.ops.mesh.primitive_cube_add(size=2, location=({center_x}, {center_y}, {cuboid_h / 2.0})); cuboid_obj = bpy.context.active_object; cuboid_obj.name = "Cuboid"
 cuboid_obj.scale = ({cuboid_l / 2.0}, {cuboid_w / 2.0}, {cuboid_h / 2.0})
 bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
-bpy.ops.mesh.primitive_cylinder_add(radius={cyl_r}, depth={cuboid_h * 1.2}, location=({center_x}, {center_y}, {cuboid_h / 2.0})); tool_obj = bpy.context.active_object
+bpy.ops.mesh.primitive_cylinder_add({hole_vertices}radius={cyl_r}, depth={cuboid_h * 1.2}, location=({center_x}, {center_y}, {cuboid_h / 2.0})); tool_obj = bpy.context.active_object
 mod = cuboid_obj.modifiers.new(name='Hole', type='BOOLEAN'); mod.operation = 'DIFFERENCE'; mod.object = tool_obj
 bpy.context.view_layer.objects.active = cuboid_obj; bpy.ops.object.modifier_apply(modifier=mod.name); bpy.data.objects.remove(tool_obj, do_unlink=True)
 # --- 2. 创建独立的圆柱零件 ---
 print("  - 创建圆柱零件...")
-bpy.ops.mesh.primitive_cylinder_add(radius={cyl_r}, depth={cyl_h}, location=({center_x}, {center_y}, {cyl_h / 2.0})); cylinder_obj = bpy.context.active_object; cylinder_obj.name = "Cylinder"
+bpy.ops.mesh.primitive_cylinder_add({cyl_vertices}radius={cyl_r}, depth={cyl_h}, location=({center_x}, {center_y}, {cyl_h / 2.0})); cylinder_obj = bpy.context.active_object; cylinder_obj.name = "Cylinder"
 mat_blue = bpy.data.materials.new(name="Blue"); mat_blue.diffuse_color = (0.1, 0.2, 0.8, 1.0)
 if len(cylinder_obj.data.materials) == 0: cylinder_obj.data.materials.append(None)
 cylinder_obj.data.materials[0] = mat_blue
@@ -148,6 +170,11 @@ def generate_full_assembly_code(params_dict, opts):
     center_x = ix
     center_y = iy
 
+    # 圆柱面的段数（未指定 LOD 时为空，即默认 32 段）
+    shaft_vertices = _vertices(screw_shaft_r, max(2 * screw_head_r, 2 * screw_shaft_r, screw_shaft_l + screw_head_h), opts)
+    nut_hole_vertices = _vertices(nut_hole_r, max(2 * nut_r, nut_h), opts)
+    cuboid_hole_vertices = _vertices(screw_shaft_r, max(cuboid_l, cuboid_w, cuboid_h), opts)
+
     # 使用 textwrap.dedent 和 f-string 生成代码
     return textwrap.dedent(f"""
 # --- 创建最终装配体 (长方体在螺钉末端) ---
@@ -158,7 +185,7 @@ print("正在创建完整装配体 (新版)...")
 print("  - 1. 创建螺钉...")
 bpy.ops.mesh.primitive_cylinder_add(vertices=6, radius={screw_head_r}, depth={screw_head_h}, location=(0, 0, 0))
 head_obj = bpy.context.active_object
-bpy.ops.mesh.primitive_cylinder_add(radius={screw_shaft_r}, depth={screw_shaft_l}, location=(0, 0, 0))
+bpy.ops.mesh.primitive_cylinder_add({shaft_vertices}radius={screw_shaft_r}, depth={screw_shaft_l}, location=(0, 0, 0))
 shaft_obj = bpy.context.active_object
 
 # 先移动部件到相对于原点的位置，再合并
@@ -184,7 +211,7 @@ bpy.ops.object.origin_set(type='ORIGIN_CURSOR', center='MEDIAN')
 print("  - 2. 创建螺母...")
 bpy.ops.mesh.primitive_cylinder_add(vertices=6, radius={nut_r}, depth={nut_h}, location=(0,0,0))
 nut_body_obj = bpy.context.active_object
-bpy.ops.mesh.primitive_cylinder_add(radius={nut_hole_r}, depth={nut_h * 1.2}, location=(0,0,0))
+bpy.ops.mesh.primitive_cylinder_add({nut_hole_vertices}radius={nut_hole_r}, depth={nut_h * 1.2}, location=(0,0,0))
 tool_obj_nut = bpy.context.active_object
 mod_nut = nut_body_obj.modifiers.new(name='Hole', type='BOOLEAN')
 mod_nut.operation = 'DIFFERENCE'
@@ -203,7 +230,7 @@ cuboid_obj = bpy.context.active_object
 cuboid_obj.name = "Cuboid_Block"
 cuboid_obj.scale = ({cuboid_l / 2.0}, {cuboid_w / 2.0}, {cuboid_h / 2.0})
 bpy.ops.object.transform_apply(location=False, rotation=False, scale=True)
-bpy.ops.mesh.primitive_cylinder_add(radius={screw_shaft_r}, depth={cuboid_h * 1.5}, location=(0,0,0))
+bpy.ops.mesh.primitive_cylinder_add({cuboid_hole_vertices}radius={screw_shaft_r}, depth={cuboid_h * 1.5}, location=(0,0,0))
 tool_obj_cuboid = bpy.context.active_object
 mod = cuboid_obj.modifiers.new(name='Hole', type='BOOLEAN')
 mod.operation = 'DIFFERENCE'
@@ -268,6 +295,12 @@ def generate_cylinder_screw_nut_assembly_code(params_dict, opts):
     center_x = ix
     center_y = iy
 
+    # 圆柱面的段数（未指定 LOD 时为空，即默认 32 段）
+    cyl_vertices = _vertices(cyl_r, max(2 * cyl_r, cyl_h), opts)
+    cyl_hole_vertices = _vertices(screw_shaft_r, max(2 * cyl_r, cyl_h), opts)
+    shaft_vertices = _vertices(screw_shaft_r, max(2 * screw_head_r, 2 * screw_shaft_r, screw_shaft_l + screw_head_h), opts)
+    nut_hole_vertices = _vertices(screw_shaft_r, max(2 * nut_r, nut_h), opts)
+
     return textwrap.dedent(f"""
 # --- 创建 螺钉-圆柱-螺母 装配体 ---
 print("正在创建 螺钉-圆柱-螺母 装配体...")
@@ -278,11 +311,11 @@ print("正在创建 螺钉-圆柱-螺母 装配体...")
 # --- 1. 创建带孔的中心圆柱体 ---
 print("  - 1. 创建带孔圆柱...")
 # 创建圆柱主体，使其底部在 Z=0
-bpy.ops.mesh.primitive_cylinder_add(radius={cyl_r}, depth={cyl_h}, location=(0, 0, {cyl_h / 2.0}))
+bpy.ops.mesh.primitive_cylinder_add({cyl_vertices}radius={cyl_r}, depth={cyl_h}, location=(0, 0, {cyl_h / 2.0}))
 main_cyl_obj = bpy.context.active_object
 main_cyl_obj.name = "Central_Cylinder"
 # 创建打孔工具 (孔径与螺杆匹配)
-bpy.ops.mesh.primitive_cylinder_add(radius={screw_shaft_r}, depth={cyl_h * 1.2}, location=(0, 0, {cyl_h / 2.0}))
+bpy.ops.mesh.primitive_cylinder_add({cyl_hole_vertices}radius={screw_shaft_r}, depth={cyl_h * 1.2}, location=(0, 0, {cyl_h / 2.0}))
 tool_obj_cyl = bpy.context.active_object
 # 执行布尔打孔
 mod = main_cyl_obj.modifiers.new(name='Hole', type='BOOLEAN')
@@ -297,7 +330,7 @@ bpy.data.objects.remove(tool_obj_cyl, do_unlink=True)
 print("  - 2. 创建完整螺钉...")
 bpy.ops.mesh.primitive_cylinder_add(vertices=6, radius={screw_head_r}, depth={screw_head_h}, location=(0, 0, 0))
 head_obj = bpy.context.active_object
-bpy.ops.mesh.primitive_cylinder_add(radius={screw_shaft_r}, depth={screw_shaft_l}, location=(0, 0, 0))
+bpy.ops.mesh.primitive_cylinder_add({shaft_vertices}radius={screw_shaft_r}, depth={screw_shaft_l}, location=(0, 0, 0))
 shaft_obj = bpy.context.active_object
 # 先移动部件到相对于原点的位置，再合并
 head_obj.location.z = {screw_shaft_l + screw_head_h / 2.0}
@@ -316,7 +349,7 @@ screw_obj.name = "Full_Screw"
 print("  - 3. 创建螺母...")
 bpy.ops.mesh.primitive_cylinder_add(vertices=6, radius={nut_r}, depth={nut_h}, location=(0, 0, 0))
 nut_body_obj = bpy.context.active_object
-bpy.ops.mesh.primitive_cylinder_add(radius={screw_shaft_r}, depth={nut_h * 1.2}, location=(0, 0, 0))
+bpy.ops.mesh.primitive_cylinder_add({nut_hole_vertices}radius={screw_shaft_r}, depth={nut_h * 1.2}, location=(0, 0, 0))
 tool_obj_nut = bpy.context.active_object
 mod_nut = nut_body_obj.modifiers.new(name='Hole', type='BOOLEAN')
 mod_nut.operation = 'DIFFERENCE'
@@ -355,6 +388,147 @@ bpy.context.view_layer.objects.active = main_cyl_obj
 
 print("\\n脚本执行完成。请在3D视图中按 '.' (小键盘) 来聚焦。")
 """)
+# ==============================================================================
+# 生成器注册表
+# ==============================================================================
+# 单个零件的生成函数接收 (parameters, drawing_options)；
+# 装配体的生成函数接收 ({组件名: 组件规格}, drawing_options)。
+PART_GENERATORS = {
+    'cylinder': generate_cylinder_code,
+    'cuboid': generate_cuboid_code,
+    'hexagonal_prism': generate_hex_prism_code,
+    'hexagonal_screw': generate_hex_screw_code,
+    'hexagonal_nut': generate_hex_nut_code,
+}
+ASSEMBLY_GENERATORS = {
+    'screw_nut_assembly': generate_screw_nut_assembly_code,
+    'cuboid_cylinder_assembly': generate_cuboid_cylinder_assembly_code,
+    'full_assembly': generate_full_assembly_code,
+    'cyl_head_nut_assembly': generate_cylinder_screw_nut_assembly_code,
+}
+
+
+INSTANCE_HELPER = textwrap.dedent("""
+
+# --- 关联复制 (instances) ---
+def link_duplicate(source_name, offset):
+    # 新对象与原对象共用同一个网格数据块，只有位置不同；Blender 自动命名为 原名.001、原名.002 ...
+    source = bpy.data.objects.get(source_name)
+    if source is None:
+        print(f"警告: instances 引用了不存在的对象 '{source_name}'，已跳过。")
+        return None
+    dup = bpy.data.objects.new(source_name, source.data)
+    dup.location = [a + b for a, b in zip(source.location, offset)]
+    bpy.context.collection.objects.link(dup)
+    dup.select_set(True)
+    return dup
+
+""")
+
+
+def generate_instances_code(instances):
+    """drawing_options 中 "instances" 的每一项 {"object": 对象名, "offset": [dx, dy, dz]} 生成一个关联副本。"""
+    if not instances:
+        return ""
+    calls = [f"link_duplicate({inst['object']!r}, {tuple(float(v) for v in inst.get('offset', (0, 0, 0)))!r})"
+             for inst in instances]
+    return INSTANCE_HELPER + "\n".join(calls) + "\n"
+
+
+def _scene_builder():
+    # 延迟导入：NumPy 只在数据模式下才加载
+    import scene_builder
+    return scene_builder
+
+
+def generate_script(shape, spec):
+    """
+    根据内存中的规格生成完整的Blender脚本，不读写任何文件（供常驻生成服务调用）。
+    零件规格含 'parameters'；装配体规格含 'components'，每个组件是一份零件规格。
+    drawing_options 中 "mesh_emitter": "data" 时，网格由预先计算的顶点/面数组通过数据 API 构建，
+    不调用 bpy.ops（见 scene_builder.py）；默认 "ops" 使用 bpy.ops 算子。
+    "instances" 列出的副本是与原对象共用网格的关联复制，内存与构建时间只随不同零件的数量增长。
+    """
+    opts = spec.get('drawing_options') or {"insertion_point": [0, 0]}
+    mesh_emitter = opts.get('mesh_emitter', 'ops')
+    if mesh_emitter not in MESH_EMITTERS:
+        raise ValueError(f"未知的 mesh_emitter '{mesh_emitter}'，可选: {', '.join(MESH_EMITTERS)}。")
+    if mesh_emitter == 'data':
+        return _scene_builder().generate_data_script(shape, spec)
+    if shape in PART_GENERATORS:
+        core_code = PART_GENERATORS[shape](spec['parameters'], opts)
+    elif shape in ASSEMBLY_GENERATORS:
+        core_code = ASSEMBLY_GENERATORS[shape](spec['components'], opts)
+    else:
+        raise KeyError(f"没有名为 '{shape}' 的Blender生成函数。")
+    return get_blender_script_header() + core_code + generate_instances_code(opts.get('instances'))
+
+
+# ==============================================================================
+# 菜单配置
+# ==============================================================================
+# 菜单选项 -> 配置文件、生成函数与数据类型（基准测试 bench_generators.py 也遍历这个字典）
+config = {
+    '1': {'file': 'cylinder_data.json', 'generator': generate_cylinder_code, 'type': 'part', 'shape': 'cylinder'},
+    '2': {'file': 'part_config.json', 'generator': generate_cuboid_code, 'type': 'part', 'shape': 'cuboid'},
+    '3': {'file': 'hex_prism_data.json', 'generator': generate_hex_prism_code, 'type': 'part',
+          'shape': 'hexagonal_prism'},
+    '4': {'file': 'hex_screw.json', 'generator': generate_hex_screw_code, 'type': 'part', 'shape': 'hexagonal_screw'},
+    '5': {'file': 'hex_nut_data.json', 'generator': generate_hex_nut_code, 'type': 'part', 'shape': 'hexagonal_nut'},
+    '6': {'file': 'screw_nut_assembly.json', 'generator': generate_screw_nut_assembly_code,
+          'type': 'assembly_screw_nut', 'shape': 'screw_nut_assembly'},
+    '7': {'file': 'cuboid_cylinder_assembly.json', 'generator': generate_cuboid_cylinder_assembly_code,
+          'type': 'assembly_cuboid_cyl', 'shape': 'cuboid_cylinder_assembly'},
+    '8': {'file': 'full_assembly.json', 'generator': generate_full_assembly_code, 'type': 'assembly_full',
+          'shape': 'full_assembly'},
+    '9': {'file': 'cyl_head_nut_assembly.json', 'generator': generate_cylinder_screw_nut_assembly_code,
+          'type': 'assembly_cyl_head_nut', 'shape': 'cyl_head_nut_assembly'}
+}
+
+# 装配体的每个组件从哪个零件配置文件读取
+ASSEMBLY_COMPONENT_FILES = {
+    'assembly_screw_nut': {'screw': 'hex_screw.json', 'nut': 'hex_nut_data.json'},
+    'assembly_cuboid_cyl': {'cuboid': 'part_config.json', 'cylinder': 'cylinder_data.json'},
+    'assembly_full': {'cuboid': 'part_config.json', 'screw': 'hex_screw.json', 'nut': 'hex_nut_data.json'},
+    'assembly_cyl_head_nut': {'cylinder': 'cylinder_data.json', 'screw': 'hex_screw.json',
+                              'nut': 'hex_nut_data.json'},
+}
+# 提供全局选项（例如插入点）的主组件；其他装配体使用默认插入点
+ASSEMBLY_OPTIONS_COMPONENT = {'assembly_full': 'cuboid', 'assembly_cyl_head_nut': 'cylinder'}
+
+
+def load_config_data(selected_config, base_dir='.'):
+    """
+    按菜单配置读取生成函数的输入，返回 (data_to_pass, opts)。
+    零件读取自身的配置文件；装配体按 ASSEMBLY_COMPONENT_FILES 把各零件配置组合成 {组件名: 零件规格}。
+    """
+    default_opts = {"insertion_point": [0, 0]}
+    if selected_config['type'] == 'part':
+        with open(os.path.join(base_dir, selected_config['file']), 'r', encoding='utf-8') as f:
+            data_to_pass = json.load(f)
+        return data_to_pass, data_to_pass.get('drawing_options', default_opts)
+
+    data_to_pass = {}
+    for component, filename in ASSEMBLY_COMPONENT_FILES[selected_config['type']].items():
+        with open(os.path.join(base_dir, filename), 'r', encoding='utf-8') as f:
+            data_to_pass[component] = json.load(f)
+    main_component = ASSEMBLY_OPTIONS_COMPONENT.get(selected_config['type'])
+    opts = data_to_pass[main_component].get('drawing_options', default_opts) if main_component else default_opts
+    return data_to_pass, opts
+
+
+def config_spec(selected_config, data_to_pass, opts):
+    """把菜单配置和 load_config_data 读取的输入组合成 generate_script 使用的 (shape, spec)。"""
+    if selected_config['type'] == 'part':
+        return selected_config['shape'], dict(data_to_pass, drawing_options=opts)
+    return selected_config['shape'], {'components': data_to_pass, 'drawing_options': opts}
+
+
+def generate_config_script(selected_config, data_to_pass, opts):
+    """按菜单配置和 load_config_data 读取的输入生成完整脚本（与 generate_script 的输出相同）。"""
+    return generate_script(*config_spec(selected_config, data_to_pass, opts))
+
+
 # ==============================================================================
 # 主程序
 # ==============================================================================
@@ -363,22 +537,10 @@ if __name__ == "__main__":
     # 你需要将上面的新函数 generate_cylinder_screwhead_nut_assembly_code 粘贴到主程序之前
     # 同时确保其他函数定义也存在
 
-    # --- 配置字典，新增了选项 '9' ---
-    config = {
-        '1': {'file': 'cylinder_data.json', 'generator': generate_cylinder_code, 'type': 'part'},
-        '2': {'file': 'part_config.json', 'generator': generate_cuboid_code, 'type': 'part'},
-        '3': {'file': 'hex_prism_data.json', 'generator': generate_hex_prism_code, 'type': 'part'},
-        '4': {'file': 'hex_screw.json', 'generator': generate_hex_screw_code, 'type': 'part'},
-        '5': {'file': 'hex_nut_data.json', 'generator': generate_hex_nut_code, 'type': 'part'},
-        '6': {'file': 'screw_nut_assembly.json', 'generator': generate_screw_nut_assembly_code,
-              'type': 'assembly_screw_nut'},
-        '7': {'file': 'cuboid_cylinder_assembly.json', 'generator': generate_cuboid_cylinder_assembly_code,
-              'type': 'assembly_cuboid_cyl'},
-        '8': {'file': 'full_assembly.json', 'generator': generate_full_assembly_code, 'type': 'assembly_full'},
-        # 【【【 新增配置 】】】
-        '9': {'file': 'cyl_head_nut_assembly.json', 'generator': generate_cylinder_screw_nut_assembly_code,
-              'type': 'assembly_cyl_head_nut'}
-    }
+    parser = argparse.ArgumentParser(description="交互式生成 Blender 脚本")
+    parser.add_argument('--lod', choices=tuple(tessellation.LODS),
+                        help="圆柱面的细分级别（覆盖配置文件中的 \"lod\"；默认 32 段）")
+    args = parser.parse_args()
 
     # --- 默认数据，新增了新装配体的占位符 ---
     default_data_lib = {
@@ -416,7 +578,6 @@ if __name__ == "__main__":
     else:
         selected_config = config[user_choice]
         json_filename = selected_config['file']
-        generator_func = selected_config['generator']
         output_filename = f"create_{json_filename.replace('_data', '').replace('.json', '')}.py"
 
         for fname, default in default_data_lib.items():
@@ -427,70 +588,10 @@ if __name__ == "__main__":
                 with open(fname, 'w', encoding='utf-8') as f:
                     json.dump(data_with_opts, f, indent=4)
 
-        data_to_pass = {}
-        # --- 数据加载逻辑 ---
-        if selected_config['type'] == 'part':
-            with open(json_filename, 'r', encoding='utf-8') as f:
-                data_to_pass = json.load(f)
-        elif selected_config['type'] == 'assembly_screw_nut':
-            assembly_data = {}
-            with open('hex_screw.json', 'r', encoding='utf-8') as f:
-                assembly_data['screw'] = json.load(f)
-            with open('hex_nut_data.json', 'r', encoding='utf-8') as f:
-                assembly_data['nut'] = json.load(f)
-            data_to_pass = assembly_data
-        elif selected_config['type'] == 'assembly_cuboid_cyl':
-            assembly_data = {}
-            with open('part_config.json', 'r', encoding='utf-8') as f:
-                assembly_data['cuboid'] = json.load(f)
-            with open('cylinder_data.json', 'r', encoding='utf-8') as f:
-                assembly_data['cylinder'] = json.load(f)
-            data_to_pass = assembly_data
-        elif selected_config['type'] == 'assembly_full':
-            assembly_data = {}
-            with open('part_config.json', 'r', encoding='utf-8') as f:
-                assembly_data['cuboid'] = json.load(f)
-            with open('hex_screw.json', 'r', encoding='utf-8') as f:
-                assembly_data['screw'] = json.load(f)
-            with open('hex_nut_data.json', 'r', encoding='utf-8') as f:
-                assembly_data['nut'] = json.load(f)
-            data_to_pass = assembly_data
-        # 【【【 新增数据加载逻辑 】】】
-        elif selected_config['type'] == 'assembly_cyl_head_nut':
-            assembly_data = {}
-            with open('cylinder_data.json', 'r', encoding='utf-8') as f:
-                assembly_data['cylinder'] = json.load(f)
-            with open('hex_screw.json', 'r', encoding='utf-8') as f:
-                assembly_data['screw'] = json.load(f)
-            with open('hex_nut_data.json', 'r', encoding='utf-8') as f:
-                assembly_data['nut'] = json.load(f)
-            data_to_pass = assembly_data
-
-        # --- 提取全局选项 (例如插入点) ---
-        opts = {}
-        # 尝试从主零件的配置中获取插入点
-        try:
-            if 'part' in selected_config['type']:
-                opts = data_to_pass.get('drawing_options', {"insertion_point": [0, 0]})
-            elif 'assembly_full' in selected_config['type']:
-                opts = data_to_pass['cuboid'].get('drawing_options', {"insertion_point": [0, 0]})
-            elif 'assembly_cyl_head_nut' in selected_config['type']:
-                opts = data_to_pass['cylinder'].get('drawing_options', {"insertion_point": [0, 0]})
-            else:  # Fallback for other assemblies
-                opts = {"insertion_point": [0, 0]}
-        except (KeyError, AttributeError):
-            opts = {"insertion_point": [0, 0]}
-
-        header = get_blender_script_header()
-
-        if 'assembly' in selected_config['type']:
-            core_code = generator_func(data_to_pass, opts)
-        else:
-            params = data_to_pass['parameters']
-            core_code = generator_func(params, opts)
-
-        footer = ""
-        final_script = header + core_code + footer
+        data_to_pass, opts = load_config_data(selected_config)
+        if args.lod:
+            opts = dict(opts, lod=args.lod)
+        final_script = generate_config_script(selected_config, data_to_pass, opts)
 
         with open(output_filename, "w", encoding='utf-8') as f:
             f.write(final_script)
@@ -0,0 +1,278 @@
+# mesh_export.py
+"""
+不依赖 Blender 或 AutoCAD，直接把零件和装配体导出为三维网格文件：二进制 STL、OBJ 和 glTF 2.0 (.glb)。
+
+几何来自 scene_builder 的场景描述和 mesh_kernel 的网格（与 "mesh_emitter": "data" 的 Blender 脚本相同，
+孔是解析生成的带孔网格），支持圆柱、长方体、六棱柱、六角螺钉、六角螺母、内六角圆柱头螺钉
+以及各装配体。顶点和三角形数组由 NumPy 直接写入文件（文件对象直接读取数组的缓冲区，不复制），
+适合网页预览和 3D 打印。圆柱面的段数由 --lod 选择（默认 export，见 tessellation.py）。
+
+  STL  全部对象合并成一个网格，每个三角形带法线；单位 mm，Z 轴向上。
+  OBJ  每个对象一个 "o" 组，面保留为四边形/多边形；有材质时同时写出 .mtl；单位 mm，Z 轴向上。
+  GLB  每个对象一个节点（位置放在节点上）和一个网格，材质写入 baseColorFactor；按 glTF 约定，
+       根节点把模型换算成米并转为 Y 轴向上。
+
+用法:
+    python mesh_export.py SPEC.json [-o model.glb] [--format stl|obj|glb] [--shape SHAPE] [--lod export]
+    python mesh_export.py --menu 8 [-o full_assembly.stl]     # main_generator.py 的菜单选项
+"""
+import argparse
+import json
+import math
+import os
+import struct
+import sys
+import time
+
+import numpy as np
+
+import scene_builder
+import tessellation
+
+EXPORT_FORMATS = ('stl', 'obj', 'glb')
+# AutoCAD 三维生成器（lisp_generator.SOLID_SHAPE_MAP）的形状名 -> 场景名
+SHAPE_ALIASES = {
+    'cylinder_3d': 'cylinder',
+    'cuboid_3d': 'cuboid',
+    'hex_prism_3d': 'hexagonal_prism',
+    'hex_screw_3d': 'hexagonal_screw',
+    'hex_nut_3d': 'hexagonal_nut',
+    'socket_head_cap_screw_3d': 'socket_head_cap_screw',
+    'screw_nut_assembly_3d': 'screw_nut_assembly',
+    'cuboid_cylinder_assembly_3d': 'cuboid_cylinder_assembly',
+}
+
+STL_HEADER = b'CAD-Daedalus binary STL'.ljust(80, b' ')
+STL_RECORD = np.dtype([('normal', '<f4', (3,)), ('vertices', '<f4', (3, 3)), ('attribute', '<u2')])
+GLB_MAGIC, GLB_VERSION = b'glTF', 2
+GLB_ARRAY_BUFFER, GLB_ELEMENT_ARRAY_BUFFER = 34962, 34963
+GLB_FLOAT, GLB_UNSIGNED_INT, GLB_TRIANGLES = 5126, 5125, 4
+# 根节点：mm -> m，绕 X 轴旋转 -90°（Z 轴向上 -> Y 轴向上）
+GLB_ROOT = {'rotation': [-math.sqrt(0.5), 0.0, 0.0, math.sqrt(0.5)], 'scale': [0.001, 0.001, 0.001]}
+
+
+# ==============================================================================
+# 场景 -> 网格
+# ==============================================================================
+def scene_parts(scene):
+    """
+    场景中每个对象的 {name, key, mesh（局部坐标）, location, material}。
+    geometry_key 相同的对象（如 instances 的副本）共用同一个 MeshData，网格只计算一次。
+    孔无法解析生成时抛出 ValueError。
+    """
+    parts, meshes = [], {}
+    for obj in scene['objects']:
+        key = scene_builder.geometry_key(obj)
+        if key not in meshes:
+            mesh, holes = scene_builder.object_mesh(obj)
+            if holes:
+                raise ValueError(f"对象 '{obj['name']}' 的孔无法解析生成（不同轴、与轮廓相切或覆盖整个截面），"
+                                 f"只能在 Blender 中用布尔运算挖出。")
+            meshes[key] = mesh
+        parts.append({'name': obj['name'], 'key': key, 'mesh': meshes[key], 'location': np.asarray(obj['location']),
+                      'material': obj['material']})
+    return parts
+
+
+def _nested_parameters(component, params):
+    """AutoCAD 的 screw_nut_assembly.json 中螺钉/螺母用扁平参数（head_width、width 等），换成零件规格的嵌套参数。"""
+    if component == 'screw' and 'head_width' in params:
+        return {'head': {'side_length': params['head_width'] / 2.0, 'height': params['head_height']},
+                'shaft': {'diameter': params['shaft_diameter'], 'length': params['shaft_length']}}
+    if component == 'nut' and 'width' in params:
+        return {'side_length': params['width'] / 2.0, 'height': params['height'],
+                'hole': {'diameter': params['hole_diameter']}}
+    return params
+
+
+def normalize_spec(spec):
+    """装配体规格中组件参数统一为零件规格的格式（返回副本，不修改原规格）。"""
+    if not isinstance(spec.get('components'), dict):
+        return spec
+    components = {name: dict(comp, parameters=_nested_parameters(name, comp.get('parameters', {})))
+                  for name, comp in spec['components'].items()}
+    return dict(spec, components=components)
+
+
+def resolve_shape(spec, shape=None):
+    shape = shape or spec.get('shape')
+    if not shape:
+        raise KeyError("规格中没有 'shape'，请用 --shape 指定形状。")
+    return SHAPE_ALIASES.get(shape, shape)
+
+
+# ==============================================================================
+# 写出
+# ==============================================================================
+def write_stl(parts, path):
+    """二进制 STL：80 字节文件头、三角形数，然后每个三角形 50 字节（法线、三个顶点、属性）。"""
+    records = []
+    for part in parts:
+        mesh = part['mesh']
+        corners = (mesh.verts + part['location'])[mesh.triangles()]
+        normals = np.cross(corners[:, 1] - corners[:, 0], corners[:, 2] - corners[:, 0])
+        lengths = np.linalg.norm(normals, axis=1, keepdims=True)
+        record = np.zeros(len(corners), dtype=STL_RECORD)
+        record['normal'] = np.divide(normals, lengths, out=np.zeros_like(normals), where=lengths > 0)
+        record['vertices'] = corners
+        records.append(record)
+    with open(path, 'wb') as f:
+        f.write(STL_HEADER)
+        f.write(struct.pack('<I', sum(len(r) for r in records)))
+        for record in records:
+            f.write(record)
+
+
+def write_obj(parts, path):
+    """OBJ：每个对象一组顶点和面（面按顶点数分批写出）；有材质时写同名 .mtl。"""
+    materials = {part['material'][0]: part['material'][1] for part in parts if part['material']}
+    mtl_path = os.path.splitext(path)[0] + '.mtl'
+    with open(path, 'w', encoding='utf-8') as f:
+        f.write("# CAD-Daedalus mesh export (mm, Z up)\n")
+        if materials:
+            f.write(f"mtllib {os.path.basename(mtl_path)}\n")
+        offset = 1
+        for part in parts:
+            mesh = part['mesh']
+            f.write(f"o {part['name']}\n")
+            np.savetxt(f, mesh.verts + part['location'], fmt='v %.9g %.9g %.9g')
+            if part['material']:
+                f.write(f"usemtl {part['material'][0]}\n")
+            starts = np.cumsum(mesh.sizes) - mesh.sizes
+            for size in np.unique(mesh.sizes):
+                faces = mesh.loops[starts[mesh.sizes == size][:, None] + np.arange(size)] + offset
+                np.savetxt(f, faces, fmt='f' + ' %d' * size)
+            offset += mesh.vertex_count
+    if materials:
+        with open(mtl_path, 'w', encoding='utf-8') as f:
+            for name, color in materials.items():
+                f.write(f"newmtl {name}\nKd {color[0]:.6g} {color[1]:.6g} {color[2]:.6g}\nd {color[3]:.6g}\n")
+
+
+def write_glb(parts, path):
+    """
+    glTF 2.0 二进制容器：JSON 块描述节点/网格/访问器，BIN 块依次存放各网格的顶点和索引数组。
+    键相同的对象只写一份网格，各自的节点引用它（相当于关联复制）。
+    """
+    arrays, views, accessors, meshes, nodes, materials = [], [], [], [], [], []
+    mesh_index = {}
+    offset = 0
+    for part in parts:
+        if part['key'] in mesh_index:
+            nodes.append({'name': part['name'], 'mesh': mesh_index[part['key']],
+                          'translation': part['location'].tolist()})
+            continue
+        mesh_index[part['key']] = len(meshes)
+        mesh = part['mesh']
+        positions = mesh.verts.astype('<f4')
+        indices = mesh.triangles().astype('<u4').ravel()
+        for array, target in ((positions, GLB_ARRAY_BUFFER), (indices, GLB_ELEMENT_ARRAY_BUFFER)):
+            views.append({'buffer': 0, 'byteOffset': offset, 'byteLength': array.nbytes, 'target': target})
+            arrays.append(array)
+            offset += array.nbytes  # 两种数组都是 4 字节元素，偏移自然对齐
+        accessors.append({'bufferView': len(views) - 2, 'componentType': GLB_FLOAT, 'count': len(positions),
+                          'type': 'VEC3', 'min': positions.min(axis=0).tolist(), 'max': positions.max(axis=0).tolist()})
+        accessors.append({'bufferView': len(views) - 1, 'componentType': GLB_UNSIGNED_INT, 'count': len(indices),
+                          'type': 'SCALAR'})
+        primitive = {'attributes': {'POSITION': len(accessors) - 2}, 'indices': len(accessors) - 1,
+                     'mode': GLB_TRIANGLES}
+        if part['material']:
+            name, color = part['material']
+            primitive['material'] = len(materials)
+            materials.append({'name': name, 'pbrMetallicRoughness': {'baseColorFactor': list(color),
+                                                                     'metallicFactor': 0.0}})
+        meshes.append({'name': part['name'], 'primitives': [primitive]})
+        nodes.append({'name': part['name'], 'mesh': mesh_index[part['key']], 'translation': part['location'].tolist()})
+
+    root = dict(GLB_ROOT, name='CAD-Daedalus', children=list(range(1, len(nodes) + 1)))
+    document = {'asset': {'version': '2.0', 'generator': 'CAD-Daedalus mesh_export.py'},
+                'scene': 0, 'scenes': [{'nodes': [0]}], 'nodes': [root] + nodes, 'meshes': meshes,
+                'accessors': accessors, 'bufferViews': views, 'buffers': [{'byteLength': offset}]}
+    if materials:
+        document['materials'] = materials
+    json_chunk = json.dumps(document, separators=(',', ':')).encode('utf-8')
+    json_chunk += b' ' * (-len(json_chunk) % 4)
+    with open(path, 'wb') as f:
+        f.write(struct.pack('<4sII', GLB_MAGIC, GLB_VERSION, 12 + 8 + len(json_chunk) + 8 + offset))
+        f.write(struct.pack('<I4s', len(json_chunk), b'JSON'))
+        f.write(json_chunk)
+        f.write(struct.pack('<I4s', offset, b'BIN\0'))
+        for array in arrays:
+            f.write(array)
+
+
+WRITERS = {'stl': write_stl, 'obj': write_obj, 'glb': write_glb}
+
+
+def export_scene(scene, path, fmt=None):
+    """把场景描述写成 path（格式默认取扩展名），返回导出统计。"""
+    fmt = (fmt or os.path.splitext(path)[1].lstrip('.')).lower()
+    if fmt not in WRITERS:
+        raise ValueError(f"不支持的导出格式 '{fmt}'，可选: {', '.join(EXPORT_FORMATS)}。")
+    start = time.perf_counter()
+    parts = scene_parts(scene)
+    WRITERS[fmt](parts, path)
+    return {'path': path, 'format': fmt, 'objects': [part['name'] for part in parts],
+            'unique_meshes': len({part['key'] for part in parts}),
+            'vertices': sum(part['mesh'].vertex_count for part in parts),
+            'triangles': sum(int((part['mesh'].sizes - 2).sum()) for part in parts),
+            'bytes': os.path.getsize(path), 'seconds': round(time.perf_counter() - start, 4)}
+
+
+def export_spec(spec, path, shape=None, fmt=None, lod=None):
+    """
+    按零件/装配体规格（与 AutoCAD 和 Blender 生成器相同的 JSON）导出网格文件。
+    lod 覆盖规格 drawing_options 中的 "lod"（见 tessellation.py）。
+    """
+    spec = normalize_spec(spec)
+    if lod:
+        spec = dict(spec, drawing_options=dict(spec.get('drawing_options') or scene_builder.DEFAULT_OPTIONS, lod=lod))
+    return export_scene(scene_builder.build_scene(resolve_shape(spec, shape), spec), path, fmt)
+
+
+# ==============================================================================
+# 主程序
+# ==============================================================================
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="把零件/装配体规格导出为 STL、OBJ 或 GLB 网格文件")
+    parser.add_argument('spec', nargs='?', help="零件或装配体规格 JSON")
+    parser.add_argument('--menu', help="改用 main_generator.py 的菜单选项（1-9）及其配置文件")
+    parser.add_argument('-o', '--output', help="输出文件（默认: 规格文件名 + 格式扩展名）")
+    parser.add_argument('--format', choices=EXPORT_FORMATS, help="导出格式（默认取输出文件扩展名，否则为 glb）")
+    parser.add_argument('--shape', help="形状名（默认取规格中的 'shape'）")
+    parser.add_argument('--lod', choices=tuple(tessellation.LODS), default='export',
+                        help="圆柱面的细分级别（默认 export，即最高精度）")
+    args = parser.parse_args(argv)
+    if bool(args.spec) == bool(args.menu):
+        parser.error("请指定一个规格文件或 --menu 选项（二选一）。")
+
+    if args.menu:
+        import main_generator
+        if args.menu not in main_generator.config:
+            parser.error(f"没有菜单选项 '{args.menu}'。")
+        selected = main_generator.config[args.menu]
+        here = os.path.dirname(os.path.abspath(__file__))
+        shape, spec = main_generator.config_spec(selected, *main_generator.load_config_data(selected, here))
+        stem = selected['file'].replace('_data', '').replace('.json', '')
+    else:
+        with open(args.spec, 'r', encoding='utf-8') as f:
+            spec = json.load(f)
+        shape = args.shape
+        stem = os.path.splitext(os.path.basename(args.spec))[0]
+
+    fmt = args.format or (os.path.splitext(args.output)[1].lstrip('.').lower() if args.output else 'glb')
+    output = args.output or f"{stem}.{fmt}"
+    try:
+        report = export_spec(spec, output, shape, fmt, args.lod)
+    except (KeyError, ValueError) as e:
+        print(f"导出失败: {e}", file=sys.stderr)
+        return 1
+    print(f"已导出 {report['path']} ({report['format'].upper()}, {len(report['objects'])} 个对象 / "
+          f"{report['unique_meshes']} 个不同网格, "
+          f"{report['vertices']} 个顶点, {report['triangles']} 个三角形, {report['bytes']} 字节, "
+          f"{report['seconds'] * 1000:.1f} ms)")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
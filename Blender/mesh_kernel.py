@@ -0,0 +1,194 @@
+# mesh_kernel.py
+"""
+零件网格内核：用 NumPy 向量化地计算网格的顶点与面，供生成的 Blender 脚本直接写入网格数据，
+不需要在 Blender 里调用任何 bpy.ops 算子。
+
+网格用 MeshData 表示，和 Blender 的网格数据一一对应：
+  verts  顶点坐标，形状 (V, 3)
+  loops  所有面按顺序展开后的顶点索引（Mesh.loops 的 vertex_index）
+  sizes  每个面的顶点数（Mesh.polygons 的 loop_total）
+面的顶点按逆时针排列（从网格外侧看），法线朝外。
+"""
+import numpy as np
+
+
+class MeshData:
+    __slots__ = ('verts', 'loops', 'sizes')
+
+    def __init__(self, verts, loops, sizes):
+        self.verts = np.asarray(verts, dtype=np.float64).reshape(-1, 3)
+        self.loops = np.asarray(loops, dtype=np.int64)
+        self.sizes = np.asarray(sizes, dtype=np.int64)
+
+    @property
+    def vertex_count(self):
+        return len(self.verts)
+
+    @property
+    def face_count(self):
+        return len(self.sizes)
+
+    def translated(self, offset):
+        """平移后的副本（拓扑数组共用）。"""
+        return MeshData(self.verts + np.asarray(offset, dtype=np.float64), self.loops, self.sizes)
+
+    def bounds(self):
+        """(最小角点, 最大角点)。"""
+        return self.verts.min(axis=0), self.verts.max(axis=0)
+
+    def triangles(self):
+        """把各面按扇形剖分成三角形 (T, 3)，方向不变（本模块生成的面都是凸多边形）。"""
+        counts = self.sizes - 2
+        starts = np.repeat(np.cumsum(self.sizes) - self.sizes, counts)
+        corner = np.arange(counts.sum()) - np.repeat(np.cumsum(counts) - counts, counts) + 1
+        return np.column_stack([self.loops[starts], self.loops[starts + corner], self.loops[starts + corner + 1]])
+
+
+def merge(meshes):
+    """把多个网格合并成一个（相当于 bpy.ops.object.join，但只是拼接数组）。"""
+    meshes = list(meshes)
+    offsets = np.cumsum([0] + [m.vertex_count for m in meshes[:-1]])
+    return MeshData(np.concatenate([m.verts for m in meshes]),
+                    np.concatenate([m.loops + offset for m, offset in zip(meshes, offsets)]),
+                    np.concatenate([m.sizes for m in meshes]))
+
+
+# ==============================================================================
+# 基本体
+# ==============================================================================
+def extrude(ring, depth):
+    """
+    把 xy 平面上逆时针的多边形 ring (n, 2) 沿 z 轴拉伸成以原点为中心、高 depth 的封闭棱柱：
+    n 个四边形侧面加上下两个 n 边形端面。
+    """
+    ring = np.asarray(ring, dtype=np.float64)
+    n = len(ring)
+    z = np.full(n, depth / 2.0)
+    verts = np.concatenate([np.column_stack([ring, -z]), np.column_stack([ring, z])])
+    k = np.arange(n)
+    k1 = (k + 1) % n
+    sides = np.column_stack([k, k1, n + k1, n + k]).ravel()
+    loops = np.concatenate([sides, n + k, k[::-1]])
+    sizes = np.concatenate([np.full(n, 4), [n, n]])
+    return MeshData(verts, loops, sizes)
+
+
+def circle_ring(segments, radius):
+    """
+    圆周上的 segments 个点，排列与 bpy.ops.mesh.primitive_cylinder_add 相同：
+    第一个点在 +Y 方向，逆时针排列（六边形即尖角朝 Y 轴）。
+    """
+    phi = np.arange(segments) * (2.0 * np.pi / segments)
+    return np.column_stack([-radius * np.sin(phi), radius * np.cos(phi)])
+
+
+def prism(segments, radius, depth):
+    """正 segments 边形棱柱（圆柱或六棱柱），以原点为中心，轴线为 z 轴。"""
+    return extrude(circle_ring(segments, radius), depth)
+
+
+def box_ring(size_x, size_y):
+    """以原点为中心的矩形轮廓，逆时针。"""
+    hx, hy = size_x / 2.0, size_y / 2.0
+    return np.array([(-hx, -hy), (hx, -hy), (hx, hy), (-hx, hy)])
+
+
+def box(size_x, size_y, size_z):
+    """以原点为中心的长方体。"""
+    return extrude(box_ring(size_x, size_y), size_z)
+
+
+# ==============================================================================
+# 带孔零件（代替布尔差集）
+# ==============================================================================
+def _angles(points):
+    return np.arctan2(points[:, 1], points[:, 0]) % (2.0 * np.pi)
+
+
+def _ray_hits(ring, directions):
+    """从原点沿 directions (m, 2) 发出的射线与凸多边形 ring 边界的交点 (m, 2)。"""
+    edges = np.roll(ring, -1, axis=0) - ring
+    normals = np.column_stack([edges[:, 1], -edges[:, 0]])  # 逆时针多边形的外法线
+    offsets = np.einsum('ij,ij->i', normals, ring)
+    dots = directions @ normals.T
+    with np.errstate(divide='ignore'):
+        t = np.where(dots > 0, offsets / np.where(dots > 0, dots, 1.0), np.inf)
+    return directions * t.min(axis=1)[:, None]
+
+
+def _crossings(ring, other):
+    """两个多边形边界的交点 (c, 2)。"""
+    p, e = ring, np.roll(ring, -1, axis=0) - ring
+    q, f = other, np.roll(other, -1, axis=0) - other
+    d = q[None, :, :] - p[:, None, :]
+    denom = e[:, None, 0] * f[None, :, 1] - e[:, None, 1] * f[None, :, 0]
+    with np.errstate(divide='ignore', invalid='ignore'):
+        s = (d[..., 0] * f[None, :, 1] - d[..., 1] * f[None, :, 0]) / denom
+        u = (d[..., 0] * e[:, None, 1] - d[..., 1] * e[:, None, 0]) / denom
+    i, j = np.nonzero((denom != 0) & (s >= 0) & (s < 1) & (u >= 0) & (u < 1))
+    return p[i] + s[i, j, None] * e[i]
+
+
+def bored(ring, hole_radius, depth, hole_segments=32):
+    """
+    截面为凸多边形 ring (n, 2)（逆时针，包含原点）减去以原点为圆心的圆孔、高 depth 的棱柱，以原点为中心。
+
+    从原点向外轮廓角点、孔的顶点和两条边界的交点各引一条射线，截面就被分成若干扇区，
+    每个扇区内外两边都是直线段：端面是四边形（孔贯穿外轮廓处退化为三角形），内外侧面都是四边形，
+    网格封闭、没有 T 形接缝。孔比外轮廓的内切圆小时就是普通的带孔零件；孔穿出侧面时截面
+    分成几块，同样适用。孔的顶点排列与 circle_ring 相同。孔覆盖整个截面或与边界相切时抛出 ValueError。
+    """
+    ring = np.asarray(ring, dtype=np.float64)
+    hole = circle_ring(hole_segments, hole_radius)
+    angles = np.sort(np.concatenate([_angles(ring), _angles(hole), _angles(_crossings(ring, hole))]))
+    angles = angles[np.diff(angles, append=angles[0] + 2.0 * np.pi) > 1e-9]
+    directions = np.column_stack([np.cos(angles), np.sin(angles)])
+    outer, inner = _ray_hits(ring, directions), _ray_hits(hole, directions)
+
+    # 每个射线方向上外轮廓与孔的距离差；扇区两端都不在孔内、且不是两端都贴合时才有实体
+    count = len(angles)
+    gap = np.hypot(*outer.T) - np.hypot(*inner.T)
+    eps = 1e-9 * np.abs(outer).max()
+    touch = np.abs(gap) <= eps
+    k = np.arange(count)
+    k1 = (k + 1) % count
+    active = (gap > -eps) & (gap[k1] > -eps) & ~(touch & touch[k1])
+    if not active.any():
+        raise ValueError(f"半径 {hole_radius} 的孔覆盖了整个截面。")
+    if np.any(touch & active & active[k - 1]):
+        raise ValueError(f"半径 {hole_radius} 的孔与外轮廓相切。")
+
+    # 顶点：外轮廓底/顶，孔底/顶；孔与外轮廓的交点只保留外轮廓上的那个
+    z = np.full(count, depth / 2.0)
+    verts = np.concatenate([np.column_stack([outer, -z]), np.column_stack([outer, z]),
+                            np.column_stack([inner, -z]), np.column_stack([inner, z])])
+    hole_bottom = np.where(touch, k, 2 * count + k)
+    hole_top = np.where(touch, count + k, 3 * count + k)
+    a = np.flatnonzero(active)
+    b = k1[a]
+    outer_sides = np.column_stack([a, b, count + b, count + a])
+    hole_sides = np.column_stack([hole_bottom[b], hole_bottom[a], hole_top[a], hole_top[b]])  # 法线朝向孔轴
+    top = np.column_stack([count + a, count + b, hole_top[b], hole_top[a]])
+    keep = np.column_stack([np.ones((len(a), 2), dtype=bool), ~touch[b], ~touch[a]])
+    bottom = np.column_stack([hole_bottom[a], hole_bottom[b], b, a])
+    faces = [outer_sides.ravel(), hole_sides.ravel(), top[keep], bottom[keep[:, ::-1]]]
+    sizes = np.concatenate([np.full(2 * len(a), 4), keep.sum(axis=1), keep.sum(axis=1)])
+
+    # 去掉孔内没有用到的顶点
+    used, loops = np.unique(np.concatenate(faces), return_inverse=True)
+    return MeshData(verts[used], loops, sizes)
+
+
+def bored_prism(segments, radius, hole_radius, depth, hole_segments=32):
+    """带同轴圆孔的正 segments 边形棱柱（如六角螺母）。"""
+    return bored(circle_ring(segments, radius), hole_radius, depth, hole_segments)
+
+
+def bored_box(size_x, size_y, size_z, hole_radius, hole_segments=32):
+    """中心有沿 z 轴贯通圆孔的长方体。"""
+    return bored(box_ring(size_x, size_y), hole_radius, size_z, hole_segments)
+
+
+def tube(segments, radius, hole_radius, depth):
+    """圆管：内外圆段数相同，端面和侧面都是 segments 个四边形。"""
+    return bored(circle_ring(segments, radius), hole_radius, depth, segments)
@@ -0,0 +1,476 @@
+# scene_builder.py
+"""
+零件与装配体的场景描述，以及基于数据 API 的 Blender 脚本生成（"mesh_emitter": "data"）。
+
+main_generator.py 的默认生成方式（"ops"）逐个调用 bpy.ops.mesh.primitive_*_add、
+bpy.ops.object.join 和 bpy.ops.object.modifier_apply。这些算子依赖界面上下文，每次调用都会
+触发依赖图更新和撤销记录，零件一多就很慢，在后台模式（blender -b）下也无法运行。
+
+这里先把每个形状描述成与算子无关的场景：若干对象，每个对象由基本体（棱柱、长方体）拼成，
+可带要挖去的孔、材质和位置，摆放结果与 "ops" 脚本相同。数据模式的脚本再用 mesh_kernel
+预先算好的顶点与面数组，通过 Mesh.vertices/loops/polygons.foreach_set 直接写入网格，
+用 scene.collection.objects.link 链接对象，全程不调用 bpy.ops。螺母、带孔长方体和中心圆柱的孔
+由 mesh_kernel.bored 直接生成带孔网格，不做布尔运算。
+"""
+import hashlib
+import json
+import math
+import textwrap
+from collections import Counter
+
+import mesh_kernel
+import tessellation
+
+CYLINDER_SEGMENTS = tessellation.DEFAULT_SEGMENTS  # 与 primitive_cylinder_add 的默认段数一致；指定 LOD 时按弦高误差重新计算
+HEX_SEGMENTS = 6
+DEFAULT_OPTIONS = {"insertion_point": [0, 0]}
+
+
+# ==============================================================================
+# 场景描述
+# ==============================================================================
+# 对象是一个字典：
+#   name      对象名
+#   location  对象原点的世界坐标
+#   solids    组成对象的基本体（局部坐标），合并为一个网格
+#   holes     从对象中挖去的圆柱孔（局部坐标）
+#   material  None 或 (材质名, RGBA)
+# 基本体: {'kind': 'prism', 'segments', 'radius', 'depth', 'offset', 'round'}（round 为真的是圆柱，段数由 LOD 决定）、{'kind': 'box', 'size', 'offset'}，
+# 或 {'kind': 'bored', 'solid', 'hole', 'offset'}（基本体挖去与之等高的同轴孔，如内六角沉孔）
+def _prism(radius, depth, z=0.0, segments=None):
+    return {'kind': 'prism', 'segments': segments or CYLINDER_SEGMENTS, 'radius': radius, 'depth': depth,
+            'offset': (0.0, 0.0, z), 'round': segments is None}
+
+
+def _hex(radius, depth, z=0.0):
+    return _prism(radius, depth, z, HEX_SEGMENTS)
+
+
+def _box(size_x, size_y, size_z):
+    return {'kind': 'box', 'size': (size_x, size_y, size_z), 'offset': (0.0, 0.0, 0.0)}
+
+
+def _bored(solid, hole):
+    return {'kind': 'bored', 'solid': solid, 'hole': hole, 'offset': (0.0, 0.0, 0.0)}
+
+
+def _object(name, location, solids, holes=(), material=None):
+    return {'name': name, 'location': tuple(float(v) for v in location), 'solids': list(solids),
+            'holes': list(holes), 'material': material}
+
+
+def _scene(objects, active=None):
+    """场景：对象列表，以及脚本结束时选中全部对象、激活 active（默认第一个对象）。"""
+    return {'objects': objects, 'active': active or objects[0]['name']}
+
+
+def _insertion_point(opts):
+    ix, iy = opts.get('insertion_point', [0, 0])
+    return ix, iy
+
+
+def _screw_solids(screw_p, origin_z):
+    """螺钉 = 六角头 + 圆柱杆；杆底在 z=0，返回相对于原点高度 origin_z 的基本体。"""
+    head_r, head_h = screw_p['head']['side_length'], screw_p['head']['height']
+    shaft_r, shaft_l = screw_p['shaft']['diameter'] / 2.0, screw_p['shaft']['length']
+    return [_hex(head_r, head_h, shaft_l + head_h / 2.0 - origin_z), _prism(shaft_r, shaft_l, shaft_l / 2.0 - origin_z)]
+
+
+def _nut(name, nut_p, hole_r, location):
+    nut_r, nut_h = nut_p['side_length'], nut_p['height']
+    return _object(name, location, [_hex(nut_r, nut_h)], [_prism(hole_r, nut_h * 1.2)])
+
+
+def cylinder_scene(params, opts):
+    ix, iy = _insertion_point(opts)
+    radius, height = params['radius'], params['height']
+    return _scene([_object("Cylinder", (ix, iy, height / 2.0), [_prism(radius, height)])])
+
+
+def cuboid_scene(params, opts):
+    ix, iy = _insertion_point(opts)
+    length, width, height = params['length'], params['width'], params['height']
+    return _scene([_object("Cuboid", (ix + length / 2.0, iy + width / 2.0, height / 2.0), [_box(length, width, height)])])
+
+
+def hex_prism_scene(params, opts):
+    ix, iy = _insertion_point(opts)
+    side_length, height = params['side_length'], params['height']
+    return _scene([_object("Hex_Prism", (ix, iy, height / 2.0), [_hex(side_length, height)])])
+
+
+def hex_screw_scene(params, opts):
+    # 与 "ops" 脚本一致：合并后的原点在六角头中心
+    ix, iy = _insertion_point(opts)
+    head_z = params['shaft']['length'] + params['head']['height'] / 2.0
+    return _scene([_object("Hex_Screw", (ix, iy, head_z), _screw_solids(params, head_z))])
+
+
+def hex_nut_scene(params, opts):
+    ix, iy = _insertion_point(opts)
+    return _scene([_nut("Hex_Nut", params, params['hole']['diameter'] / 2.0, (ix, iy, params['height'] / 2.0))])
+
+
+def socket_head_cap_screw_scene(params, opts):
+    # 与 generate_3d_lisp_for_socket_head_cap_screw 一致：杆底在 z=0，圆柱头顶面有内六角沉孔（不含装饰螺纹）
+    ix, iy = _insertion_point(opts)
+    head_r, head_h = params['head_diameter'] / 2.0, params['head_height']
+    shaft_r, shaft_l = params['shaft_diameter'] / 2.0, params['shaft_length']
+    socket_depth = min(params['socket_depth'], head_h)
+    socket_r = params['socket_width_across_flats'] / 2.0 / math.cos(math.pi / 6)  # 对边宽 -> 外接圆半径
+    top = shaft_l + head_h
+    socket_z = top - socket_depth / 2.0
+    solids = [_prism(shaft_r, shaft_l, shaft_l / 2.0),
+              _bored(_prism(head_r, socket_depth, socket_z), _hex(socket_r, socket_depth, socket_z))]
+    if socket_depth < head_h:
+        solids.append(_prism(head_r, head_h - socket_depth, shaft_l + (head_h - socket_depth) / 2.0))
+    return _scene([_object("Socket_Head_Cap_Screw", (ix, iy, 0.0), solids)])
+
+
+def screw_nut_assembly_scene(params_dict, opts):
+    screw_p, nut_p = params_dict['screw']['parameters'], params_dict['nut']['parameters']
+    ix, iy = _insertion_point(opts)
+    shaft_l = screw_p['shaft']['length']
+    head_z = shaft_l + screw_p['head']['height'] / 2.0
+    screw = _object("Screw", (ix, iy, head_z), _screw_solids(screw_p, head_z))
+    nut = _nut("Nut", nut_p, nut_p['hole']['diameter'] / 2.0, (ix, iy, shaft_l - nut_p['height'] - 5.0))
+    return _scene([screw, nut], active="Nut")
+
+
+def cuboid_cylinder_assembly_scene(params_dict, opts):
+    cuboid_p, cylinder_p = params_dict['cuboid']['parameters'], params_dict['cylinder']['parameters']
+    ix, iy = _insertion_point(opts)
+    cuboid_l, cuboid_w, cuboid_h = cuboid_p['length'], cuboid_p['width'], cuboid_p['height']
+    cyl_r, cyl_h = cylinder_p['radius'], cylinder_p['height']
+    center_x, center_y = ix + cuboid_l / 2.0, iy + cuboid_w / 2.0
+    cuboid = _object("Cuboid", (center_x, center_y, cuboid_h / 2.0), [_box(cuboid_l, cuboid_w, cuboid_h)],
+                     [_prism(cyl_r, cuboid_h * 1.2)])
+    cylinder = _object("Cylinder", (center_x, center_y, cyl_h / 2.0), [_prism(cyl_r, cyl_h)],
+                       material=("Blue", (0.1, 0.2, 0.8, 1.0)))
+    return _scene([cuboid, cylinder], active="Cuboid")
+
+
+def full_assembly_scene(params_dict, opts):
+    cuboid_p = params_dict['cuboid']['parameters']
+    screw_p = params_dict['screw']['parameters']
+    nut_p = params_dict['nut']['parameters']
+    ix, iy = _insertion_point(opts)
+    cuboid_l, cuboid_w, cuboid_h = cuboid_p['length'], cuboid_p['width'], cuboid_p['height']
+    screw_shaft_r, screw_shaft_l = screw_p['shaft']['diameter'] / 2.0, screw_p['shaft']['length']
+    nut_h = nut_p['height']
+    if screw_shaft_l < (cuboid_h + nut_h):
+        print(f"警告: 螺杆长度 ({screw_shaft_l}) 可能不足以穿过长方体 ({cuboid_h}) 并固定螺母 ({nut_h})。")
+    # 参照系: Z=0 是螺母的底部；螺钉原点在螺杆底部
+    screw = _object("Screw_Assembly", (ix, iy, 0.0), _screw_solids(screw_p, 0.0))
+    nut = _nut("Nut_Assembly", nut_p, nut_p['hole']['diameter'] / 2.0, (ix, iy, nut_h / 2.0))
+    cuboid = _object("Cuboid_Block", (ix, iy, nut_h + cuboid_h / 2.0), [_box(cuboid_l, cuboid_w, cuboid_h)],
+                     [_prism(screw_shaft_r, cuboid_h * 1.5)])
+    return _scene([screw, nut, cuboid], active="Screw_Assembly")
+
+
+def cylinder_screw_nut_assembly_scene(params_dict, opts):
+    cylinder_p = params_dict['cylinder']['parameters']
+    screw_p = params_dict['screw']['parameters']
+    nut_p = params_dict['nut']['parameters']
+    ix, iy = _insertion_point(opts)
+    cyl_r, cyl_h = cylinder_p['radius'], cylinder_p['height']
+    screw_head_h = screw_p['head']['height']
+    screw_shaft_r, screw_shaft_l = screw_p['shaft']['diameter'] / 2.0, screw_p['shaft']['length']
+    nut_h = nut_p['height']
+    if screw_shaft_l < cyl_h + nut_h:
+        print(f"警告: 螺杆长度 ({screw_shaft_l}) 可能不足以穿过圆柱 ({cyl_h}) 并固定螺母 ({nut_h})。")
+    # 参考系：圆柱体的底部平面为 Z=0；螺钉原点在六角头中心，螺钉头的底部紧贴圆柱顶部
+    main_cyl = _object("Central_Cylinder", (ix, iy, cyl_h / 2.0), [_prism(cyl_r, cyl_h)],
+                       [_prism(screw_shaft_r, cyl_h * 1.2)])
+    screw = _object("Full_Screw", (ix, iy, cyl_h + screw_head_h / 2.0),
+                    _screw_solids(screw_p, screw_shaft_l + screw_head_h / 2.0))
+    nut = _nut("Bottom_Nut", nut_p, screw_shaft_r, (ix, iy, -nut_h / 2.0))
+    return _scene([main_cyl, screw, nut], active="Central_Cylinder")
+
+
+PART_SCENES = {
+    'cylinder': cylinder_scene,
+    'cuboid': cuboid_scene,
+    'hexagonal_prism': hex_prism_scene,
+    'hexagonal_screw': hex_screw_scene,
+    'hexagonal_nut': hex_nut_scene,
+    'socket_head_cap_screw': socket_head_cap_screw_scene,
+}
+ASSEMBLY_SCENES = {
+    'screw_nut_assembly': screw_nut_assembly_scene,
+    'cuboid_cylinder_assembly': cuboid_cylinder_assembly_scene,
+    'full_assembly': full_assembly_scene,
+    'cyl_head_nut_assembly': cylinder_screw_nut_assembly_scene,
+}
+
+
+def _solid_extent(solid):
+    """基本体的 (xy 方向最大宽度, 最低 z, 最高 z)。"""
+    if solid['kind'] == 'bored':
+        return _solid_extent(solid['solid'])
+    if solid['kind'] == 'prism':
+        width, depth = 2.0 * solid['radius'], solid['depth']
+    else:
+        width, depth = max(solid['size'][:2]), solid['size'][2]
+    z = solid['offset'][2]
+    return width, z - depth / 2.0, z + depth / 2.0
+
+
+def object_size(obj):
+    """零件尺寸：对象（不计孔）包围盒的最大边长，即弦高误差的参照尺寸。"""
+    extents = [_solid_extent(solid) for solid in obj['solids']]
+    return max(max(e[0] for e in extents), max(e[2] for e in extents) - min(e[1] for e in extents))
+
+
+def _tessellated(solid, size, settings):
+    if solid['kind'] == 'bored':
+        return dict(solid, solid=_tessellated(solid['solid'], size, settings),
+                    hole=_tessellated(solid['hole'], size, settings))
+    if solid['kind'] == 'prism' and solid['round']:
+        return dict(solid, segments=tessellation.segments(solid['radius'], size, settings))
+    return solid
+
+
+def tessellate(scene, settings):
+    """按细分策略（tessellation.policy）重新确定每个圆柱和圆孔的段数，参照尺寸是它所在的对象。"""
+    objects = []
+    for obj in scene['objects']:
+        size = object_size(obj)
+        objects.append(dict(obj, solids=[_tessellated(s, size, settings) for s in obj['solids']],
+                            holes=[_tessellated(h, size, settings) for h in obj['holes']]))
+    return dict(scene, objects=objects)
+
+
+def with_instances(scene, instances):
+    """
+    加上 drawing_options 中 "instances" 列出的副本：每一项 {"object": 对象名, "offset": [dx, dy, dz]}
+    复制该对象并平移，按 Blender 的习惯命名为 原名.001、原名.002 ...（与 "ops" 脚本中的关联复制相同）。
+    """
+    if not instances:
+        return scene
+    by_name = {obj['name']: obj for obj in scene['objects']}
+    counts = Counter()
+    copies = []
+    for inst in instances:
+        source = by_name.get(inst.get('object'))
+        if source is None:
+            raise KeyError(f"instances 引用了不存在的对象 '{inst.get('object')}'，可选: {', '.join(by_name)}。")
+        counts[source['name']] += 1
+        location = [a + float(b) for a, b in zip(source['location'], inst.get('offset', (0, 0, 0)))]
+        copies.append(_object(f"{source['name']}.{counts[source['name']]:03d}", location, source['solids'],
+                              source['holes'], source['material']))
+    return dict(scene, objects=scene['objects'] + copies)
+
+
+def build_scene(shape, spec):
+    """按与 main_generator.generate_script 相同的规格格式构建场景描述。"""
+    opts = spec.get('drawing_options') or DEFAULT_OPTIONS
+    if shape in PART_SCENES:
+        scene = PART_SCENES[shape](spec['parameters'], opts)
+    elif shape in ASSEMBLY_SCENES:
+        scene = ASSEMBLY_SCENES[shape](spec['components'], opts)
+    else:
+        raise KeyError(f"没有名为 '{shape}' 的场景描述。")
+    settings = tessellation.policy(opts)
+    if settings is not None:
+        scene = tessellate(scene, settings)
+    return with_instances(scene, opts.get('instances'))
+
+
+def geometry_key(obj):
+    """对象网格的键（基本体、孔和材质的哈希）：键相同的对象共用一个网格数据块。"""
+    payload = json.dumps([obj['solids'], obj['holes'], obj['material']], sort_keys=True)
+    return hashlib.sha1(payload.encode('utf-8')).hexdigest()[:16]
+
+
+# ==============================================================================
+# 网格
+# ==============================================================================
+def solid_mesh(solid):
+    """基本体在对象局部坐标中的网格。"""
+    if solid['kind'] == 'prism':
+        mesh = mesh_kernel.prism(solid['segments'], solid['radius'], solid['depth'])
+    elif solid['kind'] == 'box':
+        mesh = mesh_kernel.box(*solid['size'])
+    elif solid['kind'] == 'bored':
+        mesh = bored_mesh(solid['solid'], solid['hole'])
+        if mesh is None:
+            raise ValueError("无法生成带孔基本体：孔必须同轴、在轮廓内部并与基本体等高。")
+    else:
+        raise ValueError(f"未知的基本体类型 '{solid['kind']}'。")
+    return mesh.translated(solid['offset'])
+
+
+def _outline(solid):
+    """基本体的截面轮廓与高度。"""
+    if solid['kind'] == 'prism':
+        return mesh_kernel.circle_ring(solid['segments'], solid['radius']), solid['depth']
+    return mesh_kernel.box_ring(*solid['size'][:2]), solid['size'][2]
+
+
+def bored_mesh(solid, hole):
+    """
+    基本体挖去圆柱孔后的解析网格（mesh_kernel.bored），不需要布尔运算。
+    孔必须与基本体同轴、在轮廓内部并贯穿整个高度，否则返回 None。
+    """
+    ring, depth = _outline(solid)
+    (sx, sy, sz), (hx, hy, hz) = solid['offset'], hole['offset']
+    if hole['kind'] != 'prism' or (sx, sy) != (hx, hy):
+        return None
+    if hz - hole['depth'] / 2.0 > sz - depth / 2.0 or hz + hole['depth'] / 2.0 < sz + depth / 2.0:
+        return None
+    try:
+        mesh = mesh_kernel.bored(ring, hole['radius'], depth, hole['segments'])
+    except ValueError:
+        return None
+    return mesh.translated(solid['offset'])
+
+
+def object_mesh(obj):
+    """
+    对象的网格，以及仍需用布尔差集挖去的孔。
+    单个基本体带一个同轴贯通孔（螺母、带孔长方体、中心圆柱）时直接生成带孔网格；
+    其余情况各基本体合并为一个网格，孔原样返回。
+    """
+    if len(obj['solids']) == 1 and len(obj['holes']) == 1:
+        mesh = bored_mesh(obj['solids'][0], obj['holes'][0])
+        if mesh is not None:
+            return mesh, []
+    meshes = [solid_mesh(solid) for solid in obj['solids']]
+    return (meshes[0] if len(meshes) == 1 else mesh_kernel.merge(meshes)), list(obj['holes'])
+
+
+# ==============================================================================
+# 数据模式脚本
+# ==============================================================================
+DATA_SCRIPT_HEADER = textwrap.dedent("""
+import bpy
+from itertools import accumulate
+
+
+def clear_scene():
+    # 不使用 bpy.ops：直接从数据块中删除对象，后台模式 (blender -b) 下同样可用
+    for obj in list(bpy.context.scene.objects):
+        bpy.data.objects.remove(obj, do_unlink=True)
+    for block in bpy.data.meshes:
+        if block.users == 0: bpy.data.meshes.remove(block)
+    for block in bpy.data.materials:
+        if block.users == 0: bpy.data.materials.remove(block)
+
+
+def dm_mesh_data(name, co, loops, sizes):
+    # 用预先算好的扁平数组一次性写入顶点、面角和面
+    mesh = bpy.data.meshes.new(name)
+    mesh.vertices.add(len(co) // 3)
+    mesh.vertices.foreach_set("co", co)
+    mesh.loops.add(len(loops))
+    mesh.loops.foreach_set("vertex_index", loops)
+    mesh.polygons.add(len(sizes))
+    mesh.polygons.foreach_set("loop_start", [0, *accumulate(sizes)][:-1])
+    if bpy.app.version < (4, 0, 0):
+        mesh.polygons.foreach_set("loop_total", sizes)
+    mesh.update(calc_edges=True)
+    return mesh
+
+
+def dm_object(name, mesh, location):
+    # 网格数据块可被多个对象共用（关联复制），每个对象只有自己的位置
+    obj = bpy.data.objects.new(name, mesh)
+    obj.location = location
+    bpy.context.scene.collection.objects.link(obj)
+    return obj
+
+
+def dm_mesh(name, co, loops, sizes, location):
+    return dm_object(name, dm_mesh_data(name, co, loops, sizes), location)
+
+
+def dm_difference(obj, tool):
+    # 布尔差集（只用于无法解析生成的孔）：经依赖图求值后把结果写回网格，代替 bpy.ops.object.modifier_apply
+    mod = obj.modifiers.new(name='Hole', type='BOOLEAN')
+    mod.operation = 'DIFFERENCE'
+    mod.object = tool
+    depsgraph = bpy.context.evaluated_depsgraph_get()
+    result = bpy.data.meshes.new_from_object(obj.evaluated_get(depsgraph))
+    obj.modifiers.remove(mod)
+    old_mesh, tool_mesh = obj.data, tool.data
+    obj.data = result
+    bpy.data.objects.remove(tool, do_unlink=True)
+    bpy.data.meshes.remove(old_mesh)
+    bpy.data.meshes.remove(tool_mesh)
+
+
+def dm_material(mesh, name, color):
+    mat = bpy.data.materials.new(name=name)
+    mat.diffuse_color = color
+    mesh.materials.append(mat)
+
+
+def dm_select(objects, active):
+    for obj in bpy.context.view_layer.objects:
+        obj.select_set(False)
+    for obj in objects:
+        obj.select_set(True)
+    bpy.context.view_layer.objects.active = active
+
+
+# --- 主执行逻辑开始 ---
+clear_scene()
+""")
+
+
+def _floats(values):
+    return '[' + ','.join(f"{v:.7g}" for v in values) + ']'
+
+
+def _ints(values):
+    return '[' + ','.join(map(str, values)) + ']'
+
+
+def _location(location):
+    return f"({location[0]!r}, {location[1]!r}, {location[2]!r})"
+
+
+def _mesh_args(name, mesh):
+    return f"{name!r}, co={_floats(mesh.verts.ravel())}, loops={_ints(mesh.loops)}, sizes={_ints(mesh.sizes)}"
+
+
+def emit_data_script(scene):
+    """
+    把场景描述生成为只使用数据 API 的 Blender 脚本。
+    geometry_key 相同的对象共用一个网格数据块（后出现的对象是关联复制，网格只计算和写入一次）；
+    需要布尔运算的对象各自建网格，因为差集会替换对象的网格。
+    """
+    lines = [DATA_SCRIPT_HEADER]
+    names = []
+    shared = {}
+    for index, obj in enumerate(scene['objects']):
+        var = f"obj_{index}"
+        names.append((obj['name'], var))
+        lines.append(f"# --- {obj['name']} ---")
+        key = geometry_key(obj)
+        if key in shared:
+            lines.append(f"{var} = dm_object({obj['name']!r}, {shared[key]}, location={_location(obj['location'])})")
+            continue
+        mesh, holes = object_mesh(obj)
+        if holes:
+            lines.append(f"{var} = dm_mesh({_mesh_args(obj['name'], mesh)}, location={_location(obj['location'])})")
+            for hole in holes:
+                tool = _mesh_args(obj['name'] + '_Hole', solid_mesh(hole))
+                lines.append(f"dm_difference({var}, dm_mesh({tool}, location={_location(obj['location'])}))")
+        else:
+            shared[key] = f"mesh_{len(shared)}"
+            lines.append(f"{shared[key]} = dm_mesh_data({_mesh_args(obj['name'], mesh)})")
+            lines.append(f"{var} = dm_object({obj['name']!r}, {shared[key]}, location={_location(obj['location'])})")
+        if obj['material']:
+            name, color = obj['material']
+            lines.append(f"dm_material({var}.data, {name!r}, {tuple(color)!r})")
+    active = dict(names)[scene['active']]
+    lines.append(f"\ndm_select([{', '.join(var for _, var in names)}], {active})")
+    lines.append("print(\"\\n脚本执行完成。请在3D视图中按 '.' (小键盘) 来聚焦。\")\n")
+    return '\n'.join(lines)
+
+
+def generate_data_script(shape, spec):
+    """数据模式下的完整 Blender 脚本。"""
+    return emit_data_script(build_scene(shape, spec))
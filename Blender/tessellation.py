@@ -0,0 +1,48 @@
+# tessellation.py
+"""
+圆柱面的细分策略（LOD）：按弦高误差决定圆周段数，而不是一律使用 primitive_cylinder_add 默认的 32 段。
+
+半径为 r 的圆用 n 段折线近似时，弦高（折线与圆弧的最大距离）为 r * (1 - cos(pi / n))，
+要求弦高不超过 tol 即得
+    n = ceil(pi / acos(1 - tol / r))
+tol 取零件尺寸（其包围盒的最大边长）乘以 LOD 的相对误差：同一零件上的小孔段数少，
+大圆柱段数多；整体放大或缩小时段数不变。段数向上取 4 的倍数（保证四个象限对称，
+包围盒与圆柱一致），再限制在 LOD 的上下限之间。六棱柱等本身就是多边形的基本体不受影响。
+
+LOD 在规格的 drawing_options 中用 "lod" 选择，也可以在每次运行时用命令行的 --lod 指定
+（main_generator.py、mesh_export.py）；"tessellation" 可覆盖所选 LOD 的参数。
+未指定 LOD 时保持 32 段，生成的脚本与以前完全相同。
+"""
+import math
+
+DEFAULT_SEGMENTS = 32
+# 相对弦高误差（相对于零件尺寸）与段数上下限
+LODS = {
+    'preview': {'tolerance': 0.01, 'min_segments': 8, 'max_segments': 32},
+    'render': {'tolerance': 0.001, 'min_segments': 16, 'max_segments': 128},
+    'export': {'tolerance': 0.0002, 'min_segments': 32, 'max_segments': 512},
+}
+
+
+def policy(opts):
+    """drawing_options 选择的细分参数；没有指定 "lod" 时返回 None（使用默认的 32 段）。"""
+    lod = opts.get('lod')
+    if lod is None:
+        return None
+    if lod not in LODS:
+        raise ValueError(f"未知的 lod '{lod}'，可选: {', '.join(LODS)}。")
+    return dict(LODS[lod], **(opts.get('tessellation') or {}))
+
+
+def segments(radius, part_size, settings):
+    """半径 radius 的圆在尺寸为 part_size 的零件上的段数。"""
+    if settings is None:
+        return DEFAULT_SEGMENTS
+    low, high = settings['min_segments'], settings['max_segments']
+    tol = settings['tolerance'] * part_size
+    if radius <= 0 or tol >= radius:
+        count = low
+    else:
+        count = math.ceil(math.pi / math.acos(1.0 - tol / radius))
+    count = -(-count // 4) * 4
+    return max(low, min(high, count))